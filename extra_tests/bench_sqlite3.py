@@ -0,0 +1,75 @@
+""" Benchmark for _sqlite3: inserts and scans of many rows in an in-memory
+database.  Run it with the pypy to measure, e.g.
+
+    pypy extra_tests/bench_sqlite3.py [num_rows]
+"""
+
+import sys
+import time
+import sqlite3
+
+
+def count_operation(name, function):
+    t0 = time.time()
+    retval = function()
+    tk = time.time()
+    print "%-30s %8.3f s" % (name, tk - t0)
+    return retval
+
+
+def bench(num_rows):
+    con = sqlite3.connect(':memory:')
+    con.execute("CREATE TABLE t (i INTEGER, f REAL, s TEXT, b BLOB)")
+    rows = [(i, i * 0.5, 'row %d' % i, buffer('x' * (i % 16)))
+            for i in xrange(num_rows)]
+
+    def insert_many():
+        con.executemany("INSERT INTO t VALUES (?, ?, ?, ?)", rows)
+        con.commit()
+
+    def insert_one_by_one():
+        cur = con.cursor()
+        for row in rows:
+            cur.execute("INSERT INTO t VALUES (?, ?, ?, ?)", row)
+        con.rollback()
+
+    def scan_iter():
+        n = 0
+        for row in con.execute("SELECT * FROM t"):
+            n += 1
+        return n
+
+    def scan_fetchmany():
+        cur = con.execute("SELECT * FROM t")
+        n = 0
+        while True:
+            rows = cur.fetchmany(1000)
+            if not rows:
+                break
+            n += len(rows)
+        return n
+
+    def scan_fetchall():
+        return len(con.execute("SELECT * FROM t").fetchall())
+
+    def point_queries():
+        cur = con.cursor()
+        for i in xrange(0, num_rows, 10):
+            cur.execute("SELECT s FROM t WHERE i = ?", (i,)).fetchone()
+
+    count_operation("executemany() insert", insert_many)
+    count_operation("execute() insert", insert_one_by_one)
+    assert count_operation("scan, iteration", scan_iter) == num_rows
+    assert count_operation("scan, fetchmany(1000)", scan_fetchmany) == num_rows
+    assert count_operation("scan, fetchall()", scan_fetchall) == num_rows
+    con.execute("CREATE INDEX t_i ON t (i)")
+    count_operation("point queries", point_queries)
+    con.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        num_rows = int(sys.argv[1])
+    else:
+        num_rows = 1000000
+    bench(num_rows)
@@ -322,3 +322,80 @@ def test_close_in_del_ordering():
     gc.collect()
     gc.collect()
     assert SQLiteBackend.success
+
+def test_fetchmany_readahead(con):
+    con.execute("create table t (i integer, s text)")
+    con.executemany("insert into t values (?, ?)",
+                    [(i, str(i)) for i in range(10)])
+    cur = con.execute("select * from t order by i")
+    assert cur.fetchmany(3) == [(0, '0'), (1, '1'), (2, '2')]
+    assert cur.fetchone() == (3, '3')
+    assert cur.fetchmany(0) == [(i, str(i)) for i in range(4, 10)]
+    assert cur.fetchmany(3) == []
+    cur = con.execute("select i from t order by i")
+    cur.row_factory = lambda cursor, row: row[0]
+    assert cur.fetchmany(2) == [0, 1]
+    assert cur.fetchall() == range(2, 10)
+    assert cur.fetchall() == []
+
+def test_statement_pool(con):
+    con.execute("create table t (i integer)")
+    con.executemany("insert into t values (?)", [(i,) for i in range(5)])
+    sql = "select i from t order by i"
+    cursors = [con.execute(sql) for i in range(6)]
+    for cur in cursors:
+        assert cur.fetchone() == (0,)
+    for cur in cursors:
+        assert cur.fetchall() == [(1,), (2,), (3,), (4,)]
+    assert con.execute(sql).fetchall() == [(i,) for i in range(5)]
+
+@pypy_only
+def test_blobopen(con):
+    con.execute("create table t (b blob)")
+    con.execute("insert into t values (zeroblob(10))")
+    rowid = con.execute("select rowid from t").fetchone()[0]
+    with con.blobopen("t", "b", rowid) as blob:
+        assert len(blob) == 10
+        blob.write(b"abc")
+        assert blob.tell() == 3
+        blob.seek(-2, 2)
+        blob.write(b"yz")
+        with pytest.raises(ValueError):
+            blob.write(b"!")
+        with pytest.raises(ValueError):
+            blob.seek(11)
+        blob.seek(0)
+        assert blob.read(4) == b"abc\0"
+        buf = bytearray(4)
+        assert blob.readinto(buf) == 4
+        assert buf == bytearray(4)
+        assert blob.read() == b"\0\0yz"
+        assert blob.read() == b""
+        assert blob.readinto(buf) == 0
+    with pytest.raises(_sqlite3.ProgrammingError):
+        blob.read()
+    assert con.execute("select b from t").fetchone()[0] == buffer(
+        b"abc\0\0\0\0\0yz")
+    blob = con.blobopen("t", "b", rowid, readonly=True)
+    assert blob.read(3) == b"abc"
+    with pytest.raises(_sqlite3.OperationalError):
+        blob.write(b"x")
+    con.close()
+    with pytest.raises(_sqlite3.ProgrammingError):
+        blob.read()
+
+@pypy_only
+def test_blob_views(con):
+    con.execute("create table t (i integer, b blob)")
+    con.executemany("insert into t values (?, ?)",
+                    [(i, buffer(b"x" * i)) for i in range(5)])
+    cur = con.execute("select * from t order by i")
+    cur.blob_views = True
+    for i, b in cur:
+        assert b[:] == b"x" * i
+    cur = con.execute("select b from t order by i")
+    cur.blob_views = True
+    first = cur.fetchone()[0]
+    rest = cur.fetchall()
+    assert first[:] == b""
+    assert [row[0][:] for row in rest] == [b"x" * i for i in range(1, 5)]
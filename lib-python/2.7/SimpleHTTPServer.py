@@ -188,8 +188,17 @@ class SimpleHTTPRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
         -- note however that this the default server uses this
         to copy binary data as well.
 
+        When the destination is the response stream, the data is
+        sent with socket.sendfile(), which lets the kernel copy it
+        directly from the file.
+
         """
-        shutil.copyfileobj(source, outputfile)
+        if (outputfile is self.wfile and
+                hasattr(self.connection, 'sendfile')):
+            outputfile.flush()
+            self.connection.sendfile(source)
+        else:
+            shutil.copyfileobj(source, outputfile)
 
     def guess_type(self, path):
         """Guess the type of a file.
@@ -224,12 +224,16 @@ def JoinableQueue(maxsize=0):
     from multiprocessing.queues import JoinableQueue
     return JoinableQueue(maxsize)
 
-def Pool(processes=None, initializer=None, initargs=(), maxtasksperchild=None):
+def Pool(processes=None, initializer=None, initargs=(), maxtasksperchild=None,
+         transport='pipe'):
     '''
     Returns a process pool object
+
+    With transport='ring' the tasks and results go through ring buffers
+    in shared memory instead of pipes.
     '''
     from multiprocessing.pool import Pool
-    return Pool(processes, initializer, initargs, maxtasksperchild)
+    return Pool(processes, initializer, initargs, maxtasksperchild, transport)
 
 def RawValue(typecode_or_type, *args):
     '''
@@ -199,6 +199,13 @@ if sys.platform != 'win32':
 
         return c1, c2
 
+    def RingPipe(size=1024*1024):
+        '''
+        Returns a (reader, writer) pair of connection objects passing the
+        messages through a ring buffer of `size` bytes in shared memory
+        '''
+        return _multiprocessing.ring_pipe(size)
+
 else:
     from _multiprocessing import win32
 
@@ -134,7 +134,8 @@ class Pool(object):
     Process = Process
 
     def __init__(self, processes=None, initializer=None, initargs=(),
-                 maxtasksperchild=None):
+                 maxtasksperchild=None, transport='pipe'):
+        self._transport = transport
         self._setup_queues()
         self._taskqueue = Queue.Queue()
         self._cache = {}
@@ -231,8 +232,8 @@ class Pool(object):
 
     def _setup_queues(self):
         from .queues import SimpleQueue
-        self._inqueue = SimpleQueue()
-        self._outqueue = SimpleQueue()
+        self._inqueue = SimpleQueue(self._transport)
+        self._outqueue = SimpleQueue(self._transport)
         self._quick_put = self._inqueue._writer.send
         self._quick_get = self._outqueue._reader.recv
 
@@ -349,8 +349,14 @@ class JoinableQueue(Queue):
 
 class SimpleQueue(object):
 
-    def __init__(self):
-        self._reader, self._writer = Pipe(duplex=False)
+    def __init__(self, transport='pipe'):
+        if transport == 'pipe':
+            self._reader, self._writer = Pipe(duplex=False)
+        elif transport == 'ring' and sys.platform != 'win32':
+            from .connection import RingPipe
+            self._reader, self._writer = RingPipe()
+        else:
+            raise ValueError('unsupported transport: %r' % (transport,))
         self._rlock = Lock()
         if sys.platform == 'win32':
             self._wlock = None
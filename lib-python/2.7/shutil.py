@@ -51,6 +51,34 @@ def copyfileobj(fsrc, fdst, length=16*1024):
             break
         fdst.write(buf)
 
+_USE_SENDFILE = hasattr(os, 'sendfile') and sys.platform.startswith('linux')
+
+def _copyfileobj_sendfile(fsrc, fdst):
+    """Copy the regular file fsrc to fdst with os.sendfile(), without
+    going through user-space buffers.  Return False if the kernel does
+    not support it for these files, before anything was copied."""
+    try:
+        infd = fsrc.fileno()
+        outfd = fdst.fileno()
+        blocksize = max(os.fstat(infd).st_size, 2 ** 23)   # min 8MiB
+    except (AttributeError, IOError, OSError, ValueError):
+        return False
+    blocksize = min(blocksize, 2 ** 30)
+    offset = 0
+    while True:
+        try:
+            sent = os.sendfile(outfd, infd, offset, blocksize)
+        except OSError as e:
+            if e.errno == errno.EINTR:
+                continue
+            if offset == 0 and e.errno in (errno.EINVAL, errno.ENOSYS):
+                return False
+            raise
+        if sent == 0:
+            break
+        offset += sent
+    return True
+
 def _samefile(src, dst):
     # Macintosh, Unix.
     if hasattr(os.path, 'samefile'):
@@ -81,6 +109,8 @@ def copyfile(src, dst):
 
     with open(src, 'rb') as fsrc:
         with open(dst, 'wb') as fdst:
+            if _USE_SENDFILE and _copyfileobj_sendfile(fsrc, fdst):
+                return
             copyfileobj(fsrc, fdst)
 
 def copymode(src, dst):
@@ -97,6 +97,15 @@ except ImportError:
 EBADF = getattr(errno, 'EBADF', 9)
 EINTR = getattr(errno, 'EINTR', 4)
 
+_SENDFILE_BLOCKSIZE = 1024 * 1024
+_SEND_BLOCKSIZE = 64 * 1024
+_SENDFILE_UNSUPPORTED = (getattr(errno, 'EINVAL', 22),
+                         getattr(errno, 'ENOSYS', 38),
+                         getattr(errno, 'ENOTSOCK', 88))
+
+class _GiveupOnSendfile(Exception):
+    pass
+
 __all__ = ["getfqdn", "create_connection"]
 __all__.extend(os._get_exports_list(_socket))
 
@@ -198,6 +207,7 @@ class _closedsocket(object):
         raise error(EBADF, 'Bad file descriptor')
     # All _delegate_methods must also be initialized here.
     send = recv = recv_into = sendto = recvfrom = recvfrom_into = _dummy
+    recvmsg = sendmsg = recv_many_into = send_many = _dummy
     __getattr__ = _dummy
     def _drop(self):
         pass
@@ -247,6 +257,112 @@ class _socketobject(object):
             return self._sock.sendto(data, param2, param3)
     sendto.__doc__ = _realsocket.sendto.__doc__
 
+    if hasattr(_realsocket, 'sendmsg'):
+        def recvmsg(self, buffersize, ancbufsize=0, flags=0):
+            return self._sock.recvmsg(buffersize, ancbufsize, flags)
+        recvmsg.__doc__ = _realsocket.recvmsg.__doc__
+
+        def sendmsg(self, buffers, ancdata=None, flags=0, address=None):
+            return self._sock.sendmsg(buffers, ancdata, flags, address)
+        sendmsg.__doc__ = _realsocket.sendmsg.__doc__
+
+    if hasattr(_realsocket, 'send_many'):
+        def recv_many_into(self, buffers, flags=0):
+            return self._sock.recv_many_into(buffers, flags)
+        recv_many_into.__doc__ = _realsocket.recv_many_into.__doc__
+
+        def send_many(self, buffers, flags=0, address=None):
+            return self._sock.send_many(buffers, flags, address)
+        send_many.__doc__ = _realsocket.send_many.__doc__
+
+    def sendfile(self, file, offset=0, count=None):
+        """sendfile(file[, offset[, count]]) -> sent
+
+        Send a file until EOF is reached, or until 'count' bytes are sent.
+        The file must be opened in binary mode.  If it has a real file
+        descriptor and the socket is a blocking SOCK_STREAM one, the
+        data is copied by the kernel with os.sendfile(); otherwise the
+        file is read in chunks into a reusable buffer and passed to
+        send().  The file position is updated on return, even in case of
+        error, and the total number of bytes sent is returned.
+        """
+        try:
+            return self._sendfile_use_sendfile(file, offset, count)
+        except _GiveupOnSendfile:
+            return self._sendfile_use_send(file, offset, count)
+
+    def _sendfile_use_sendfile(self, file, offset, count):
+        if not hasattr(os, 'sendfile'):
+            raise _GiveupOnSendfile
+        try:
+            fileno = file.fileno()
+        except (AttributeError, IOError, ValueError):
+            raise _GiveupOnSendfile
+        if self.type != SOCK_STREAM or self.gettimeout() is not None:
+            raise _GiveupOnSendfile
+        if count is not None and count <= 0:
+            raise ValueError("count must be a positive integer (got %r)"
+                             % (count,))
+        sockno = self.fileno()
+        total_sent = 0
+        try:
+            while count is None or total_sent < count:
+                blocksize = _SENDFILE_BLOCKSIZE
+                if count is not None:
+                    blocksize = min(blocksize, count - total_sent)
+                try:
+                    sent = os.sendfile(sockno, fileno, offset, blocksize)
+                except OSError as e:
+                    if e.errno == EINTR:
+                        continue
+                    if total_sent == 0 and e.errno in _SENDFILE_UNSUPPORTED:
+                        # e.g. 'file' is a pipe or a socket
+                        raise _GiveupOnSendfile
+                    raise error(e.errno, e.strerror)
+                if sent == 0:
+                    break    # EOF
+                offset += sent
+                total_sent += sent
+            return total_sent
+        finally:
+            if total_sent > 0 and hasattr(file, 'seek'):
+                file.seek(offset)
+
+    def _sendfile_use_send(self, file, offset, count):
+        if count is not None and count <= 0:
+            raise ValueError("count must be a positive integer (got %r)"
+                             % (count,))
+        if offset:
+            file.seek(offset)
+        blocksize = _SEND_BLOCKSIZE
+        if count is not None:
+            blocksize = min(blocksize, count)
+        buf = bytearray(blocksize)
+        view = memoryview(buf)
+        readinto = getattr(file, 'readinto', None)
+        total_sent = 0
+        try:
+            while count is None or total_sent < count:
+                size = blocksize
+                if count is not None:
+                    size = min(size, count - total_sent)
+                if readinto is not None:
+                    n = readinto(view[:size])
+                    if not n:
+                        break    # EOF
+                    data = view[:n]
+                else:
+                    data = file.read(size)
+                    if not data:
+                        break    # EOF
+                    n = len(data)
+                self.sendall(data)
+                total_sent += n
+            return total_sent
+        finally:
+            if total_sent > 0 and hasattr(file, 'seek'):
+                file.seek(offset + total_sent)
+
     def close(self):
         s = self._sock
         self._sock = _closedsocket()
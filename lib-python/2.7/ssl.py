@@ -754,6 +754,33 @@ class SSLSocket(socket):
         else:
             return socket.sendall(self, data, flags)
 
+    def sendfile(self, file, offset=0, count=None):
+        """Send a file, possibly by using os.sendfile() if this is a
+        clear-text socket.  The encrypted stream always goes through
+        send()."""
+        self._checkClosed()
+        if self._sslobj:
+            return self._sendfile_use_send(file, offset, count)
+        else:
+            return socket.sendfile(self, file, offset, count)
+
+    # the scatter/gather methods would bypass the encryption layer
+    def sendmsg(self, *args, **kwargs):
+        raise NotImplementedError("sendmsg not allowed on instances of %s" %
+                                  self.__class__)
+
+    def recvmsg(self, *args, **kwargs):
+        raise NotImplementedError("recvmsg not allowed on instances of %s" %
+                                  self.__class__)
+
+    def send_many(self, *args, **kwargs):
+        raise NotImplementedError("send_many not allowed on instances of %s" %
+                                  self.__class__)
+
+    def recv_many_into(self, *args, **kwargs):
+        raise NotImplementedError(
+            "recv_many_into not allowed on instances of %s" % self.__class__)
+
     def recv(self, buflen=1024, flags=0):
         self._checkClosed()
         if self._sslobj:
@@ -174,6 +174,12 @@ else:
 
 
 class _StatementCache(object):
+    # Keeps up to POOL_SIZE prepared statements per SQL string, so that
+    # several cursors running the same query at the same time don't need
+    # to prepare it again every time.  maxcount limits the number of
+    # distinct SQL strings.
+    POOL_SIZE = 4
+
     def __init__(self, connection, maxcount):
         self.connection = connection
         self.maxcount = maxcount
@@ -181,16 +187,22 @@ class _StatementCache(object):
 
     def get(self, sql):
         try:
-            stat = self.cache[sql]
+            pool = self.cache[sql]
         except KeyError:
             stat = Statement(self.connection, sql)
-            self.cache[sql] = stat
+            self.cache[sql] = [stat]
             if len(self.cache) > self.maxcount:
                 self.cache.popitem(0)
-        else:
-            if stat._in_use:
-                stat = Statement(self.connection, sql)
-                self.cache[sql] = stat
+            return stat
+        for stat in pool:
+            if not stat._in_use:
+                return stat
+        # all the pooled statements are in use: if the pool is full, the
+        # new statement replaces the oldest one in it
+        stat = Statement(self.connection, sql)
+        if len(pool) >= self.POOL_SIZE:
+            del pool[0]
+        pool.append(stat)
         return stat
 
 
@@ -224,6 +236,8 @@ class Connection(object):
         self.__statements = []
         self.__statements_counter = 0
         self.__rawstatements = set()
+        self.__blobs = []
+        self.__rawblobs = set()
         self._statement_cache = _StatementCache(self, cached_statements)
         self.__statements_already_committed = []
 
@@ -252,6 +266,15 @@ class Connection(object):
     def close(self):
         self._check_thread()
 
+        for weakref in self.__blobs:
+            blob = weakref()
+            if blob is not None:
+                blob._close()
+        if self.__rawblobs is not None:
+            for blob in list(self.__rawblobs):
+                self._close_raw_blob(blob)
+            self.__rawblobs = None
+
         self.__do_all_statements(Statement._finalize, True)
 
         # depending on when this close() is called, the statements' weakrefs
@@ -357,6 +380,14 @@ class Connection(object):
                 return    # rare case: already finalized, see issue #2097
             _lib.sqlite3_finalize(_statement)
 
+    def _close_raw_blob(self, _blob):
+        if self.__rawblobs is not None:
+            try:
+                self.__rawblobs.remove(_blob)
+            except KeyError:
+                return    # already closed
+            _lib.sqlite3_blob_close(_blob)
+
     def __do_all_statements(self, action, reset_cursors):
         for weakref in self.__statements:
             statement = weakref()
@@ -652,6 +683,31 @@ class Connection(object):
         _lib.sqlite3_progress_handler(self._db, nsteps, progress_handler,
                                       _ffi.NULL)
 
+    @_check_thread_wrap
+    @_check_closed_wrap
+    def blobopen(self, table, column, row, readonly=False, name="main"):
+        """Open the BLOB stored in the given table, column and row for
+        incremental I/O.  The size of the BLOB cannot be changed."""
+        def encode(s):
+            if isinstance(s, unicode):
+                return s.encode('utf-8')
+            if not isinstance(s, bytes):
+                raise TypeError("expected a string, got %s" %
+                                type(s).__name__)
+            return s
+        blob_star = _ffi.new('sqlite3_blob **')
+        rc = _lib.sqlite3_blob_open(self._db, encode(name), encode(table),
+                                    encode(column), row, not readonly,
+                                    blob_star)
+        if rc != _lib.SQLITE_OK:
+            raise self._get_exception(rc)
+        blob = Blob(self, blob_star[0])
+        self.__rawblobs.add(blob._blob)
+        self.__blobs.append(weakref.ref(blob))
+        if len(self.__blobs) >= 200:
+            self.__blobs = [r for r in self.__blobs if r() is not None]
+        return blob
+
     if sys.version_info[0] >= 3:
         def __get_in_transaction(self):
             return self._in_transaction
@@ -682,6 +738,60 @@ class Connection(object):
                 raise OperationalError("Error enabling load extension")
 
 
+if sys.version_info[0] >= 3:
+    def _readonly_view(data, length):
+        return memoryview(data)[:length].toreadonly()
+else:
+    def _readonly_view(data, length):
+        return buffer(data, 0, length)
+
+def _blob_view(storage, i, blob, blob_len):
+    # copy the BLOB into the bytearray kept in storage for column i, which
+    # is reused for the following rows if it is large enough
+    data = storage.get(i)
+    if data is None or len(data) < blob_len:
+        data = storage[i] = bytearray(blob_len)
+    if blob_len:
+        _ffi.memmove(data, blob, blob_len)
+    return _readonly_view(data, blob_len)
+
+def _fetch_row(statement, cast_map, text_factory, blob_storage=None):
+    num_cols = _lib.sqlite3_data_count(statement)
+    row = newlist_hint(num_cols)
+    for i in xrange(num_cols):
+        if cast_map is not None:
+            converter = cast_map[i]
+            if converter is not None:
+                blob = _lib.sqlite3_column_blob(statement, i)
+                if not blob:
+                    val = None
+                else:
+                    blob_len = _lib.sqlite3_column_bytes(statement, i)
+                    val = converter(_ffi.buffer(blob, blob_len)[:])
+                row.append(val)
+                continue
+        typ = _lib.sqlite3_column_type(statement, i)
+        if typ == _lib.SQLITE_INTEGER:
+            val = int(_lib.sqlite3_column_int64(statement, i))
+        elif typ == _lib.SQLITE_FLOAT:
+            val = _lib.sqlite3_column_double(statement, i)
+        elif typ == _lib.SQLITE_TEXT:
+            text = _lib.sqlite3_column_text(statement, i)
+            text_len = _lib.sqlite3_column_bytes(statement, i)
+            val = text_factory(_ffi.buffer(text, text_len)[:])
+        elif typ == _lib.SQLITE_BLOB:
+            blob = _lib.sqlite3_column_blob(statement, i)
+            blob_len = _lib.sqlite3_column_bytes(statement, i)
+            if blob_storage is None:
+                val = _BLOB_TYPE(_ffi.buffer(blob, blob_len)[:])
+            else:
+                val = _blob_view(blob_storage, i, blob, blob_len)
+        else:
+            val = None
+        row.append(val)
+    return tuple(row)
+
+
 class Cursor(object):
     __initialized = False
     __statement = None
@@ -693,6 +803,13 @@ class Cursor(object):
 
         self.arraysize = 1
         self.row_factory = None
+        # if True, next() and fetchone() return the BLOB values as read-only
+        # views on buffers that the cursor reuses: they are only valid until
+        # the following call to next() or fetchone().  fetchmany() and
+        # fetchall() always return copies.
+        self.blob_views = False
+        self.__blob_storage = None
+        self.__blob_slot = 0
         self._reset = False
         self.__locked = False
         self.__closed = False
@@ -769,42 +886,20 @@ class Cursor(object):
             self.__row_cast_map.append(converter)
 
     def __fetch_one_row(self):
-        num_cols = _lib.sqlite3_data_count(self.__statement._statement)
-        row = newlist_hint(num_cols)
-        for i in xrange(num_cols):
-            if self.__connection._detect_types:
-                converter = self.__row_cast_map[i]
-            else:
-                converter = None
-
-            if converter is not None:
-                blob = _lib.sqlite3_column_blob(self.__statement._statement, i)
-                if not blob:
-                    val = None
-                else:
-                    blob_len = _lib.sqlite3_column_bytes(self.__statement._statement, i)
-                    val = _ffi.buffer(blob, blob_len)[:]
-                    val = converter(val)
-            else:
-                typ = _lib.sqlite3_column_type(self.__statement._statement, i)
-                if typ == _lib.SQLITE_NULL:
-                    val = None
-                elif typ == _lib.SQLITE_INTEGER:
-                    val = _lib.sqlite3_column_int64(self.__statement._statement, i)
-                    val = int(val)
-                elif typ == _lib.SQLITE_FLOAT:
-                    val = _lib.sqlite3_column_double(self.__statement._statement, i)
-                elif typ == _lib.SQLITE_TEXT:
-                    text = _lib.sqlite3_column_text(self.__statement._statement, i)
-                    text_len = _lib.sqlite3_column_bytes(self.__statement._statement, i)
-                    val = _ffi.buffer(text, text_len)[:]
-                    val = self.__connection.text_factory(val)
-                elif typ == _lib.SQLITE_BLOB:
-                    blob = _lib.sqlite3_column_blob(self.__statement._statement, i)
-                    blob_len = _lib.sqlite3_column_bytes(self.__statement._statement, i)
-                    val = _BLOB_TYPE(_ffi.buffer(blob, blob_len)[:])
-            row.append(val)
-        return tuple(row)
+        if self.__connection._detect_types:
+            cast_map = self.__row_cast_map
+        else:
+            cast_map = None
+        blob_storage = None
+        if self.blob_views:
+            # two sets of buffers: one for the row returned by next(),
+            # one for the row read ahead
+            if self.__blob_storage is None:
+                self.__blob_storage = ({}, {})
+            self.__blob_slot ^= 1
+            blob_storage = self.__blob_storage[self.__blob_slot]
+        return _fetch_row(self.__statement._statement, cast_map,
+                          self.__connection.text_factory, blob_storage)
 
     def __execute(self, multiple, sql, many_params):
         self.__locked = True
@@ -822,14 +917,15 @@ class Cursor(object):
                 pass
             self.__rowcount = -1
             self.__statement = self.__connection._statement_cache.get(sql)
+            is_dml = self.__statement._type in (
+                _STMT_TYPE_UPDATE,
+                _STMT_TYPE_DELETE,
+                _STMT_TYPE_INSERT,
+                _STMT_TYPE_REPLACE
+            )
 
             if self.__connection._isolation_level is not None:
-                if self.__statement._type in (
-                    _STMT_TYPE_UPDATE,
-                    _STMT_TYPE_DELETE,
-                    _STMT_TYPE_INSERT,
-                    _STMT_TYPE_REPLACE
-                ):
+                if is_dml:
                     if not self.__connection._in_transaction:
                         self.__connection._begin()
                 elif self.__statement._type == _STMT_TYPE_OTHER:
@@ -840,12 +936,14 @@ class Cursor(object):
                         raise ProgrammingError("You cannot execute SELECT "
                                                "statements in executemany().")
 
+            statement = self.__statement
+            db = self.__connection._db
             for params in many_params:
-                self.__statement._set_params(params)
+                statement._set_params(params)
 
                 # Actually execute the SQL statement
 
-                ret = _lib.sqlite3_step(self.__statement._statement)
+                ret = _lib.sqlite3_step(statement._statement)
 
                 # PyPy: if we get SQLITE_LOCKED, it's probably because
                 # one of the cursors created previously is still alive
@@ -854,7 +952,7 @@ class Cursor(object):
                 # automatically reset all old cursors and try again.
                 if ret == _lib.SQLITE_LOCKED:
                     self.__connection._reset_already_committed_statements()
-                    ret = _lib.sqlite3_step(self.__statement._statement)
+                    ret = _lib.sqlite3_step(statement._statement)
 
                 if ret == _lib.SQLITE_ROW:
                     if multiple:
@@ -863,28 +961,23 @@ class Cursor(object):
                     self.__next_row = self.__fetch_one_row()
                 elif ret == _lib.SQLITE_DONE:
                     if not multiple:
-                        self.__statement._reset()
+                        statement._reset()
                 else:
-                    self.__statement._reset()
+                    statement._reset()
                     raise self.__connection._get_exception(ret)
 
-                if self.__statement._type in (
-                    _STMT_TYPE_UPDATE,
-                    _STMT_TYPE_DELETE,
-                    _STMT_TYPE_INSERT,
-                    _STMT_TYPE_REPLACE
-                ):
+                if is_dml:
                     if self.__rowcount == -1:
                         self.__rowcount = 0
-                    self.__rowcount += _lib.sqlite3_changes(self.__connection._db)
+                    self.__rowcount += _lib.sqlite3_changes(db)
 
-                if not multiple and self.__statement._type == _STMT_TYPE_INSERT:
-                    self.__lastrowid = _lib.sqlite3_last_insert_rowid(self.__connection._db)
+                if not multiple and statement._type == _STMT_TYPE_INSERT:
+                    self.__lastrowid = _lib.sqlite3_last_insert_rowid(db)
                 else:
                     self.__lastrowid = None
 
                 if multiple:
-                    self.__statement._reset()
+                    statement._reset()
         finally:
             self.__connection._in_transaction = \
                 not _lib.sqlite3_get_autocommit(self.__connection._db)
@@ -974,18 +1067,57 @@ class Cursor(object):
     def fetchone(self):
         return next(self, None)
 
+    def __fetch_rows(self, size):
+        # Like calling next() size times, or until the end if size <= 0,
+        # but the checks and the lookups are only done once, and the rows
+        # are stepped and converted in a tight loop.
+        self.__check_cursor()
+        self.__check_reset()
+        if not self.__statement:
+            return []
+        try:
+            next_row = self.__next_row
+        except AttributeError:
+            return []
+        del self.__next_row
+        if self.blob_views:
+            next_row = tuple([_BLOB_TYPE(val[:]) if isinstance(val, _BLOB_TYPE)
+                              else val for val in next_row])
+
+        rows = [next_row]
+        statement = self.__statement._statement
+        if self.__connection._detect_types:
+            cast_map = self.__row_cast_map
+        else:
+            cast_map = None
+        text_factory = self.__connection.text_factory
+        step = _lib.sqlite3_step
+        while True:
+            ret = step(statement)
+            if ret != _lib.SQLITE_ROW:
+                self.__statement._reset()
+                if ret != _lib.SQLITE_DONE:
+                    raise self.__connection._get_exception(ret)
+                break
+            row = _fetch_row(statement, cast_map, text_factory)
+            if len(rows) == size:
+                # keep it as the read-ahead row, like next() does
+                self.__next_row = row
+                break
+            rows.append(row)
+
+        row_factory = self.row_factory
+        if row_factory is not None:
+            rows = [row_factory(self, row) for row in rows]
+        return rows
+
     def fetchmany(self, size=None):
         if size is None:
             size = self.arraysize
-        lst = []
-        for row in self:
-            lst.append(row)
-            if len(lst) == size:
-                break
-        return lst
+        return self.__fetch_rows(size)
 
     def fetchall(self):
-        return list(self)
+        return self.__fetch_rows(-1)
 
     def __get_connection(self):
         return self.__connection
@@ -1069,6 +1201,8 @@ class Statement(object):
             raise self.__con._get_exception(ret)
 
         self.__con._remember_statement(self)
+        self.__num_params_needed = _lib.sqlite3_bind_parameter_count(
+            self._statement)
 
         tail = _ffi.string(next_char[0]).decode('utf-8')
         if _check_remaining_sql(tail):
@@ -1103,14 +1237,19 @@ class Statement(object):
                             "just switch your application to Unicode strings.")
 
     def __set_param(self, idx, param):
-        cvt = converters.get(type(param))
-        if cvt is not None:
-            param = cvt(param)
+        typ = type(param)
+        if typ in _PLAIN_PARAM_TYPES and (typ, PrepareProtocol) not in adapters:
+            # fast path: adapt() would return the value unchanged
+            pass
+        else:
+            cvt = converters.get(typ)
+            if cvt is not None:
+                param = cvt(param)
 
-        try:
-            param = adapt(param)
-        except:
-            pass  # And use previous value
+            try:
+                param = adapt(param)
+            except:
+                pass  # And use previous value
 
         if param is None:
             rc = _lib.sqlite3_bind_null(self._statement, idx)
@@ -1140,7 +1279,7 @@ class Statement(object):
     def _set_params(self, params):
         self._in_use = True
 
-        num_params_needed = _lib.sqlite3_bind_parameter_count(self._statement)
+        num_params_needed = self.__num_params_needed
         if isinstance(params, (tuple, list)) or \
                 not isinstance(params, dict) and \
                 hasattr(params, '__getitem__'):
@@ -1196,6 +1335,111 @@ class Statement(object):
         return desc
 
 
+class Blob(object):
+    """A BLOB opened for incremental I/O with Connection.blobopen().
+    Reads and writes start at the current offset and advance it; writes
+    cannot go past the end of the BLOB."""
+    _blob = None
+
+    def __init__(self, connection, blob):
+        self.__con = connection
+        self._blob = blob
+        self.__offset = 0
+        self.__length = _lib.sqlite3_blob_bytes(blob)
+
+    def __del__(self):
+        if self._blob:
+            self.__con._close_raw_blob(self._blob)
+
+    def _close(self):
+        if self._blob:
+            self.__con._close_raw_blob(self._blob)
+            self._blob = None
+
+    def __check(self):
+        if not self._blob:
+            raise ProgrammingError("Cannot operate on a closed blob.")
+        self.__con._check_thread()
+        self.__con._check_closed()
+
+    def close(self):
+        self.__con._check_thread()
+        self._close()
+
+    def __enter__(self):
+        self.__check()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    def __len__(self):
+        self.__check()
+        return self.__length
+
+    def tell(self):
+        self.__check()
+        return self.__offset
+
+    def seek(self, offset, origin=0):
+        self.__check()
+        if origin == 0:
+            pass
+        elif origin == 1:
+            offset += self.__offset
+        elif origin == 2:
+            offset += self.__length
+        else:
+            raise ValueError("'origin' should be os.SEEK_SET, os.SEEK_CUR, "
+                             "or os.SEEK_END")
+        if not 0 <= offset <= self.__length:
+            raise ValueError("offset out of blob range")
+        self.__offset = offset
+
+    def read(self, length=-1):
+        """Read at most length bytes, or until the end if length < 0."""
+        self.__check()
+        remaining = self.__length - self.__offset
+        if length < 0 or length > remaining:
+            length = remaining
+        if length == 0:
+            return b""
+        buf = _ffi.new("char[]", length)
+        rc = _lib.sqlite3_blob_read(self._blob, buf, length, self.__offset)
+        if rc != _lib.SQLITE_OK:
+            raise self.__con._get_exception(rc)
+        self.__offset += length
+        return _ffi.buffer(buf, length)[:]
+
+    def readinto(self, b):
+        """Read into the writable buffer b, without an intermediate copy.
+        Returns the number of bytes read, 0 at the end of the BLOB."""
+        self.__check()
+        buf = _ffi.from_buffer(b, require_writable=True)
+        length = min(len(buf), self.__length - self.__offset)
+        if length == 0:
+            return 0
+        rc = _lib.sqlite3_blob_read(self._blob, buf, length, self.__offset)
+        if rc != _lib.SQLITE_OK:
+            raise self.__con._get_exception(rc)
+        self.__offset += length
+        return length
+
+    def write(self, data):
+        """Write the bytes-like object data at the current offset."""
+        self.__check()
+        if isinstance(data, unicode):
+            raise TypeError("a bytes-like object is required, not 'unicode'")
+        buf = _ffi.from_buffer(data)
+        length = len(buf)
+        if length > self.__length - self.__offset:
+            raise ValueError("data longer than blob length")
+        rc = _lib.sqlite3_blob_write(self._blob, buf, length, self.__offset)
+        if rc != _lib.SQLITE_OK:
+            raise self.__con._get_exception(rc)
+        self.__offset += length
+
+
 class Row(object):
     def __init__(self, cursor, values):
         if not (type(cursor) is Cursor or issubclass(type(cursor), Cursor)):
@@ -1333,6 +1577,10 @@ def _function_callback(real_cb, context, nargs, c_params):
 converters = {}
 adapters = {}
 
+# the types that adapt() returns unchanged unless an adapter is registered
+_PLAIN_PARAM_TYPES = frozenset([type(None), bool, int, long, float, unicode,
+                                str])
+
 
 class PrepareProtocol(object):
     pass
@@ -109,6 +109,7 @@ typedef ... sqlite3;
 typedef ... sqlite3_stmt;
 typedef ... sqlite3_context;
 typedef ... sqlite3_value;
+typedef ... sqlite3_blob;
 typedef int64_t sqlite3_int64;
 typedef uint64_t sqlite3_uint64;
 
@@ -213,6 +214,14 @@ void sqlite3_result_text16be(sqlite3_context*,const void*, int,void(*)(void*));
 void sqlite3_result_value(sqlite3_context*, sqlite3_value*);
 void sqlite3_result_zeroblob(sqlite3_context*, int n);
 
+int sqlite3_blob_open(sqlite3*, const char *zDb, const char *zTable,
+                      const char *zColumn, sqlite3_int64 iRow, int flags,
+                      sqlite3_blob **ppBlob);
+int sqlite3_blob_close(sqlite3_blob *);
+int sqlite3_blob_bytes(sqlite3_blob *);
+int sqlite3_blob_read(sqlite3_blob *, void *Z, int N, int iOffset);
+int sqlite3_blob_write(sqlite3_blob *, const void *z, int n, int iOffset);
+
 const void *sqlite3_value_blob(sqlite3_value*);
 int sqlite3_value_bytes(sqlite3_value*);
 int sqlite3_value_bytes16(sqlite3_value*);
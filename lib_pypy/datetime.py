@@ -21,13 +21,16 @@ import time as _timemodule
 import math as _math
 import struct as _struct
 
-# for cpyext, use these as base classes
-from __pypy__._pypydatetime import dateinterop, deltainterop, timeinterop
+# the base classes hold the fields, and implement the construction,
+# comparisons, hashing, arithmetic and pickling; cpyext uses them too
+from __pypy__._pypydatetime import (dateinterop, datetimeinterop,
+    deltainterop, timeinterop, set_types as _set_types)
 
-_SENTINEL = object()
-
-def _cmp(x, y):
-    return 0 if x == y else 1 if x > y else -1
+# interp-level versions of the helpers on the hot paths
+from __pypy__._pypydatetime import (
+    ymd2ord as _ymd2ord, ord2ymd as _ord2ymd,
+    normalize_datetime as _normalize_datetime,
+    parse_iso as _parse_iso)
 
 def _round(x):
     return int(_math.floor(x + 0.5) if x >= 0.0 else _math.ceil(x - 0.5))
@@ -77,101 +80,8 @@ def _days_before_month(year, month):
     assert 1 <= month <= 12, 'month must be in 1..12'
     return _DAYS_BEFORE_MONTH[month] + (month > 2 and _is_leap(year))
 
-def _ymd2ord(year, month, day):
-    "year, month, day -> ordinal, considering 01-Jan-0001 as day 1."
-    assert 1 <= month <= 12, 'month must be in 1..12'
-    dim = _days_in_month(year, month)
-    assert 1 <= day <= dim, ('day must be in 1..%d' % dim)
-    return (_days_before_year(year) +
-            _days_before_month(year, month) +
-            day)
-
-_DI400Y = _days_before_year(401)    # number of days in 400 years
-_DI100Y = _days_before_year(101)    #    "    "   "   " 100   "
-_DI4Y   = _days_before_year(5)      #    "    "   "   "   4   "
-
-# A 4-year cycle has an extra leap day over what we'd get from pasting
-# together 4 single years.
-assert _DI4Y == 4 * 365 + 1
-
-# Similarly, a 400-year cycle has an extra leap day over what we'd get from
-# pasting together 4 100-year cycles.
-assert _DI400Y == 4 * _DI100Y + 1
-
-# OTOH, a 100-year cycle has one fewer leap day than we'd get from
-# pasting together 25 4-year cycles.
-assert _DI100Y == 25 * _DI4Y - 1
-
-_US_PER_US = 1
-_US_PER_MS = 1000
 _US_PER_SECOND = 1000000
-_US_PER_MINUTE = 60000000
 _SECONDS_PER_DAY = 24 * 3600
-_US_PER_HOUR = 3600000000
-_US_PER_DAY = 86400000000
-_US_PER_WEEK = 604800000000
-
-def _ord2ymd(n):
-    "ordinal -> (year, month, day), considering 01-Jan-0001 as day 1."
-
-    # n is a 1-based index, starting at 1-Jan-1.  The pattern of leap years
-    # repeats exactly every 400 years.  The basic strategy is to find the
-    # closest 400-year boundary at or before n, then work with the offset
-    # from that boundary to n.  Life is much clearer if we subtract 1 from
-    # n first -- then the values of n at 400-year boundaries are exactly
-    # those divisible by _DI400Y:
-    #
-    #     D  M   Y            n              n-1
-    #     -- --- ----        ----------     ----------------
-    #     31 Dec -400        -_DI400Y       -_DI400Y -1
-    #      1 Jan -399         -_DI400Y +1   -_DI400Y      400-year boundary
-    #     ...
-    #     30 Dec  000        -1             -2
-    #     31 Dec  000         0             -1
-    #      1 Jan  001         1              0            400-year boundary
-    #      2 Jan  001         2              1
-    #      3 Jan  001         3              2
-    #     ...
-    #     31 Dec  400         _DI400Y        _DI400Y -1
-    #      1 Jan  401         _DI400Y +1     _DI400Y      400-year boundary
-    n -= 1
-    n400, n = divmod(n, _DI400Y)
-    year = n400 * 400 + 1   # ..., -399, 1, 401, ...
-
-    # Now n is the (non-negative) offset, in days, from January 1 of year, to
-    # the desired date.  Now compute how many 100-year cycles precede n.
-    # Note that it's possible for n100 to equal 4!  In that case 4 full
-    # 100-year cycles precede the desired day, which implies the desired
-    # day is December 31 at the end of a 400-year cycle.
-    n100, n = divmod(n, _DI100Y)
-
-    # Now compute how many 4-year cycles precede it.
-    n4, n = divmod(n, _DI4Y)
-
-    # And now how many single years.  Again n1 can be 4, and again meaning
-    # that the desired day is December 31 at the end of the 4-year cycle.
-    n1, n = divmod(n, 365)
-
-    year += n100 * 100 + n4 * 4 + n1
-    if n1 == 4 or n100 == 4:
-        assert n == 0
-        return year-1, 12, 31
-
-    # Now the year is correct, and n is the offset from January 1.  We find
-    # the month via an estimate that's either exact or one too large.
-    leapyear = n1 == 3 and (n4 != 24 or n100 == 3)
-    assert leapyear == _is_leap(year)
-    month = (n + 50) >> 5
-    preceding = _DAYS_BEFORE_MONTH[month] + (month > 2 and leapyear)
-    if preceding > n:  # estimate is too large
-        month -= 1
-        preceding -= _DAYS_IN_MONTH[month] + (month == 2 and leapyear)
-    n -= preceding
-    assert 0 <= n < _days_in_month(year, month)
-
-    # Now the year and month are correct, and n is the offset from the
-    # start of that month:  we're done!
-    return year, month, n+1
 
 # Month and day names.  For localized versions, see the calendar module.
 _MONTHNAMES = [None, "Jan", "Feb", "Mar", "Apr", "May", "Jun",
@@ -184,13 +94,6 @@ def _build_struct_time(y, m, d, hh, mm, ss, dstflag):
     dnum = _days_before_month(y, m) + d
     return _timemodule.struct_time((y, m, d, hh, mm, ss, wday, dnum, dstflag))
 
-def _format_time(hh, mm, ss, us):
-    # Skip trailing microseconds when us==0.
-    result = "%02d:%02d:%02d" % (hh, mm, ss)
-    if us:
-        result += ".%06d" % us
-    return result
-
 # Correctly substitute for %z and %Z escapes in strftime formats.
 def _wrap_strftime(object, format, timetuple):
     year = timetuple[0]
@@ -285,51 +188,6 @@ def _check_utc_offset(name, offset):
         raise ValueError("%s()=%d, must be in -1439..1439" % (name, offset))
     return offset
 
-def _check_int_field(value):
-    if isinstance(value, int):
-        return int(value)
-    if not isinstance(value, float):
-        try:
-            value = value.__int__()
-        except AttributeError:
-            pass
-        else:
-            if isinstance(value, int):
-                return int(value)
-            elif isinstance(value, long):
-                return int(long(value))
-            raise TypeError('__int__ method should return an integer')
-        raise TypeError('an integer is required')
-    raise TypeError('integer argument expected, got float')
-
-def _check_date_fields(year, month, day):
-    year = _check_int_field(year)
-    month = _check_int_field(month)
-    day = _check_int_field(day)
-    if not MINYEAR <= year <= MAXYEAR:
-        raise ValueError('year must be in %d..%d' % (MINYEAR, MAXYEAR), year)
-    if not 1 <= month <= 12:
-        raise ValueError('month must be in 1..12', month)
-    dim = _days_in_month(year, month)
-    if not 1 <= day <= dim:
-        raise ValueError('day must be in 1..%d' % dim, day)
-    return year, month, day
-
-def _check_time_fields(hour, minute, second, microsecond):
-    hour = _check_int_field(hour)
-    minute = _check_int_field(minute)
-    second = _check_int_field(second)
-    microsecond = _check_int_field(microsecond)
-    if not 0 <= hour <= 23:
-        raise ValueError('hour must be in 0..23', hour)
-    if not 0 <= minute <= 59:
-        raise ValueError('minute must be in 0..59', minute)
-    if not 0 <= second <= 59:
-        raise ValueError('second must be in 0..59', second)
-    if not 0 <= microsecond <= 999999:
-        raise ValueError('microsecond must be in 0..999999', microsecond)
-    return hour, minute, second, microsecond
-
 def _check_tzinfo_arg(tz):
     if tz is not None and not isinstance(tz, tzinfo):
         raise TypeError("tzinfo argument must be None or of a tzinfo subclass")
@@ -357,84 +215,8 @@ def _check_tzinfo_arg(tz):
 #    don't raise annoying TypeErrors just because a datetime object
 #    is part of a heterogeneous collection.  If there's no known way to
 #    compare X to a datetime, saying they're not equal is reasonable.
-
-def _cmperror(x, y):
-    raise TypeError("can't compare '%s' to '%s'" % (
-                    type(x).__name__, type(y).__name__))
-
-def _normalize_pair(hi, lo, factor):
-    if not 0 <= lo <= factor-1:
-        inc, lo = divmod(lo, factor)
-        hi += inc
-    return hi, lo
-
-def _normalize_datetime(y, m, d, hh, mm, ss, us, ignore_overflow=False):
-    # Normalize all the inputs, and store the normalized values.
-    ss, us = _normalize_pair(ss, us, 1000000)
-    mm, ss = _normalize_pair(mm, ss, 60)
-    hh, mm = _normalize_pair(hh, mm, 60)
-    d, hh = _normalize_pair(d, hh, 24)
-    y, m, d = _normalize_date(y, m, d, ignore_overflow)
-    return y, m, d, hh, mm, ss, us
-
-def _normalize_date(year, month, day, ignore_overflow=False):
-    # That was easy.  Now it gets muddy:  the proper range for day
-    # can't be determined without knowing the correct month and year,
-    # but if day is, e.g., plus or minus a million, the current month
-    # and year values make no sense (and may also be out of bounds
-    # themselves).
-    # Saying 12 months == 1 year should be non-controversial.
-    if not 1 <= month <= 12:
-        year, month = _normalize_pair(year, month-1, 12)
-        month += 1
-        assert 1 <= month <= 12
-
-    # Now only day can be out of bounds (year may also be out of bounds
-    # for a datetime object, but we don't care about that here).
-    # If day is out of bounds, what to do is arguable, but at least the
-    # method here is principled and explainable.
-    dim = _days_in_month(year, month)
-    if not 1 <= day <= dim:
-        # Move day-1 days from the first of the month.  First try to
-        # get off cheap if we're only one day out of range (adjustments
-        # for timezone alone can't be worse than that).
-        if day == 0:    # move back a day
-            month -= 1
-            if month > 0:
-                day = _days_in_month(year, month)
-            else:
-                year, month, day = year-1, 12, 31
-        elif day == dim + 1:    # move forward a day
-            month += 1
-            day = 1
-            if month > 12:
-                month = 1
-                year += 1
-        else:
-            ordinal = _ymd2ord(year, month, 1) + (day - 1)
-            year, month, day = _ord2ymd(ordinal)
-
-    if not ignore_overflow and not MINYEAR <= year <= MAXYEAR:
-        raise OverflowError("date value out of range")
-    return year, month, day
-
-def _accum(tag, sofar, num, factor, leftover):
-    if isinstance(num, (int, long)):
-        prod = num * factor
-        rsum = sofar + prod
-        return rsum, leftover
-    if isinstance(num, float):
-        fracpart, intpart = _math.modf(num)
-        prod = int(intpart) * factor
-        rsum = sofar + prod
-        if fracpart == 0.0:
-            return rsum, leftover
-        assert isinstance(factor, (int, long))
-        fracpart, intpart = _math.modf(factor * fracpart)
-        rsum += int(intpart)
-        return rsum, leftover + fracpart
-    raise TypeError("unsupported type for timedelta %s component: %s" %
-                    (tag, type(num)))
+#
+# The comparisons themselves are implemented by the interp-level base classes.
 
 class timedelta(deltainterop):
     """Represent the difference between two datetime objects.
@@ -453,148 +235,46 @@ class timedelta(deltainterop):
     Representation: (days, seconds, microseconds).  Why?  Because I
     felt like it.
     """
-    __slots__ = '_days', '_seconds', '_microseconds', '_hashcode'
-
-    def __new__(cls, days=_SENTINEL, seconds=_SENTINEL, microseconds=_SENTINEL,
-                milliseconds=_SENTINEL, minutes=_SENTINEL, hours=_SENTINEL, weeks=_SENTINEL):
-        x = 0
-        leftover = 0.0
-        if microseconds is not _SENTINEL:
-            x, leftover = _accum("microseconds", x, microseconds, _US_PER_US, leftover)
-        if milliseconds is not _SENTINEL:
-            x, leftover = _accum("milliseconds", x, milliseconds, _US_PER_MS, leftover)
-        if seconds is not _SENTINEL:
-            x, leftover = _accum("seconds", x, seconds, _US_PER_SECOND, leftover)
-        if minutes is not _SENTINEL:
-            x, leftover = _accum("minutes", x, minutes, _US_PER_MINUTE, leftover)
-        if hours is not _SENTINEL:
-            x, leftover = _accum("hours", x, hours, _US_PER_HOUR, leftover)
-        if days is not _SENTINEL:
-            x, leftover = _accum("days", x, days, _US_PER_DAY, leftover)
-        if weeks is not _SENTINEL:
-            x, leftover = _accum("weeks", x, weeks, _US_PER_WEEK, leftover)
-        if leftover != 0.0:
-            x += _round(leftover)
-        return cls._from_microseconds(x)
-
-    @classmethod
-    def _from_microseconds(cls, us):
-        s, us = divmod(us, _US_PER_SECOND)
-        d, s = divmod(s, _SECONDS_PER_DAY)
-        return cls._create(d, s, us, False)
-
-    @classmethod
-    def _create(cls, d, s, us, normalize):
-        if normalize:
-            s, us = _normalize_pair(s, us, 1000000)
-            d, s = _normalize_pair(d, s, 24*3600)
-
-        if not -_MAX_DELTA_DAYS <= d <= _MAX_DELTA_DAYS:
-            raise OverflowError("days=%d; must have magnitude <= %d" % (d, _MAX_DELTA_DAYS))
-
-        self = deltainterop.__new__(cls)
-        self._days = d
-        self._seconds = s
-        self._microseconds = us
-        self._hashcode = -1
-        return self
+    __slots__ = ()
 
     def _to_microseconds(self):
-        return ((self._days * _SECONDS_PER_DAY + self._seconds) * _US_PER_SECOND +
-                self._microseconds)
+        return ((self.days * _SECONDS_PER_DAY + self.seconds) * _US_PER_SECOND +
+                self.microseconds)
 
     def __repr__(self):
         module = "datetime." if self.__class__ is timedelta else ""
-        if self._microseconds:
+        if self.microseconds:
             return "%s(%d, %d, %d)" % (module + self.__class__.__name__,
-                                       self._days,
-                                       self._seconds,
-                                       self._microseconds)
-        if self._seconds:
+                                       self.days,
+                                       self.seconds,
+                                       self.microseconds)
+        if self.seconds:
             return "%s(%d, %d)" % (module + self.__class__.__name__,
-                                   self._days,
-                                   self._seconds)
-        return "%s(%d)" % (module + self.__class__.__name__, self._days)
+                                   self.days,
+                                   self.seconds)
+        return "%s(%d)" % (module + self.__class__.__name__, self.days)
 
     def __str__(self):
-        mm, ss = divmod(self._seconds, 60)
+        mm, ss = divmod(self.seconds, 60)
         hh, mm = divmod(mm, 60)
         s = "%d:%02d:%02d" % (hh, mm, ss)
-        if self._days:
+        if self.days:
             def plural(n):
                 return n, abs(n) != 1 and "s" or ""
-            s = ("%d day%s, " % plural(self._days)) + s
-        if self._microseconds:
-            s = s + ".%06d" % self._microseconds
+            s = ("%d day%s, " % plural(self.days)) + s
+        if self.microseconds:
+            s = s + ".%06d" % self.microseconds
         return s
 
     def total_seconds(self):
         """Total seconds in the duration."""
         return self._to_microseconds() / 10**6
 
-    # Read-only field accessors
-    @property
-    def days(self):
-        """days"""
-        return self._days
-
-    @property
-    def seconds(self):
-        """seconds"""
-        return self._seconds
-
-    @property
-    def microseconds(self):
-        """microseconds"""
-        return self._microseconds
-
-    def __add__(self, other):
-        if isinstance(other, timedelta):
-            # for CPython compatibility, we cannot use
-            # our __class__ here, but need a real timedelta
-            return timedelta._create(self._days + other._days,
-                                     self._seconds + other._seconds,
-                                     self._microseconds + other._microseconds,
-                                     True)
-        return NotImplemented
-
-    def __sub__(self, other):
-        if isinstance(other, timedelta):
-            # for CPython compatibility, we cannot use
-            # our __class__ here, but need a real timedelta
-            return timedelta._create(self._days - other._days,
-                                     self._seconds - other._seconds,
-                                     self._microseconds - other._microseconds,
-                                     True)
-        return NotImplemented
-
-    def __neg__(self):
-        # for CPython compatibility, we cannot use
-        # our __class__ here, but need a real timedelta
-        return timedelta._create(-self._days,
-                                 -self._seconds,
-                                 -self._microseconds,
-                                 True)
-
-    def __pos__(self):
-        # for CPython compatibility, we cannot use
-        # our __class__ here, but need a real timedelta
-        return timedelta._create(self._days,
-                                 self._seconds,
-                                 self._microseconds,
-                                 False)
-
-    def __abs__(self):
-        if self._days < 0:
-            return -self
-        else:
-            return self
-
     def __mul__(self, other):
         if not isinstance(other, (int, long)):
             return NotImplemented
         usec = self._to_microseconds()
-        return timedelta._from_microseconds(usec * other)
+        return timedelta(0, 0, usec * other)
 
     __rmul__ = __mul__
 
@@ -602,70 +282,10 @@ class timedelta(deltainterop):
         if not isinstance(other, (int, long)):
             return NotImplemented
         usec = self._to_microseconds()
-        return timedelta._from_microseconds(usec // other)
+        return timedelta(0, 0, usec // other)
 
     __floordiv__ = __div__
 
-    # Comparisons of timedelta objects with other.
-
-    def __eq__(self, other):
-        if isinstance(other, timedelta):
-            return self._cmp(other) == 0
-        else:
-            return False
-
-    def __ne__(self, other):
-        if isinstance(other, timedelta):
-            return self._cmp(other) != 0
-        else:
-            return True
-
-    def __le__(self, other):
-        if isinstance(other, timedelta):
-            return self._cmp(other) <= 0
-        else:
-            _cmperror(self, other)
-
-    def __lt__(self, other):
-        if isinstance(other, timedelta):
-            return self._cmp(other) < 0
-        else:
-            _cmperror(self, other)
-
-    def __ge__(self, other):
-        if isinstance(other, timedelta):
-            return self._cmp(other) >= 0
-        else:
-            _cmperror(self, other)
-
-    def __gt__(self, other):
-        if isinstance(other, timedelta):
-            return self._cmp(other) > 0
-        else:
-            _cmperror(self, other)
-
-    def _cmp(self, other):
-        assert isinstance(other, timedelta)
-        return _cmp(self._getstate(), other._getstate())
-
-    def __hash__(self):
-        if self._hashcode == -1:
-            self._hashcode = hash(self._getstate())
-        return self._hashcode
-
-    def __nonzero__(self):
-        return (self._days != 0 or
-                self._seconds != 0 or
-                self._microseconds != 0)
-
-    # Pickle support.
-
-    def _getstate(self):
-        return (self._days, self._seconds, self._microseconds)
-
-    def __reduce__(self):
-        return (self.__class__, self._getstate())
-
 timedelta.min = timedelta(-_MAX_DELTA_DAYS)
 timedelta.max = timedelta(_MAX_DELTA_DAYS, 24*3600-1, 1000000-1)
 timedelta.resolution = timedelta(microseconds=1)
@@ -698,29 +318,7 @@ class date(dateinterop):
     Properties (readonly):
     year, month, day
     """
-    __slots__ = '_year', '_month', '_day', '_hashcode'
-
-    def __new__(cls, year, month=None, day=None):
-        """Constructor.
-
-        Arguments:
-
-        year, month, day (required, base 1)
-        """
-        if month is None and isinstance(year, bytes) and len(year) == 4 and \
-                1 <= ord(year[2]) <= 12:
-            # Pickle support
-            self = dateinterop.__new__(cls)
-            self.__setstate(year)
-            self._hashcode = -1
-            return self
-        year, month, day = _check_date_fields(year, month, day)
-        self = dateinterop.__new__(cls)
-        self._year = year
-        self._month = month
-        self._day = day
-        self._hashcode = -1
-        return self
+    __slots__ = ()
 
     # Additional constructors
 
@@ -761,9 +359,9 @@ class date(dateinterop):
         """
         module = "datetime." if self.__class__ is date else ""
         return "%s(%d, %d, %d)" % (module + self.__class__.__name__,
-                                   self._year,
-                                   self._month,
-                                   self._day)
+                                   self.year,
+                                   self.month,
+                                   self.day)
 
     # XXX These shouldn't depend on time.localtime(), because that
     # clips the usable dates to [1970 .. 2038).  At least ctime() is
@@ -775,8 +373,8 @@ class date(dateinterop):
         weekday = self.toordinal() % 7 or 7
         return "%s %s %2d 00:00:00 %04d" % (
             _DAYNAMES[weekday],
-            _MONTHNAMES[self._month],
-            self._day, self._year)
+            _MONTHNAMES[self.month],
+            self.day, self.year)
 
     def strftime(self, format):
         "Format using strftime()."
@@ -790,159 +388,24 @@ class date(dateinterop):
             return self.strftime(fmt)
         return str(self)
 
-    def isoformat(self):
-        """Return the date formatted according to ISO.
-
-        This is 'YYYY-MM-DD'.
-
-        References:
-        - http://www.w3.org/TR/NOTE-datetime
-        - http://www.cl.cam.ac.uk/~mgk25/iso-time.html
-        """
-        return "%04d-%02d-%02d" % (self._year, self._month, self._day)
-
-    __str__ = isoformat
-
-    # Read-only field accessors
-    @property
-    def year(self):
-        """year (1-9999)"""
-        return self._year
-
-    @property
-    def month(self):
-        """month (1-12)"""
-        return self._month
-
-    @property
-    def day(self):
-        """day (1-31)"""
-        return self._day
-
-    # Standard conversions, __cmp__, __hash__ (and helpers)
+    # Standard conversions (and helpers)
 
     def timetuple(self):
         "Return local time tuple compatible with time.localtime()."
-        return _build_struct_time(self._year, self._month, self._day,
+        return _build_struct_time(self.year, self.month, self.day,
                                   0, 0, 0, -1)
 
-    def toordinal(self):
-        """Return proleptic Gregorian ordinal for the year, month and day.
-
-        January 1 of year 1 is day 1.  Only the year, month and day values
-        contribute to the result.
-        """
-        return _ymd2ord(self._year, self._month, self._day)
-
     def replace(self, year=None, month=None, day=None):
         """Return a new date with new values for the specified fields."""
         if year is None:
-            year = self._year
+            year = self.year
         if month is None:
-            month = self._month
+            month = self.month
         if day is None:
-            day = self._day
+            day = self.day
         return date.__new__(type(self), year, month, day)
 
-    # Comparisons of date objects with other.
-
-    def __eq__(self, other):
-        if isinstance(other, date):
-            return self._cmp(other) == 0
-        elif hasattr(other, "timetuple"):
-            return NotImplemented
-        else:
-            return False
-
-    def __ne__(self, other):
-        if isinstance(other, date):
-            return self._cmp(other) != 0
-        elif hasattr(other, "timetuple"):
-            return NotImplemented
-        else:
-            return True
-
-    def __le__(self, other):
-        if isinstance(other, date):
-            return self._cmp(other) <= 0
-        elif hasattr(other, "timetuple"):
-            return NotImplemented
-        else:
-            _cmperror(self, other)
-
-    def __lt__(self, other):
-        if isinstance(other, date):
-            return self._cmp(other) < 0
-        elif hasattr(other, "timetuple"):
-            return NotImplemented
-        else:
-            _cmperror(self, other)
-
-    def __ge__(self, other):
-        if isinstance(other, date):
-            return self._cmp(other) >= 0
-        elif hasattr(other, "timetuple"):
-            return NotImplemented
-        else:
-            _cmperror(self, other)
-
-    def __gt__(self, other):
-        if isinstance(other, date):
-            return self._cmp(other) > 0
-        elif hasattr(other, "timetuple"):
-            return NotImplemented
-        else:
-            _cmperror(self, other)
-
-    def _cmp(self, other):
-        assert isinstance(other, date)
-        y, m, d = self._year, self._month, self._day
-        y2, m2, d2 = other._year, other._month, other._day
-        return _cmp((y, m, d), (y2, m2, d2))
-
-    def __hash__(self):
-        "Hash."
-        if self._hashcode == -1:
-            self._hashcode = hash(self._getstate())
-        return self._hashcode
-
-    # Computations
-
-    def _add_timedelta(self, other, factor):
-        y, m, d = _normalize_date(
-            self._year,
-            self._month,
-            self._day + other.days * factor)
-        return date(y, m, d)
-
-    def __add__(self, other):
-        "Add a date to a timedelta."
-        if isinstance(other, timedelta):
-            return self._add_timedelta(other, 1)
-        return NotImplemented
-
-    __radd__ = __add__
-
-    def __sub__(self, other):
-        """Subtract two dates, or a date and a timedelta."""
-        if isinstance(other, date):
-            days1 = self.toordinal()
-            days2 = other.toordinal()
-            return timedelta._create(days1 - days2, 0, 0, False)
-        if isinstance(other, timedelta):
-            return self._add_timedelta(other, -1)
-        return NotImplemented
-
-    def weekday(self):
-        "Return day of the week, where Monday == 0 ... Sunday == 6."
-        return (self.toordinal() + 6) % 7
-
-    # Day-of-the-week and week-of-the-year, according to ISO
-
-    def isoweekday(self):
-        "Return day of the week, where Monday == 1 ... Sunday == 7."
-        # 1-Jan-0001 is a Monday
-        return self.toordinal() % 7 or 7
+    # Week-of-the-year, according to ISO
 
     def isocalendar(self):
         """Return a 3-tuple containing ISO year, week number, and weekday.
@@ -956,9 +419,9 @@ class date(dateinterop):
         ISO calendar algorithm taken from
         http://www.phys.uu.nl/~vgent/calendar/isocalendar.htm
         """
-        year = self._year
+        year = self.year
         week1monday = _isoweek1monday(year)
-        today = _ymd2ord(self._year, self._month, self._day)
+        today = _ymd2ord(self.year, self.month, self.day)
         # Internally, week and day have origin 0
         week, day = divmod(today - week1monday, 7)
         if week < 0:
@@ -971,20 +434,6 @@ class date(dateinterop):
                 week = 0
         return year, week+1, day+1
 
-    # Pickle support.
-
-    def _getstate(self):
-        yhi, ylo = divmod(self._year, 256)
-        return (_struct.pack('4B', yhi, ylo, self._month, self._day),)
-
-    def __setstate(self, string):
-        yhi, ylo, self._month, self._day = (ord(string[0]), ord(string[1]),
-                                            ord(string[2]), ord(string[3]))
-        self._year = yhi * 256 + ylo
-
-    def __reduce__(self):
-        return (self.__class__, self._getstate())
-
 _date_class = date  # so functions w/ args named "date" can get at the class
 
 date.min = date(1, 1, 1)
@@ -1087,187 +536,26 @@ class time(timeinterop):
     Properties (readonly):
     hour, minute, second, microsecond, tzinfo
     """
-    __slots__ = '_hour', '_minute', '_second', '_microsecond', '_tzinfo', '_hashcode'
-
-    def __new__(cls, hour=0, minute=0, second=0, microsecond=0, tzinfo=None):
-        """Constructor.
-
-        Arguments:
-
-        hour, minute (required)
-        second, microsecond (default to zero)
-        tzinfo (default to None)
-        """
-        if isinstance(hour, bytes) and len(hour) == 6 and ord(hour[0]) < 24:
-            # Pickle support
-            self = timeinterop.__new__(cls)
-            self.__setstate(hour, minute or None)
-            self._hashcode = -1
-            return self
-        hour, minute, second, microsecond = _check_time_fields(
-            hour, minute, second, microsecond)
-        _check_tzinfo_arg(tzinfo)
-        self = timeinterop.__new__(cls)
-        self._hour = hour
-        self._minute = minute
-        self._second = second
-        self._microsecond = microsecond
-        self._tzinfo = tzinfo
-        self._hashcode = -1
-        return self
-
-    # Read-only field accessors
-    @property
-    def hour(self):
-        """hour (0-23)"""
-        return self._hour
-
-    @property
-    def minute(self):
-        """minute (0-59)"""
-        return self._minute
-
-    @property
-    def second(self):
-        """second (0-59)"""
-        return self._second
-
-    @property
-    def microsecond(self):
-        """microsecond (0-999999)"""
-        return self._microsecond
-
-    @property
-    def tzinfo(self):
-        """timezone info object"""
-        return self._tzinfo
-
-    # Standard conversions, __hash__ (and helpers)
-
-    # Comparisons of time objects with other.
-
-    def __eq__(self, other):
-        if isinstance(other, time):
-            return self._cmp(other) == 0
-        else:
-            return False
-
-    def __ne__(self, other):
-        if isinstance(other, time):
-            return self._cmp(other) != 0
-        else:
-            return True
-
-    def __le__(self, other):
-        if isinstance(other, time):
-            return self._cmp(other) <= 0
-        else:
-            _cmperror(self, other)
-
-    def __lt__(self, other):
-        if isinstance(other, time):
-            return self._cmp(other) < 0
-        else:
-            _cmperror(self, other)
-
-    def __ge__(self, other):
-        if isinstance(other, time):
-            return self._cmp(other) >= 0
-        else:
-            _cmperror(self, other)
-
-    def __gt__(self, other):
-        if isinstance(other, time):
-            return self._cmp(other) > 0
-        else:
-            _cmperror(self, other)
-
-    def _cmp(self, other):
-        assert isinstance(other, time)
-        mytz = self._tzinfo
-        ottz = other._tzinfo
-        myoff = otoff = None
-
-        if mytz is ottz:
-            base_compare = True
-        else:
-            myoff = self._utcoffset()
-            otoff = other._utcoffset()
-            base_compare = myoff == otoff
-
-        if base_compare:
-            return _cmp((self._hour, self._minute, self._second,
-                         self._microsecond),
-                        (other._hour, other._minute, other._second,
-                         other._microsecond))
-        if myoff is None or otoff is None:
-            raise TypeError("can't compare offset-naive and offset-aware times")
-        myhhmm = self._hour * 60 + self._minute - myoff
-        othhmm = other._hour * 60 + other._minute - otoff
-        return _cmp((myhhmm, self._second, self._microsecond),
-                    (othhmm, other._second, other._microsecond))
-
-    def __hash__(self):
-        """Hash."""
-        if self._hashcode == -1:
-            tzoff = self._utcoffset()
-            if not tzoff:  # zero or None
-                self._hashcode = hash(self._getstate()[0])
-            else:
-                h, m = divmod(self.hour * 60 + self.minute - tzoff, 60)
-                if 0 <= h < 24:
-                    self._hashcode = hash(time(h, m, self.second, self.microsecond))
-                else:
-                    self._hashcode = hash((h, m, self.second, self.microsecond))
-        return self._hashcode
+    __slots__ = ()
 
     # Conversion to string
 
-    def _tzstr(self, sep=":"):
-        """Return formatted timezone offset (+xx:xx) or None."""
-        off = self._utcoffset()
-        if off is not None:
-            if off < 0:
-                sign = "-"
-                off = -off
-            else:
-                sign = "+"
-            hh, mm = divmod(off, 60)
-            assert 0 <= hh < 24
-            off = "%s%02d%s%02d" % (sign, hh, sep, mm)
-        return off
-
     def __repr__(self):
         """Convert to formal string, for repr()."""
-        if self._microsecond != 0:
-            s = ", %d, %d" % (self._second, self._microsecond)
-        elif self._second != 0:
-            s = ", %d" % self._second
+        if self.microsecond != 0:
+            s = ", %d, %d" % (self.second, self.microsecond)
+        elif self.second != 0:
+            s = ", %d" % self.second
         else:
             s = ""
         module = "datetime." if self.__class__ is time else ""
         s= "%s(%d, %d%s)" % (module + self.__class__.__name__,
-                             self._hour, self._minute, s)
-        if self._tzinfo is not None:
+                             self.hour, self.minute, s)
+        if self.tzinfo is not None:
             assert s[-1:] == ")"
-            s = s[:-1] + ", tzinfo=%r" % self._tzinfo + ")"
-        return s
-
-    def isoformat(self):
-        """Return the time formatted according to ISO.
-
-        This is 'HH:MM:SS.mmmmmm+zz:zz', or 'HH:MM:SS+zz:zz' if
-        self.microsecond == 0.
-        """
-        s = _format_time(self._hour, self._minute, self._second,
-                         self._microsecond)
-        tz = self._tzstr()
-        if tz:
-            s += tz
+            s = s[:-1] + ", tzinfo=%r" % self.tzinfo + ")"
         return s
 
-    __str__ = isoformat
-
     def strftime(self, format):
         """Format using strftime().  The date part of the timestamp passed
         to underlying strftime should not be used.
@@ -1275,7 +563,7 @@ class time(timeinterop):
         # The year must be >= _MINYEARFMT else Python's strftime implementation
         # can raise a bogus exception.
         timetuple = (1900, 1, 1,
-                     self._hour, self._minute, self._second,
+                     self.hour, self.minute, self.second,
                      0, 1, -1)
         return _wrap_strftime(self, format, timetuple)
 
@@ -1292,19 +580,19 @@ class time(timeinterop):
     def utcoffset(self):
         """Return the timezone offset in minutes east of UTC (negative west of
         UTC)."""
-        if self._tzinfo is None:
+        if self.tzinfo is None:
             return None
-        offset = self._tzinfo.utcoffset(None)
+        offset = self.tzinfo.utcoffset(None)
         offset = _check_utc_offset("utcoffset", offset)
         if offset is not None:
-            offset = timedelta._create(0, offset * 60, 0, True)
+            offset = timedelta(0, offset * 60)
         return offset
 
     # Return an integer (or None) instead of a timedelta (or None).
     def _utcoffset(self):
-        if self._tzinfo is None:
+        if self.tzinfo is None:
             return None
-        offset = self._tzinfo.utcoffset(None)
+        offset = self.tzinfo.utcoffset(None)
         offset = _check_utc_offset("utcoffset", offset)
         return offset
 
@@ -1315,9 +603,9 @@ class time(timeinterop):
         it mean anything in particular. For example, "GMT", "UTC", "-500",
         "-5:00", "EDT", "US/Eastern", "America/New York" are all valid replies.
         """
-        if self._tzinfo is None:
+        if self.tzinfo is None:
             return None
-        name = self._tzinfo.tzname(None)
+        name = self.tzinfo.tzname(None)
         _check_tzname(name)
         return name
 
@@ -1330,19 +618,19 @@ class time(timeinterop):
         need to consult dst() unless you're interested in displaying the DST
         info.
         """
-        if self._tzinfo is None:
+        if self.tzinfo is None:
             return None
-        offset = self._tzinfo.dst(None)
+        offset = self.tzinfo.dst(None)
         offset = _check_utc_offset("dst", offset)
         if offset is not None:
-            offset = timedelta._create(0, offset * 60, 0, True)
+            offset = timedelta(0, offset * 60)
         return offset
 
     # Return an integer (or None) instead of a timedelta (or None).
     def _dst(self):
-        if self._tzinfo is None:
+        if self.tzinfo is None:
             return None
-        offset = self._tzinfo.dst(None)
+        offset = self.tzinfo.dst(None)
         offset = _check_utc_offset("dst", offset)
         return offset
 
@@ -1362,105 +650,19 @@ class time(timeinterop):
         return time.__new__(type(self),
                             hour, minute, second, microsecond, tzinfo)
 
-    def __nonzero__(self):
-        if self.second or self.microsecond:
-            return True
-        offset = self._utcoffset() or 0
-        return self.hour * 60 + self.minute != offset
-
-    # Pickle support.
-
-    def _getstate(self):
-        us2, us3 = divmod(self._microsecond, 256)
-        us1, us2 = divmod(us2, 256)
-        basestate = _struct.pack('6B', self._hour, self._minute, self._second,
-                                       us1, us2, us3)
-        if self._tzinfo is None:
-            return (basestate,)
-        else:
-            return (basestate, self._tzinfo)
-
-    def __setstate(self, string, tzinfo):
-        if tzinfo is not None and not isinstance(tzinfo, _tzinfo_class):
-            raise TypeError("bad tzinfo state arg")
-        self._hour, self._minute, self._second, us1, us2, us3 = (
-            ord(string[0]), ord(string[1]), ord(string[2]),
-            ord(string[3]), ord(string[4]), ord(string[5]))
-        self._microsecond = (((us1 << 8) | us2) << 8) | us3
-        self._tzinfo = tzinfo
-
-    def __reduce__(self):
-        return (time, self._getstate())
-
 _time_class = time  # so functions w/ args named "time" can get at the class
 
 time.min = time(0, 0, 0)
 time.max = time(23, 59, 59, 999999)
 time.resolution = timedelta(microseconds=1)
 
-class datetime(date):
+class datetime(date, datetimeinterop):
     """datetime(year, month, day[, hour[, minute[, second[, microsecond[,tzinfo]]]]])
 
     The year, month and day arguments are required. tzinfo may be None, or an
     instance of a tzinfo subclass. The remaining arguments may be ints or longs.
     """
-    __slots__ = date.__slots__ + time.__slots__
-
-    def __new__(cls, year, month=None, day=None, hour=0, minute=0, second=0,
-                microsecond=0, tzinfo=None):
-        if isinstance(year, bytes) and len(year) == 10 and \
-                1 <= ord(year[2]) <= 12:
-            # Pickle support
-            self = dateinterop.__new__(cls)
-            self.__setstate(year, month)
-            self._hashcode = -1
-            return self
-        elif isinstance(year, tuple) and len(year) == 7:
-            # Used by internal functions where the arguments are guaranteed to
-            # be valid.
-            year, month, day, hour, minute, second, microsecond = year
-        else:
-            year, month, day = _check_date_fields(year, month, day)
-            hour, minute, second, microsecond = _check_time_fields(
-                hour, minute, second, microsecond)
-        _check_tzinfo_arg(tzinfo)
-        self = dateinterop.__new__(cls)
-        self._year = year
-        self._month = month
-        self._day = day
-        self._hour = hour
-        self._minute = minute
-        self._second = second
-        self._microsecond = microsecond
-        self._tzinfo = tzinfo
-        self._hashcode = -1
-        return self
-
-    # Read-only field accessors
-    @property
-    def hour(self):
-        """hour (0-23)"""
-        return self._hour
-
-    @property
-    def minute(self):
-        """minute (0-59)"""
-        return self._minute
-
-    @property
-    def second(self):
-        """second (0-59)"""
-        return self._second
-
-    @property
-    def microsecond(self):
-        """microsecond (0-999999)"""
-        return self._microsecond
-
-    @property
-    def tzinfo(self):
-        """timezone info object"""
-        return self._tzinfo
+    __slots__ = ()
 
     @classmethod
     def fromtimestamp(cls, timestamp, tz=None):
@@ -1496,7 +698,7 @@ class datetime(date):
             us = 0
         y, m, d, hh, mm, ss, weekday, jday, dst = converter(timestamp)
         ss = min(ss, 59)    # clamp out leap seconds if the platform has them
-        return cls((y, m, d, hh, mm, ss, us), tzinfo=tzinfo)
+        return cls(y, m, d, hh, mm, ss, us, tzinfo)
 
     @classmethod
     def now(cls, tz=None):
@@ -1545,7 +747,7 @@ class datetime(date):
 
     def date(self):
         "Return the date part."
-        return date(self._year, self._month, self._day)
+        return date(self.year, self.month, self.day)
 
     def time(self):
         "Return the time part, with tzinfo None."
@@ -1554,7 +756,7 @@ class datetime(date):
     def timetz(self):
         "Return the time part, with same tzinfo."
         return time(self.hour, self.minute, self.second, self.microsecond,
-                    self._tzinfo)
+                    self.tzinfo)
 
     def replace(self, year=None, month=None, day=None, hour=None,
                 minute=None, second=None, microsecond=None, tzinfo=True):
@@ -1606,41 +808,15 @@ class datetime(date):
         weekday = self.toordinal() % 7 or 7
         return "%s %s %2d %02d:%02d:%02d %04d" % (
             _DAYNAMES[weekday],
-            _MONTHNAMES[self._month],
-            self._day,
-            self._hour, self._minute, self._second,
-            self._year)
-
-    def isoformat(self, sep='T'):
-        """Return the time formatted according to ISO.
-
-        This is 'YYYY-MM-DD HH:MM:SS.mmmmmm', or 'YYYY-MM-DD HH:MM:SS' if
-        self.microsecond == 0.
-
-        If self.tzinfo is not None, the UTC offset is also attached, giving
-        'YYYY-MM-DD HH:MM:SS.mmmmmm+HH:MM' or 'YYYY-MM-DD HH:MM:SS+HH:MM'.
-
-        Optional argument sep specifies the separator between date and
-        time, default 'T'.
-        """
-        s = ("%04d-%02d-%02d%c" % (self._year, self._month, self._day, sep) +
-             _format_time(self._hour, self._minute, self._second,
-                          self._microsecond))
-        off = self._utcoffset()
-        if off is not None:
-            if off < 0:
-                sign = "-"
-                off = -off
-            else:
-                sign = "+"
-            hh, mm = divmod(off, 60)
-            s += "%s%02d:%02d" % (sign, hh, mm)
-        return s
+            _MONTHNAMES[self.month],
+            self.day,
+            self.hour, self.minute, self.second,
+            self.year)
 
     def __repr__(self):
         """Convert to formal string, for repr()."""
-        L = [self._year, self._month, self._day,  # These are never zero
-             self._hour, self._minute, self._second, self._microsecond]
+        L = [self.year, self.month, self.day,  # These are never zero
+             self.hour, self.minute, self.second, self.microsecond]
         if L[-1] == 0:
             del L[-1]
         if L[-1] == 0:
@@ -1648,18 +824,18 @@ class datetime(date):
         s = ", ".join(map(str, L))
         module = "datetime." if self.__class__ is datetime else ""
         s = "%s(%s)" % (module + self.__class__.__name__, s)
-        if self._tzinfo is not None:
+        if self.tzinfo is not None:
             assert s[-1:] == ")"
-            s = s[:-1] + ", tzinfo=%r" % self._tzinfo + ")"
+            s = s[:-1] + ", tzinfo=%r" % self.tzinfo + ")"
         return s
 
-    def __str__(self):
-        "Convert to string, for str()."
-        return self.isoformat(sep=' ')
-
     @classmethod
     def strptime(cls, date_string, format):
         'string, format -> new datetime parsed from a string (like time.strptime()).'
+        if type(date_string) is str and type(format) is str:
+            fields = _parse_iso(date_string, format)
+            if fields is not None:
+                return cls(*fields)
         from _strptime import _strptime
         # _strptime._strptime returns a two-element tuple.  The first
         # element is a time.struct_time object.  The second is the
@@ -1670,19 +846,19 @@ class datetime(date):
     def utcoffset(self):
         """Return the timezone offset in minutes east of UTC (negative west of
         UTC)."""
-        if self._tzinfo is None:
+        if self.tzinfo is None:
             return None
-        offset = self._tzinfo.utcoffset(self)
+        offset = self.tzinfo.utcoffset(self)
         offset = _check_utc_offset("utcoffset", offset)
         if offset is not None:
-            offset = timedelta._create(0, offset * 60, 0, True)
+            offset = timedelta(0, offset * 60)
         return offset
 
     # Return an integer (or None) instead of a timedelta (or None).
     def _utcoffset(self):
-        if self._tzinfo is None:
+        if self.tzinfo is None:
             return None
-        offset = self._tzinfo.utcoffset(self)
+        offset = self.tzinfo.utcoffset(self)
         offset = _check_utc_offset("utcoffset", offset)
         return offset
 
@@ -1693,9 +869,9 @@ class datetime(date):
         it mean anything in particular. For example, "GMT", "UTC", "-500",
         "-5:00", "EDT", "US/Eastern", "America/New York" are all valid replies.
         """
-        if self._tzinfo is None:
+        if self.tzinfo is None:
             return None
-        name = self._tzinfo.tzname(self)
+        name = self.tzinfo.tzname(self)
         _check_tzname(name)
         return name
 
@@ -1708,189 +884,29 @@ class datetime(date):
         need to consult dst() unless you're interested in displaying the DST
         info.
         """
-        if self._tzinfo is None:
+        if self.tzinfo is None:
             return None
-        offset = self._tzinfo.dst(self)
+        offset = self.tzinfo.dst(self)
         offset = _check_utc_offset("dst", offset)
         if offset is not None:
-            offset = timedelta._create(0, offset * 60, 0, True)
+            offset = timedelta(0, offset * 60)
         return offset
 
     # Return an integer (or None) instead of a timedelta (or None).
     def _dst(self):
-        if self._tzinfo is None:
+        if self.tzinfo is None:
             return None
-        offset = self._tzinfo.dst(self)
+        offset = self.tzinfo.dst(self)
         offset = _check_utc_offset("dst", offset)
         return offset
 
-    # Comparisons of datetime objects with other.
-
-    def __eq__(self, other):
-        if isinstance(other, datetime):
-            return self._cmp(other) == 0
-        elif hasattr(other, "timetuple") and not isinstance(other, date):
-            return NotImplemented
-        else:
-            return False
-
-    def __ne__(self, other):
-        if isinstance(other, datetime):
-            return self._cmp(other) != 0
-        elif hasattr(other, "timetuple") and not isinstance(other, date):
-            return NotImplemented
-        else:
-            return True
-
-    def __le__(self, other):
-        if isinstance(other, datetime):
-            return self._cmp(other) <= 0
-        elif hasattr(other, "timetuple") and not isinstance(other, date):
-            return NotImplemented
-        else:
-            _cmperror(self, other)
-
-    def __lt__(self, other):
-        if isinstance(other, datetime):
-            return self._cmp(other) < 0
-        elif hasattr(other, "timetuple") and not isinstance(other, date):
-            return NotImplemented
-        else:
-            _cmperror(self, other)
-
-    def __ge__(self, other):
-        if isinstance(other, datetime):
-            return self._cmp(other) >= 0
-        elif hasattr(other, "timetuple") and not isinstance(other, date):
-            return NotImplemented
-        else:
-            _cmperror(self, other)
-
-    def __gt__(self, other):
-        if isinstance(other, datetime):
-            return self._cmp(other) > 0
-        elif hasattr(other, "timetuple") and not isinstance(other, date):
-            return NotImplemented
-        else:
-            _cmperror(self, other)
-
-    def _cmp(self, other):
-        assert isinstance(other, datetime)
-        mytz = self._tzinfo
-        ottz = other._tzinfo
-        myoff = otoff = None
-
-        if mytz is ottz:
-            base_compare = True
-        else:
-            if mytz is not None:
-                myoff = self._utcoffset()
-            if ottz is not None:
-                otoff = other._utcoffset()
-            base_compare = myoff == otoff
-
-        if base_compare:
-            return _cmp((self._year, self._month, self._day,
-                         self._hour, self._minute, self._second,
-                         self._microsecond),
-                        (other._year, other._month, other._day,
-                         other._hour, other._minute, other._second,
-                         other._microsecond))
-        if myoff is None or otoff is None:
-            raise TypeError("can't compare offset-naive and offset-aware datetimes")
-        # XXX What follows could be done more efficiently...
-        diff = self - other     # this will take offsets into account
-        if diff.days < 0:
-            return -1
-        return diff and 1 or 0
-
-    def _add_timedelta(self, other, factor):
-        result = _normalize_datetime(
-            self._year,
-            self._month,
-            self._day + other.days * factor,
-            self._hour,
-            self._minute,
-            self._second + other.seconds * factor,
-            self._microsecond + other.microseconds * factor)
-        return datetime(result, tzinfo=self._tzinfo)
-
-    def __add__(self, other):
-        "Add a datetime and a timedelta."
-        if not isinstance(other, timedelta):
-            return NotImplemented
-        return self._add_timedelta(other, 1)
-
-    __radd__ = __add__
-
-    def __sub__(self, other):
-        "Subtract two datetimes, or a datetime and a timedelta."
-        if not isinstance(other, datetime):
-            if isinstance(other, timedelta):
-                return self._add_timedelta(other, -1)
-            return NotImplemented
-
-        delta_d = self.toordinal() - other.toordinal()
-        delta_s = (self._hour - other._hour) * 3600 + \
-                  (self._minute - other._minute) * 60 + \
-                  (self._second - other._second)
-        delta_us = self._microsecond - other._microsecond
-        base = timedelta._create(delta_d, delta_s, delta_us, True)
-        if self._tzinfo is other._tzinfo:
-            return base
-        myoff = self._utcoffset()
-        otoff = other._utcoffset()
-        if myoff == otoff:
-            return base
-        if myoff is None or otoff is None:
-            raise TypeError("can't subtract offset-naive and offset-aware datetimes")
-        return base + timedelta(minutes = otoff-myoff)
-
-    def __hash__(self):
-        if self._hashcode == -1:
-            tzoff = self._utcoffset()
-            if tzoff is None:
-                self._hashcode = hash(self._getstate()[0])
-            else:
-                days = _ymd2ord(self.year, self.month, self.day)
-                seconds = self.hour * 3600 + (self.minute - tzoff) * 60 + self.second
-                self._hashcode = hash(timedelta(days, seconds, self.microsecond))
-        return self._hashcode
-
-    # Pickle support.
-
-    def _getstate(self):
-        yhi, ylo = divmod(self._year, 256)
-        us2, us3 = divmod(self._microsecond, 256)
-        us1, us2 = divmod(us2, 256)
-        basestate = _struct.pack('10B', yhi, ylo, self._month, self._day,
-                                        self._hour, self._minute, self._second,
-                                        us1, us2, us3)
-        if self._tzinfo is None:
-            return (basestate,)
-        else:
-            return (basestate, self._tzinfo)
-
-    def __setstate(self, string, tzinfo):
-        if tzinfo is not None and not isinstance(tzinfo, _tzinfo_class):
-            raise TypeError("bad tzinfo state arg")
-        (yhi, ylo, self._month, self._day, self._hour,
-            self._minute, self._second, us1, us2, us3) = (ord(string[0]),
-                ord(string[1]), ord(string[2]), ord(string[3]),
-                ord(string[4]), ord(string[5]), ord(string[6]),
-                ord(string[7]), ord(string[8]), ord(string[9]))
-        self._year = yhi * 256 + ylo
-        self._microsecond = (((us1 << 8) | us2) << 8) | us3
-        self._tzinfo = tzinfo
-
-    def __reduce__(self):
-        return (self.__class__, self._getstate())
-
 
 datetime.min = datetime(1, 1, 1)
 datetime.max = datetime(9999, 12, 31, 23, 59, 59, 999999)
 datetime.resolution = timedelta(microseconds=1)
 
+_set_types(timedelta, date, datetime, time, tzinfo)
+
 
 def _isoweek1monday(year):
     # Helper to calculate the day number of the Monday starting week 1
@@ -50,6 +50,21 @@ def mapdict_cache_counter(space, name):
     return space.newtuple([space.newint(cache.hits.get(name, 0)),
                            space.newint(cache.misses.get(name, 0))])
 
+def json_cache_counter(space):
+    """Return a tuple (key_hits, key_misses, value_hits, value_misses,
+    evictions) for the process-wide caches of decoded keys and short string
+    values of the _pypyjson decoder."""
+    from pypy.module._pypyjson.interp_decoder import Terminator
+    terminator = space.fromcache(Terminator)
+    key_cache = terminator.key_cache
+    value_cache = terminator.value_cache
+    return space.newtuple([space.newint(key_cache.hits),
+                           space.newint(key_cache.misses),
+                           space.newint(value_cache.hits),
+                           space.newint(value_cache.misses),
+                           space.newint(key_cache.evictions +
+                                        value_cache.evictions)])
+
 def builtinify(space, w_func):
     """To implement at app-level modules that are, in CPython,
     implemented in C: this decorator protects a function from being ever
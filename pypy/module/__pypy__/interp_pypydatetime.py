@@ -1,24 +1,1150 @@
+import math
+import operator
+import sys
+
 from pypy.interpreter.baseobjspace import W_Root
-from pypy.interpreter.typedef import TypeDef
-from pypy.interpreter.gateway import interp2app
-from rpython.tool.sourcetools import func_with_new_name
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.typedef import (TypeDef, interp_attrproperty,
+    interp_attrproperty_w)
+from pypy.interpreter.gateway import interp2app, unwrap_spec, WrappedDefault
+from rpython.rlib import jit
+from rpython.rlib.rarithmetic import ovfcheck, r_longlong
+from rpython.rlib.rstring import StringBuilder
+
+# ____________________________________________________________
+# Interp-level versions of the helpers that dominate the construction and
+# the arithmetic of lib_pypy/datetime.py objects.  They work with plain
+# machine integers and must give exactly the same results (and raise the
+# same exceptions) as the pure Python code they replace.
+
+MINYEAR = 1
+MAXYEAR = 9999
+MAX_DELTA_DAYS = 999999999
+NO_OFFSET = -sys.maxint - 1     # the utcoffset() of a naive object
+
+CMP_UNRELATED = 2               # results of compare() besides -1, 0, 1
+CMP_NOTIMPLEMENTED = 3
+
+_DAYS_IN_MONTH = [-1, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+_DAYS_BEFORE_MONTH = [-1, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304,
+                      334]
+
+def _is_leap(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+def _days_before_year(year):
+    y = year - 1
+    return y * 365 + y // 4 - y // 100 + y // 400
+
+def _days_in_month(year, month):
+    if month == 2 and _is_leap(year):
+        return 29
+    return _DAYS_IN_MONTH[month]
+
+def _days_before_month(year, month):
+    result = _DAYS_BEFORE_MONTH[month]
+    if month > 2 and _is_leap(year):
+        result += 1
+    return result
+
+_DI400Y = _days_before_year(401)    # number of days in 400 years
+_DI100Y = _days_before_year(101)    #    "    "   "   " 100   "
+_DI4Y   = _days_before_year(5)      #    "    "   "   "   4   "
+
+def _ymd2ord(year, month, day):
+    return _days_before_year(year) + _days_before_month(year, month) + day
+
+def _ord2ymd(n):
+    # n is a 1-based index, starting at 1-Jan-1.  The pattern of leap years
+    # repeats exactly every 400 years: find the closest 400-year boundary
+    # at or before n, then the 100-year, 4-year and 1-year cycles inside
+    # it.  n100 or n1 can be 4, meaning December 31 of the last year of
+    # the cycle.  The month is then found via an estimate that is either
+    # exact or one too large.
+    n -= 1
+    n400 = n // _DI400Y
+    n = n % _DI400Y
+    year = n400 * 400 + 1
+    n100 = n // _DI100Y
+    n = n % _DI100Y
+    n4 = n // _DI4Y
+    n = n % _DI4Y
+    n1 = n // 365
+    n = n % 365
+    year += n100 * 100 + n4 * 4 + n1
+    if n1 == 4 or n100 == 4:
+        return year - 1, 12, 31
+    leapyear = n1 == 3 and (n4 != 24 or n100 == 3)
+    month = (n + 50) >> 5
+    preceding = _DAYS_BEFORE_MONTH[month]
+    if month > 2 and leapyear:
+        preceding += 1
+    if preceding > n:   # estimate is too large
+        month -= 1
+        preceding -= _DAYS_IN_MONTH[month]
+        if month == 2 and leapyear:
+            preceding -= 1
+    return year, month, n - preceding + 1
+
+def _value_error(space, msg, w_value):
+    w_exc = space.call_function(space.w_ValueError, space.newtext(msg),
+                                w_value)
+    return OperationError(space.w_ValueError, w_exc)
+
+def _check_int_field(space, w_value):
+    if space.isinstance_w(w_value, space.w_int):
+        return space.int(w_value)
+    if space.isinstance_w(w_value, space.w_float):
+        raise oefmt(space.w_TypeError, "integer argument expected, got float")
+    w_method = space.findattr(w_value, space.newtext('__int__'))
+    if w_method is None:
+        raise oefmt(space.w_TypeError, "an integer is required")
+    w_value = space.call_function(w_method)
+    if space.isinstance_w(w_value, space.w_int):
+        return space.int(w_value)
+    elif space.isinstance_w(w_value, space.w_long):
+        return space.int(space.long(w_value))
+    raise oefmt(space.w_TypeError, "__int__ method should return an integer")
+
+def _field_value(space, w_value):
+    # the result of _check_int_field() may be a long that does not fit;
+    # such values are out of range for all the fields, and so is -1
+    try:
+        return space.int_w(w_value)
+    except OperationError as e:
+        if not e.match(space, space.w_OverflowError):
+            raise
+        return -1
+
+def _check_date_fields(space, w_year, w_month, w_day):
+    w_year = _check_int_field(space, w_year)
+    w_month = _check_int_field(space, w_month)
+    w_day = _check_int_field(space, w_day)
+    year = _field_value(space, w_year)
+    if not MINYEAR <= year <= MAXYEAR:
+        raise _value_error(space, 'year must be in %d..%d' % (MINYEAR,
+                                                              MAXYEAR), w_year)
+    month = _field_value(space, w_month)
+    if not 1 <= month <= 12:
+        raise _value_error(space, 'month must be in 1..12', w_month)
+    dim = _days_in_month(year, month)
+    day = _field_value(space, w_day)
+    if not 1 <= day <= dim:
+        raise _value_error(space, 'day must be in 1..%d' % dim, w_day)
+    return year, month, day
+
+def _check_time_fields(space, w_hour, w_minute, w_second, w_microsecond):
+    w_hour = _check_int_field(space, w_hour)
+    w_minute = _check_int_field(space, w_minute)
+    w_second = _check_int_field(space, w_second)
+    w_microsecond = _check_int_field(space, w_microsecond)
+    hour = _field_value(space, w_hour)
+    if not 0 <= hour <= 23:
+        raise _value_error(space, 'hour must be in 0..23', w_hour)
+    minute = _field_value(space, w_minute)
+    if not 0 <= minute <= 59:
+        raise _value_error(space, 'minute must be in 0..59', w_minute)
+    second = _field_value(space, w_second)
+    if not 0 <= second <= 59:
+        raise _value_error(space, 'second must be in 0..59', w_second)
+    microsecond = _field_value(space, w_microsecond)
+    if not 0 <= microsecond <= 999999:
+        raise _value_error(space, 'microsecond must be in 0..999999',
+                           w_microsecond)
+    return hour, minute, second, microsecond
+
+@unwrap_spec(year=int, month=int, day=int)
+def ymd2ord(space, year, month, day):
+    "year, month, day -> ordinal, considering 01-Jan-0001 as day 1."
+    if not 1 <= month <= 12:
+        raise oefmt(space.w_ValueError, "month must be in 1..12")
+    return space.newint(_ymd2ord(year, month, day))
+
+def ord2ymd(space, w_n):
+    "ordinal -> (year, month, day), considering 01-Jan-0001 as day 1."
+    try:
+        n = space.int_w(w_n)
+    except OperationError as e:
+        if not e.match(space, space.w_OverflowError):
+            raise
+        # far outside of the range of the years, like the result of the
+        # ordinals that still fit
+        raise oefmt(space.w_ValueError, "ordinal %s is out of range",
+                    space.text_w(space.str(w_n)))
+    year, month, day = _ord2ymd(n)
+    return space.newtuple([space.newint(year), space.newint(month),
+                           space.newint(day)])
+
+def _normalize_date(space, year, month, day, ignore_overflow):
+    if not 1 <= month <= 12:
+        month -= 1
+        year += month // 12
+        month = month % 12 + 1
+    dim = _days_in_month(year, month)
+    if not 1 <= day <= dim:
+        if day == 0:    # move back a day
+            month -= 1
+            if month > 0:
+                day = _days_in_month(year, month)
+            else:
+                year, month, day = year - 1, 12, 31
+        elif day == dim + 1:    # move forward a day
+            month += 1
+            day = 1
+            if month > 12:
+                month = 1
+                year += 1
+        else:
+            year, month, day = _ord2ymd(_ymd2ord(year, month, 1) + (day - 1))
+    if not ignore_overflow and not MINYEAR <= year <= MAXYEAR:
+        raise oefmt(space.w_OverflowError, "date value out of range")
+    return year, month, day
+
+def _normalize_datetime(space, y, m, d, hh, mm, ss, us, ignore_overflow):
+    if not 0 <= us <= 999999:
+        ss += us // 1000000
+        us = us % 1000000
+    if not 0 <= ss <= 59:
+        mm += ss // 60
+        ss = ss % 60
+    if not 0 <= mm <= 59:
+        hh += mm // 60
+        mm = mm % 60
+    if not 0 <= hh <= 23:
+        d += hh // 24
+        hh = hh % 24
+    y, m, d = _normalize_date(space, y, m, d, ignore_overflow)
+    return y, m, d, hh, mm, ss, us
+
+@unwrap_spec(y=int, m=int, d=int, hh=int, mm=int, ss=int, us=int,
+             ignore_overflow=bool)
+def normalize_datetime(space, y, m, d, hh, mm, ss, us,
+                       ignore_overflow=False):
+    y, m, d, hh, mm, ss, us = _normalize_datetime(space, y, m, d, hh, mm, ss,
+                                                  us, ignore_overflow)
+    return space.newtuple([space.newint(y), space.newint(m), space.newint(d),
+                           space.newint(hh), space.newint(mm),
+                           space.newint(ss), space.newint(us)])
+
+def _normalize_delta(d, s, us):
+    # may raise OverflowError if 'd' does not fit any more
+    if not 0 <= us <= 999999:
+        s += us // 1000000
+        us = us % 1000000
+    if not 0 <= s <= 24 * 3600 - 1:
+        d = ovfcheck(d + s // (24 * 3600))
+        s = s % (24 * 3600)
+    return d, s, us
+
+def _check_delta_days(space, d):
+    if not -MAX_DELTA_DAYS <= d <= MAX_DELTA_DAYS:
+        raise oefmt(space.w_OverflowError,
+                    "days=%d; must have magnitude <= %d", d, MAX_DELTA_DAYS)
+
+def _cmp(x, y):
+    if x < y:
+        return -1
+    return 1 if x > y else 0
+
+def _append_int(builder, value, width):
+    s = str(value)
+    for i in range(width - len(s)):
+        builder.append('0')
+    builder.append(s)
+
+def _append_date(builder, year, month, day):
+    # 'YYYY-MM-DD'
+    _append_int(builder, year, 4)
+    builder.append('-')
+    _append_int(builder, month, 2)
+    builder.append('-')
+    _append_int(builder, day, 2)
+
+def _append_time(builder, hh, mm, ss, us):
+    # 'HH:MM:SS', followed by '.ffffff' if us is not zero
+    _append_int(builder, hh, 2)
+    builder.append(':')
+    _append_int(builder, mm, 2)
+    builder.append(':')
+    _append_int(builder, ss, 2)
+    if us:
+        builder.append('.')
+        _append_int(builder, us, 6)
+
+def _append_offset(builder, offset):
+    # '+HH:MM' or '-HH:MM', if there is a utcoffset()
+    if offset == NO_OFFSET:
+        return
+    if offset < 0:
+        builder.append('-')
+        offset = -offset
+    else:
+        builder.append('+')
+    _append_int(builder, offset // 60, 2)
+    builder.append(':')
+    _append_int(builder, offset % 60, 2)
+
+def _parse_digits(s, start, count):
+    # returns -1 if the count characters at s[start:] are not all digits
+    if start + count > len(s):
+        return -1
+    result = 0
+    for i in range(start, start + count):
+        c = s[i]
+        if not '0' <= c <= '9':
+            return -1
+        result = result * 10 + (ord(c) - ord('0'))
+    return result
+
+def _parse_iso(s, format):
+    """ Parse s with one of the ISO 8601 formats below, which are the ones
+    that are used almost everywhere.  Only accepts the canonical form with
+    fixed-width fields and valid values, and returns None in all the other
+    cases: then the generic _strptime code takes care of it, including the
+    error messages. """
+    if format == '%Y-%m-%d':
+        end = 10
+        with_time = with_fraction = False
+    elif format == '%Y-%m-%dT%H:%M:%S' or format == '%Y-%m-%d %H:%M:%S':
+        end = 19
+        with_time = True
+        with_fraction = False
+    elif (format == '%Y-%m-%dT%H:%M:%S.%f' or
+          format == '%Y-%m-%d %H:%M:%S.%f'):
+        end = 20
+        with_time = with_fraction = True
+    else:
+        return None
+    if len(s) < end or s[4] != '-' or s[7] != '-':
+        return None
+    year = _parse_digits(s, 0, 4)
+    month = _parse_digits(s, 5, 2)
+    day = _parse_digits(s, 8, 2)
+    if (not MINYEAR <= year <= MAXYEAR or not 1 <= month <= 12 or
+            not 1 <= day <= _days_in_month(year, month)):
+        return None
+    hh = mm = ss = us = 0
+    if with_time:
+        if s[10] != format[8] or s[13] != ':' or s[16] != ':':
+            return None
+        hh = _parse_digits(s, 11, 2)
+        mm = _parse_digits(s, 14, 2)
+        ss = _parse_digits(s, 17, 2)
+        if not 0 <= hh <= 23 or not 0 <= mm <= 59 or not 0 <= ss <= 59:
+            return None
+    if with_fraction:
+        if s[19] != '.':
+            return None
+        ndigits = len(s) - end
+        if not 1 <= ndigits <= 6:
+            return None
+        us = _parse_digits(s, end, ndigits)
+        if us < 0:
+            return None
+        for i in range(6 - ndigits):
+            us *= 10
+    elif len(s) != end:
+        return None
+    return [year, month, day, hh, mm, ss, us]
+
+@jit.dont_look_inside
+@unwrap_spec(s='bytes', format='bytes')
+def parse_iso(space, s, format):
+    """parse_iso(s, format) -> (y, m, d, hh, mm, ss, us) or None
+
+Fast path for datetime.strptime() with the common ISO 8601 formats.
+Returns None if it cannot handle the format or the string."""
+    fields = _parse_iso(s, format)
+    if fields is None:
+        return space.w_None
+    return space.newtuple([space.newint(x) for x in fields])
+
+# ____________________________________________________________
+# The base classes of datetime.timedelta, date, datetime and time.  They
+# hold the fields as machine integers and implement construction,
+# comparison, hashing, arithmetic and pickling; lib_pypy/datetime.py adds
+# the rest (repr, strftime, the tzinfo methods, ...).  The tzinfo is None
+# for naive objects.
+
+class DateTimeTypes(object):
+    """The classes of lib_pypy/datetime.py, see set_types()."""
+
+    def __init__(self, space):
+        self.w_timedelta = space.gettypefor(W_DateTime_Delta)
+        self.w_date = space.gettypefor(W_DateTime_Date)
+        self.w_datetime = space.gettypefor(W_DateTime_DateTime)
+        self.w_time = space.gettypefor(W_DateTime_Time)
+        self.w_tzinfo = None
+
+def _check_base(space, w_type, W_Class):
+    w_base = space.gettypefor(W_Class)
+    if not space.isinstance_w(w_type, space.w_type) or not space.issubtype_w(
+            w_type, w_base):
+        raise oefmt(space.w_TypeError, "expected a subclass of '%N', got %R",
+                    w_base, w_type)
+    return w_type
+
+def set_types(space, w_timedelta, w_date, w_datetime, w_time, w_tzinfo):
+    """set_types(timedelta, date, datetime, time, tzinfo)
+
+Register the classes of the datetime module.  The results of the arithmetic
+are instances of these exact classes, and tzinfo arguments must be None or
+instances of the given tzinfo class."""
+    types = space.fromcache(DateTimeTypes)
+    types.w_timedelta = _check_base(space, w_timedelta, W_DateTime_Delta)
+    types.w_date = _check_base(space, w_date, W_DateTime_Date)
+    types.w_datetime = _check_base(space, w_datetime, W_DateTime_DateTime)
+    types.w_time = _check_base(space, w_time, W_DateTime_Time)
+    if not space.isinstance_w(w_tzinfo, space.w_type):
+        raise oefmt(space.w_TypeError, "expected a class, got %R", w_tzinfo)
+    types.w_tzinfo = w_tzinfo
+
+def _isinstance_tzinfo(space, w_tzinfo):
+    w_class = space.fromcache(DateTimeTypes).w_tzinfo
+    return w_class is not None and space.isinstance_w(w_tzinfo, w_class)
+
+def _check_tzinfo_arg(space, w_tzinfo):
+    if space.is_none(w_tzinfo):
+        return None
+    if not _isinstance_tzinfo(space, w_tzinfo):
+        raise oefmt(space.w_TypeError,
+                    "tzinfo argument must be None or of a tzinfo subclass")
+    return w_tzinfo
+
+def _check_tzinfo_state(space, w_tzinfo):
+    if space.is_none(w_tzinfo):
+        return None
+    if not _isinstance_tzinfo(space, w_tzinfo):
+        raise oefmt(space.w_TypeError, "bad tzinfo state arg")
+    return w_tzinfo
+
+def _same_tzinfo(space, w_tzinfo1, w_tzinfo2):
+    if w_tzinfo1 is None or w_tzinfo2 is None:
+        return w_tzinfo1 is w_tzinfo2
+    return space.is_w(w_tzinfo1, w_tzinfo2)
+
+def _utcoffset(space, w_obj, w_tzinfo):
+    # the result of the app-level _utcoffset() method, which checks the
+    # result of tzinfo.utcoffset(), in minutes; or NO_OFFSET
+    if w_tzinfo is None:
+        return NO_OFFSET
+    w_offset = space.call_method(w_obj, '_utcoffset')
+    if space.is_w(w_offset, space.w_None):
+        return NO_OFFSET
+    return space.int_w(w_offset)
+
+def _pickle_state(space, w_arg, length):
+    # the pickled state that the constructors accept instead of the first
+    # argument, or None
+    if not space.isinstance_w(w_arg, space.w_bytes):
+        return None
+    state = space.bytes_w(w_arg)
+    if len(state) != length:
+        return None
+    return state
+
+def _unpack_microsecond(state, start):
+    return (((ord(state[start]) << 8) | ord(state[start + 1])) << 8 |
+            ord(state[start + 2]))
+
+def _pack_microsecond(builder, us):
+    builder.append(chr(us >> 16))
+    builder.append(chr((us >> 8) & 0xff))
+    builder.append(chr(us & 0xff))
+
+def _reduce(space, w_obj, state, w_tzinfo):
+    w_state = space.newbytes(state)
+    if w_tzinfo is None:
+        w_args = space.newtuple([w_state])
+    else:
+        w_args = space.newtuple([w_state, w_tzinfo])
+    return space.newtuple([space.type(w_obj), w_args])
+
+def _make_comparison(name, op):
+    # builds descr_eq() & co. on top of a compare() method, which returns
+    # -1, 0, 1, CMP_UNRELATED or CMP_NOTIMPLEMENTED
+    def descr_compare(self, space, w_other):
+        result = self.compare(space, w_other)
+        if result == CMP_NOTIMPLEMENTED:
+            return space.w_NotImplemented
+        if result == CMP_UNRELATED:
+            if name == 'eq':
+                return space.w_False
+            if name == 'ne':
+                return space.w_True
+            raise oefmt(space.w_TypeError, "can't compare '%T' to '%T'",
+                        self, w_other)
+        return space.newbool(op(result, 0))
+    descr_compare.func_name = 'descr_' + name
+    return descr_compare
+
+def _add_comparisons(W_Class):
+    for name, op in [('eq', operator.eq), ('ne', operator.ne),
+                     ('lt', operator.lt), ('le', operator.le),
+                     ('gt', operator.gt), ('ge', operator.ge)]:
+        setattr(W_Class, 'descr_' + name, _make_comparison(name, op))
+
+def _comparison_descrs(W_Class):
+    return dict([('__%s__' % name,
+                  interp2app(getattr(W_Class, 'descr_' + name)))
+                 for name in ['eq', 'ne', 'lt', 'le', 'gt', 'ge']])
+
+# ____________________________________________________________
+# timedelta
+
+_US_PER_UNIT = [('microseconds', r_longlong(1)),
+                ('milliseconds', r_longlong(1000)),
+                ('seconds', r_longlong(1000000)),
+                ('minutes', r_longlong(60000000)),
+                ('hours', r_longlong(3600000000)),
+                ('days', r_longlong(86400000000)),
+                ('weeks', r_longlong(604800000000))]
+
+def _round(x):
+    return int(math.floor(x + 0.5) if x >= 0.0 else math.ceil(x - 0.5))
+
+def _accum(space, tag, w_sofar, w_num, factor, leftover):
+    w_factor = space.newint(factor)
+    if (space.isinstance_w(w_num, space.w_int) or
+            space.isinstance_w(w_num, space.w_long)):
+        return space.add(w_sofar, space.mul(w_num, w_factor)), leftover
+    if space.isinstance_w(w_num, space.w_float):
+        fracpart, intpart = math.modf(space.float_w(w_num))
+        w_prod = space.mul(space.int(space.newfloat(intpart)), w_factor)
+        w_sofar = space.add(w_sofar, w_prod)
+        if fracpart == 0.0:
+            return w_sofar, leftover
+        fracpart, intpart = math.modf(float(factor) * fracpart)
+        w_sofar = space.add(w_sofar, space.int(space.newfloat(intpart)))
+        return w_sofar, leftover + fracpart
+    raise oefmt(space.w_TypeError,
+                "unsupported type for timedelta %s component: %R",
+                tag, space.type(w_num))
+
+def _exact_int(space, w_value, default):
+    # -> (ok, value) for the fast path of timedelta(): only exact ints
+    if w_value is None:
+        return True, default
+    if not space.is_w(space.type(w_value), space.w_int):
+        return False, 0
+    return True, space.int_w(w_value)
+
+class W_DateTime_Delta(W_Root):
+    "builtin base class for datetime.timedelta, also used by cpyext"
+    _immutable_fields_ = ['days', 'seconds', 'microseconds']
+
+    def __init__(self, days, seconds, microseconds):
+        self.days = days
+        self.seconds = seconds
+        self.microseconds = microseconds
+        self.hashcode = -1
+
+    def compare(self, space, w_other):
+        if not isinstance(w_other, W_DateTime_Delta):
+            return CMP_UNRELATED
+        return (_cmp(self.days, w_other.days) or
+                _cmp(self.seconds, w_other.seconds) or
+                _cmp(self.microseconds, w_other.microseconds))
+
+    def descr_hash(self, space):
+        if self.hashcode == -1:
+            w_state = space.newtuple([space.newint(self.days),
+                                      space.newint(self.seconds),
+                                      space.newint(self.microseconds)])
+            self.hashcode = space.int_w(space.hash(w_state))
+        return space.newint(self.hashcode)
+
+    def descr_nonzero(self, space):
+        return space.newbool(self.days != 0 or self.seconds != 0 or
+                             self.microseconds != 0)
+
+    def descr_add(self, space, w_other):
+        if not isinstance(w_other, W_DateTime_Delta):
+            return space.w_NotImplemented
+        # for CPython compatibility, the result is a real timedelta, not
+        # an instance of our class
+        return new_delta(space, self.days + w_other.days,
+                         self.seconds + w_other.seconds,
+                         self.microseconds + w_other.microseconds)
+
+    def descr_sub(self, space, w_other):
+        if not isinstance(w_other, W_DateTime_Delta):
+            return space.w_NotImplemented
+        return new_delta(space, self.days - w_other.days,
+                         self.seconds - w_other.seconds,
+                         self.microseconds - w_other.microseconds)
+
+    def descr_neg(self, space):
+        return new_delta(space, -self.days, -self.seconds,
+                         -self.microseconds)
+
+    def descr_pos(self, space):
+        return new_delta(space, self.days, self.seconds, self.microseconds)
+
+    def descr_abs(self, space):
+        if self.days < 0:
+            return self.descr_neg(space)
+        return self
+
+    def descr_reduce(self, space):
+        w_args = space.newtuple([space.newint(self.days),
+                                 space.newint(self.seconds),
+                                 space.newint(self.microseconds)])
+        return space.newtuple([space.type(self), w_args])
+
+_add_comparisons(W_DateTime_Delta)
+
+def _allocate_delta(space, w_type, d, s, us):
+    _check_delta_days(space, d)
+    w_obj = space.allocate_instance(W_DateTime_Delta, w_type)
+    W_DateTime_Delta.__init__(w_obj, d, s, us)
+    return w_obj
+
+def new_delta(space, d, s, us):
+    "A datetime.timedelta after normalizing the fields."
+    try:
+        d, s, us = _normalize_delta(d, s, us)
+    except OverflowError:
+        raise oefmt(space.w_OverflowError,
+                    "days=%d; must have magnitude <= %d", d, MAX_DELTA_DAYS)
+    w_type = space.fromcache(DateTimeTypes).w_timedelta
+    return _allocate_delta(space, w_type, d, s, us)
+
+def _new_delta_fast(space, w_subtype, w_days, w_seconds, w_microseconds,
+                    w_milliseconds, w_minutes, w_hours, w_weeks):
+    # returns None if the arguments are not all exact ints, or if they
+    # overflow; then the general code takes over
+    ok1, days = _exact_int(space, w_days, 0)
+    ok2, seconds = _exact_int(space, w_seconds, 0)
+    ok3, microseconds = _exact_int(space, w_microseconds, 0)
+    ok4, milliseconds = _exact_int(space, w_milliseconds, 0)
+    ok5, minutes = _exact_int(space, w_minutes, 0)
+    ok6, hours = _exact_int(space, w_hours, 0)
+    ok7, weeks = _exact_int(space, w_weeks, 0)
+    if not (ok1 and ok2 and ok3 and ok4 and ok5 and ok6 and ok7):
+        return None
+    try:
+        d = ovfcheck(days + ovfcheck(weeks * 7))
+        s = ovfcheck(seconds + ovfcheck(minutes * 60))
+        s = ovfcheck(s + ovfcheck(hours * 3600))
+        us = ovfcheck(microseconds + ovfcheck(milliseconds * 1000))
+        d, s, us = _normalize_delta(d, s, us)
+    except OverflowError:
+        return None
+    return _allocate_delta(space, w_subtype, d, s, us)
+
+def descr_new_delta(space, w_subtype, w_days=None, w_seconds=None,
+                    w_microseconds=None, w_milliseconds=None, w_minutes=None,
+                    w_hours=None, w_weeks=None):
+    w_obj = _new_delta_fast(space, w_subtype, w_days, w_seconds,
+                            w_microseconds, w_milliseconds, w_minutes,
+                            w_hours, w_weeks)
+    if w_obj is not None:
+        return w_obj
+    # the general case: sum everything up in microseconds, with a float
+    # part if some of the arguments are floats
+    args_w = [w_microseconds, w_milliseconds, w_seconds, w_minutes,
+              w_hours, w_days, w_weeks]
+    w_x = space.newint(0)
+    leftover = 0.0
+    for i in range(len(_US_PER_UNIT)):
+        if args_w[i] is not None:
+            tag, factor = _US_PER_UNIT[i]
+            w_x, leftover = _accum(space, tag, w_x, args_w[i], factor,
+                                   leftover)
+    if leftover != 0.0:
+        w_x = space.add(w_x, space.newint(_round(leftover)))
+    w_s, w_us = space.fixedview(space.divmod(w_x, space.newint(1000000)), 2)
+    w_d, w_s = space.fixedview(space.divmod(w_s, space.newint(24 * 3600)), 2)
+    try:
+        d = space.int_w(w_d)
+    except OperationError as e:
+        if not e.match(space, space.w_OverflowError):
+            raise
+        raise oefmt(space.w_OverflowError,
+                    "days=%s; must have magnitude <= %d",
+                    space.text_w(space.str(w_d)), MAX_DELTA_DAYS)
+    return _allocate_delta(space, w_subtype, d, space.int_w(w_s),
+                           space.int_w(w_us))
+
+W_DateTime_Delta.typedef = TypeDef("pypydatetime_delta",
+    __doc__ = "builtin base class for datetime.timedelta",
+    __new__ = interp2app(descr_new_delta),
+    days = interp_attrproperty('days', W_DateTime_Delta, doc="days",
+                               wrapfn="newint"),
+    seconds = interp_attrproperty('seconds', W_DateTime_Delta,
+                                  doc="seconds", wrapfn="newint"),
+    microseconds = interp_attrproperty('microseconds', W_DateTime_Delta,
+                                       doc="microseconds", wrapfn="newint"),
+    __hash__ = interp2app(W_DateTime_Delta.descr_hash),
+    __nonzero__ = interp2app(W_DateTime_Delta.descr_nonzero),
+    __add__ = interp2app(W_DateTime_Delta.descr_add),
+    __sub__ = interp2app(W_DateTime_Delta.descr_sub),
+    __neg__ = interp2app(W_DateTime_Delta.descr_neg),
+    __pos__ = interp2app(W_DateTime_Delta.descr_pos),
+    __abs__ = interp2app(W_DateTime_Delta.descr_abs),
+    __reduce__ = interp2app(W_DateTime_Delta.descr_reduce),
+    **_comparison_descrs(W_DateTime_Delta))
+W_DateTime_Delta.typedef.acceptable_as_base_class = True
+
+# ____________________________________________________________
+# date and datetime
+
+class W_DateTime_Date(W_Root):
+    "builtin base class for datetime.date, also used by cpyext"
+    _immutable_fields_ = ['year', 'month', 'day']
+
+    def __init__(self, year, month, day):
+        self.year = year
+        self.month = month
+        self.day = day
+        self.hashcode = -1
+
+    def toordinal(self):
+        return _ymd2ord(self.year, self.month, self.day)
+
+    def compare(self, space, w_other):
+        if isinstance(w_other, W_DateTime_Date):
+            return (_cmp(self.year, w_other.year) or
+                    _cmp(self.month, w_other.month) or
+                    _cmp(self.day, w_other.day))
+        if space.findattr(w_other, space.newtext('timetuple')) is not None:
+            return CMP_NOTIMPLEMENTED
+        return CMP_UNRELATED
+
+    def getstate(self):
+        builder = StringBuilder(4)
+        builder.append(chr(self.year >> 8))
+        builder.append(chr(self.year & 0xff))
+        builder.append(chr(self.month))
+        builder.append(chr(self.day))
+        return builder.build()
+
+    def descr_hash(self, space):
+        if self.hashcode == -1:
+            w_state = space.newtuple([space.newbytes(self.getstate())])
+            self.hashcode = space.int_w(space.hash(w_state))
+        return space.newint(self.hashcode)
+
+    def descr_add(self, space, w_other):
+        if not isinstance(w_other, W_DateTime_Delta):
+            return space.w_NotImplemented
+        return self.add_days(space, w_other.days)
+
+    def descr_sub(self, space, w_other):
+        if isinstance(w_other, W_DateTime_Date):
+            return new_delta(space, self.toordinal() - w_other.toordinal(),
+                             0, 0)
+        if isinstance(w_other, W_DateTime_Delta):
+            return self.add_days(space, -w_other.days)
+        return space.w_NotImplemented
+
+    def add_days(self, space, days):
+        year, month, day = _normalize_date(space, self.year, self.month,
+                                           self.day + days, False)
+        w_type = space.fromcache(DateTimeTypes).w_date
+        w_obj = space.allocate_instance(W_DateTime_Date, w_type)
+        W_DateTime_Date.__init__(w_obj, year, month, day)
+        return w_obj
+
+    def descr_toordinal(self, space):
+        """Return proleptic Gregorian ordinal for the year, month and day.
+
+January 1 of year 1 is day 1.  Only the year, month and day values
+contribute to the result."""
+        return space.newint(self.toordinal())
+
+    def descr_weekday(self, space):
+        "Return day of the week, where Monday == 0 ... Sunday == 6."
+        return space.newint((self.toordinal() + 6) % 7)
+
+    def descr_isoweekday(self, space):
+        "Return day of the week, where Monday == 1 ... Sunday == 7."
+        # 1-Jan-0001 is a Monday
+        return space.newint(self.toordinal() % 7 or 7)
+
+    def descr_isoformat(self, space):
+        """Return the date formatted according to ISO.
+
+This is 'YYYY-MM-DD'."""
+        builder = StringBuilder(10)
+        _append_date(builder, self.year, self.month, self.day)
+        return space.newtext(builder.build())
+
+    def descr_reduce(self, space):
+        return _reduce(space, self, self.getstate(), None)
+
+_add_comparisons(W_DateTime_Date)
+
+def descr_new_date(space, w_subtype, w_year, w_month=None, w_day=None):
+    if w_month is None:
+        state = _pickle_state(space, w_year, 4)
+        if state is not None and 1 <= ord(state[2]) <= 12:
+            w_obj = space.allocate_instance(W_DateTime_Date, w_subtype)
+            W_DateTime_Date.__init__(w_obj,
+                                     ord(state[0]) * 256 + ord(state[1]),
+                                     ord(state[2]), ord(state[3]))
+            return w_obj
+        w_month = space.w_None
+    if w_day is None:
+        w_day = space.w_None
+    year, month, day = _check_date_fields(space, w_year, w_month, w_day)
+    w_obj = space.allocate_instance(W_DateTime_Date, w_subtype)
+    W_DateTime_Date.__init__(w_obj, year, month, day)
+    return w_obj
+
+W_DateTime_Date.typedef = TypeDef("pypydatetime_date",
+    __doc__ = "builtin base class for datetime.date",
+    __new__ = interp2app(descr_new_date),
+    year = interp_attrproperty('year', W_DateTime_Date, doc="year (1-9999)",
+                               wrapfn="newint"),
+    month = interp_attrproperty('month', W_DateTime_Date,
+                                doc="month (1-12)", wrapfn="newint"),
+    day = interp_attrproperty('day', W_DateTime_Date, doc="day (1-31)",
+                              wrapfn="newint"),
+    __hash__ = interp2app(W_DateTime_Date.descr_hash),
+    __add__ = interp2app(W_DateTime_Date.descr_add),
+    __radd__ = interp2app(W_DateTime_Date.descr_add),
+    __sub__ = interp2app(W_DateTime_Date.descr_sub),
+    toordinal = interp2app(W_DateTime_Date.descr_toordinal),
+    weekday = interp2app(W_DateTime_Date.descr_weekday),
+    isoweekday = interp2app(W_DateTime_Date.descr_isoweekday),
+    isoformat = interp2app(W_DateTime_Date.descr_isoformat),
+    __str__ = interp2app(W_DateTime_Date.descr_isoformat),
+    __reduce__ = interp2app(W_DateTime_Date.descr_reduce),
+    **_comparison_descrs(W_DateTime_Date))
+W_DateTime_Date.typedef.acceptable_as_base_class = True
+
+
+class W_DateTime_DateTime(W_DateTime_Date):
+    "builtin base class for datetime.datetime, also used by cpyext"
+    _immutable_fields_ = ['hour', 'minute', 'second', 'microsecond',
+                          'w_tzinfo']
+
+    def __init__(self, year, month, day, hour, minute, second, microsecond,
+                 w_tzinfo):
+        W_DateTime_Date.__init__(self, year, month, day)
+        self.hour = hour
+        self.minute = minute
+        self.second = second
+        self.microsecond = microsecond
+        self.w_tzinfo = w_tzinfo
+
+    def subtract(self, other, myoff, otoff):
+        # (days, seconds, microseconds) of self - other, where myoff and
+        # otoff are the utcoffsets in minutes
+        d = self.toordinal() - other.toordinal()
+        s = ((self.hour - other.hour) * 3600 +
+             (self.minute - other.minute + otoff - myoff) * 60 +
+             (self.second - other.second))
+        us = self.microsecond - other.microsecond
+        return _normalize_delta(d, s, us)
+
+    def compare(self, space, w_other):
+        if isinstance(w_other, W_DateTime_DateTime):
+            if _same_tzinfo(space, self.w_tzinfo, w_other.w_tzinfo):
+                myoff = otoff = NO_OFFSET
+            else:
+                myoff = _utcoffset(space, self, self.w_tzinfo)
+                otoff = _utcoffset(space, w_other, w_other.w_tzinfo)
+            if myoff == otoff:
+                return (_cmp(self.year, w_other.year) or
+                        _cmp(self.month, w_other.month) or
+                        _cmp(self.day, w_other.day) or
+                        _cmp(self.hour, w_other.hour) or
+                        _cmp(self.minute, w_other.minute) or
+                        _cmp(self.second, w_other.second) or
+                        _cmp(self.microsecond, w_other.microsecond))
+            if myoff == NO_OFFSET or otoff == NO_OFFSET:
+                raise oefmt(space.w_TypeError,
+                    "can't compare offset-naive and offset-aware datetimes")
+            d, s, us = self.subtract(w_other, myoff, otoff)
+            if d < 0:
+                return -1
+            return 1 if d or s or us else 0
+        if (space.findattr(w_other, space.newtext('timetuple')) is not None
+                and not isinstance(w_other, W_DateTime_Date)):
+            return CMP_NOTIMPLEMENTED
+        return CMP_UNRELATED
+
+    def getstate(self):
+        builder = StringBuilder(10)
+        builder.append(chr(self.year >> 8))
+        builder.append(chr(self.year & 0xff))
+        builder.append(chr(self.month))
+        builder.append(chr(self.day))
+        builder.append(chr(self.hour))
+        builder.append(chr(self.minute))
+        builder.append(chr(self.second))
+        _pack_microsecond(builder, self.microsecond)
+        return builder.build()
+
+    def descr_hash(self, space):
+        if self.hashcode == -1:
+            tzoff = _utcoffset(space, self, self.w_tzinfo)
+            if tzoff == NO_OFFSET:
+                w_state = space.newbytes(self.getstate())
+            else:
+                d, s, us = _normalize_delta(
+                    self.toordinal(),
+                    self.hour * 3600 + (self.minute - tzoff) * 60 +
+                        self.second,
+                    self.microsecond)
+                w_state = space.newtuple([space.newint(d), space.newint(s),
+                                          space.newint(us)])
+            self.hashcode = space.int_w(space.hash(w_state))
+        return space.newint(self.hashcode)
+
+    def descr_add(self, space, w_other):
+        if not isinstance(w_other, W_DateTime_Delta):
+            return space.w_NotImplemented
+        return self.add_delta(space, w_other, 1)
+
+    def descr_sub(self, space, w_other):
+        if isinstance(w_other, W_DateTime_DateTime):
+            if _same_tzinfo(space, self.w_tzinfo, w_other.w_tzinfo):
+                myoff = otoff = 0
+            else:
+                myoff = _utcoffset(space, self, self.w_tzinfo)
+                otoff = _utcoffset(space, w_other, w_other.w_tzinfo)
+                if myoff == otoff:
+                    myoff = otoff = 0
+                elif myoff == NO_OFFSET or otoff == NO_OFFSET:
+                    raise oefmt(space.w_TypeError,
+                        "can't subtract offset-naive and offset-aware "
+                        "datetimes")
+            d, s, us = self.subtract(w_other, myoff, otoff)
+            return new_delta(space, d, s, us)
+        if isinstance(w_other, W_DateTime_Delta):
+            return self.add_delta(space, w_other, -1)
+        return space.w_NotImplemented
+
+    def add_delta(self, space, w_delta, factor):
+        y, m, d, hh, mm, ss, us = _normalize_datetime(space,
+            self.year, self.month, self.day + w_delta.days * factor,
+            self.hour, self.minute, self.second + w_delta.seconds * factor,
+            self.microsecond + w_delta.microseconds * factor, False)
+        w_type = space.fromcache(DateTimeTypes).w_datetime
+        w_obj = space.allocate_instance(W_DateTime_DateTime, w_type)
+        W_DateTime_DateTime.__init__(w_obj, y, m, d, hh, mm, ss, us,
+                                     self.w_tzinfo)
+        return w_obj
+
+    @unwrap_spec(sep='text')
+    def descr_datetime_isoformat(self, space, sep='T'):
+        """Return the time formatted according to ISO.
+
+This is 'YYYY-MM-DDTHH:MM:SS.mmmmmm', or 'YYYY-MM-DDTHH:MM:SS' if
+self.microsecond == 0.  If self.tzinfo is not None, the UTC offset is also
+attached, giving 'YYYY-MM-DDTHH:MM:SS.mmmmmm+HH:MM' or
+'YYYY-MM-DDTHH:MM:SS+HH:MM'.
+
+Optional argument sep specifies the separator between date and time,
+default 'T'."""
+        if len(sep) != 1:
+            raise oefmt(space.w_TypeError, "%%c requires int or char")
+        builder = StringBuilder(32)
+        _append_date(builder, self.year, self.month, self.day)
+        builder.append(sep)
+        _append_time(builder, self.hour, self.minute, self.second,
+                     self.microsecond)
+        _append_offset(builder, _utcoffset(space, self, self.w_tzinfo))
+        return space.newtext(builder.build())
+
+    def descr_str(self, space):
+        return space.call_method(self, 'isoformat', space.newtext(' '))
+
+    def descr_reduce(self, space):
+        return _reduce(space, self, self.getstate(), self.w_tzinfo)
+
+_add_comparisons(W_DateTime_DateTime)
+
+@unwrap_spec(w_hour=WrappedDefault(0), w_minute=WrappedDefault(0),
+             w_second=WrappedDefault(0), w_microsecond=WrappedDefault(0))
+def descr_new_datetime(space, w_subtype, w_year, w_month=None, w_day=None,
+                       w_hour=None, w_minute=None, w_second=None,
+                       w_microsecond=None, w_tzinfo=None):
+    state = _pickle_state(space, w_year, 10)
+    if state is not None and 1 <= ord(state[2]) <= 12:
+        w_tzinfo = _check_tzinfo_state(space, w_month)
+        w_obj = space.allocate_instance(W_DateTime_DateTime, w_subtype)
+        W_DateTime_DateTime.__init__(w_obj,
+            ord(state[0]) * 256 + ord(state[1]), ord(state[2]),
+            ord(state[3]), ord(state[4]), ord(state[5]), ord(state[6]),
+            _unpack_microsecond(state, 7), w_tzinfo)
+        return w_obj
+    if w_month is None:
+        w_month = space.w_None
+    if w_day is None:
+        w_day = space.w_None
+    year, month, day = _check_date_fields(space, w_year, w_month, w_day)
+    hour, minute, second, microsecond = _check_time_fields(
+        space, w_hour, w_minute, w_second, w_microsecond)
+    w_tzinfo = _check_tzinfo_arg(space, w_tzinfo)
+    w_obj = space.allocate_instance(W_DateTime_DateTime, w_subtype)
+    W_DateTime_DateTime.__init__(w_obj, year, month, day, hour, minute,
+                                 second, microsecond, w_tzinfo)
+    return w_obj
+
+W_DateTime_DateTime.typedef = TypeDef("pypydatetime_datetime",
+    W_DateTime_Date.typedef,
+    __doc__ = "builtin base class for datetime.datetime",
+    __new__ = interp2app(descr_new_datetime),
+    hour = interp_attrproperty('hour', W_DateTime_DateTime,
+                               doc="hour (0-23)", wrapfn="newint"),
+    minute = interp_attrproperty('minute', W_DateTime_DateTime,
+                                 doc="minute (0-59)", wrapfn="newint"),
+    second = interp_attrproperty('second', W_DateTime_DateTime,
+                                 doc="second (0-59)", wrapfn="newint"),
+    microsecond = interp_attrproperty('microsecond', W_DateTime_DateTime,
+                                      doc="microsecond (0-999999)",
+                                      wrapfn="newint"),
+    tzinfo = interp_attrproperty_w('w_tzinfo', W_DateTime_DateTime,
+                                   doc="timezone info object"),
+    __hash__ = interp2app(W_DateTime_DateTime.descr_hash),
+    __add__ = interp2app(W_DateTime_DateTime.descr_add),
+    __radd__ = interp2app(W_DateTime_DateTime.descr_add),
+    __sub__ = interp2app(W_DateTime_DateTime.descr_sub),
+    isoformat = interp2app(W_DateTime_DateTime.descr_datetime_isoformat),
+    __str__ = interp2app(W_DateTime_DateTime.descr_str),
+    __reduce__ = interp2app(W_DateTime_DateTime.descr_reduce),
+    **_comparison_descrs(W_DateTime_DateTime))
+W_DateTime_DateTime.typedef.acceptable_as_base_class = True
+
+# ____________________________________________________________
+# time
+
+class W_DateTime_Time(W_Root):
+    "builtin base class for datetime.time, also used by cpyext"
+    _immutable_fields_ = ['hour', 'minute', 'second', 'microsecond',
+                          'w_tzinfo']
+
+    def __init__(self, hour, minute, second, microsecond, w_tzinfo):
+        self.hour = hour
+        self.minute = minute
+        self.second = second
+        self.microsecond = microsecond
+        self.w_tzinfo = w_tzinfo
+        self.hashcode = -1
+
+    def compare(self, space, w_other):
+        if not isinstance(w_other, W_DateTime_Time):
+            return CMP_UNRELATED
+        if _same_tzinfo(space, self.w_tzinfo, w_other.w_tzinfo):
+            myoff = otoff = NO_OFFSET
+        else:
+            myoff = _utcoffset(space, self, self.w_tzinfo)
+            otoff = _utcoffset(space, w_other, w_other.w_tzinfo)
+        if myoff == otoff:
+            return (_cmp(self.hour, w_other.hour) or
+                    _cmp(self.minute, w_other.minute) or
+                    _cmp(self.second, w_other.second) or
+                    _cmp(self.microsecond, w_other.microsecond))
+        if myoff == NO_OFFSET or otoff == NO_OFFSET:
+            raise oefmt(space.w_TypeError,
+                        "can't compare offset-naive and offset-aware times")
+        myhhmm = self.hour * 60 + self.minute - myoff
+        othhmm = w_other.hour * 60 + w_other.minute - otoff
+        return (_cmp(myhhmm, othhmm) or
+                _cmp(self.second, w_other.second) or
+                _cmp(self.microsecond, w_other.microsecond))
+
+    def getstate(self):
+        return _time_state(self.hour, self.minute, self.second,
+                           self.microsecond)
+
+    def descr_hash(self, space):
+        if self.hashcode == -1:
+            tzoff = _utcoffset(space, self, self.w_tzinfo)
+            if tzoff == NO_OFFSET or tzoff == 0:
+                w_state = space.newbytes(self.getstate())
+            else:
+                hhmm = self.hour * 60 + self.minute - tzoff
+                h = hhmm // 60
+                m = hhmm % 60
+                if 0 <= h < 24:
+                    w_state = space.newbytes(_time_state(
+                        h, m, self.second, self.microsecond))
+                else:
+                    w_state = space.newtuple([
+                        space.newint(h), space.newint(m),
+                        space.newint(self.second),
+                        space.newint(self.microsecond)])
+            self.hashcode = space.int_w(space.hash(w_state))
+        return space.newint(self.hashcode)
+
+    def descr_nonzero(self, space):
+        if self.second or self.microsecond:
+            return space.w_True
+        offset = _utcoffset(space, self, self.w_tzinfo)
+        if offset == NO_OFFSET:
+            offset = 0
+        return space.newbool(self.hour * 60 + self.minute != offset)
+
+    def descr_isoformat(self, space):
+        """Return the time formatted according to ISO.
+
+This is 'HH:MM:SS.mmmmmm+zz:zz', or 'HH:MM:SS+zz:zz' if
+self.microsecond == 0."""
+        builder = StringBuilder(21)
+        _append_time(builder, self.hour, self.minute, self.second,
+                     self.microsecond)
+        _append_offset(builder, _utcoffset(space, self, self.w_tzinfo))
+        return space.newtext(builder.build())
 
-def create_class(name):
-    class W_Class(W_Root):
-        'builtin base clasee for datetime.%s to allow interop with cpyext' % name
-        def descr_new__(space, w_type):
-            return space.allocate_instance(W_Class, w_type)
+    def descr_reduce(self, space):
+        return _reduce(space, self, self.getstate(), self.w_tzinfo)
 
-    W_Class.typedef = TypeDef(name,
-        __new__ = interp2app(func_with_new_name(
-                                    W_Class.descr_new__.im_func,
-                                    '%s_new' % (name,))),
-        )
-    W_Class.typedef.acceptable_as_base_class = True
-    return W_Class
+_add_comparisons(W_DateTime_Time)
 
-W_DateTime_Time = create_class('pypydatetime_time')
-W_DateTime_Date = create_class('pypydatetime_date')
-W_DateTime_Delta = create_class('pypydatetime_delta')
+def _time_state(hour, minute, second, microsecond):
+    builder = StringBuilder(6)
+    builder.append(chr(hour))
+    builder.append(chr(minute))
+    builder.append(chr(second))
+    _pack_microsecond(builder, microsecond)
+    return builder.build()
 
+@unwrap_spec(w_hour=WrappedDefault(0), w_minute=WrappedDefault(0),
+             w_second=WrappedDefault(0), w_microsecond=WrappedDefault(0))
+def descr_new_time(space, w_subtype, w_hour=None, w_minute=None,
+                   w_second=None, w_microsecond=None, w_tzinfo=None):
+    state = _pickle_state(space, w_hour, 6)
+    if state is not None and ord(state[0]) < 24:
+        if not space.is_true(w_minute):
+            w_minute = None
+        w_tzinfo = _check_tzinfo_state(space, w_minute)
+        w_obj = space.allocate_instance(W_DateTime_Time, w_subtype)
+        W_DateTime_Time.__init__(w_obj, ord(state[0]), ord(state[1]),
+                                 ord(state[2]), _unpack_microsecond(state, 3),
+                                 w_tzinfo)
+        return w_obj
+    hour, minute, second, microsecond = _check_time_fields(
+        space, w_hour, w_minute, w_second, w_microsecond)
+    w_tzinfo = _check_tzinfo_arg(space, w_tzinfo)
+    w_obj = space.allocate_instance(W_DateTime_Time, w_subtype)
+    W_DateTime_Time.__init__(w_obj, hour, minute, second, microsecond,
+                             w_tzinfo)
+    return w_obj
 
+W_DateTime_Time.typedef = TypeDef("pypydatetime_time",
+    __doc__ = "builtin base class for datetime.time",
+    __new__ = interp2app(descr_new_time),
+    hour = interp_attrproperty('hour', W_DateTime_Time, doc="hour (0-23)",
+                               wrapfn="newint"),
+    minute = interp_attrproperty('minute', W_DateTime_Time,
+                                 doc="minute (0-59)", wrapfn="newint"),
+    second = interp_attrproperty('second', W_DateTime_Time,
+                                 doc="second (0-59)", wrapfn="newint"),
+    microsecond = interp_attrproperty('microsecond', W_DateTime_Time,
+                                      doc="microsecond (0-999999)",
+                                      wrapfn="newint"),
+    tzinfo = interp_attrproperty_w('w_tzinfo', W_DateTime_Time,
+                                   doc="timezone info object"),
+    __hash__ = interp2app(W_DateTime_Time.descr_hash),
+    __nonzero__ = interp2app(W_DateTime_Time.descr_nonzero),
+    isoformat = interp2app(W_DateTime_Time.descr_isoformat),
+    __str__ = interp2app(W_DateTime_Time.descr_isoformat),
+    __reduce__ = interp2app(W_DateTime_Time.descr_reduce),
+    **_comparison_descrs(W_DateTime_Time))
+W_DateTime_Time.typedef.acceptable_as_base_class = True
@@ -62,9 +62,15 @@ class OsModule(MixedModule):
 class PyPyDateTime(MixedModule):
     appleveldefs = {}
     interpleveldefs = {
-        'dateinterop'  : 'interp_pypydatetime.W_DateTime_Date',
-        'timeinterop'  : 'interp_pypydatetime.W_DateTime_Time',
-        'deltainterop' : 'interp_pypydatetime.W_DateTime_Delta',
+        'dateinterop'       : 'interp_pypydatetime.W_DateTime_Date',
+        'datetimeinterop'   : 'interp_pypydatetime.W_DateTime_DateTime',
+        'timeinterop'       : 'interp_pypydatetime.W_DateTime_Time',
+        'deltainterop'      : 'interp_pypydatetime.W_DateTime_Delta',
+        'set_types'         : 'interp_pypydatetime.set_types',
+        'ymd2ord'           : 'interp_pypydatetime.ymd2ord',
+        'ord2ymd'           : 'interp_pypydatetime.ord2ymd',
+        'normalize_datetime': 'interp_pypydatetime.normalize_datetime',
+        'parse_iso'         : 'interp_pypydatetime.parse_iso',
     }
 
 class PyPyBufferable(MixedModule):
@@ -106,6 +112,7 @@ class Module(MixedModule):
         'delitem_if_value_is'       : 'interp_dict.delitem_if_value_is',
         'move_to_end'               : 'interp_dict.move_to_end',
         'strategy'                  : 'interp_magic.strategy',  # dict,set,list
+        'json_cache_counter'        : 'interp_magic.json_cache_counter',
         'specialized_zip_2_lists'   : 'interp_magic.specialized_zip_2_lists',
         'set_debug'                 : 'interp_magic.set_debug',
         'locals_to_fast'            : 'interp_magic.locals_to_fast',
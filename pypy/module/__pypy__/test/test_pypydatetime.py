@@ -0,0 +1,310 @@
+class AppTestPyPyDateTime:
+    spaceconfig = dict(usemodules=['__pypy__', 'struct', 'time', 'binascii'])
+
+    def test_date_fields(self):
+        from __pypy__._pypydatetime import dateinterop
+        d = dateinterop(2000, 2, 29)
+        assert (d.year, d.month, d.day) == (2000, 2, 29)
+        d = dateinterop(True, 1L, 31)
+        assert (d.year, d.month, d.day) == (1, 1, 31)
+        assert type(dateinterop(1L, 1, 1).year) is int
+        class C(object):
+            def __int__(self):
+                return 3
+        d = dateinterop(C(), C(), C())
+        assert (d.year, d.month, d.day) == (3, 3, 3)
+        exc = raises(ValueError, dateinterop, 1900, 2, 29)
+        assert exc.value.args == ('day must be in 1..28', 29)
+        exc = raises(ValueError, dateinterop, 10000, 1, 1)
+        assert exc.value.args == ('year must be in 1..9999', 10000)
+        exc = raises(ValueError, dateinterop, 2000, 2**100, 1)
+        assert exc.value.args == ('month must be in 1..12', 2**100)
+        exc = raises(TypeError, dateinterop, 2000.0, 1, 1)
+        assert str(exc.value) == 'integer argument expected, got float'
+        exc = raises(TypeError, dateinterop, '2000', 1, 1)
+        assert str(exc.value) == 'an integer is required'
+        raises(TypeError, dateinterop, 2000, 1)
+        raises(TypeError, setattr, d, 'year', 2000)
+
+    def test_time_fields(self):
+        from __pypy__._pypydatetime import timeinterop, datetimeinterop
+        t = timeinterop(23, 59, 59, 999999)
+        assert (t.hour, t.minute, t.second, t.microsecond) == (
+            23, 59, 59, 999999)
+        assert t.tzinfo is None
+        t = timeinterop()
+        assert (t.hour, t.minute, t.second, t.microsecond) == (0, 0, 0, 0)
+        exc = raises(ValueError, timeinterop, 0, 60, 0, 0)
+        assert exc.value.args == ('minute must be in 0..59', 60)
+        exc = raises(ValueError, timeinterop, 0, 0, 0, -1)
+        assert exc.value.args == ('microsecond must be in 0..999999', -1)
+        raises(TypeError, timeinterop, None)
+        dt = datetimeinterop(2000, 1, 2, 3, 4, 5, 6)
+        assert (dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second,
+                dt.microsecond, dt.tzinfo) == (2000, 1, 2, 3, 4, 5, 6, None)
+        exc = raises(ValueError, datetimeinterop, 2000, 1, 2, 24)
+        assert exc.value.args == ('hour must be in 0..23', 24)
+
+    def test_ordinals(self):
+        from __pypy__._pypydatetime import ymd2ord, ord2ymd
+        assert ymd2ord(1, 1, 1) == 1
+        assert ymd2ord(2000, 3, 1) == 730180
+        for n in [1, 59, 60, 365, 366, 1460, 1461, 36524, 36525, 146096,
+                  146097, 730180, 3652059]:
+            assert ymd2ord(*ord2ymd(n)) == n
+        assert ord2ymd(3652059) == (9999, 12, 31)
+        assert ord2ymd(146097) == (400, 12, 31)
+        assert ord2ymd(3652059L) == (9999, 12, 31)
+        exc = raises(ValueError, ord2ymd, 10 ** 30)
+        assert str(exc.value) == 'ordinal %d is out of range' % 10 ** 30
+        raises(TypeError, ord2ymd, 1.5)
+
+    def test_normalize(self):
+        from __pypy__._pypydatetime import normalize_datetime
+        assert normalize_datetime(2000, 12, 31, 23, 59, 59, 1000000) == (
+            2001, 1, 1, 0, 0, 0, 0)
+        assert normalize_datetime(2000, 1, 1, 0, -1, 0, -1) == (
+            1999, 12, 31, 23, 58, 59, 999999)
+        raises(OverflowError, normalize_datetime, 9999, 12, 31, 24, 0, 0, 0)
+        assert normalize_datetime(9999, 12, 31, 24, 0, 0, 0, True) == (
+            10000, 1, 1, 0, 0, 0, 0)
+
+    def test_delta(self):
+        from __pypy__._pypydatetime import deltainterop
+        def fields(td):
+            return (td.days, td.seconds, td.microseconds)
+        assert fields(deltainterop()) == (0, 0, 0)
+        assert fields(deltainterop(0, 0, 1000000)) == (0, 1, 0)
+        assert fields(deltainterop(0, -1)) == (-1, 86399, 0)
+        assert fields(deltainterop(1, 86400, -1)) == (1, 86399, 999999)
+        assert fields(deltainterop(weeks=1, hours=-1, minutes=1,
+                                   milliseconds=1)) == (6, 82860, 1000)
+        assert fields(deltainterop(999999999, 86399, 999999)) == (
+            999999999, 86399, 999999)
+        assert fields(deltainterop(1.5, microseconds=0.5)) == (1, 43200, 1)
+        assert fields(deltainterop(microseconds=1.5)) == (0, 0, 2)
+        assert fields(deltainterop(microseconds=-1.5)) == (-1, 86399, 999998)
+        assert fields(deltainterop(2**70, -2**70 * 86400)) == (0, 0, 0)
+        assert fields(deltainterop(-999999999L)) == (-999999999, 0, 0)
+        exc = raises(OverflowError, deltainterop, 999999999, 86400)
+        assert str(exc.value) == (
+            'days=1000000000; must have magnitude <= 999999999')
+        exc = raises(OverflowError, deltainterop, 2**64)
+        assert str(exc.value) == (
+            'days=%d; must have magnitude <= 999999999' % 2**64)
+        exc = raises(TypeError, deltainterop, '1')
+        assert str(exc.value) == (
+            "unsupported type for timedelta days component: <type 'str'>")
+        td = deltainterop(1, 2, 3)
+        assert fields(td + deltainterop(0, 86397, 999997)) == (2, 0, 0)
+        assert fields(td - deltainterop(2)) == (-1, 2, 3)
+        assert fields(-td) == (-2, 86397, 999997)
+        assert fields(+td) == (1, 2, 3)
+        assert abs(td) is td
+        assert fields(abs(-td)) == (1, 2, 3)
+        assert td.__add__(5) is NotImplemented
+        assert bool(td) and not deltainterop(0)
+        assert hash(td) == hash((1, 2, 3))
+        assert td.__reduce__() == (deltainterop, (1, 2, 3))
+
+    def test_cmp(self):
+        from __pypy__._pypydatetime import (deltainterop, dateinterop,
+            datetimeinterop, timeinterop)
+        td = deltainterop
+        assert td(1, 2, 3) == td(1, 2, 3)
+        assert td(1, 2, 3) < td(1, 2, 4)
+        assert td(2) > td(1, 86399, 999999)
+        assert td(-1, 86399) < td(0) != td(1)
+        assert td(0) != 0 and not td(0) == 0
+        exc = raises(TypeError, "td(0) < 0")
+        assert str(exc.value) == (
+            "can't compare 'pypydatetime_delta' to 'int'")
+        assert timeinterop(1, 2, 3, 4) == timeinterop(1, 2, 3, 4)
+        assert timeinterop(1, 2, 3, 5) > timeinterop(1, 2, 3, 4)
+        assert dateinterop(2000, 1, 2) < dateinterop(2000, 2, 1)
+        dt = datetimeinterop
+        assert dt(1, 2, 3, 4, 5, 6, 7) == dt(1, 2, 3, 4, 5, 6, 7)
+        assert dt(1, 2, 3, 4, 5, 6, 7) < dt(1, 2, 3, 4, 5, 6, 8)
+        assert dt(1, 2, 3, 4, 5, 6, 7) > dt(1, 2, 3, 4, 4, 9, 9)
+        class Other(object):
+            def timetuple(self):
+                pass
+            def __eq__(self, other):
+                return 'other'
+            __le__ = __eq__
+        assert (dateinterop(1, 1, 1) == Other()) == 'other'
+        assert (dt(1, 1, 1) >= Other()) == 'other'
+
+    def test_arithmetic(self):
+        from __pypy__._pypydatetime import (deltainterop, dateinterop,
+            datetimeinterop)
+        d = dateinterop(2000, 2, 28)
+        e = d + deltainterop(400)
+        assert (e.year, e.month, e.day) == (2001, 4, 3)
+        e = deltainterop(1) + d
+        assert (e.year, e.month, e.day) == (2000, 2, 29)
+        e = d - deltainterop(-2, 1)
+        assert (e.year, e.month, e.day) == (2000, 3, 1)
+        assert (d - dateinterop(2000, 1, 1)).days == 58
+        raises(OverflowError, "dateinterop(9999, 12, 31) + deltainterop(1)")
+        raises(OverflowError, "dateinterop(1, 1, 1) - deltainterop(1)")
+        assert d.__add__(1) is NotImplemented
+        dt = datetimeinterop(2000, 12, 31, 23, 59, 59, 999999)
+        e = dt + deltainterop(microseconds=1)
+        assert (e.year, e.month, e.day, e.hour, e.minute, e.second,
+                e.microsecond) == (2001, 1, 1, 0, 0, 0, 0)
+        e = dt - datetimeinterop(2001, 1, 1)
+        assert (e.days, e.seconds, e.microseconds) == (-1, 86399, 999999)
+        assert dt.__sub__(d) is NotImplemented
+        assert d.toordinal() == 730178
+        assert d.weekday() == 0 and d.isoweekday() == 1
+
+    def test_format(self):
+        from __pypy__._pypydatetime import (dateinterop, datetimeinterop,
+            timeinterop)
+        assert dateinterop(12, 3, 4).isoformat() == '0012-03-04'
+        assert str(dateinterop(12, 3, 4)) == '0012-03-04'
+        assert timeinterop(1, 2, 3).isoformat() == '01:02:03'
+        assert str(timeinterop(1, 2, 3, 45)) == '01:02:03.000045'
+        dt = datetimeinterop(2000, 1, 2, 3, 4, 5)
+        assert dt.isoformat() == '2000-01-02T03:04:05'
+        assert dt.isoformat('x') == '2000-01-02x03:04:05'
+        assert str(dt) == '2000-01-02 03:04:05'
+        raises(TypeError, dt.isoformat, 'xy')
+
+    def test_parse_iso(self):
+        from __pypy__._pypydatetime import parse_iso
+        assert parse_iso('2017-03-27', '%Y-%m-%d') == (2017, 3, 27, 0, 0, 0, 0)
+        assert parse_iso('2017-03-27T22:20:42', '%Y-%m-%dT%H:%M:%S') == (
+            2017, 3, 27, 22, 20, 42, 0)
+        assert parse_iso('2017-03-27 22:20:42.5',
+                         '%Y-%m-%d %H:%M:%S.%f') == (
+            2017, 3, 27, 22, 20, 42, 500000)
+        for s, fmt in [('2017-3-27', '%Y-%m-%d'),
+                       ('2017-02-29', '%Y-%m-%d'),
+                       ('2017-03-27 ', '%Y-%m-%d'),
+                       ('2017-03-27 22:20:42', '%Y-%m-%dT%H:%M:%S'),
+                       ('2017-03-27 22:20:60', '%Y-%m-%d %H:%M:%S'),
+                       ('2017-03-27 22:20:42.', '%Y-%m-%d %H:%M:%S.%f'),
+                       ('2017-03-27 22:20:42.1234567',
+                        '%Y-%m-%d %H:%M:%S.%f'),
+                       ('27/03/2017', '%d/%m/%Y')]:
+            assert parse_iso(s, fmt) is None
+
+    def test_datetime_module(self):
+        import datetime
+        d = datetime.datetime(2000, 2, 28, 23, 59, 59, 999999)
+        assert d + datetime.timedelta(microseconds=1) == datetime.datetime(
+            2000, 2, 29)
+        assert d.isoformat() == '2000-02-28T23:59:59.999999'
+        assert str(d.date()) == '2000-02-28'
+        assert datetime.date.fromordinal(d.toordinal()) == d.date()
+        assert datetime.datetime.strptime('2000-02-28 23:59:59.999999',
+                                          '%Y-%m-%d %H:%M:%S.%f') == d
+        raises(ValueError, datetime.datetime.strptime, '2000-02-30',
+               '%Y-%m-%d')
+        raises(ValueError, datetime.date, 2000, 2, 30)
+        raises(ValueError, datetime.date.fromordinal, 10 ** 30)
+        td = datetime.timedelta
+        assert td(days=1, seconds=-1) + td(microseconds=1) == td(
+            0, 86399, 1)
+        assert td(1) - td(seconds=1) < td(1) <= td(1, 0, 0)
+        assert sorted([td(1, 2), td(-1), td(0, 5)]) == [td(-1), td(0, 5),
+                                                       td(1, 2)]
+        raises(OverflowError, lambda: td.max + td.resolution)
+        assert datetime.time(1, 2) < datetime.time(1, 2, 0, 1)
+        assert d.date() < datetime.date(2000, 2, 29)
+        assert d < datetime.datetime(2000, 2, 29) > d
+
+    def test_datetime_tzinfo(self):
+        import datetime
+        class FixedOffset(datetime.tzinfo):
+            def __init__(self, minutes):
+                self.minutes = minutes
+            def utcoffset(self, dt):
+                return datetime.timedelta(minutes=self.minutes)
+            def dst(self, dt):
+                return None
+        plus1 = FixedOffset(60)
+        minus1 = FixedOffset(-60)
+        dt1 = datetime.datetime(2000, 1, 1, 12, 0, tzinfo=plus1)
+        dt2 = datetime.datetime(2000, 1, 1, 10, 0, tzinfo=minus1)
+        assert dt1.tzinfo is plus1
+        assert dt2 - dt1 == datetime.timedelta(hours=0)
+        assert dt1 == dt2 and hash(dt1) == hash(dt2)
+        assert dt1 < dt2 + datetime.timedelta(microseconds=1)
+        assert str(dt1) == '2000-01-01 12:00:00+01:00'
+        assert dt2.isoformat() == '2000-01-01T10:00:00-01:00'
+        naive = dt1.replace(tzinfo=None)
+        exc = raises(TypeError, "naive < dt1")
+        assert str(exc.value) == (
+            "can't compare offset-naive and offset-aware datetimes")
+        exc = raises(TypeError, "naive - dt1")
+        assert str(exc.value) == (
+            "can't subtract offset-naive and offset-aware datetimes")
+        t1 = datetime.time(12, 0, tzinfo=plus1)
+        t2 = datetime.time(10, 0, tzinfo=minus1)
+        assert t1 == t2 and hash(t1) == hash(t2)
+        assert hash(t1) == hash(datetime.time(11, 0))
+        assert str(t2) == '10:00:00-01:00'
+        assert not datetime.time(1, 0, tzinfo=plus1)
+        exc = raises(TypeError, "datetime.time(12, 0) < t1")
+        assert str(exc.value) == (
+            "can't compare offset-naive and offset-aware times")
+        exc = raises(TypeError, datetime.time, 1, tzinfo=1)
+        assert str(exc.value) == (
+            "tzinfo argument must be None or of a tzinfo subclass")
+        raises(TypeError, datetime.datetime, 2000, 1, 1, tzinfo=1)
+
+    def test_datetime_types(self):
+        import datetime
+        class MyDate(datetime.date):
+            pass
+        class MyDelta(datetime.timedelta):
+            pass
+        class MyDateTime(datetime.datetime):
+            def isoformat(self, sep='T'):
+                return 'my isoformat %r' % (sep,)
+        d = MyDate(2000, 1, 1)
+        assert type(d) is MyDate and d.year == 2000
+        assert type(d + MyDelta(1)) is datetime.date
+        assert type(MyDelta(1) + MyDelta(2)) is datetime.timedelta
+        assert type(-MyDelta(1)) is datetime.timedelta
+        assert type(d - d) is datetime.timedelta
+        dt = MyDateTime(2000, 1, 1, 12)
+        assert type(dt + MyDelta(1)) is datetime.datetime
+        assert str(dt) == "my isoformat ' '"
+        assert isinstance(dt, datetime.date)
+        assert dt.date() == d and not (dt == d)
+        d.attr = 42
+        assert d.attr == 42
+        raises(AttributeError, setattr, datetime.date(2000, 1, 1), 'x', 1)
+
+    def test_datetime_pickle(self):
+        import datetime, pickle
+        class UTC(datetime.tzinfo):
+            def utcoffset(self, dt):
+                return datetime.timedelta(0)
+        for obj in [datetime.timedelta(1, 2, 3), datetime.date(2000, 2, 29),
+                    datetime.time(1, 2, 3, 456789),
+                    datetime.datetime(2000, 2, 29, 1, 2, 3, 456789)]:
+            for proto in range(3):
+                copy = pickle.loads(pickle.dumps(obj, proto))
+                assert copy == obj and type(copy) is type(obj)
+                assert hash(copy) == hash(obj)
+        utc = UTC()
+        for obj in [datetime.time(1, 2, tzinfo=utc),
+                    datetime.datetime(2000, 2, 29, 1, 2, tzinfo=utc)]:
+            cls, args = obj.__reduce__()
+            assert cls is type(obj) and args[1] is utc
+            copy = cls(*args)
+            assert copy == obj and copy.tzinfo is utc
+        assert datetime.date(2000, 2, 29).__reduce__() == (
+            datetime.date, ('\x07\xd0\x02\x1d',))
+        assert datetime.datetime(2000, 2, 29, 1, 2, 3, 4).__reduce__() == (
+            datetime.datetime, ('\x07\xd0\x02\x1d\x01\x02\x03\x00\x00\x04',))
+        assert hash(datetime.date(2000, 2, 29)) == hash(
+            ('\x07\xd0\x02\x1d',))
+        exc = raises(TypeError, datetime.time, '\x01\x02\x03\x00\x00\x04',
+                     'not a tzinfo')
+        assert str(exc.value) == 'bad tzinfo state arg'
@@ -0,0 +1,552 @@
+"""A block-oriented CSV reader producing columns instead of rows.
+
+The data is read in large chunks with the file's readinto() into a
+bytearray, and the fields are found by scanning the raw memory a word at
+a time for the few characters that can end them (see _pypyjson/simd.py).
+Unquoted fields of int columns are converted without building a string
+first.  Each iteration returns a list of columns, each of them a list of
+str, int or float using the corresponding list strategy.
+"""
+
+from rpython.rlib import objectmodel
+from rpython.rlib.rarithmetic import string_to_int
+from rpython.rlib.rfloat import string_to_float
+from rpython.rlib.rstring import (
+    StringBuilder, ParseStringError, ParseStringOverflowError)
+from rpython.rtyper.lltypesystem import lltype, rffi
+
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import WrappedDefault, unwrap_spec
+from pypy.interpreter.typedef import (
+    TypeDef, interp2app, interp_attrproperty, interp_attrproperty_w)
+from pypy.module._csv.interp_csv import _build_dialect
+from pypy.module._csv.interp_csv import QUOTE_NONE, QUOTE_NONNUMERIC
+from pypy.module._csv.interp_reader import field_limit
+from pypy.module._pypyjson.simd import (
+    USE_SIMD, WORD_SIZE, char_repeated_word_width, any_char_in_words_zero,
+    index_nonzero)
+from pypy.objspace.std.util import wrap_parsestringerror
+
+KIND_STR, KIND_INT, KIND_FLOAT = range(3)
+
+c_memmove = rffi.llexternal("memmove", [rffi.VOIDP, rffi.VOIDP, rffi.SIZE_T],
+                            lltype.Void, releasegil=False)
+
+# the longest unsigned decimal number that always fits in a Signed
+MAX_FAST_DIGITS = 18
+
+
+@objectmodel.always_inline
+def _find_special(ll_chars, i, end, c1, c2, c3, c4):
+    """Return the position of the first of the characters c1 to c4 or of a
+    NULL byte in ll_chars[i:end], or 'end'."""
+    if USE_SIMD:
+        mask1 = char_repeated_word_width(c1)
+        mask2 = char_repeated_word_width(c2)
+        mask3 = char_repeated_word_width(c3)
+        mask4 = char_repeated_word_width(c4)
+        while i + WORD_SIZE <= end:
+            word = rffi.cast(rffi.ULONGP, rffi.ptradd(ll_chars, i))[0]
+            cond = any_char_in_words_zero(word ^ mask1, word ^ mask2,
+                                          word ^ mask3, word ^ mask4, word)
+            if cond:
+                return i + index_nonzero(cond)
+            i += WORD_SIZE
+    while i < end:
+        ch = ll_chars[i]
+        if ch == c1 or ch == c2 or ch == c3 or ch == c4 or ch == '\0':
+            return i
+        i += 1
+    return end
+
+
+class Column(object):
+    def add_span(self, reader, ll_chars, start, stop):
+        self.add_string(reader, rffi.charpsize2str(
+            rffi.ptradd(ll_chars, start), stop - start))
+
+    def add_string(self, reader, s):
+        raise NotImplementedError
+
+    def wrap(self, space):
+        raise NotImplementedError
+
+
+class StrColumn(Column):
+    def __init__(self):
+        self.items = []
+
+    def add_string(self, reader, s):
+        self.items.append(s)
+
+    def wrap(self, space):
+        return space.newlist_bytes(self.items)
+
+
+class IntColumn(Column):
+    def __init__(self):
+        self.items = []
+
+    def add_span(self, reader, ll_chars, start, stop):
+        i = start
+        negative = False
+        if i < stop and (ll_chars[i] == '-' or ll_chars[i] == '+'):
+            negative = ll_chars[i] == '-'
+            i += 1
+        if 0 < stop - i <= MAX_FAST_DIGITS:
+            value = 0
+            while i < stop:
+                c = ll_chars[i]
+                if not ('0' <= c <= '9'):
+                    break
+                value = value * 10 + (ord(c) - ord('0'))
+                i += 1
+            else:
+                if negative:
+                    value = -value
+                self.items.append(value)
+                return
+        Column.add_span(self, reader, ll_chars, start, stop)
+
+    def add_string(self, reader, s):
+        space = reader.space
+        try:
+            value = string_to_int(s)
+        except ParseStringError as e:
+            raise wrap_parsestringerror(space, e, space.newtext(s))
+        except ParseStringOverflowError:
+            raise oefmt(space.w_OverflowError,
+                        "line %d: %R does not fit in an int column",
+                        reader.current_line(), space.newtext(s))
+        self.items.append(value)
+
+    def wrap(self, space):
+        return space.newlist_int(self.items)
+
+
+class FloatColumn(Column):
+    def __init__(self):
+        self.items = []
+
+    def add_string(self, reader, s):
+        space = reader.space
+        try:
+            value = string_to_float(s)
+        except ParseStringError as e:
+            raise wrap_parsestringerror(space, e, space.newtext(s))
+        self.items.append(value)
+
+    def wrap(self, space):
+        return space.newlist_float(self.items)
+
+
+class W_ColumnReader(W_Root):
+
+    def __init__(self, space, dialect, w_file, kinds, rows, chunksize):
+        self.space = space
+        self.dialect = dialect
+        self.w_file = w_file
+        self.kinds = kinds
+        self.rows = rows
+        self.use_readinto = space.findattr(
+            w_file, space.newtext('readinto')) is not None
+        self.w_chunk = space.call_function(space.w_bytearray,
+                                           space.newint(chunksize))
+        self.chunksize = chunksize
+        self.start = 0         # the data not parsed yet is in
+        self.end = 0           # w_chunk[start:end]
+        self.eof = False
+        self.line_num = 0
+        self.ncolumns = -1
+        self.columns = None
+        # the fields of the record being parsed: either a span of the
+        # chunk, or a string if it contained escapes or doubled quotes
+        self.field_starts = []
+        self.field_stops = []
+        self.field_strings = []
+        self.record_lines = 0
+
+    def iter_w(self):
+        return self
+
+    @objectmodel.dont_inline
+    def error(self, msg):
+        space = self.space
+        w_module = space.getbuiltinmodule('_csv')
+        w_error = space.getattr(w_module, space.newtext('Error'))
+        return oefmt(w_error, "line %d: %s", self.current_line(), msg)
+
+    def current_line(self):
+        return self.line_num + self.record_lines + 1
+
+    def _get_chars(self):
+        return self.space.writebuf_w(self.w_chunk).get_raw_address()
+
+    def _fill(self):
+        """Move the data not parsed yet to the start of the chunk, and
+        read more after it."""
+        space = self.space
+        keep = self.end - self.start
+        if keep == self.chunksize:
+            # a single record larger than the chunk
+            w_chunk = space.call_function(space.w_bytearray,
+                                          space.newint(2 * self.chunksize))
+            rffi.c_memcpy(
+                rffi.cast(rffi.VOIDP,
+                          space.writebuf_w(w_chunk).get_raw_address()),
+                rffi.cast(rffi.VOIDP, self._get_chars()), keep)
+            self.w_chunk = w_chunk
+            self.chunksize *= 2
+        elif keep > 0 and self.start > 0:
+            ll_chars = self._get_chars()
+            c_memmove(rffi.cast(rffi.VOIDP, ll_chars),
+                           rffi.cast(rffi.VOIDP,
+                                     rffi.ptradd(ll_chars, self.start)),
+                           keep)
+        self.start = 0
+        self.end = keep
+        size = self.chunksize - keep
+        if self.use_readinto:
+            view = space.buffer_w(self.w_chunk, space.BUF_WRITABLE)
+            w_view = view.new_slice(keep, 1, size).wrap(space)
+            w_count = space.call_method(self.w_file, 'readinto', w_view)
+            count = space.int_w(w_count)
+            if not 0 <= count <= size:
+                raise oefmt(space.w_IOError,
+                            "readinto() returned %d, expected 0 to %d",
+                            count, size)
+        else:
+            data = space.bytes_w(space.call_method(self.w_file, 'read',
+                                                   space.newint(size)))
+            count = len(data)
+            if count > size:
+                raise oefmt(space.w_IOError,
+                            "read() returned %d bytes instead of %d",
+                            count, size)
+            with rffi.scoped_nonmovingbuffer(data) as buf:
+                rffi.c_memcpy(
+                    rffi.cast(rffi.VOIDP,
+                              rffi.ptradd(self._get_chars(), keep)),
+                    rffi.cast(rffi.VOIDP, buf), count)
+        if count == 0:
+            self.eof = True
+        self.end += count
+
+    # Parsing
+
+    def _add_span(self, start, stop):
+        if stop - start > field_limit.limit:
+            raise self.error("field larger than field limit")
+        self.field_starts.append(start)
+        self.field_stops.append(stop)
+        self.field_strings.append(None)
+
+    def _add_string(self, builder):
+        if builder.getlength() > field_limit.limit:
+            raise self.error("field larger than field limit")
+        self.field_starts.append(0)
+        self.field_stops.append(0)
+        self.field_strings.append(builder.build())
+
+    def _eat_crnl(self, ll_chars, i, end, final):
+        """Skip the line terminator at ll_chars[i]."""
+        self.record_lines += 1
+        if ll_chars[i] == '\r':
+            if i + 1 < end:
+                if ll_chars[i + 1] == '\n':
+                    return i + 2
+            elif not final:
+                return -1
+        return i + 1
+
+    def _parse_unquoted(self, ll_chars, i, end, final, builder):
+        """Parse an unquoted field, or what follows the closing quote of a
+        quoted one if 'builder' is not None.  Returns the position after
+        the field, or -1 if the data ends before it."""
+        dialect = self.dialect
+        start = i
+        while True:
+            i = _find_special(ll_chars, i, end, dialect.delimiter, '\n',
+                              '\r', dialect.escapechar)
+            if i == end:
+                if not final:
+                    return -1
+                break
+            c = ll_chars[i]
+            if c == '\0':
+                raise self.error("line contains NULL byte")
+            if c != dialect.escapechar:
+                break
+            # escaped character
+            if builder is None:
+                builder = StringBuilder(64)
+            builder.append_charpsize(rffi.ptradd(ll_chars, start), i - start)
+            if i + 1 == end:
+                if not final:
+                    return -1
+                if dialect.strict:
+                    raise self.error("unexpected end of data")
+                builder.append('\n')
+                i = start = end
+                break
+            builder.append(ll_chars[i + 1])
+            if ll_chars[i + 1] == '\n':
+                self.record_lines += 1
+            i += 2
+            start = i
+        if builder is None:
+            self._add_span(start, i)
+        else:
+            builder.append_charpsize(rffi.ptradd(ll_chars, start), i - start)
+            self._add_string(builder)
+        return i
+
+    def _parse_quoted(self, ll_chars, i, end, final):
+        """Parse a quoted field, starting after the opening quote."""
+        dialect = self.dialect
+        quotechar = dialect.quotechar
+        builder = None
+        start = i
+        while True:
+            i = _find_special(ll_chars, i, end, quotechar, dialect.escapechar,
+                              '\n', quotechar)
+            if i == end:
+                if not final:
+                    return -1
+                if dialect.strict:
+                    raise self.error("unexpected end of data")
+                break
+            c = ll_chars[i]
+            if c == '\0':
+                raise self.error("line contains NULL byte")
+            if c == '\n':
+                self.record_lines += 1
+                i += 1
+                continue
+            if c == quotechar:
+                if dialect.doublequote:
+                    if i + 1 == end and not final:
+                        return -1
+                    if i + 1 < end and ll_chars[i + 1] == quotechar:
+                        # save "" as "
+                        if builder is None:
+                            builder = StringBuilder(64)
+                        builder.append_charpsize(
+                            rffi.ptradd(ll_chars, start), i + 1 - start)
+                        i += 2
+                        start = i
+                        continue
+                # end of the quoted part of the field
+                break
+            # escaped character
+            if builder is None:
+                builder = StringBuilder(64)
+            builder.append_charpsize(rffi.ptradd(ll_chars, start), i - start)
+            if i + 1 == end:
+                if not final:
+                    return -1
+                if dialect.strict:
+                    raise self.error("unexpected end of data")
+                builder.append('\n')
+                i = start = end
+                break
+            builder.append(ll_chars[i + 1])
+            if ll_chars[i + 1] == '\n':
+                self.record_lines += 1
+            i += 2
+            start = i
+        stop = i
+        if i < end:
+            i += 1      # the closing quote
+        if i < end:
+            c = ll_chars[i]
+            if not (c == dialect.delimiter or c == '\n' or c == '\r'):
+                if dialect.strict:
+                    raise self.error("'%s' expected after '%s'" % (
+                        dialect.delimiter, quotechar))
+                # the rest is taken as an unquoted field
+                if builder is None:
+                    builder = StringBuilder(64)
+                builder.append_charpsize(rffi.ptradd(ll_chars, start),
+                                         stop - start)
+                return self._parse_unquoted(ll_chars, i, end, final,
+                                            builder)
+        elif not final:
+            return -1
+        if builder is None:
+            self._add_span(start, stop)
+        else:
+            builder.append_charpsize(rffi.ptradd(ll_chars, start),
+                                     stop - start)
+            self._add_string(builder)
+        return i
+
+    def _parse_record(self, ll_chars, i, end, final):
+        """Parse the record at ll_chars[i:end] into the field_* lists.
+        Returns the position after it, or -1 if the data ends before it.
+        An empty line gives a record without fields."""
+        dialect = self.dialect
+        del self.field_starts[:]
+        del self.field_stops[:]
+        del self.field_strings[:]
+        self.record_lines = 0
+        c = ll_chars[i]
+        if c == '\n' or c == '\r':
+            return self._eat_crnl(ll_chars, i, end, final)
+        while True:
+            if dialect.skipinitialspace:
+                while i < end and ll_chars[i] == ' ':
+                    i += 1
+            if (i < end and ll_chars[i] == dialect.quotechar and
+                    dialect.quoting != QUOTE_NONE):
+                i = self._parse_quoted(ll_chars, i + 1, end, final)
+            else:
+                i = self._parse_unquoted(ll_chars, i, end, final, None)
+            if i < 0:
+                return -1
+            if i == end:
+                return i
+            if ll_chars[i] != dialect.delimiter:
+                return self._eat_crnl(ll_chars, i, end, final)
+            i += 1
+
+    def _store_record(self, ll_chars):
+        space = self.space
+        nfields = len(self.field_starts)
+        if self.ncolumns < 0:
+            for index in self.kinds:
+                if index >= nfields:
+                    raise oefmt(space.w_ValueError,
+                                "type given for column %d, but there are "
+                                "only %d columns", index, nfields)
+            self.ncolumns = nfields
+        elif nfields != self.ncolumns:
+            raise self.error("expected %d fields, saw %d" % (
+                self.ncolumns, nfields))
+        if self.columns is None:
+            self.columns = [self._new_column(i)
+                            for i in range(self.ncolumns)]
+        for i in range(nfields):
+            column = self.columns[i]
+            s = self.field_strings[i]
+            if s is None:
+                column.add_span(self, ll_chars, self.field_starts[i],
+                                self.field_stops[i])
+            else:
+                column.add_string(self, s)
+
+    def _new_column(self, index):
+        kind = self.kinds.get(index, KIND_STR)
+        if kind == KIND_INT:
+            return IntColumn()
+        elif kind == KIND_FLOAT:
+            return FloatColumn()
+        else:
+            return StrColumn()
+
+    def next_w(self):
+        space = self.space
+        self.columns = None
+        nrows = 0
+        ll_chars = self._get_chars()
+        while nrows < self.rows:
+            if self.start == self.end:
+                if self.eof:
+                    break
+                self._fill()
+                ll_chars = self._get_chars()
+                continue
+            pos = self._parse_record(ll_chars, self.start, self.end,
+                                     self.eof)
+            if pos < 0:
+                self._fill()
+                ll_chars = self._get_chars()
+                continue
+            if len(self.field_starts) > 0:
+                self._store_record(ll_chars)
+                nrows += 1
+            self.line_num += self.record_lines
+            self.start = pos
+        if nrows == 0:
+            raise OperationError(space.w_StopIteration, space.w_None)
+        columns = self.columns
+        self.columns = None
+        assert columns is not None
+        return space.newlist([column.wrap(space) for column in columns])
+
+
+def _column_kinds(space, w_types):
+    kinds = {}
+    if space.is_none(w_types):
+        return kinds
+    for w_key in space.listview(w_types):
+        index = space.int_w(w_key)
+        if index < 0:
+            raise oefmt(space.w_ValueError, "negative column index")
+        w_type = space.getitem(w_types, w_key)
+        if space.is_w(w_type, space.w_int):
+            kinds[index] = KIND_INT
+        elif space.is_w(w_type, space.w_float):
+            kinds[index] = KIND_FLOAT
+        elif space.is_w(w_type, space.w_bytes):
+            kinds[index] = KIND_STR
+        else:
+            raise oefmt(space.w_TypeError,
+                        "column types must be int, float or str, not %R",
+                        w_type)
+    return kinds
+
+
+@unwrap_spec(rows=int, chunksize=int)
+def csv_column_reader(space, w_fileobj, w_types=None, rows=65536,
+                      chunksize=1024 * 1024, w_dialect=None,
+                      w_delimiter        = None,
+                      w_doublequote      = None,
+                      w_escapechar       = None,
+                      w_lineterminator   = None,
+                      w_quotechar        = None,
+                      w_quoting          = None,
+                      w_skipinitialspace = None,
+                      w_strict           = None,
+                      ):
+    """
+    column_reader(fileobj [, types] [, rows] [, chunksize]
+                  [, dialect='excel'] [optional keyword args])
+    for columns in column_reader(f, {0: int, 2: float}):
+        process(columns)
+
+    Reads the CSV data of a file object in chunks of 'chunksize' bytes,
+    with its readinto() method if it has one and with read() otherwise.
+    Each iteration returns a list of columns holding up to 'rows' records;
+    the columns are lists of str, except the ones given in the 'types'
+    dictionary, which maps column indexes to int or float.
+
+    All records must have the same number of fields, and empty lines are
+    skipped.  '\\r', '\\n' and '\\r\\n' all end a record."""
+    dialect = _build_dialect(space, w_dialect, w_delimiter, w_doublequote,
+                             w_escapechar, w_lineterminator, w_quotechar,
+                             w_quoting, w_skipinitialspace, w_strict)
+    if dialect.quoting == QUOTE_NONNUMERIC:
+        raise oefmt(space.w_ValueError,
+                    "column_reader() does not support QUOTE_NONNUMERIC, "
+                    "give the column types instead")
+    if rows <= 0:
+        raise oefmt(space.w_ValueError, "rows must be positive")
+    if chunksize <= 0:
+        raise oefmt(space.w_ValueError, "chunksize must be positive")
+    kinds = _column_kinds(space, w_types)
+    return W_ColumnReader(space, dialect, w_fileobj, kinds, rows, chunksize)
+
+W_ColumnReader.typedef = TypeDef(
+        '_csv.column_reader',
+        dialect = interp_attrproperty_w('dialect', W_ColumnReader),
+        line_num = interp_attrproperty('line_num', W_ColumnReader,
+            wrapfn="newint"),
+        __iter__ = interp2app(W_ColumnReader.iter_w),
+        next = interp2app(W_ColumnReader.next_w),
+        __doc__ = """CSV column reader
+
+Column reader objects read CSV data in large chunks and return it as
+lists of columns.""")
+W_ColumnReader.typedef.acceptable_as_base_class = False
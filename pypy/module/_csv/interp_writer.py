@@ -7,6 +7,10 @@ from pypy.interpreter.typedef import interp_attrproperty_w
 from pypy.module._csv.interp_csv import _build_dialect
 from pypy.module._csv.interp_csv import (QUOTE_MINIMAL, QUOTE_ALL,
                                          QUOTE_NONNUMERIC, QUOTE_NONE)
+from pypy.objspace.std.floatobject import float2string
+
+# writerows() calls write() when it has collected this many bytes
+WRITEROWS_BUFFER_SIZE = 64 * 1024
 
 
 class W_Writer(W_Root):
@@ -33,103 +37,161 @@ class W_Writer(W_Root):
         """Construct and write a CSV record from a sequence of fields.
         Non-string elements will be converted to string."""
         space = self.space
-        fields_w = space.listview(w_fields)
-        dialect = self.dialect
         rec = StringBuilder(80)
-        #
-        for field_index in range(len(fields_w)):
-            w_field = fields_w[field_index]
-            if space.is_w(w_field, space.w_None):
-                field = ""
-            elif space.isinstance_w(w_field, space.w_float):
-                field = space.text_w(space.repr(w_field))
-            else:
-                field = space.text_w(space.str(w_field))
-            #
-            if dialect.quoting == QUOTE_NONNUMERIC:
-                try:
-                    space.float_w(w_field)    # is it an int/long/float?
-                    quoted = False
-                except OperationError as e:
-                    if e.async(space):
-                        raise
-                    quoted = True
-            elif dialect.quoting == QUOTE_ALL:
-                quoted = True
-            elif dialect.quoting == QUOTE_MINIMAL:
-                # Find out if we really quoting
-                special_characters = self.special_characters
-                for c in field:
-                    if c in special_characters:
-                        if c != dialect.quotechar or dialect.doublequote:
-                            quoted = True
-                            break
-                else:
-                    quoted = False
-            else:
-                quoted = False
-
-            # If field is empty check if it needs to be quoted
-            if len(field) == 0 and len(fields_w) == 1:
-                if dialect.quoting == QUOTE_NONE:
-                    raise self.error("single empty field record "
-                                     "must be quoted")
-                quoted = True
-
-            # If this is not the first field we need a field separator
-            if field_index > 0:
-                rec.append(dialect.delimiter)
-
-            # Handle preceding quote
-            if quoted:
-                rec.append(dialect.quotechar)
-
-            # Copy field data
-            special_characters = self.special_characters
-            for c in field:
-                if c in special_characters:
-                    if dialect.quoting == QUOTE_NONE:
-                        want_escape = True
-                    else:
-                        want_escape = False
-                        if c == dialect.quotechar:
-                            if dialect.doublequote:
-                                rec.append(dialect.quotechar)
-                            else:
-                                want_escape = True
-                    if want_escape:
-                        if dialect.escapechar == '\0':
-                            raise self.error("need to escape, "
-                                             "but no escapechar set")
-                        rec.append(dialect.escapechar)
-                    else:
-                        assert quoted
-                # Copy field character into record buffer
-                rec.append(c)
-
-            # Handle final quote
-            if quoted:
-                rec.append(dialect.quotechar)
-
-        # Add line terminator
-        rec.append(dialect.lineterminator)
-
+        self.append_record(rec, w_fields)
         line = rec.build()
         return space.call_function(self.w_filewrite, space.newtext(line))
 
     def writerows(self, w_seqseq):
         """Construct and write a series of sequences to a csv file.
         Non-string elements will be converted to string."""
+        # the records are collected and written in blocks of about
+        # WRITEROWS_BUFFER_SIZE bytes instead of one write() per row
         space = self.space
         w_iter = space.iter(w_seqseq)
+        rec = StringBuilder(WRITEROWS_BUFFER_SIZE)
         while True:
+            start = rec.getlength()
             try:
                 w_seq = space.next(w_iter)
+                self.append_record(rec, w_seq)
             except OperationError as e:
+                # the rows before the failing one are written, like
+                # when calling writerow() for each of them
+                self.flush_records(rec.build(), start)
                 if e.match(space, space.w_StopIteration):
                     break
                 raise
-            self.writerow(w_seq)
+            if rec.getlength() >= WRITEROWS_BUFFER_SIZE:
+                self.flush_records(rec.build(), rec.getlength())
+                rec = StringBuilder(WRITEROWS_BUFFER_SIZE)
+
+    def flush_records(self, data, length):
+        if length > 0:
+            space = self.space
+            if length < len(data):
+                data = data[:length]
+            space.call_function(self.w_filewrite, space.newtext(data))
+
+    def append_record(self, rec, w_fields):
+        """Append the CSV record made from the sequence 'w_fields' to the
+        StringBuilder 'rec'.  Lists of ints, floats or strings are
+        formatted without wrapping their items."""
+        space = self.space
+        intlist = space.listview_int(w_fields)
+        if intlist is not None:
+            for i in range(len(intlist)):
+                self.append_field(rec, i, len(intlist), str(intlist[i]),
+                                  True)
+        else:
+            floatlist = space.listview_float(w_fields)
+            if floatlist is not None:
+                for i in range(len(floatlist)):
+                    self.append_field(rec, i, len(floatlist),
+                                      float2string(floatlist[i], 'r', 0),
+                                      True)
+            else:
+                byteslist = space.listview_bytes(w_fields)
+                if byteslist is not None:
+                    for i in range(len(byteslist)):
+                        self.append_field(rec, i, len(byteslist),
+                                          byteslist[i], False)
+                else:
+                    # tuples are viewed without copying them
+                    fields_w = space.fixedview(w_fields)
+                    for i in range(len(fields_w)):
+                        self._append_w_field(rec, i, len(fields_w),
+                                             fields_w[i])
+        # Add line terminator
+        rec.append(self.dialect.lineterminator)
+
+    def _append_w_field(self, rec, field_index, nfields, w_field):
+        space = self.space
+        numeric = False
+        if space.is_w(w_field, space.w_None):
+            field = ""
+        elif space.is_w(space.type(w_field), space.w_int):
+            field = str(space.int_w(w_field))
+            numeric = True
+        elif space.is_w(space.type(w_field), space.w_float):
+            field = float2string(space.float_w(w_field), 'r', 0)
+            numeric = True
+        elif space.isinstance_w(w_field, space.w_float):
+            field = space.text_w(space.repr(w_field))
+        else:
+            field = space.text_w(space.str(w_field))
+        #
+        if self.dialect.quoting == QUOTE_NONNUMERIC and not numeric:
+            try:
+                space.float_w(w_field)    # is it an int/long/float?
+                numeric = True
+            except OperationError as e:
+                if e.async(space):
+                    raise
+        self.append_field(rec, field_index, nfields, field, numeric)
+
+    def append_field(self, rec, field_index, nfields, field, numeric):
+        """Append one field, quoted and escaped as required.  'numeric'
+        tells that the field comes from an int, long or float."""
+        dialect = self.dialect
+        if dialect.quoting == QUOTE_NONNUMERIC:
+            quoted = not numeric
+        elif dialect.quoting == QUOTE_ALL:
+            quoted = True
+        elif dialect.quoting == QUOTE_MINIMAL:
+            # Find out if we really quoting
+            special_characters = self.special_characters
+            for c in field:
+                if c in special_characters:
+                    if c != dialect.quotechar or dialect.doublequote:
+                        quoted = True
+                        break
+            else:
+                quoted = False
+        else:
+            quoted = False
+
+        # If field is empty check if it needs to be quoted
+        if len(field) == 0 and nfields == 1:
+            if dialect.quoting == QUOTE_NONE:
+                raise self.error("single empty field record "
+                                 "must be quoted")
+            quoted = True
+
+        # If this is not the first field we need a field separator
+        if field_index > 0:
+            rec.append(dialect.delimiter)
+
+        # Handle preceding quote
+        if quoted:
+            rec.append(dialect.quotechar)
+
+        # Copy field data
+        special_characters = self.special_characters
+        for c in field:
+            if c in special_characters:
+                if dialect.quoting == QUOTE_NONE:
+                    want_escape = True
+                else:
+                    want_escape = False
+                    if c == dialect.quotechar:
+                        if dialect.doublequote:
+                            rec.append(dialect.quotechar)
+                        else:
+                            want_escape = True
+                if want_escape:
+                    if dialect.escapechar == '\0':
+                        raise self.error("need to escape, "
+                                         "but no escapechar set")
+                    rec.append(dialect.escapechar)
+                else:
+                    assert quoted
+            # Copy field character into record buffer
+            rec.append(c)
+
+        # Handle final quote
+        if quoted:
+            rec.append(dialect.quotechar)
 
 
 def csv_writer(space, w_fileobj, w_dialect=None,
@@ -104,3 +104,116 @@ class AppTestReader(object):
         self._read_test(['a,"'], 'Error', strict=True)
         self._read_test(['"a'], 'Error', strict=True)
         self._read_test(['^'], 'Error', escapechar='^', strict=True)
+
+
+class AppTestColumnReader(object):
+    spaceconfig = dict(usemodules=['_csv', '_io'])
+
+    def setup_class(cls):
+        w__read_columns = cls.space.appexec([], r"""():
+            import _csv, _io
+            class ReadOnly(object):
+                # a file object without readinto()
+                def __init__(self, data):
+                    self.f = _io.BytesIO(data)
+                def read(self, size):
+                    return self.f.read(size)
+            def _read_columns(data, expect, **kwargs):
+                for f in [_io.BytesIO(data), ReadOnly(data)]:
+                    for chunksize in [1, 3, 1024]:
+                        reader = _csv.column_reader(f, chunksize=chunksize,
+                                                    **kwargs)
+                        if expect == 'Error':
+                            raises(_csv.Error, list, reader)
+                        else:
+                            result = list(reader)
+                            assert result == expect, (
+                                'result: %r\nexpect: %r' % (result, expect))
+                        f.seek(0) if hasattr(f, 'seek') else f.f.seek(0)
+            return _read_columns
+        """)
+        if type(w__read_columns) is type(lambda:0):
+            w__read_columns = staticmethod(w__read_columns)
+        cls.w__read_columns = w__read_columns
+
+    def test_simple(self):
+        self._read_columns(b'', [])
+        self._read_columns(b'a,b\n', [[['a'], ['b']]])
+        self._read_columns(b'a,b\nc,d', [[['a', 'c'], ['b', 'd']]])
+        self._read_columns(b'a,b\r\nc,d\rx,\n', [[['a', 'c', 'x'],
+                                                  ['b', 'd', '']]])
+        self._read_columns(b'a:b\n\n\nc:d\n', [[['a', 'c'], ['b', 'd']]],
+                           delimiter=':')
+        self._read_columns(b'a,b\nc\n', 'Error')
+        self._read_columns(b'a,\0\n', 'Error')
+
+    def test_rows(self):
+        self._read_columns(b'1\n2\n3\n4\n5\n', [[[1, 2]], [[3, 4]], [[5]]],
+                           types={0: int}, rows=2)
+
+    def test_quoting(self):
+        self._read_columns(b'1,",3,",5\n', [[['1'], [',3,'], ['5']]])
+        self._read_columns(b'"a\nb",7\n', [[['a\nb'], [7]]],
+                           types={1: int})
+        self._read_columns(b'"a""b"\n', [[['a"b']]])
+        self._read_columns(b'"ab"c\n', [[['abc']]])
+        self._read_columns(b'"ab"c\n', 'Error', strict=True)
+        self._read_columns(b'"a\n', [[['a\n']]])
+        self._read_columns(b'"a\n', 'Error', strict=True)
+        self._read_columns(b'1,",3,",5\n', [[['1'], ['"'], ['3'], ['"'],
+                                            ['5']]],
+                           quoting=3, escapechar='\\')
+
+    def test_escape(self):
+        self._read_columns(b'a,b\\,c\n', [[['a'], ['b,c']]],
+                           escapechar='\\')
+        self._read_columns(b'a,"b\\"c"\n', [[['a'], ['b"c']]],
+                           escapechar='\\')
+        self._read_columns(b'a,b\\\nc\n', [[['a'], ['b\nc']]],
+                           escapechar='\\')
+
+    def test_types(self):
+        import _csv, _io
+        data = b'x,1,2.5\ny,-20,1e3\nz,+3, 4\n"w","55",-0.5\n'
+        self._read_columns(data, [[['x', 'y', 'z', 'w'], [1, -20, 3, 55],
+                                   [2.5, 1000.0, 4.0, -0.5]]],
+                           types={1: int, 2: float})
+        self._read_columns(b'1234567890123456789\n-12\n',
+                           [[[1234567890123456789, -12]]], types={0: int})
+        raises(OverflowError, list, _csv.column_reader(
+            _io.BytesIO(b'9' * 30), types={0: int}, chunksize=64))
+        raises(ValueError, list, _csv.column_reader(
+            _io.BytesIO(b'1\nx\n'), types={0: int}, chunksize=64))
+        raises(ValueError, list, _csv.column_reader(
+            _io.BytesIO(b'1\n'), types={1: int}, chunksize=64))
+        raises(TypeError, _csv.column_reader, _io.BytesIO(b''),
+               types={0: list})
+        raises(ValueError, _csv.column_reader, _io.BytesIO(b''),
+               quoting=_csv.QUOTE_NONNUMERIC)
+        raises(ValueError, _csv.column_reader, _io.BytesIO(b''), rows=0)
+
+    def test_strategies(self):
+        import _csv, __pypy__, _io
+        f = _io.BytesIO(b'a,1,1.5\nb,2,2.5\n')
+        names, ints, floats = next(_csv.column_reader(
+            f, {1: int, 2: float}, chunksize=64))
+        assert __pypy__.strategy(names) == 'BytesListStrategy'
+        assert __pypy__.strategy(ints) == 'IntegerListStrategy'
+        assert __pypy__.strategy(floats) == 'FloatListStrategy'
+
+    def test_field_limit_and_line_num(self):
+        import _csv, _io
+        limit = _csv.field_size_limit()
+        try:
+            _csv.field_size_limit(5)
+            reader = _csv.column_reader(_io.BytesIO(b'aaaaaa\n'),
+                                        chunksize=64)
+            raises(_csv.Error, next, reader)
+        finally:
+            _csv.field_size_limit(limit)
+        reader = _csv.column_reader(_io.BytesIO(b'a\n"b\nc"\nd\n'),
+                                    rows=2, chunksize=64)
+        next(reader)
+        assert reader.line_num == 3
+        next(reader)
+        assert reader.line_num == 4
@@ -85,3 +85,54 @@ class AppTestWriter(object):
 
     def test_writerows(self):
         self._write_test([['a'],['b','c']], 'a\r\nb,c')
+
+    def test_write_strategies(self):
+        import _csv as csv
+        self._write_test([1, -2, 3], '1,-2,3')
+        self._write_test([1, -2, 3], '"1","-2","3"', quoting=csv.QUOTE_ALL)
+        self._write_test([1.5, -2.0, 1e100], '1.5,-2.0,1e+100')
+        self._write_test([1.5, 2.25], "'1.5';'2.25'", delimiter=';',
+                         quotechar="'", quoting=csv.QUOTE_ALL)
+        self._write_test([1.5, float('inf')], '1.5,inf')
+        self._write_test([1.5, 2.0], '"1.5"."2.0"', delimiter='.')
+        self._write_test(['a', 'b,c'], 'a,"b,c"')
+        self._write_test(['a', 'b'], '"a","b"',
+                         quoting=csv.QUOTE_NONNUMERIC)
+        self._write_test((1, 2.5, 'x', None, 2**70), '1,2.5,x,,%d' % 2**70)
+        self._write_test((1, 2.5, 'x', True), '1,2.5,"x",True',
+                         quoting=csv.QUOTE_NONNUMERIC)
+        class MyInt(int):
+            def __str__(self):
+                return 'my'
+        self._write_test((1, MyInt(2)), '1,my')
+
+    def test_writerows_buffered(self):
+        import _csv as csv
+        writes = []
+        class File(object):
+            def write(self, data):
+                writes.append(data)
+        writer = csv.writer(File())
+        rows = [[i, i * 0.5, 'row %d' % i] for i in range(20000)]
+        writer.writerows(rows)
+        data = ''.join(writes)
+        assert data.count('\r\n') == 20000
+        assert data.startswith('0,0.0,row 0\r\n1,0.5,row 1\r\n')
+        assert 1 < len(writes) < 100
+        # the rows before a failing one are written
+        del writes[:]
+        raises(TypeError, writer.writerows, [[1, 2], (3, 4), 5])
+        assert writes == ['1,2\r\n3,4\r\n']
+        del writes[:]
+        def gen():
+            yield [1, 2]
+            yield ['a', 'b']
+            raise ValueError
+        raises(ValueError, writer.writerows, gen())
+        assert writes == ['1,2\r\na,b\r\n']
+        class BadItem(object):
+            def __str__(self):
+                raise IOError
+        del writes[:]
+        raises(IOError, writer.writerows, [[1, 2], [3, BadItem()]])
+        assert writes == ['1,2\r\n']
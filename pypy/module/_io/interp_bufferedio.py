@@ -18,10 +18,13 @@ from pypy.module._io.interp_iobase import (
     W_IOBase, DEFAULT_BUFFER_SIZE, convert_size, trap_eintr,
     check_readable_w, check_writable_w, check_seekable_w)
 from pypy.module._io.interp_io import W_BlockingIOError
+from pypy.module._io.interp_fileio import W_FileIO
 from rpython.rlib import rthread
 
 STATE_ZERO, STATE_OK, STATE_DETACHED = range(3)
 
+_HAVE_WRITEV = hasattr(rposix, 'writev')
+
 
 def make_write_blocking_error(space, written):
     # XXX CPython reads 'errno' here.  I *think* it doesn't make sense,
@@ -370,6 +373,46 @@ class BufferedMixin:
     def _raw_write(self, space, start, end):
         return self._write(space, self.buffer[start:end])
 
+    def _can_writev(self, size):
+        # A write of at least a full buffer to a plain FileIO, just after
+        # the pending bytes: both can go out with a single writev() call,
+        # without first copying the data into the buffer.  Subclasses of
+        # FileIO may override write(), so they are excluded.
+        return (_HAVE_WRITEV and size >= self.buffer_size and
+                self.write_end != -1 and self.write_pos < self.write_end and
+                self.pos == self.write_end and self.raw_pos == self.write_pos
+                and type(self.w_raw) is W_FileIO)
+
+    def _writev_unlocked(self, space, data):
+        """Write the pending bytes and then 'data' with one writev() call.
+        Return how many bytes of 'data' were written.  If not all the
+        pending bytes were written, the buffer is left in the same state
+        as after a partial flush."""
+        w_raw = self.w_raw
+        assert isinstance(w_raw, W_FileIO)
+        pending = self.write_end - self.write_pos
+        chunks = [self.buffer[self.write_pos:self.write_end], data]
+        try:
+            n = w_raw.write_chunks(space, chunks)
+        except OperationError as e:
+            if trap_eintr(space, e):
+                return 0
+            raise
+        if n <= 0:
+            # would block: the regular path raises BlockingIOError
+            return 0
+        if self.abs_pos != -1:
+            self.abs_pos += n
+        if n < pending:
+            self.write_pos += n
+            self.raw_pos = self.write_pos
+            return 0
+        self.raw_pos = self.write_end
+        self._writer_reset_buf()
+        written = n - pending
+        assert written >= 0
+        return written
+
     def detach_w(self, space):
         self._check_init(space)
         space.call_method(self, "flush")
@@ -724,6 +767,10 @@ class BufferedMixin:
                     self.write_end = self.pos
                 return space.newint(size)
 
+            written = 0
+            if self._can_writev(size):
+                written = self._writev_unlocked(space, data)
+
             # First write the current buffer
             try:
                 self._writer_flush_unlocked(space)
@@ -773,8 +820,7 @@ class BufferedMixin:
                 self.raw_pos -= offset
 
             # Then write buf itself. At this point the buffer has been emptied
-            remaining = size
-            written = 0
+            remaining = size - written
             while remaining > self.buffer_size:
                 try:
                     n = self._write(space, data[written:])
@@ -4,6 +4,7 @@ from pypy.interpreter.error import (
     OperationError, oefmt, wrap_oserror, wrap_oserror2)
 from rpython.rlib.objectmodel import keepalive_until_here
 from rpython.rlib.rarithmetic import r_longlong
+from rpython.rlib import rposix
 from rpython.rlib.rposix import c_read, get_saved_errno
 from rpython.rlib.rstring import StringBuilder
 from rpython.rtyper.lltypesystem import lltype, rffi
@@ -348,6 +349,21 @@ class W_FileIO(W_RawIOBase):
 
         return space.newint(n)
 
+    def write_chunks(self, space, chunks):
+        """Interp-level helper for the buffered writers: write the list of
+        strings with a single writev() call.  Return the number of bytes
+        written, or -1 if the file is non-blocking and the call would
+        block."""
+        self._check_closed(space)
+        self._check_writable(space)
+        try:
+            return rposix.writev(self.fd, chunks)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return -1
+            raise wrap_oserror(space, e,
+                               w_exception_class=space.w_IOError)
+
     def read_w(self, space, w_size=None):
         self._check_closed(space)
         self._check_readable(space)
@@ -329,6 +329,43 @@ class AppTestBufferedWriter:
         f.close()
         assert self.readfile() == "abcd" * 5000
 
+    def test_largewrite_after_pending(self):
+        # the pending bytes and the large write go out together
+        import _io
+        raw = _io.FileIO(self.tmpfile, 'w')
+        f = _io.BufferedWriter(raw, 16)
+        assert f.write("head") == 4
+        assert f.write("x" * 40) == 40
+        assert raw.tell() == 44
+        assert f.tell() == 44
+        assert f.write("y" * 20) == 20
+        f.write("z")
+        assert f.tell() == 65
+        assert f.write(buffer("w" * 16)) == 16
+        assert raw.tell() == f.tell() == 81
+        f.seek(2)
+        f.write("ad")
+        assert f.write("v" * 30) == 30
+        assert f.tell() == 34
+        f.close()
+        assert self.readfile() == ("head"[:2] + "ad" + "v" * 30 +
+                                   ("x" * 40 + "y" * 20 + "z" + "w" * 16)[30:])
+
+    def test_largewrite_after_pending_subclass(self):
+        import _io
+        written = []
+        class MyFileIO(_io.FileIO):
+            def write(self, data):
+                written.append(len(data))
+                return _io.FileIO.write(self, data)
+        raw = MyFileIO(self.tmpfile, 'w')
+        f = _io.BufferedWriter(raw, 16)
+        f.write("head")
+        f.write("x" * 40)
+        f.close()
+        assert written == [4, 40]
+        assert self.readfile() == "head" + "x" * 40
+
     def test_incomplete(self):
         import _io
         raw = _io.FileIO(self.tmpfile)
@@ -711,6 +748,21 @@ class AppTestBufferedRandom:
         f.seek(0)
         assert f.read() == 'a\nbxxxx'
 
+    def test_largewrite_after_read(self):
+        import _io
+        raw = _io.FileIO(self.tmpfile, 'wb+')
+        raw.write('0123456789' * 3)
+        raw.seek(0)
+        f = _io.BufferedRandom(raw, 16)
+        assert f.read(3) == '012'
+        f.write('ab')
+        f.write('c' * 20)
+        assert f.tell() == 25
+        assert f.read() == '56789'
+        f.seek(0)
+        assert f.read() == '012ab' + 'c' * 20 + '56789'
+        f.close()
+
     def test_simple_read_after_write(self):
         import _io
         raw = _io.FileIO(self.tmpfile, 'wb+')
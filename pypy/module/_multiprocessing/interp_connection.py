@@ -1,8 +1,9 @@
 import sys
 from errno import EINTR
 
-from rpython.rlib import rpoll, rsocket
-from rpython.rlib.rarithmetic import intmask
+from rpython.rlib import rpoll, rposix, rsocket
+from rpython.rlib.objectmodel import keepalive_until_here
+from rpython.rlib.rarithmetic import intmask, widen
 from rpython.rtyper.lltypesystem import lltype, rffi
 
 from pypy.interpreter.baseobjspace import W_Root
@@ -36,14 +37,25 @@ def w_handle(space, handle):
     return space.newint(rffi.cast(rffi.INTPTR_T, handle))
 
 
+def _frame_header(size):
+    # the length of a message, in network byte order
+    return (chr((size >> 24) & 0xff) + chr((size >> 16) & 0xff) +
+            chr((size >> 8) & 0xff) + chr(size & 0xff))
+
+
 class W_BaseConnection(W_Root):
     BUFFER_SIZE = 1024
+    # the receive buffer grows up to this size and is then kept around;
+    # larger messages get a buffer of their own
+    MAX_BUFFER_SIZE = 1024 * 1024
     buffer = lltype.nullptr(rffi.CCHARP.TO)
+    buffer_size = 0
 
     def __init__(self, space, flags):
         self.flags = flags
         self.buffer = lltype.malloc(rffi.CCHARP.TO, self.BUFFER_SIZE,
                                     flavor='raw')
+        self.buffer_size = self.BUFFER_SIZE
         self.register_finalizer(space)
 
     def _finalize_(self):
@@ -63,11 +75,40 @@ class W_BaseConnection(W_Root):
         return False
     def do_send_string(self, space, buf, offset, size):
         raise NotImplementedError
-    def do_recv_string(self, space, buflength, maxlength):
+    def do_recv_string(self, space, buflength, maxlength,
+                       target=lltype.nullptr(rffi.CCHARP.TO)):
         raise NotImplementedError
     def do_poll(self, space, timeout):
         raise NotImplementedError
 
+    def do_send_strings(self, space, bufs):
+        for buf in bufs:
+            self.do_send_string(space, buf, 0, len(buf))
+
+    def _ensure_buffer(self, size):
+        """Make self.buffer at least 'size' bytes long.  It never grows
+        past MAX_BUFFER_SIZE."""
+        assert size <= self.MAX_BUFFER_SIZE
+        if size > self.buffer_size:
+            newsize = max(size, min(2 * self.buffer_size,
+                                    self.MAX_BUFFER_SIZE))
+            newbuf = lltype.malloc(rffi.CCHARP.TO, newsize, flavor='raw')
+            lltype.free(self.buffer, flavor='raw')
+            self.buffer = newbuf
+            self.buffer_size = newsize
+
+    def _recv_buffer(self, length, buflength, target):
+        """Return where to read a message of 'length' bytes, and the raw
+        buffer allocated for it if any.  Messages that fit in 'buflength'
+        bytes go into 'target', or into self.buffer if 'target' is NULL."""
+        if length > buflength:
+            newbuf = lltype.malloc(rffi.CCHARP.TO, length, flavor='raw')
+            return newbuf, newbuf
+        if not target:
+            self._ensure_buffer(length)
+            target = self.buffer
+        return target, lltype.nullptr(rffi.CCHARP.TO)
+
     def close(self):
         self.do_close()
 
@@ -112,6 +153,14 @@ class W_BaseConnection(W_Root):
 
         self.do_send_string(space, buf, offset, size)
 
+    def send_bytes_many(self, space, w_buffers):
+        """Send each buffer of the iterable as a separate message, with
+        as few system calls as possible."""
+        self._check_writable(space)
+        bufs = [space.getarg_w('s*', w_buf).as_str()
+                for w_buf in space.unpackiterable(w_buffers)]
+        self.do_send_strings(space, bufs)
+
     @unwrap_spec(maxlength='index')
     def recv_bytes(self, space, maxlength=PY_SSIZE_T_MAX):
         self._check_readable(space)
@@ -119,7 +168,7 @@ class W_BaseConnection(W_Root):
             raise oefmt(space.w_ValueError, "maxlength < 0")
 
         res, newbuf = self.do_recv_string(
-            space, self.BUFFER_SIZE, maxlength)
+            space, self.MAX_BUFFER_SIZE, maxlength)
         try:
             if newbuf:
                 return space.newbytes(rffi.charpsize2str(newbuf, res))
@@ -133,14 +182,30 @@ class W_BaseConnection(W_Root):
     def recv_bytes_into(self, space, w_buffer, offset=0):
         rwbuffer = space.writebuf_w(w_buffer)
         length = rwbuffer.getlength()
+        available = length - offset
 
-        res, newbuf = self.do_recv_string(
-            space, length - offset, PY_SSIZE_T_MAX)
+        # read directly into the buffer if it has a raw address, otherwise
+        # into self.buffer (or a buffer of its own) and copy it
+        target = lltype.nullptr(rffi.CCHARP.TO)
         try:
-            if newbuf:
+            target = rwbuffer.get_raw_address()
+        except ValueError:
+            pass
+        if target:
+            res, newbuf = self.do_recv_string(
+                space, available, PY_SSIZE_T_MAX, rffi.ptradd(target, offset))
+        else:
+            res, newbuf = self.do_recv_string(
+                space, min(available, self.MAX_BUFFER_SIZE), PY_SSIZE_T_MAX)
+        try:
+            if res > available:
                 raise BufferTooShort(space, space.newbytes(
                     rffi.charpsize2str(newbuf, res)))
-            rwbuffer.setslice(offset, rffi.charpsize2str(self.buffer, res))
+            if newbuf:
+                rwbuffer.setslice(offset, rffi.charpsize2str(newbuf, res))
+            elif not target:
+                rwbuffer.setslice(offset, rffi.charpsize2str(self.buffer, res))
+            keepalive_until_here(rwbuffer)
         finally:
             if newbuf:
                 rffi.free_charp(newbuf)
@@ -163,7 +228,7 @@ class W_BaseConnection(W_Root):
         self._check_readable(space)
 
         res, newbuf = self.do_recv_string(
-            space, self.BUFFER_SIZE, PY_SSIZE_T_MAX)
+            space, self.MAX_BUFFER_SIZE, PY_SSIZE_T_MAX)
         try:
             if newbuf:
                 w_received = space.newbytes(rffi.charpsize2str(newbuf, res))
@@ -199,6 +264,7 @@ W_BaseConnection.typedef = TypeDef(
     writable = GetSetProperty(W_BaseConnection.writable_get),
 
     send_bytes = interp2app(W_BaseConnection.send_bytes),
+    send_bytes_many = interp2app(W_BaseConnection.send_bytes_many),
     recv_bytes = interp2app(W_BaseConnection.recv_bytes),
     recv_bytes_into = interp2app(W_BaseConnection.recv_bytes_into),
     send = interp2app(W_BaseConnection.send),
@@ -225,6 +291,12 @@ class W_FileConnection(W_BaseConnection):
                 if length < 0:
                     raise WindowsError(geterrno(), "recv")
                 return buf.str(length)
+        def READ_INTO(self, buf, size):
+            from rpython.rlib._rsocket_rffi import socketrecv, geterrno
+            length = socketrecv(self.fd, buf, size, 0)
+            if length < 0:
+                raise WindowsError(geterrno(), "recv")
+            return length
         def CLOSE(self):
             from rpython.rlib._rsocket_rffi import socketclose
             socketclose(self.fd)
@@ -235,6 +307,12 @@ class W_FileConnection(W_BaseConnection):
         def READ(self, length):
             import os
             return os.read(self.fd, length)
+        def READ_INTO(self, buf, size):
+            length = widen(rposix.c_read(self.fd, rffi.cast(rffi.VOIDP, buf),
+                                         size))
+            if length < 0:
+                raise OSError(rposix.get_saved_errno(), "read")
+            return length
         def CLOSE(self):
             import os
             try:
@@ -270,23 +348,59 @@ class W_FileConnection(W_BaseConnection):
             self.CLOSE()
             self.fd = self.INVALID_HANDLE_VALUE
 
-    def do_send_string(self, space, buf, offset, size):
-        # Since str2charp copies the buf anyway, always combine the
-        # "header" and the "body" of the message and send them at once.
-        message = lltype.malloc(rffi.CCHARP.TO, size + 4, flavor='raw')
-        try:
-            length = rffi.r_uint(rsocket.htonl(
-                    rffi.cast(lltype.Unsigned, size)))
-            rffi.cast(rffi.UINTP, message)[0] = length
-            i = size - 1
-            while i >= 0:
-                message[4 + i] = buf[offset + i]
-                i -= 1
-            self._sendall(space, message, size + 4)
-        finally:
-            lltype.free(message, flavor='raw')
-
-    def do_recv_string(self, space, buflength, maxlength):
+    if sys.platform == 'win32':
+        def do_send_string(self, space, buf, offset, size):
+            # Since str2charp copies the buf anyway, always combine the
+            # "header" and the "body" of the message and send them at once.
+            message = lltype.malloc(rffi.CCHARP.TO, size + 4, flavor='raw')
+            try:
+                length = rffi.r_uint(rsocket.htonl(
+                        rffi.cast(lltype.Unsigned, size)))
+                rffi.cast(rffi.UINTP, message)[0] = length
+                i = size - 1
+                while i >= 0:
+                    message[4 + i] = buf[offset + i]
+                    i -= 1
+                self._sendall(space, message, size + 4)
+            finally:
+                lltype.free(message, flavor='raw')
+    else:
+        def do_send_string(self, space, buf, offset, size):
+            # send the "header" and the "body" of the message with a
+            # single writev(), without copying the body
+            end = offset + size
+            assert offset >= 0 and end >= 0
+            self._sendall_chunks(space, [_frame_header(size),
+                                         buf[offset:end]])
+
+        def do_send_strings(self, space, bufs):
+            chunks = []
+            for buf in bufs:
+                chunks.append(_frame_header(len(buf)))
+                chunks.append(buf)
+            self._sendall_chunks(space, chunks)
+
+        def _sendall_chunks(self, space, chunks):
+            start = 0
+            while start < len(chunks):
+                end = min(start + rposix.IOV_MAX, len(chunks))
+                try:
+                    count = rposix.writev(self.fd, chunks[start:end])
+                except OSError as e:
+                    if e.errno == EINTR:
+                        space.getexecutioncontext().checksignals()
+                        continue
+                    raise wrap_oserror(space, e)
+                # skip what was written, which may end in the middle
+                # of a chunk
+                while start < len(chunks) and count >= len(chunks[start]):
+                    count -= len(chunks[start])
+                    start += 1
+                if count > 0:
+                    chunks[start] = chunks[start][count:]
+
+    def do_recv_string(self, space, buflength, maxlength,
+                       target=lltype.nullptr(rffi.CCHARP.TO)):
         with lltype.scoped_alloc(rffi.CArrayPtr(rffi.UINT).TO, 1) as length_ptr:
             self._recvall(space, rffi.cast(rffi.CCHARP, length_ptr), 4)
             length = intmask(rsocket.ntohl(
@@ -297,13 +411,9 @@ class W_FileConnection(W_BaseConnection):
                 self.close()
             raise oefmt(space.w_IOError, "bad message length")
 
-        if length <= buflength:
-            self._recvall(space, self.buffer, length)
-            return length, lltype.nullptr(rffi.CCHARP.TO)
-        else:
-            newbuf = lltype.malloc(rffi.CCHARP.TO, length, flavor='raw')
-            self._recvall(space, newbuf, length)
-            return length, newbuf
+        buf, newbuf = self._recv_buffer(length, buflength, target)
+        self._recvall(space, buf, length)
+        return length, newbuf
 
     def _sendall(self, space, message, size):
         while size > 0:
@@ -324,22 +434,18 @@ class W_FileConnection(W_BaseConnection):
         remaining = length
         while remaining > 0:
             try:
-                data = self.READ(remaining)
+                count = self.READ_INTO(buf, remaining)
             except OSError as e:
                 if e.errno == EINTR:
                     space.getexecutioncontext().checksignals()
                     continue
                 raise wrap_oserror(space, e)
-            count = len(data)
             if count == 0:
                 if remaining == length:
                     raise OperationError(space.w_EOFError, space.w_None)
                 else:
                     raise oefmt(space.w_IOError,
                                 "got end of file during message")
-            # XXX inefficient
-            for i in range(count):
-                buf[i] = data[i]
             remaining -= count
             buf = rffi.ptradd(buf, count)
 
@@ -416,7 +522,8 @@ class W_PipeConnection(W_BaseConnection):
             finally:
                 lltype.free(written_ptr, flavor='raw')
 
-    def do_recv_string(self, space, buflength, maxlength):
+    def do_recv_string(self, space, buflength, maxlength,
+                       target=lltype.nullptr(rffi.CCHARP.TO)):
         from pypy.module._multiprocessing.interp_win32 import (
             _ReadFile, _PeekNamedPipe, ERROR_BROKEN_PIPE, ERROR_MORE_DATA)
         from rpython.rlib import rwin32
@@ -426,9 +533,13 @@ class W_PipeConnection(W_BaseConnection):
                                  flavor='raw')
         left_ptr = lltype.malloc(rffi.CArrayPtr(rwin32.DWORD).TO, 1,
                                  flavor='raw')
+        if target:
+            buf = target
+        else:
+            buf = self.buffer
+            buflength = min(self.BUFFER_SIZE, buflength)
         try:
-            result = _ReadFile(self.handle,
-                               self.buffer, min(self.BUFFER_SIZE, buflength),
+            result = _ReadFile(self.handle, buf, buflength,
                                read_ptr, rffi.NULL)
             if result:
                 return intmask(read_ptr[0]), lltype.nullptr(rffi.CCHARP.TO)
@@ -455,7 +566,7 @@ class W_PipeConnection(W_BaseConnection):
 
             newbuf = lltype.malloc(rffi.CCHARP.TO, length + 1, flavor='raw')
             for i in range(read_ptr[0]):
-                newbuf[i] = self.buffer[i]
+                newbuf[i] = buf[i]
 
             result = _ReadFile(self.handle,
                                rffi.ptradd(newbuf, read_ptr[0]), left_ptr[0],
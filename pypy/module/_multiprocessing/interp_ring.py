@@ -0,0 +1,311 @@
+"""A connection passing its messages through a ring buffer in shared
+memory, for processes related by fork().
+
+The ring lives in an anonymous shared mapping.  Its header holds two
+counters, 'head' (the number of bytes ever written) and 'tail' (the number
+of bytes ever consumed), and a flag telling that a writer waits for room.
+Each message is stored as its length (a native 32-bit integer) followed by
+the data, padded to a multiple of 4 bytes.
+
+The ring is only a place to put the data: the writer still writes a
+one-byte token to a pipe for every message, so that readers can block in
+read() or poll() as usual.  A writer that finds the ring full blocks on a
+second pipe, which the reader writes to after it made room.  Messages
+that do not fit in the ring at all are sent on the pipe, after a different
+token, framed like on a normal Connection.
+
+Like a pipe, a ring connection supports several reading and several
+writing processes, as long as only one of each is active at a time (this
+is what the locks of multiprocessing.queues.SimpleQueue ensure).
+"""
+
+import os
+from errno import EINTR, EPIPE
+
+from rpython.rlib import rmmap, rposix
+from rpython.rlib.rarithmetic import intmask, widen
+from rpython.rtyper.lltypesystem import lltype, rffi
+from rpython.translator.tool.cbuild import ExternalCompilationInfo
+
+from pypy.interpreter.error import oefmt, wrap_oserror
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import GetSetProperty, TypeDef
+from pypy.module._multiprocessing.interp_connection import (
+    READABLE, WRITABLE, W_FileConnection, _frame_header)
+
+_source_code = """
+RPY_EXTERN Signed pypy_ring_load(Signed *p)
+{
+    return __atomic_load_n(p, __ATOMIC_SEQ_CST);
+}
+
+RPY_EXTERN void pypy_ring_store(Signed *p, Signed value)
+{
+    __atomic_store_n(p, value, __ATOMIC_SEQ_CST);
+}
+
+RPY_EXTERN Signed pypy_ring_exchange(Signed *p, Signed value)
+{
+    return __atomic_exchange_n(p, value, __ATOMIC_SEQ_CST);
+}
+"""
+
+_eci = ExternalCompilationInfo(
+    separate_module_sources=[_source_code],
+    post_include_bits=["RPY_EXTERN Signed pypy_ring_load(Signed *);\n"
+                       "RPY_EXTERN void pypy_ring_store(Signed *, Signed);\n"
+                       "RPY_EXTERN Signed pypy_ring_exchange(Signed *, "
+                       "Signed);\n"])
+
+_ring_load = rffi.llexternal("pypy_ring_load", [rffi.SIGNEDP], lltype.Signed,
+                             compilation_info=_eci, releasegil=False,
+                             _nowrapper=True)
+_ring_store = rffi.llexternal("pypy_ring_store",
+                              [rffi.SIGNEDP, lltype.Signed], lltype.Void,
+                              compilation_info=_eci, releasegil=False,
+                              _nowrapper=True)
+_ring_exchange = rffi.llexternal("pypy_ring_exchange",
+                                 [rffi.SIGNEDP, lltype.Signed], lltype.Signed,
+                                 compilation_info=_eci, releasegil=False,
+                                 _nowrapper=True)
+
+# indexes in the header, which takes a whole cache line
+HEAD, TAIL, WAITING = range(3)
+HEADER_SIZE = 64
+
+DEFAULT_RING_SIZE = 1024 * 1024
+MIN_RING_SIZE = 64
+
+TOKEN_RING = 'R'
+TOKEN_PIPE = 'P'
+
+
+def _message_size(size):
+    return 4 + ((size + 3) & ~3)
+
+
+class RingMemory(object):
+    """The shared mapping.  The memory is unmapped when the last connection
+    using it goes away."""
+
+    def __init__(self, capacity):
+        assert capacity % 4 == 0
+        self.mmap = rmmap.mmap(-1, HEADER_SIZE + capacity)
+        self.header = rffi.cast(rffi.SIGNEDP, self.mmap.getptr(0))
+        self.data = self.mmap.getptr(HEADER_SIZE)
+        self.capacity = capacity
+
+    def load(self, index):
+        return _ring_load(rffi.ptradd(self.header, index))
+
+    def store(self, index, value):
+        _ring_store(rffi.ptradd(self.header, index), value)
+
+    def exchange(self, index, value):
+        return _ring_exchange(rffi.ptradd(self.header, index), value)
+
+    def free_space(self):
+        return self.capacity - (self.load(HEAD) - self.load(TAIL))
+
+    def _lengthptr(self, pos):
+        # never wraps around: 'pos' and the capacity are multiples of 4
+        return rffi.cast(rffi.UINTP, rffi.ptradd(self.data,
+                                                 pos % self.capacity))
+
+    def read_length(self, pos):
+        return intmask(self._lengthptr(pos)[0])
+
+    def write_length(self, pos, length):
+        self._lengthptr(pos)[0] = rffi.cast(rffi.UINT, length)
+
+    def read(self, pos, dest, size):
+        """Copy 'size' bytes from position 'pos' of the ring to 'dest'."""
+        pos = pos % self.capacity
+        first = min(size, self.capacity - pos)
+        rffi.c_memcpy(rffi.cast(rffi.VOIDP, dest),
+                      rffi.cast(rffi.VOIDP, rffi.ptradd(self.data, pos)),
+                      first)
+        if first < size:
+            rffi.c_memcpy(rffi.cast(rffi.VOIDP, rffi.ptradd(dest, first)),
+                          rffi.cast(rffi.VOIDP, self.data), size - first)
+
+    def write(self, pos, src, size):
+        """Copy 'size' bytes from 'src' to position 'pos' of the ring."""
+        pos = pos % self.capacity
+        first = min(size, self.capacity - pos)
+        rffi.c_memcpy(rffi.cast(rffi.VOIDP, rffi.ptradd(self.data, pos)),
+                      rffi.cast(rffi.VOIDP, src), first)
+        if first < size:
+            rffi.c_memcpy(rffi.cast(rffi.VOIDP, self.data),
+                          rffi.cast(rffi.VOIDP, rffi.ptradd(src, first)),
+                          size - first)
+
+
+class W_RingConnection(W_FileConnection):
+    back_fd = W_FileConnection.INVALID_HANDLE_VALUE
+
+    def __init__(self, space, fd, back_fd, ring, flags):
+        W_FileConnection.__init__(self, space, fd, flags)
+        # the reader writes to 'back_fd' to wake up a waiting writer
+        self.back_fd = back_fd
+        self.ring = ring
+
+    def descr_new_ring(space, w_subtype, __args__):
+        raise oefmt(space.w_TypeError,
+                    "cannot create '%N' instances, use ring_pipe()",
+                    w_subtype)
+
+    def capacity_get(self, space):
+        return space.newint(self.ring.capacity)
+
+    def do_close(self):
+        W_FileConnection.do_close(self)
+        if self.back_fd != self.INVALID_HANDLE_VALUE:
+            try:
+                os.close(self.back_fd)
+            except OSError:
+                pass
+            self.back_fd = self.INVALID_HANDLE_VALUE
+
+    # Writing side
+
+    def _wait_for_space(self, space, size):
+        ring = self.ring
+        while ring.free_space() < size:
+            ring.store(WAITING, 1)
+            # check again: the reader may have made room before it saw
+            # the flag
+            if ring.free_space() >= size:
+                break
+            self._wait_for_reader(space)
+
+    def _wait_for_reader(self, space):
+        while True:
+            count = widen(rposix.c_read(self.back_fd,
+                                        rffi.cast(rffi.VOIDP, self.buffer), 1))
+            if count > 0:
+                return
+            if count == 0:
+                raise wrap_oserror(space, OSError(EPIPE, "read"))
+            errno = rposix.get_saved_errno()
+            if errno != EINTR:
+                raise wrap_oserror(space, OSError(errno, "read"))
+            space.getexecutioncontext().checksignals()
+
+    def _put(self, buf, offset, size):
+        ring = self.ring
+        head = ring.load(HEAD)
+        ring.write_length(head, size)
+        with rffi.scoped_nonmovingbuffer(buf) as charp:
+            ring.write(head + 4, rffi.ptradd(charp, offset), size)
+        ring.store(HEAD, head + _message_size(size))
+
+    def _send_on_pipe(self, space, tokens, buf, offset, size):
+        end = offset + size
+        assert offset >= 0 and end >= 0
+        self._sendall_chunks(space, [TOKEN_RING * tokens + TOKEN_PIPE,
+                                     _frame_header(size), buf[offset:end]])
+
+    def do_send_string(self, space, buf, offset, size):
+        total = _message_size(size)
+        if total > self.ring.capacity:
+            self._send_on_pipe(space, 0, buf, offset, size)
+            return
+        self._wait_for_space(space, total)
+        self._put(buf, offset, size)
+        self._sendall_chunks(space, [TOKEN_RING])
+
+    def do_send_strings(self, space, bufs):
+        tokens = 0
+        for buf in bufs:
+            size = len(buf)
+            total = _message_size(size)
+            if total > self.ring.capacity:
+                self._send_on_pipe(space, tokens, buf, 0, size)
+                tokens = 0
+                continue
+            if tokens > 0 and self.ring.free_space() < total:
+                # the reader must know about the messages already in
+                # the ring before we wait for it
+                self._sendall_chunks(space, [TOKEN_RING * tokens])
+                tokens = 0
+            self._wait_for_space(space, total)
+            self._put(buf, 0, size)
+            tokens += 1
+        if tokens > 0:
+            self._sendall_chunks(space, [TOKEN_RING * tokens])
+
+    # Reading side
+
+    def _release(self, tail, length):
+        ring = self.ring
+        ring.store(TAIL, tail + _message_size(length))
+        if ring.exchange(WAITING, 0):
+            # ignore errors: a writer that went away does not need to be
+            # woken up
+            with rffi.scoped_nonmovingbuffer(TOKEN_RING) as charp:
+                rposix.c_write(self.back_fd, rffi.cast(rffi.VOIDP, charp), 1)
+
+    def do_recv_string(self, space, buflength, maxlength,
+                       target=lltype.nullptr(rffi.CCHARP.TO)):
+        self._recvall(space, self.buffer, 1)
+        token = self.buffer[0]
+        if token == TOKEN_PIPE:
+            return W_FileConnection.do_recv_string(self, space, buflength,
+                                                   maxlength, target)
+        if token != TOKEN_RING:
+            raise oefmt(space.w_IOError, "bad message token")
+
+        ring = self.ring
+        tail = ring.load(TAIL)
+        length = ring.read_length(tail)
+        if length > maxlength: # bad message, close connection
+            self._release(tail, length)
+            self.flags &= ~READABLE
+            if self.flags == 0:
+                self.close()
+            raise oefmt(space.w_IOError, "bad message length")
+
+        buf, newbuf = self._recv_buffer(length, buflength, target)
+        ring.read(tail + 4, buf, length)
+        self._release(tail, length)
+        return length, newbuf
+
+
+W_RingConnection.typedef = TypeDef(
+    '_multiprocessing.RingConnection', W_FileConnection.typedef,
+    __new__ = interp2app(W_RingConnection.descr_new_ring.im_func),
+    capacity = GetSetProperty(W_RingConnection.capacity_get),
+)
+W_RingConnection.typedef.acceptable_as_base_class = False
+
+
+@unwrap_spec(size=int)
+def ring_pipe(space, size=DEFAULT_RING_SIZE):
+    """ring_pipe(size) -> (reader, writer)
+
+    Return two connections passing their messages through a ring buffer
+    of 'size' bytes in shared memory.  Both ends must stay in processes
+    created by fork() from the one that made them."""
+    if size < MIN_RING_SIZE:
+        raise oefmt(space.w_ValueError, "ring size must be at least %d",
+                    MIN_RING_SIZE)
+    try:
+        ring = RingMemory((size + 3) & ~3)
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    except rmmap.RValueError as e:
+        raise oefmt(space.w_ValueError, "%s", e.message)
+    try:
+        fd, wfd = os.pipe()
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    try:
+        back_fd, back_wfd = os.pipe()
+    except OSError as e:
+        os.close(fd)
+        os.close(wfd)
+        raise wrap_oserror(space, e)
+    w_reader = W_RingConnection(space, fd, back_wfd, ring, READABLE)
+    w_writer = W_RingConnection(space, wfd, back_fd, ring, WRITABLE)
+    return space.newtuple([w_reader, w_writer])
@@ -18,6 +18,8 @@ class Module(MixedModule):
         interpleveldefs['PipeConnection'] = \
             'interp_connection.W_PipeConnection'
         interpleveldefs['win32'] = 'interp_win32.win32_namespace(space)'
+    else:
+        interpleveldefs['ring_pipe'] = 'interp_ring.ring_pipe'
 
     def init(self, space):
         MixedModule.init(self, space)
@@ -91,6 +91,57 @@ class BaseConnectionTest(object):
         raises(multiprocessing.BufferTooShort, rhandle.recv_bytes_into, buffer)
         assert rhandle.readable
 
+    def test_read_into_large(self):
+        import array, multiprocessing
+        import sys
+        # if not translated, for win32
+        if not hasattr(sys, 'executable'):
+            sys.executable = 'from test_connection.py'
+        rhandle, whandle = self.make_pair()
+
+        message = "".join([chr(i % 251) for i in range(5000)])
+        whandle.send_bytes(message)
+        buf = bytearray(6000)
+        assert rhandle.recv_bytes_into(buf, 100) == 5000
+        assert buf[100:5100] == message
+        assert buf[:100] == bytearray(100)
+        assert buf[5100:] == bytearray(900)
+
+        whandle.send_bytes(message)
+        buf = array.array('c', 'z' * 5001)
+        assert rhandle.recv_bytes_into(buf, 1) == 5000
+        assert buf.tostring() == 'z' + message
+
+        whandle.send_bytes(message)
+        buf = bytearray(4000)
+        e = raises(multiprocessing.BufferTooShort, rhandle.recv_bytes_into,
+                   buf)
+        assert e.value.args == (message,)
+        whandle.send_bytes("abc")
+        assert rhandle.recv_bytes() == "abc"
+
+    def test_send_bytes_many(self):
+        import array
+        import sys
+        # if not translated, for win32
+        if not hasattr(sys, 'executable'):
+            sys.executable = 'from test_connection.py'
+        rhandle, whandle = self.make_pair()
+
+        messages = ["", "abc", "x" * 3000, buffer("defgh", 1, 3)]
+        whandle.send_bytes_many(messages)
+        assert rhandle.recv_bytes() == ""
+        assert rhandle.recv_bytes() == "abc"
+        assert rhandle.recv_bytes() == "x" * 3000
+        buf = array.array('c', 'z' * 10)
+        assert rhandle.recv_bytes_into(buf, 2) == 3
+        assert buf.tostring() == "zzefgzzzzz"
+        whandle.send_bytes_many(iter(["y" * 2000, "end"]))
+        assert rhandle.recv_bytes() == "y" * 2000
+        assert rhandle.recv_bytes() == "end"
+        raises(TypeError, whandle.send_bytes_many, [42])
+        raises(IOError, rhandle.send_bytes_many, [])
+
 class AppTestWinpipeConnection(BaseConnectionTest):
     spaceconfig = {
         "usemodules": [
@@ -218,3 +269,96 @@ class AppTestSocketConnection(BaseConnectionTest):
             fd = os.dup(1)     # closed by PipeConnection.__del__
             c = _multiprocessing.PipeConnection(fd)
             assert repr(c) == '<read-write PipeConnection, handle %d>' % fd
+
+
+class AppTestRingConnection(BaseConnectionTest):
+    spaceconfig = {
+        "usemodules": [
+            '_multiprocessing', 'thread', 'signal', 'struct', 'array',
+            'itertools', '_socket', 'binascii', 'select', 'fcntl', 'time',
+        ]
+    }
+
+    def setup_class(cls):
+        if sys.platform == "win32":
+            py.test.skip("no ring connections on win32")
+
+    def w_make_pair(self, size=4096):
+        import _multiprocessing
+        return _multiprocessing.ring_pipe(size)
+
+    def test_ring_pipe(self):
+        import _multiprocessing
+        rhandle, whandle = self.make_pair(65)
+        assert whandle.capacity == rhandle.capacity == 68
+        assert rhandle.readable and not rhandle.writable
+        assert whandle.writable and not whandle.readable
+        assert repr(rhandle) == (
+            '<read-only RingConnection, handle %d>' % rhandle.fileno())
+        raises(TypeError, type(rhandle), rhandle.fileno())
+        raises(ValueError, _multiprocessing.ring_pipe, 10)
+        rhandle.close()
+        whandle.close()
+        assert rhandle.closed
+
+    def test_wrap_around(self):
+        rhandle, whandle = self.make_pair(64)
+        # 13 bytes take 20 in the ring, so the messages end up
+        # crossing its end
+        for i in range(20):
+            msg = chr(ord('a') + i) * 13
+            whandle.send_bytes(msg)
+            assert rhandle.recv_bytes() == msg
+        whandle.send_bytes_many(["1" * 20, "2" * 10, "3" * 5])
+        assert rhandle.recv_bytes() == "1" * 20
+        assert rhandle.recv_bytes() == "2" * 10
+        assert rhandle.recv_bytes() == "3" * 5
+        assert not rhandle.poll()
+
+    def test_large_message(self):
+        rhandle, whandle = self.make_pair(64)
+        # too big for the ring, goes through the pipe
+        whandle.send_bytes_many(["small", "L" * 100, "tail"])
+        assert rhandle.recv_bytes() == "small"
+        assert rhandle.recv_bytes() == "L" * 100
+        assert rhandle.recv_bytes() == "tail"
+        whandle.send_bytes("L" * 100)
+        raises(IOError, rhandle.recv_bytes, 10)
+
+    def test_writer_waits(self):
+        import thread, time
+        rhandle, whandle = self.make_pair(64)
+        messages = [str(i) * 20 for i in range(10)]
+        done = []
+        def writer():
+            whandle.send_bytes_many(messages)
+            done.append(True)
+        thread.start_new_thread(writer, ())
+        time.sleep(0.1)
+        # only two messages fit in the ring
+        assert not done
+        received = [rhandle.recv_bytes() for i in range(10)]
+        assert received == messages
+        while not done:
+            time.sleep(0.01)
+        assert not rhandle.poll()
+
+    def test_fork(self):
+        import os
+        if not hasattr(os, 'fork'):
+            skip("no fork")
+        rhandle, whandle = self.make_pair(64)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                rhandle.close()
+                whandle.send_bytes_many(["child%d" % i for i in range(10)])
+                whandle.send([1, 2.0, "end"])
+            finally:
+                os._exit(0)
+        whandle.close()
+        for i in range(10):
+            assert rhandle.recv_bytes() == "child%d" % i
+        assert rhandle.recv() == [1, 2.0, "end"]
+        os.waitpid(pid, 0)
+        raises(EOFError, rhandle.recv_bytes)
@@ -0,0 +1,20 @@
+def iterload(stream, chunksize=65536):
+    """iterload(stream, chunksize=65536) -> iterator
+
+Iterate over the JSON values (e.g. newline-delimited JSON) read from a
+file-like object with a read() method, or from a socket.  The input is
+read in chunks of chunksize bytes; values can span chunk boundaries."""
+    from _pypyjson import JSONStreamDecoder
+    decoder = JSONStreamDecoder()
+    try:
+        read = stream.read
+    except AttributeError:
+        read = stream.recv
+    while True:
+        chunk = read(chunksize)
+        if not chunk:
+            break
+        for value in decoder.feed(chunk):
+            yield value
+    for value in decoder.close():
+        yield value
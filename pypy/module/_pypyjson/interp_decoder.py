@@ -55,10 +55,11 @@ class JSONDecoder(W_Root):
 
     DEFAULT_SIZE_SCRATCH = 20
 
-    # string caching is only used if the total size of the message is larger
-    # than a megabyte. Below that, there can't be that many repeated big
-    # strings anyway (some experiments showed this to be a reasonable cutoff
-    # size)
+    # caching of strings longer than StringCache.MAX_STRING_LENGTH is only
+    # used if the total size of the message is larger than a megabyte. Below
+    # that, there can't be that many repeated big strings anyway (some
+    # experiments showed this to be a reasonable cutoff size). Short strings
+    # go to the process-wide StringCache of the Terminator instead.
     MIN_SIZE_FOR_STRING_CACHE = 1024 * 1024
 
     # evaluate the string cache for 200 strings, before looking at the hit rate
@@ -77,22 +78,24 @@ class JSONDecoder(W_Root):
         self.space = space
         self.w_empty_string = space.newutf8("", 0)
 
-        self.s = s
-
-        # we put our string in a raw buffer so:
-        # 1) we automatically get the '\0' sentinel at the end of the string,
-        #    which means that we never have to check for the "end of string"
-        # 2) we can pass the buffer directly to strtod
-        self.ll_chars, self.llobj, self.flag = rffi.get_nonmovingbuffer_ll_final_null(self.s)
-        self.end_ptr = lltype.malloc(rffi.CCHARPP.TO, 1, flavor='raw')
-        self.pos = 0
+        self.set_input(s)
+        # the number of bytes decoded so far, used to decide whether string
+        # caching is worth it. it is only bigger than len(s) when the
+        # decoder is reused for several inputs, see interp_stream.py
+        self.total_size = len(s)
         self.intcache = space.fromcache(IntCache)
 
-        # two caches, one for keys, one for general strings. they both have the
-        # form {hash-as-int: StringCacheEntry} and they don't deal with
+        self.startmap = self.space.fromcache(Terminator)
+
+        # keys and short strings are cached in two bounded caches that are
+        # shared by all decoders, see StringCache
+        self.key_cache = self.startmap.key_cache
+        self.value_cache = self.startmap.value_cache
+
+        # long strings of big messages are cached in a per-decoder cache of
+        # the form {hash-as-int: StringCacheEntry}. It doesn't deal with
         # collisions at all. For every hash there is simply one string stored
         # and we ignore collisions.
-        self.cache_keys = {}
         self.cache_values = {}
 
         # we don't cache *all* non-key strings, that would be too expensive.
@@ -101,8 +104,6 @@ class JSONDecoder(W_Root):
         self.lru_cache = [0] * self.LRU_SIZE
         self.lru_index = 0
 
-        self.startmap = self.space.fromcache(Terminator)
-
         # keep a list of objects that are created with maps that aren't clearly
         # useful. If they turn out to be useful in the end we are good,
         # otherwise convert them to dicts (see .close())
@@ -113,14 +114,35 @@ class JSONDecoder(W_Root):
         self.scratch = [[None] * self.DEFAULT_SIZE_SCRATCH]
 
 
-    def close(self):
+    def set_input(self, s):
+        """ Start decoding the string s. The caches and maps are kept, so a
+        decoder can be reused for several inputs, as long as
+        release_input() is called in between. """
+        self.s = s
+
+        # we put our string in a raw buffer so:
+        # 1) we automatically get the '\0' sentinel at the end of the string,
+        #    which means that we never have to check for the "end of string"
+        # 2) we can pass the buffer directly to strtod
+        self.ll_chars, self.llobj, self.flag = rffi.get_nonmovingbuffer_ll_final_null(self.s)
+        self.end_ptr = lltype.malloc(rffi.CCHARPP.TO, 1, flavor='raw')
+        self.pos = 0
+
+    def release_input(self):
         rffi.free_nonmovingbuffer_ll(self.ll_chars, self.llobj, self.flag)
         lltype.free(self.end_ptr, flavor='raw')
+
+    def close(self):
+        self.release_input()
+        self.cleanup_unclear_objects()
+
+    def cleanup_unclear_objects(self):
         # clean up objects that are instances of now blocked maps
         for w_obj in self.unclear_objects:
             jsonmap = self._get_jsonmap_from_dict(w_obj)
             if jsonmap.is_state_blocked():
                 self._devolve_jsonmap_dict(w_obj)
+        self.unclear_objects = []
 
     def getslice(self, start, end):
         assert start >= 0
@@ -566,8 +588,6 @@ class JSONDecoder(W_Root):
             contextmap.decoded_strings += 1
             if not contextmap.should_cache_strings():
                 cache = False
-        if len(self.s) < self.MIN_SIZE_FOR_STRING_CACHE:
-            cache = False
 
         if not cache:
             return self.decode_string_uncached(i)
@@ -587,6 +607,12 @@ class JSONDecoder(W_Root):
         length = i - start
         strhash ^= length
 
+        if length <= StringCache.MAX_STRING_LENGTH:
+            return self._decode_string_shared_cache(start, i, nonascii,
+                                                    strhash, contextmap)
+        if self.total_size < self.MIN_SIZE_FOR_STRING_CACHE:
+            return self._create_string_wrapped(start, i, nonascii)
+
         # check cache first:
         try:
             entry = self.cache_values[strhash]
@@ -613,6 +639,22 @@ class JSONDecoder(W_Root):
             contextmap.cache_hits += 1
         return entry.w_uni
 
+    def _decode_string_shared_cache(self, start, end, nonascii, strhash,
+                                    contextmap):
+        value_cache = self.value_cache
+        w_res = value_cache.lookup(strhash, self.ll_chars, start, end - start)
+        if w_res is not None:
+            if contextmap is not None:
+                contextmap.cache_hits += 1
+            return w_res
+        w_res = self._create_string_wrapped(start, end, nonascii)
+        # same admission policy as for the per-decoder cache
+        if ((contextmap is not None and
+                    contextmap.decoded_strings < self.STRING_CACHE_EVALUATION_SIZE) or
+                value_cache.seen_recently(strhash)):
+            value_cache.insert(strhash, self.getslice(start, end), w_res)
+        return w_res
+
     def decode_key_map(self, i, currmap):
         """ Given the current map currmap of an object, decode the next key at
         position i. This returns the new map of the object. """
@@ -656,19 +698,11 @@ class JSONDecoder(W_Root):
         strhash ^= length
         self.pos = i + 1
         # check cache first:
-        try:
-            entry = self.cache_keys[strhash]
-        except KeyError:
+        w_res = self.key_cache.lookup(strhash, ll_chars, start, length)
+        if w_res is None:
             w_res = self._create_string_wrapped(start, i, nonascii)
-            entry = StringCacheEntry(
-                    self.getslice(start, start + length), w_res)
-            self.cache_keys[strhash] = entry
-            return w_res
-        if not entry.compare(ll_chars, start, length):
-            # collision! hopefully rare
-            w_res = self._create_string_wrapped(start, i, nonascii)
-        else:
-            w_res = entry.w_uni
+            self.key_cache.insert(strhash,
+                                  self.getslice(start, start + length), w_res)
         return w_res
 
     def decode_key_string(self, i):
@@ -701,6 +735,63 @@ class StringCacheEntry(object):
         return True
 
 
+class StringCache(object):
+    """ A bounded cache of decoded strings, shared by all decoders (it lives
+    on the Terminator, like the map transition tree). This makes the keys
+    and the repeated short values of many small messages with the same
+    shape decode to the same wrapped strings.
+
+    The cache is direct-mapped: every hash has exactly one slot, and
+    inserting a string evicts the one that was in its slot before. """
+
+    # only strings up to this length go into the shared cache for values
+    MAX_STRING_LENGTH = 64
+
+    LRU_SIZE = 16
+    LRU_MASK = LRU_SIZE - 1
+
+    def __init__(self, size):
+        assert size & (size - 1) == 0
+        self.entries = [None] * size
+        self.mask = size - 1
+
+        # the hashes of the last 16 strings that were not cached, for the
+        # admission policy of the value cache, see seen_recently()
+        self.lru_cache = [0] * self.LRU_SIZE
+        self.lru_index = 0
+
+        # statistics, see __pypy__.json_cache_counter()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, strhash, ll_chars, start, length):
+        """ Return the cached wrapped string whose representation is
+        ll_chars[start:start+length], or None. """
+        entry = self.entries[strhash & self.mask]
+        if entry is not None and entry.compare(ll_chars, start, length):
+            self.hits += 1
+            return entry.w_uni
+        self.misses += 1
+        return None
+
+    def insert(self, strhash, repr, w_uni):
+        index = strhash & self.mask
+        if self.entries[index] is not None:
+            self.evictions += 1
+        self.entries[index] = StringCacheEntry(repr, w_uni)
+
+    def seen_recently(self, strhash):
+        """ Return whether strhash is among the last 16 hashes passed to
+        this method that returned False. We don't want to cache *all*
+        strings, only the ones whose hash is seen a second time. """
+        if strhash in self.lru_cache:
+            return True
+        self.lru_cache[self.lru_index] = strhash
+        self.lru_index = (self.lru_index + 1) & self.LRU_MASK
+        return False
+
+
 class MapBase(object):
     """ A map implementation to speed up parsing of json dicts, and to
     represent the resulting dicts more compactly and make access faster. """
@@ -928,10 +1019,18 @@ class MapBase(object):
 
 class Terminator(MapBase):
     """ The root node of the map transition tree. """
+
+    KEY_CACHE_SIZE = 4096
+    VALUE_CACHE_SIZE = 4096
+
     def __init__(self, space):
         MapBase.__init__(self, space)
         # a set of all map nodes that are currently in the FRINGE state
         self.current_fringe = {}
+        # the caches of wrapped keys and short string values, shared by all
+        # the decoders that use this tree
+        self.key_cache = StringCache(self.KEY_CACHE_SIZE)
+        self.value_cache = StringCache(self.VALUE_CACHE_SIZE)
 
     def register_potential_fringe(self, prelim):
         """ add prelim to the fringe, if its prev is either a Terminator or
@@ -994,6 +1093,9 @@ class JSONMap(MapBase):
         self.keys_in_order = None
         self.strategy_instance = None
 
+        # for the encoder: the ascii JSON representation of the keys
+        self.keys_encoded = None
+
     def __repr__(self):
         return "<JSONMap key_repr=%s #instantiation=%s #leaves=%s prev=%r>" % (
                 self.key_repr, self.instantiation_count, self.number_of_leaves, self.prev)
@@ -1154,6 +1256,18 @@ class JSONMap(MapBase):
                 keys_in_order[index] = w_key
         return keys_in_order
 
+    def get_keys_encoded(self):
+        """ return the list of keys in order, each one encoded as a quoted
+        ascii JSON string, as written by the encoder """
+        from pypy.module._pypyjson.interp_encoder import encode_key_ascii
+        keys_encoded = self.keys_encoded
+        if keys_encoded is None:
+            keys_in_order = self.get_keys_in_order()
+            keys_encoded = self.keys_encoded = [None] * len(keys_in_order)
+            for index, w_key in enumerate(keys_in_order):
+                keys_encoded[index] = encode_key_ascii(w_key._utf8)
+        return keys_encoded
+
     # _____________________________________________________
 
     def _get_dot_text(self):
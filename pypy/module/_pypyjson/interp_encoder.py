@@ -1,6 +1,10 @@
+import math
+
 from rpython.rlib.rstring import StringBuilder
-from rpython.rlib import rutf8
+from rpython.rlib import rutf8, jit
 from pypy.interpreter import unicodehelper
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec, applevel
 
 
 HEX = '0123456789abcdef'
@@ -19,14 +23,8 @@ ESCAPE_BEFORE_SPACE = [ESCAPE_DICT.get(chr(_i), '\\u%04x' % _i)
 def raw_encode_basestring_ascii(space, w_string):
     if space.isinstance_w(w_string, space.w_bytes):
         s = space.bytes_w(w_string)
-        for i in range(len(s)):
-            c = s[i]
-            if c >= ' ' and c <= '~' and c != '"' and c != '\\':
-                pass
-            else:
-                first = i
-                break
-        else:
+        first = _find_first_special(s)
+        if first == len(s):
             # the input is a string with only non-special ascii chars
             return w_string
 
@@ -45,6 +43,26 @@ def raw_encode_basestring_ascii(space, w_string):
         sb = StringBuilder(len(s))
         first = 0
 
+    _escape_utf8_ascii(sb, s, first)
+    res = sb.build()
+    return space.newtext(res)
+
+
+def _find_first_special(s):
+    """ Return the index of the first character of the byte string s that
+    needs escaping, or len(s) if there is none. """
+    for i in range(len(s)):
+        c = s[i]
+        if c >= ' ' and c <= '~' and c != '"' and c != '\\':
+            pass
+        else:
+            return i
+    return len(s)
+
+
+def _escape_utf8_ascii(sb, s, first):
+    """ Append the escaped version of the utf-8 string s to sb, starting at
+    the (ascii-only) position first. """
     it = rutf8.Utf8StringIterator(s)
     for i in range(first):
         it.next()
@@ -77,5 +95,327 @@ def raw_encode_basestring_ascii(space, w_string):
                 sb.append(HEX[(s2 >> 4) & 0x0f])
                 sb.append(HEX[s2 & 0x0f])
 
-    res = sb.build()
-    return space.newtext(res)
+
+def encode_basestring_ascii_into(space, sb, w_string):
+    """ Append the quoted, ascii-only JSON representation of the str or
+    unicode object w_string to the StringBuilder sb. """
+    if space.isinstance_w(w_string, space.w_bytes):
+        encode_bytes_ascii_into(space, sb, space.bytes_w(w_string))
+    else:
+        sb.append('"')
+        _escape_utf8_ascii(sb, space.utf8_w(w_string), 0)
+        sb.append('"')
+
+
+def encode_bytes_ascii_into(space, sb, s):
+    """ Same as encode_basestring_ascii_into, for an unwrapped byte string
+    s, which is checked to be valid utf-8. """
+    sb.append('"')
+    first = _find_first_special(s)
+    if first == len(s):
+        sb.append(s)
+    else:
+        unicodehelper.check_utf8_or_raise(space, s)
+        sb.append_slice(s, 0, first)
+        _escape_utf8_ascii(sb, s, first)
+    sb.append('"')
+
+
+def encode_key_ascii(s):
+    """ Return the quoted, ascii-only JSON representation of the utf-8
+    string s, which must be valid utf-8. """
+    sb = StringBuilder(len(s) + 2)
+    sb.append('"')
+    first = _find_first_special(s)
+    sb.append_slice(s, 0, first)
+    if first < len(s):
+        _escape_utf8_ascii(sb, s, first)
+    sb.append('"')
+    return sb.build()
+
+
+class JSONEncoder(object):
+    """ Interp-level version of the encoding loop of json.JSONEncoder, for
+    the options that produce a str: ensure_ascii=True, indent=None and
+    encoding='utf-8'. Everything is written directly into one
+    StringBuilder. """
+
+    def __init__(self, space, w_default, item_separator, key_separator,
+                 sort_keys, allow_nan, check_circular, skipkeys):
+        self.space = space
+        self.w_default = w_default
+        self.item_separator = item_separator
+        self.key_separator = key_separator
+        self.sort_keys = sort_keys
+        self.allow_nan = allow_nan
+        self.check_circular = check_circular
+        self.skipkeys = skipkeys
+        self.builder = StringBuilder()
+        # the containers that are currently being encoded, for the circular
+        # reference check
+        self.markers = {}
+
+    def build(self):
+        return self.builder.build()
+
+    def mark(self, w_obj):
+        if self.check_circular:
+            if w_obj in self.markers:
+                raise oefmt(self.space.w_ValueError,
+                            "Circular reference detected")
+            self.markers[w_obj] = None
+
+    def unmark(self, w_obj):
+        if self.check_circular:
+            del self.markers[w_obj]
+
+    def encode_any(self, w_obj):
+        from pypy.objspace.std.intobject import W_IntObject
+        from pypy.objspace.std.listobject import W_ListObject
+        from pypy.objspace.std.tupleobject import W_AbstractTupleObject
+        from pypy.objspace.std.dictmultiobject import W_DictMultiObject
+        space = self.space
+        sb = self.builder
+        # same order of checks as in json.encoder
+        if (space.isinstance_w(w_obj, space.w_bytes) or
+                space.isinstance_w(w_obj, space.w_unicode)):
+            encode_basestring_ascii_into(space, sb, w_obj)
+        elif space.is_w(w_obj, space.w_None):
+            sb.append('null')
+        elif space.is_w(w_obj, space.w_True):
+            sb.append('true')
+        elif space.is_w(w_obj, space.w_False):
+            sb.append('false')
+        elif type(w_obj) is W_IntObject:
+            sb.append(str(w_obj.intval))
+        elif (space.isinstance_w(w_obj, space.w_int) or
+                space.isinstance_w(w_obj, space.w_long)):
+            sb.append(space.text_w(space.str(w_obj)))
+        elif space.isinstance_w(w_obj, space.w_float):
+            self.encode_float(space.float_w(w_obj))
+        elif isinstance(w_obj, W_ListObject):
+            self.encode_list(w_obj)
+        elif isinstance(w_obj, W_AbstractTupleObject):
+            self.encode_items(w_obj, space.fixedview(w_obj))
+        elif isinstance(w_obj, W_DictMultiObject):
+            self.encode_dict(w_obj)
+        else:
+            self.mark(w_obj)
+            w_res = space.call_function(self.w_default, w_obj)
+            self.encode_any(w_res)
+            self.unmark(w_obj)
+
+    def floatstr(self, floatval):
+        from pypy.objspace.std.floatobject import float2string
+        if math.isnan(floatval):
+            text = 'NaN'
+        elif math.isinf(floatval):
+            if floatval > 0.0:
+                text = 'Infinity'
+            else:
+                text = '-Infinity'
+        else:
+            return float2string(floatval, 'r', 0)
+        if not self.allow_nan:
+            raise oefmt(self.space.w_ValueError,
+                        "Out of range float values are not JSON compliant: "
+                        "%s", float2string(floatval, 'r', 0))
+        return text
+
+    def encode_float(self, floatval):
+        self.builder.append(self.floatstr(floatval))
+
+    def encode_list(self, w_list):
+        from pypy.objspace.std.listobject import W_ListObject
+        space = self.space
+        if type(w_list) is not W_ListObject:
+            # subclass, may override __iter__
+            self.encode_items(w_list, space.listview(w_list))
+            return
+        intlist = w_list.getitems_int()
+        if intlist is not None:
+            self.encode_int_list(intlist)
+            return
+        floatlist = w_list.getitems_float()
+        if floatlist is not None:
+            self.encode_float_list(floatlist)
+            return
+        self.encode_items(w_list, w_list.getitems())
+
+    def encode_int_list(self, intlist):
+        # an int list can't contain itself, no need for the markers
+        sb = self.builder
+        sb.append('[')
+        for i in range(len(intlist)):
+            if i:
+                sb.append(self.item_separator)
+            sb.append(str(intlist[i]))
+        sb.append(']')
+
+    def encode_float_list(self, floatlist):
+        sb = self.builder
+        sb.append('[')
+        for i in range(len(floatlist)):
+            if i:
+                sb.append(self.item_separator)
+            self.encode_float(floatlist[i])
+        sb.append(']')
+
+    def encode_items(self, w_seq, items_w):
+        sb = self.builder
+        if not items_w:
+            sb.append('[]')
+            return
+        self.mark(w_seq)
+        sb.append('[')
+        first = True
+        for w_item in items_w:
+            if first:
+                first = False
+            else:
+                sb.append(self.item_separator)
+            self.encode_any(w_item)
+        sb.append(']')
+        self.unmark(w_seq)
+
+    def encode_dict(self, w_dict):
+        from pypy.objspace.std.dictmultiobject import W_DictObject
+        from pypy.objspace.std.jsondict import JsonDictStrategy
+        from pypy.objspace.std.mapdict import MapDictStrategy
+        space = self.space
+        sb = self.builder
+        if w_dict.length() == 0:
+            sb.append('{}')
+            return
+        self.mark(w_dict)
+        sb.append('{')
+        strategy = w_dict.get_strategy()
+        if self.sort_keys or type(w_dict) is not W_DictObject:
+            self.encode_dict_items(w_dict)
+        elif isinstance(strategy, JsonDictStrategy):
+            self.encode_dict_json(w_dict, strategy)
+        elif isinstance(strategy, MapDictStrategy):
+            self.encode_dict_mapdict(w_dict, strategy)
+        else:
+            first = True
+            w_iter = w_dict.iteritems()
+            while True:
+                w_key, w_value = w_iter.next_item()
+                if w_key is None:
+                    break
+                first = self.encode_dict_item(w_key, w_value, first)
+        sb.append('}')
+        self.unmark(w_dict)
+
+    def encode_dict_items(self, w_dict):
+        """ The slow path: go through the app-level items() method, which
+        dict subclasses can override """
+        space = self.space
+        w_items = space.call_method(w_dict, 'items')
+        if self.sort_keys:
+            w_items = sort_items(space, w_items)
+        first = True
+        for w_item in space.listview(w_items):
+            w_key, w_value = space.fixedview(w_item, 2)
+            first = self.encode_dict_item(w_key, w_value, first)
+
+    def encode_dict_json(self, w_dict, strategy):
+        """ fast path for dicts produced by _pypyjson.loads: the keys are
+        unicode strings, their encoded form is cached on the jsonmap """
+        sb = self.builder
+        values_w = strategy.unerase(w_dict.dstorage)
+        keys_encoded = strategy.jsonmap.get_keys_encoded()
+        for i in range(len(values_w)):
+            if i:
+                sb.append(self.item_separator)
+            sb.append(keys_encoded[i])
+            sb.append(self.key_separator)
+            self.encode_any(values_w[i])
+
+    def encode_dict_mapdict(self, w_dict, strategy):
+        """ fast path for the __dict__ of instances: read the attributes
+        directly from the map, without wrapping the keys """
+        from pypy.objspace.std.mapdict import DICT
+        space = self.space
+        sb = self.builder
+        w_obj = strategy.unerase(w_dict.dstorage)
+        attrs = []
+        orig_map = curr_map = w_obj._get_mapdict_map()
+        while True:
+            curr_map = curr_map.search(DICT)
+            if curr_map is None:
+                break
+            attrs.append(curr_map.name)
+            curr_map = curr_map.back
+        # oldest attributes first, like dict iteration
+        for i in range(len(attrs) - 1, -1, -1):
+            if w_obj._get_mapdict_map() is not orig_map:
+                raise oefmt(space.w_RuntimeError,
+                            "dictionary changed during iteration")
+            attr = attrs[i]
+            if i != len(attrs) - 1:
+                sb.append(self.item_separator)
+            encode_bytes_ascii_into(space, sb, attr)
+            sb.append(self.key_separator)
+            self.encode_any(w_obj.getdictvalue(space, attr))
+
+    def encode_dict_item(self, w_key, w_value, first):
+        space = self.space
+        sb = self.builder
+        if (space.isinstance_w(w_key, space.w_bytes) or
+                space.isinstance_w(w_key, space.w_unicode)):
+            key = None
+        # JavaScript is weakly typed for these, so it makes sense to
+        # also allow them, like json.encoder does
+        elif space.isinstance_w(w_key, space.w_float):
+            key = self.floatstr(space.float_w(w_key))
+        elif space.is_w(w_key, space.w_True):
+            key = 'true'
+        elif space.is_w(w_key, space.w_False):
+            key = 'false'
+        elif space.is_w(w_key, space.w_None):
+            key = 'null'
+        elif (space.isinstance_w(w_key, space.w_int) or
+                space.isinstance_w(w_key, space.w_long)):
+            key = space.text_w(space.str(w_key))
+        elif self.skipkeys:
+            return first
+        else:
+            raise oefmt(space.w_TypeError, "key %R is not a string", w_key)
+        if not first:
+            sb.append(self.item_separator)
+        if key is None:
+            encode_basestring_ascii_into(space, sb, w_key)
+        else:
+            sb.append('"')
+            sb.append(key)
+            sb.append('"')
+        sb.append(self.key_separator)
+        self.encode_any(w_value)
+        return False
+
+
+app = applevel('''
+def sort_items(items):
+    return sorted(items, key=lambda kv: kv[0])
+''', filename=__file__)
+
+sort_items = app.interphook('sort_items')
+
+
+@jit.dont_look_inside
+@unwrap_spec(item_separator='text', key_separator='text', sort_keys=bool,
+             allow_nan=bool, check_circular=bool, skipkeys=bool)
+def encode(space, w_obj, w_default, item_separator=', ', key_separator=': ',
+           sort_keys=False, allow_nan=True, check_circular=True,
+           skipkeys=False):
+    """encode(obj, default, item_separator=', ', key_separator=': ',
+              sort_keys=False, allow_nan=True, check_circular=True,
+              skipkeys=False)
+
+Return the JSON representation of obj as an ascii str. default is called
+for objects that can't otherwise be serialized."""
+    encoder = JSONEncoder(space, w_default, item_separator, key_separator,
+                          sort_keys, allow_nan, check_circular, skipkeys)
+    encoder.encode_any(w_obj)
+    return space.newtext(encoder.build())
@@ -0,0 +1,167 @@
+from rpython.rlib import jit
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef
+from pypy.module._pypyjson.interp_decoder import JSONDecoder, is_whitespace
+
+
+class W_JSONStreamDecoder(W_Root):
+    """ Decode a stream of concatenated (e.g. newline-delimited) JSON values
+    that arrives in chunks of arbitrary size.
+
+    Every chunk is scanned once, to find where the top-level values end.
+    The text of the complete values is then decoded in one go by a
+    JSONDecoder that is kept around for the whole stream, so that the string
+    caches and the maps are shared between all the values. Only the
+    unfinished tail of the data is kept between calls to feed(). """
+
+    def __init__(self, space):
+        self.space = space
+        self.decoder = JSONDecoder(space, "")
+        self.decoder.release_input()
+        # chunks (or tails of chunks) that contain the beginning of a value
+        # that is not finished yet
+        self.pending = []
+        # the state of the scanner, between calls to feed()
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.in_scalar = False
+
+    def _scan(self, data):
+        """ Scan data, continuing from the state left by the previous call.
+        Returns the index in data after the end of the last top-level value
+        that is finished in data, or -1. Malformed input is not detected
+        here, the decoder will complain about it later. """
+        depth = self.depth
+        in_string = self.in_string
+        escaped = self.escaped
+        in_scalar = self.in_scalar
+        last = -1
+        i = 0
+        while i < len(data):
+            ch = data[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == '\\':
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+                    if depth == 0:
+                        last = i + 1
+            elif in_scalar:
+                if is_whitespace(ch) or _is_structural(ch):
+                    # the number or constant ended just before ch, look at
+                    # ch again in the "between values" state
+                    in_scalar = False
+                    last = i
+                    continue
+            elif depth > 0:
+                if ch == '"':
+                    in_string = True
+                elif ch == '{' or ch == '[':
+                    depth += 1
+                elif ch == '}' or ch == ']':
+                    depth -= 1
+                    if depth == 0:
+                        last = i + 1
+            elif is_whitespace(ch):
+                pass
+            elif ch == '"':
+                in_string = True
+            elif ch == '{' or ch == '[':
+                depth = 1
+            elif _is_structural(ch):
+                # garbage, let the decoder produce the error message
+                last = i + 1
+            else:
+                in_scalar = True
+            i += 1
+        self.depth = depth
+        self.in_string = in_string
+        self.escaped = escaped
+        self.in_scalar = in_scalar
+        return last
+
+    def _decode_all(self, text):
+        """ Decode all the values in text, which must only contain complete
+        values and whitespace. """
+        decoder = self.decoder
+        decoder.set_input(text)
+        decoder.total_size += len(text)
+        values_w = []
+        try:
+            i = decoder.skip_whitespace(0)
+            while i < len(text):
+                values_w.append(decoder.decode_any(i))
+                i = decoder.skip_whitespace(decoder.pos)
+        finally:
+            decoder.release_input()
+            decoder.cleanup_unclear_objects()
+        return values_w
+
+    @jit.dont_look_inside
+    def descr_feed(self, space, w_data):
+        """feed(data) -> list
+
+Add the next chunk of the stream, a str or any object supporting the
+buffer interface. Returns the list of the top-level values that were
+completed by it."""
+        if space.isinstance_w(w_data, space.w_unicode):
+            raise oefmt(space.w_TypeError,
+                        "Expected utf8-encoded str, got unicode")
+        data = space.bufferstr_w(w_data)
+        last = self._scan(data)
+        if last == -1:
+            if data:
+                self.pending.append(data)
+            return space.newlist([])
+        self.pending.append(data[:last])
+        text = "".join(self.pending)
+        self.pending = []
+        if last < len(data):
+            self.pending.append(data[last:])
+        return space.newlist(self._decode_all(text))
+
+    @jit.dont_look_inside
+    def descr_close(self, space):
+        """close() -> list
+
+Signal the end of the stream. Returns the list of the values still
+buffered, which can only be a final number or constant; raises ValueError
+if the stream ends in the middle of a value."""
+        text = "".join(self.pending)
+        self.pending = []
+        incomplete = self.depth > 0 or self.in_string
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.in_scalar = False
+        values_w = self._decode_all(text)
+        if incomplete:
+            # the decoder should have complained already
+            raise oefmt(space.w_ValueError,
+                        "Incomplete JSON value at the end of the stream")
+        return space.newlist(values_w)
+
+
+def _is_structural(ch):
+    return (ch == '{' or ch == '}' or ch == '[' or ch == ']' or
+            ch == ',' or ch == ':' or ch == '"')
+
+
+def W_JSONStreamDecoder___new__(space, w_subtype):
+    w_decoder = space.allocate_instance(W_JSONStreamDecoder, w_subtype)
+    W_JSONStreamDecoder.__init__(w_decoder, space)
+    return w_decoder
+
+
+W_JSONStreamDecoder.typedef = TypeDef(
+    '_pypyjson.JSONStreamDecoder',
+    __new__ = interp2app(W_JSONStreamDecoder___new__),
+    feed = interp2app(W_JSONStreamDecoder.descr_feed),
+    close = interp2app(W_JSONStreamDecoder.descr_close),
+    __doc__ = W_JSONStreamDecoder.__doc__,
+)
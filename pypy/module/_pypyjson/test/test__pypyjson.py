@@ -1,6 +1,7 @@
 # -*- encoding: utf-8 -*-
 import pytest
 from pypy.module._pypyjson.interp_decoder import JSONDecoder, Terminator, MapBase
+from pypy.module._pypyjson.interp_decoder import StringCache
 from rpython.rtyper.lltypesystem import lltype, rffi
 
 
@@ -110,7 +111,7 @@ class TestJson(object):
         for s1 in ["abc", u"ä".encode("utf-8")]:
             s = '"%s"   "%s"    "%s"' % (s1, s1, s1)
             dec = JSONDecoder(self.space, s)
-            dec.MIN_SIZE_FOR_STRING_CACHE = 0
+            dec.value_cache = StringCache(16)
             assert dec.pos == 0
             w_x = dec.decode_string(1)
             w_y = dec.decode_string(dec.skip_whitespace(dec.pos) + 1)
@@ -120,6 +121,75 @@ class TestJson(object):
             assert w_z is w_y
             dec.close()
 
+    def test_decode_long_string_caching(self):
+        s1 = "abc" * 30
+        s = '"%s"   "%s"    "%s"' % (s1, s1, s1)
+        dec = JSONDecoder(self.space, s)
+        # no caching of long strings in small messages
+        w_x = dec.decode_string(1)
+        w_y = dec.decode_string(dec.skip_whitespace(dec.pos) + 1)
+        w_z = dec.decode_string(dec.skip_whitespace(dec.pos) + 1)
+        assert w_z is not w_y
+        dec.close()
+        dec = JSONDecoder(self.space, s)
+        dec.MIN_SIZE_FOR_STRING_CACHE = 0
+        w_x = dec.decode_string(1)
+        w_y = dec.decode_string(dec.skip_whitespace(dec.pos) + 1)
+        w_z = dec.decode_string(dec.skip_whitespace(dec.pos) + 1)
+        assert w_x is not w_y
+        assert w_z is w_y
+        dec.close()
+
+    def test_string_cache_shared_between_decoders(self):
+        space = self.space
+        terminator = Terminator(space)
+        key_cache = terminator.key_cache
+        value_cache = terminator.value_cache
+        for i in range(3):
+            dec = JSONDecoder(space, '"abc"')
+            dec.startmap = terminator
+            dec.key_cache = key_cache
+            dec.value_cache = value_cache
+            w_res = dec.decode_string(1)
+            dec.close()
+            if i == 0:
+                assert value_cache.misses == 1
+            elif i == 1:
+                w_first = w_res
+            else:
+                assert w_res is w_first
+        assert value_cache.hits == 1
+        assert value_cache.misses == 2
+        # keys are always cached
+        w_keys = []
+        for i in range(2):
+            dec = JSONDecoder(space, '"kkk"')
+            dec.key_cache = key_cache
+            w_keys.append(dec.decode_key_string(0))
+            dec.close()
+        assert w_keys[0] is w_keys[1]
+        assert key_cache.hits == 1
+
+    def test_string_cache_eviction(self):
+        space = self.space
+        cache = StringCache(4)
+        w_a = space.newutf8("a", 1)
+        w_b = space.newutf8("b", 1)
+        cache.insert(1, "a", w_a)
+        s = "ab"
+        ll_chars = rffi.str2charp(s)
+        try:
+            assert cache.lookup(1, ll_chars, 0, 1) is w_a
+            assert cache.lookup(5, ll_chars, 1, 1) is None
+            cache.insert(5, "b", w_b)  # same slot as 1
+            assert cache.evictions == 1
+            assert cache.lookup(1, ll_chars, 0, 1) is None
+            assert cache.lookup(5, ll_chars, 1, 1) is w_b
+        finally:
+            rffi.free_charp(ll_chars)
+        assert not cache.seen_recently(17)
+        assert cache.seen_recently(17)
+
     def _make_some_maps(self):
         # base -> m1 -> m2 -> m3
         #                \-> m4
@@ -272,6 +342,22 @@ class TestJson(object):
         assert m2.instantiation_count == 2
         dec.close()
 
+    def test_stream_decoder_keeps_caches(self):
+        from pypy.module._pypyjson.interp_stream import W_JSONStreamDecoder
+        space = self.space
+        dec = W_JSONStreamDecoder(space)
+        w_res = dec.descr_feed(space, space.newbytes('{"abc": 1}\n{"ab'))
+        assert space.len_w(w_res) == 1
+        w_first = space.getitem(w_res, space.newint(0))
+        w_res = dec.descr_feed(space, space.newbytes('c": 2}\n'))
+        assert space.len_w(w_res) == 1
+        w_second = space.getitem(w_res, space.newint(0))
+        from pypy.objspace.std.jsondict import get_jsonmap_from_dict
+        assert (get_jsonmap_from_dict(w_first) is
+                get_jsonmap_from_dict(w_second))
+        assert dec.decoder.total_size == len('{"abc": 1}\n{"abc": 2}')
+        assert dec.pending == ['\n']
+
 
 class AppTest(object):
     spaceconfig = {"objspace.usemodules._pypyjson": True}
@@ -494,6 +580,19 @@ class AppTest(object):
         s = '["\ttab\tcharacter\tin\tstring\t"]'
         raises(ValueError, "_pypyjson.loads(s)")
 
+    def test_json_cache_counter(self):
+        import _pypyjson, __pypy__
+        before = __pypy__.json_cache_counter()
+        assert len(before) == 5
+        for i in range(10):
+            d = _pypyjson.loads('{"kind_of_event": "click", "n": %d}' % i)
+            assert d == {u"kind_of_event": u"click", u"n": i}
+        after = __pypy__.json_cache_counter()
+        key_hits = after[0] - before[0]
+        value_hits = after[2] - before[2]
+        assert key_hits >= 9
+        assert value_hits >= 8
+
     def test_raw_encode_basestring_ascii(self):
         import _pypyjson
         def check(s):
@@ -538,3 +637,208 @@ class AppTest(object):
         a = '{"abc": "4", "k": 1, "k": 1.5, "c": null, "k": 2}'
         d = _pypyjson.loads(a)
         assert d == {u"abc": u"4", u"c": None, u"k": 2}
+
+    def test_encode_constants(self):
+        import _pypyjson
+        def default(o):
+            raise TypeError
+        assert _pypyjson.encode(None, default) == 'null'
+        assert _pypyjson.encode(True, default) == 'true'
+        assert _pypyjson.encode(False, default) == 'false'
+        assert _pypyjson.encode(42, default) == '42'
+        assert _pypyjson.encode(-2**100, default) == str(-2**100)
+        assert _pypyjson.encode(1.5, default) == '1.5'
+        assert _pypyjson.encode(1e100, default) == '1e+100'
+        assert _pypyjson.encode(float('inf'), default) == 'Infinity'
+        assert _pypyjson.encode(float('-inf'), default) == '-Infinity'
+        assert _pypyjson.encode(float('nan'), default) == 'NaN'
+        exc = raises(ValueError, _pypyjson.encode, float('nan'), default,
+                     allow_nan=False)
+        assert str(exc.value) == (
+            "Out of range float values are not JSON compliant: nan")
+        assert _pypyjson.encode("a\"b\xc3\xa4", default) == '"a\\"b\\u00e4"'
+        assert _pypyjson.encode(u"\U00012345", default) == '"\\ud808\\udf45"'
+        raises(UnicodeDecodeError, _pypyjson.encode, "\xc0", default)
+
+    def test_encode_containers(self):
+        import _pypyjson
+        def default(o):
+            raise TypeError("not serializable")
+        assert _pypyjson.encode([], default) == '[]'
+        assert _pypyjson.encode({}, default) == '{}'
+        assert _pypyjson.encode((), default) == '[]'
+        assert _pypyjson.encode([1, 2, 3], default) == '[1, 2, 3]'
+        assert _pypyjson.encode([1.5, 2.0], default) == '[1.5, 2.0]'
+        assert _pypyjson.encode(range(3), default) == '[0, 1, 2]'
+        assert _pypyjson.encode((1, "a", None), default) == '[1, "a", null]'
+        assert _pypyjson.encode([[1], {"a": [2.5]}], default,
+                                ',', ':') == '[[1],{"a":[2.5]}]'
+        d = {"b": 1, u"a": 2, 3: 4, 1.5: 5, None: 6, True: 7}
+        res = _pypyjson.encode(d, default, sort_keys=True)
+        assert res == ('{"null": 6, "true": 7, "1.5": 5, "3": 4, '
+                       '"a": 2, "b": 1}')
+        raises(TypeError, _pypyjson.encode, {(1, 2): 3}, default)
+        res = _pypyjson.encode({(1, 2): 3, "a": 1}, default, skipkeys=True)
+        assert res == '{"a": 1}'
+
+    def test_encode_subclasses(self):
+        import _pypyjson
+        class L(list):
+            def __iter__(self):
+                return iter([7, 8])
+        class D(dict):
+            def items(self):
+                return [("x", 1)]
+        class I(int):
+            pass
+        def default(o):
+            raise TypeError
+        assert _pypyjson.encode(L([1]), default) == '[7, 8]'
+        assert _pypyjson.encode(D(a=2), default) == '{"x": 1}'
+        assert _pypyjson.encode(I(5), default) == '5'
+
+    def test_encode_float_subclass(self):
+        import _pypyjson
+        class F(float):
+            def __repr__(self):
+                return 'F!'
+        def default(o):
+            raise TypeError
+        # like json.encoder, which uses float.__repr__
+        assert _pypyjson.encode([F(1.5), 2.5], default) == '[1.5, 2.5]'
+        assert _pypyjson.encode({F(1.5): 1}, default) == '{"1.5": 1}'
+        assert _pypyjson.encode(F('inf'), default) == 'Infinity'
+        raises(ValueError, _pypyjson.encode, F('nan'), default,
+               allow_nan=False)
+
+    def test_encode_sort_keys_only(self):
+        import _pypyjson
+        class V(object):
+            def __cmp__(self, other):
+                raise AssertionError("values compared")
+        class D(dict):
+            def items(self):
+                return [("b", V()), ("a", 1), ("b", 2)]
+        def default(o):
+            return 0
+        res = _pypyjson.encode(D(x=1), default, sort_keys=True)
+        assert res == '{"a": 1, "b": 0, "b": 2}'
+
+    def test_encode_default(self):
+        import _pypyjson
+        class A(object):
+            pass
+        def default(o):
+            if isinstance(o, A):
+                return ["A", o.__dict__]
+            raise TypeError("not serializable")
+        a = A()
+        a.x = 1
+        a.y = u"\u1234"
+        assert _pypyjson.encode(a, default) == '["A", {"x": 1, "y": "\\u1234"}]'
+        raises(TypeError, _pypyjson.encode, object(), default)
+
+    def test_encode_circular(self):
+        import _pypyjson
+        def default(o):
+            return o
+        l = []
+        l.append(l)
+        exc = raises(ValueError, _pypyjson.encode, l, default)
+        assert str(exc.value) == "Circular reference detected"
+        d = {}
+        d["a"] = [d]
+        raises(ValueError, _pypyjson.encode, d, default)
+        raises(ValueError, _pypyjson.encode, object(), default)
+        # the same object twice is not a cycle
+        x = [1]
+        assert _pypyjson.encode([x, x], default) == '[[1], [1]]'
+
+    def test_encode_loads_roundtrip(self):
+        import _pypyjson
+        def default(o):
+            raise TypeError
+        s = '[{"a": 1, "b\\u1234": [1.5, "x"]}, {"a": 2, "b\\u1234": null}]'
+        for i in range(10):
+            assert _pypyjson.encode(_pypyjson.loads(s), default) == s
+
+
+class AppTestJsonEncoder(object):
+    spaceconfig = {"usemodules": ["_pypyjson", "struct", "binascii"]}
+
+    def test_json_dumps_uses_encode(self):
+        import json
+        assert json.encoder._pypyjson_encode is not None
+        assert json.dumps({"a": [1, 2.5, None]}) == '{"a": [1, 2.5, null]}'
+        assert json.dumps({"b": 1, "a": 2}, sort_keys=True,
+                          separators=(',', ':')) == '{"a":2,"b":1}'
+        assert json.dumps([1], indent=2) == '[\n  1\n]'
+        assert json.dumps(u"\xe4", ensure_ascii=False) == u'"\xe4"'
+        class E(json.JSONEncoder):
+            def default(self, o):
+                return list(o)
+        assert E().encode(set([1])) == '[1]'
+
+
+class AppTestJsonStream(object):
+    spaceconfig = {"objspace.usemodules._pypyjson": True}
+
+    def test_feed_whole_values(self):
+        import _pypyjson
+        dec = _pypyjson.JSONStreamDecoder()
+        res = dec.feed('{"a": 1}\n[1, 2]\n"x"\n')
+        assert res == [{u"a": 1}, [1, 2], u"x"]
+        assert dec.close() == []
+
+    def test_feed_split_values(self):
+        import _pypyjson
+        s = '{"a": [1, "}]\\"{"], "b": {"c": null}} 12 true "x\\\\" -1.5e3\n'
+        expected = [{u"a": [1, u'}]"{'], u"b": {u"c": None}}, 12, True,
+                    u"x\\", -1.5e3]
+        for size in range(1, len(s) + 1):
+            dec = _pypyjson.JSONStreamDecoder()
+            res = []
+            for i in range(0, len(s), size):
+                res.extend(dec.feed(s[i:i+size]))
+            res.extend(dec.close())
+            assert res == expected
+
+    def test_final_scalar(self):
+        import _pypyjson
+        dec = _pypyjson.JSONStreamDecoder()
+        assert dec.feed('1 23') == [1]
+        assert dec.feed('4') == []
+        assert dec.close() == [234]
+
+    def test_buffer_input(self):
+        import _pypyjson
+        dec = _pypyjson.JSONStreamDecoder()
+        assert dec.feed(bytearray('[1]')) == [[1]]
+        assert dec.feed(memoryview('{"a": 2}')) == [{u"a": 2}]
+        raises(TypeError, dec.feed, u'[1]')
+
+    def test_errors(self):
+        import _pypyjson
+        dec = _pypyjson.JSONStreamDecoder()
+        raises(ValueError, dec.feed, '[1, ]')
+        dec = _pypyjson.JSONStreamDecoder()
+        assert dec.feed('{"a": [1') == []
+        exc = raises(ValueError, dec.close)
+        assert "Unterminated" in str(exc.value)
+        dec = _pypyjson.JSONStreamDecoder()
+        raises(ValueError, dec.feed, '}')
+
+    def test_maps_shared(self):
+        import _pypyjson
+        dec = _pypyjson.JSONStreamDecoder()
+        res = []
+        for i in range(100):
+            res.extend(dec.feed('{"id": %d, "name": "x"}\n' % i))
+        assert res == [{u"id": i, u"name": u"x"} for i in range(100)]
+
+    def test_iterload(self):
+        import _pypyjson
+        from StringIO import StringIO
+        f = StringIO('{"a": 1}\n' * 10 + '5')
+        res = list(_pypyjson.iterload(f, chunksize=3))
+        assert res == [{u"a": 1}] * 10 + [5]
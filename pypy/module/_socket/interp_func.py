@@ -313,6 +313,36 @@ def getaddrinfo(space, w_host, w_port,
             for (family, socktype, protocol, canonname, addr) in lst]
     return space.newlist(lst1)
 
+@unwrap_spec(length=int)
+def CMSG_LEN(space, length):
+    """CMSG_LEN(length) -> control message length
+
+    Return the total length, without trailing padding, of an ancillary
+    data item with associated data of the given length.
+    """
+    result = 0
+    if length >= 0:
+        result = rsocket.CMSG_LEN(length)
+    if result == 0:
+        raise oefmt(space.w_OverflowError, "CMSG_LEN() argument out of range")
+    return space.newint(result)
+
+@unwrap_spec(size=int)
+def CMSG_SPACE(space, size):
+    """CMSG_SPACE(length) -> buffer size
+
+    Return the buffer size needed for recvmsg() to receive an ancillary
+    data item with associated data of the given length, along with any
+    trailing padding.
+    """
+    result = 0
+    if size >= 0:
+        result = rsocket.CMSG_SPACE(size)
+    if result == 0:
+        raise oefmt(space.w_OverflowError,
+                    "CMSG_SPACE() argument out of range")
+    return space.newint(result)
+
 def getdefaulttimeout(space):
     """getdefaulttimeout() -> timeout
 
@@ -530,6 +530,127 @@ class W_Socket(W_Root):
         except SocketError as e:
             raise converted_error(space, e)
 
+    @unwrap_spec(message_size=int, ancbufsize=int, flags=int)
+    def recvmsg_w(self, space, message_size, ancbufsize=0, flags=0):
+        """recvmsg(bufsize[, ancbufsize[, flags]]) -> (data, ancdata, msg_flags, address)
+
+        Receive normal data (up to bufsize bytes) and ancillary data from the
+        socket.  The ancbufsize argument sets the size in bytes of the buffer
+        used to receive the ancillary data; it defaults to 0, meaning that no
+        ancillary data will be received.  ancdata is a list of
+        (cmsg_level, cmsg_type, cmsg_data) tuples.
+        """
+        if message_size < 0:
+            raise oefmt(space.w_ValueError,
+                        "negative buffer size in recvmsg()")
+        if ancbufsize < 0:
+            raise oefmt(space.w_ValueError,
+                        "invalid ancillary data buffer length")
+        try:
+            data, ancillary, msg_flags, addr = self.sock.recvmsg(
+                message_size, ancbufsize, flags)
+        except SocketError as e:
+            raise converted_error(space, e)
+        anclist = []
+        for level, type, content in ancillary:
+            anclist.append(space.newtuple([space.newint(level),
+                                           space.newint(type),
+                                           space.newbytes(content)]))
+        if addr is not None:
+            w_addr = addr_as_object(addr, self.sock.fd, space)
+        else:
+            w_addr = space.w_None
+        return space.newtuple([space.newbytes(data), space.newlist(anclist),
+                               space.newint(msg_flags), w_addr])
+
+    @unwrap_spec(flags=int)
+    def sendmsg_w(self, space, w_data, w_ancillary=None, flags=0,
+                  w_address=None):
+        """sendmsg(buffers[, ancdata[, flags[, address]]]) -> count
+
+        Send normal and ancillary data to the socket, gathering the
+        non-ancillary data from a series of buffers and concatenating it into
+        a single message.  The ancdata argument is a sequence of
+        (cmsg_level, cmsg_type, cmsg_data) tuples.  Return the number of
+        bytes sent.
+        """
+        data = [space.bufferstr_w(w_buf)
+                for w_buf in space.unpackiterable(w_data)]
+        ancillary = None
+        if w_ancillary is not None and not space.is_none(w_ancillary):
+            ancillary = []
+            for w_item in space.unpackiterable(w_ancillary):
+                items_w = space.fixedview(w_item)
+                if len(items_w) != 3:
+                    raise oefmt(space.w_TypeError,
+                                "[sendmsg() ancillary data items]() argument "
+                                "must be sequence of length 3")
+                ancillary.append((space.c_int_w(items_w[0]),
+                                  space.c_int_w(items_w[1]),
+                                  space.bufferstr_w(items_w[2])))
+        try:
+            addr = None
+            if w_address is not None and not space.is_none(w_address):
+                addr = self.addr_from_object(space, w_address)
+            count = self.sock.sendmsg(data, ancillary, flags, addr)
+        except SocketError as e:
+            raise converted_error(space, e)
+        if count == -1000:
+            raise explicit_socket_error(space,
+                "sending multiple control messages is not supported")
+        if count == -1001 or count == -1002:
+            raise explicit_socket_error(space, "ancillary data item too large")
+        return space.newint(count)
+
+    @unwrap_spec(flags=int)
+    def recv_many_into_w(self, space, w_buffers, flags=0):
+        """recv_many_into(buffers[, flags]) -> [(nbytes, address info), ...]
+
+        Receive several datagrams with a single system call, the first one
+        into buffers[0], the next one into buffers[1], and so on.  Block until
+        one datagram is available, and return only the datagrams that are
+        already queued after it.  Datagrams longer than their buffer are
+        truncated.
+        """
+        buffers = [space.getarg_w('w*', w_buf)
+                   for w_buf in space.unpackiterable(w_buffers)]
+        if not buffers:
+            return space.newlist([])
+        try:
+            received = self.sock.recvmmsg_into(buffers, flags)
+        except SocketError as e:
+            raise converted_error(space, e)
+        result_w = []
+        for nbytes, addr in received:
+            if addr is not None:
+                w_addr = addr_as_object(addr, self.sock.fd, space)
+            else:
+                w_addr = space.w_None
+            result_w.append(space.newtuple([space.newint(nbytes), w_addr]))
+        return space.newlist(result_w)
+
+    @unwrap_spec(flags=int)
+    def send_many_w(self, space, w_data, flags=0, w_address=None):
+        """send_many(buffers[, flags[, address]]) -> count
+
+        Send each buffer as a separate datagram, with a single system call.
+        Without an address, the socket must be connected.  Return the number
+        of datagrams sent, which may be less than len(buffers) if the network
+        is busy.
+        """
+        data = [space.bufferstr_w(w_buf)
+                for w_buf in space.unpackiterable(w_data)]
+        if not data:
+            return space.newint(0)
+        try:
+            addr = None
+            if w_address is not None and not space.is_none(w_address):
+                addr = self.addr_from_object(space, w_address)
+            count = self.sock.sendmmsg(data, flags, addr)
+        except SocketError as e:
+            raise converted_error(space, e)
+        return space.newint(count)
+
     @unwrap_spec(cmd=int)
     def ioctl_w(self, space, cmd, w_option):
         from rpython.rtyper.lltypesystem import rffi, lltype
@@ -727,6 +848,10 @@ for name in ('dup',):
         socketmethodnames.remove(name)
 if hasattr(rsocket._c, 'WSAIoctl'):
     socketmethodnames.append('ioctl')
+if rsocket._c.HAVE_SENDMSG:
+    socketmethodnames.extend(['recvmsg', 'sendmsg'])
+if rsocket._c.HAVE_RECVMMSG and rsocket._c.HAVE_SENDMMSG:
+    socketmethodnames.extend(['recv_many_into', 'send_many'])
 
 socketmethods = {}
 for methodname in socketmethodnames:
@@ -762,8 +887,12 @@ listen(n) -- start listening for incoming connections
 makefile([mode, [bufsize]]) -- return a file object for the socket [*]
 recv(buflen[, flags]) -- receive data
 recvfrom(buflen[, flags]) -- receive data and sender's address
+recvmsg(buflen[, ancbuflen[, flags]]) -- receive data and ancillary data [*]
+recv_many_into(buffers[, flags]) -- receive several datagrams at once [*]
 sendall(data[, flags]) -- send all data
 send(data[, flags]) -- send data, may not send all of it
+sendmsg(buffers[, ancdata[, flags[, addr]]]) -- send data and ancillary data [*]
+send_many(buffers[, flags[, addr]]) -- send several datagrams at once [*]
 sendto(data[, flags], addr) -- send data to a given address
 setblocking(0 | 1) -- set or clear the blocking I/O flag
 setsockopt(level, optname, value) -- set socket options
@@ -31,10 +31,11 @@ class Module(MixedModule):
             ntohs ntohl htons htonl inet_aton inet_ntoa inet_pton inet_ntop
             getaddrinfo getnameinfo
             getdefaulttimeout setdefaulttimeout sethostname
+            CMSG_LEN CMSG_SPACE
             """.split():
 
             if name in ('inet_pton', 'inet_ntop', 'fromfd', 'socketpair',
-                        'sethostname') \
+                        'sethostname', 'CMSG_LEN', 'CMSG_SPACE') \
                     and not hasattr(rsocket, name):
                 continue
 
@@ -687,6 +687,92 @@ class AppTestSocket:
         finally:
             os.chdir(oldcwd)
 
+    def test_sendmsg_recvmsg(self):
+        import _socket
+        if not hasattr(_socket.socket, 'sendmsg'):
+            skip('no sendmsg()')
+        s1 = _socket.socket(_socket.AF_INET, _socket.SOCK_DGRAM)
+        s1.bind(('127.0.0.1', 0))
+        s2 = _socket.socket(_socket.AF_INET, _socket.SOCK_DGRAM)
+        s2.bind(('127.0.0.1', 0))
+        count = s1.sendmsg([b'ab', buffer(b'cd'), bytearray(b'e')], [], 0,
+                           s2.getsockname())
+        assert count == 5
+        s2.settimeout(10.0)
+        data, ancdata, flags, addr = s2.recvmsg(100)
+        assert data == b'abcde'
+        assert ancdata == []
+        assert addr == s1.getsockname()
+        s1.sendto(b'x' * 10, s2.getsockname())
+        data, ancdata, flags, addr = s2.recvmsg(4)
+        assert data == b'xxxx'
+        assert flags & _socket.MSG_TRUNC
+        raises(ValueError, s2.recvmsg, -1)
+        raises(ValueError, s2.recvmsg, 10, -1)
+        s1.close()
+        s2.close()
+
+    def test_sendmsg_recvmsg_scm_rights(self):
+        import _socket, struct, os
+        if not hasattr(_socket.socket, 'sendmsg'):
+            skip('no sendmsg()')
+        if not hasattr(_socket, 'AF_UNIX'):
+            skip('AF_UNIX not supported.')
+        s1, s2 = _socket.socketpair(_socket.AF_UNIX, _socket.SOCK_DGRAM)
+        r, w = os.pipe()
+        try:
+            assert s1.sendmsg([b'x'], [(_socket.SOL_SOCKET, _socket.SCM_RIGHTS,
+                                       struct.pack('i', w))]) == 1
+            size = _socket.CMSG_LEN(struct.calcsize('i'))
+            assert _socket.CMSG_SPACE(struct.calcsize('i')) >= size
+            data, ancdata, flags, addr = s2.recvmsg(1, size)
+            assert data == b'x'
+            [(level, type, fddata)] = ancdata
+            assert level == _socket.SOL_SOCKET
+            assert type == _socket.SCM_RIGHTS
+            fd, = struct.unpack('i', fddata)
+            os.write(fd, b'!')
+            os.close(fd)
+            assert os.read(r, 1) == b'!'
+        finally:
+            os.close(r)
+            os.close(w)
+            s1.close()
+            s2.close()
+        raises(OverflowError, _socket.CMSG_LEN, -1)
+
+    def test_send_many_recv_many_into(self):
+        import _socket
+        if not hasattr(_socket.socket, 'send_many'):
+            skip('no sendmmsg()')
+        s1 = _socket.socket(_socket.AF_INET, _socket.SOCK_DGRAM)
+        s1.bind(('127.0.0.1', 0))
+        s2 = _socket.socket(_socket.AF_INET, _socket.SOCK_DGRAM)
+        s2.bind(('127.0.0.1', 0))
+        count = s1.send_many([b'a', buffer(b'bc'), b'', b'x' * 20], 0,
+                             s2.getsockname())
+        assert count == 4
+        s2.settimeout(10.0)
+        bufs = [bytearray(8) for i in range(6)]
+        res = s2.recv_many_into([memoryview(buf) for buf in bufs])
+        assert [nbytes for nbytes, addr in res] == [1, 2, 0, 8]
+        assert [addr for nbytes, addr in res] == [s1.getsockname()] * 4
+        assert bufs[0][:1] == b'a'
+        assert bufs[1][:2] == b'bc'
+        assert bufs[3] == b'x' * 8
+        assert s2.recv_many_into([]) == []
+        s1.connect(s2.getsockname())
+        assert s1.send_many([b'y', b'z']) == 2
+        assert s1.send_many([]) == 0
+        res = s2.recv_many_into(bufs)
+        assert [nbytes for nbytes, addr in res] == [1, 1]
+        assert bufs[0][:1] == b'y' and bufs[1][:1] == b'z'
+        s2.settimeout(0.0)
+        raises(_socket.error, s2.recv_many_into, bufs)
+        raises(TypeError, s2.recv_many_into, [b'read-only'])
+        s1.close()
+        s2.close()
+
     def test_automatic_shutdown(self):
         # doesn't really test anything, but at least should not explode
         # in close_all_sockets()
@@ -734,6 +820,9 @@ class AppTestSocketTCP:
     HOST = 'localhost'
     spaceconfig = {'usemodules': ['_socket', 'array']}
 
+    def setup_class(cls):
+        cls.w_udir = cls.space.wrap(str(udir))
+
     def setup_method(self, method):
         w_HOST = self.space.wrap(self.HOST)
         self.w_serv = self.space.appexec([w_HOST],
@@ -861,6 +950,47 @@ class AppTestSocketTCP:
         cli = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         assert cli.family == socket.AF_INET
 
+    def test_sendfile(self):
+        import socket, os
+        data = b''.join([chr(i % 251) for i in range(251)]) * 400
+        fn = os.path.join(self.udir, 'test_sendfile')
+        with open(fn, 'wb') as f:
+            f.write(data)
+        f = open(fn, 'rb')
+        cli = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        cli.connect(self.serv.getsockname())
+        conn, addr = self.serv.accept()
+        conn = socket.socket(_sock=conn)
+
+        def receive(size):
+            result = []
+            while size > 0:
+                chunk = cli.recv(size)
+                assert chunk
+                result.append(chunk)
+                size -= len(chunk)
+            return b''.join(result)
+
+        assert conn.sendfile(f) == len(data)
+        assert receive(len(data)) == data
+        assert f.tell() == len(data)
+        assert conn.sendfile(f, 10, 5000) == 5000
+        assert receive(5000) == data[10:5010]
+        assert f.tell() == 5010
+        raises(ValueError, conn.sendfile, f, 0, 0)
+        # the fallback reads into a buffer and uses send()
+        assert conn._sendfile_use_send(f, len(data) - 10, None) == 10
+        assert receive(10) == data[-10:]
+        conn.settimeout(10.0)
+        assert conn.sendfile(f, 200, 20) == 20
+        assert receive(20) == data[200:220]
+        from StringIO import StringIO
+        assert conn.sendfile(StringIO(b'no fileno')) == 9
+        assert receive(9) == b'no fileno'
+        f.close()
+        conn.close()
+        cli.close()
+
     def test_missing_error_catching(self):
         from _socket import socket, error
         s = socket()
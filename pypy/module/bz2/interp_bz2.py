@@ -10,6 +10,7 @@ from rpython.rlib.streamio import Stream
 from rpython.translator.tool.cbuild import ExternalCompilationInfo
 from rpython.translator.platform import platform as compiler
 from rpython.rlib.rarithmetic import intmask, r_longlong
+from rpython.rlib.objectmodel import keepalive_until_here
 import sys
 
 
@@ -506,7 +507,27 @@ def descr_compressor__new__(space, w_subtype, compresslevel=9):
     W_BZ2Compressor.__init__(x, space, compresslevel)
     return x
 
-class W_BZ2Compressor(W_Root):
+class W_BZ2Object(W_Root):
+    """Common base class for BZ2Compressor and BZ2Decompressor.
+
+    The GIL is released while bzlib works, so a lock protects 'self.bzs'
+    against other threads using the same object."""
+
+    def __init__(self, space):
+        self.space = space
+        self._lock = space.allocate_lock()
+
+    def lock(self):
+        """To call before using self.bzs."""
+        self._lock.acquire(True)
+
+    def unlock(self):
+        """To call after using self.bzs."""
+        self._lock.release()
+        keepalive_until_here(self)
+
+
+class W_BZ2Compressor(W_BZ2Object):
     """BZ2Compressor([compresslevel=9]) -> compressor object
 
     Create a new compressor object. This object may be used to compress
@@ -514,7 +535,7 @@ class W_BZ2Compressor(W_Root):
     compress() function instead. The compresslevel parameter, if given,
     must be a number between 1 and 9."""
     def __init__(self, space, compresslevel):
-        self.space = space
+        W_BZ2Object.__init__(self, space)
         self.bzs = lltype.malloc(bz_stream.TO, flavor='raw', zero=True)
         try:
             self.running = False
@@ -551,7 +572,13 @@ class W_BZ2Compressor(W_Root):
         compressed data whenever possible. When you've finished providing data
         to compress, call the flush() method to finish the compression process,
         and return what is left in the internal buffers."""
+        self.lock()
+        try:
+            return self._compress(data)
+        finally:
+            self.unlock()
 
+    def _compress(self, data):
         assert data is not None
         datasize = len(data)
 
@@ -584,6 +611,13 @@ class W_BZ2Compressor(W_Root):
                 return self.space.newbytes(res)
 
     def flush(self):
+        self.lock()
+        try:
+            return self._flush()
+        finally:
+            self.unlock()
+
+    def _flush(self):
         if not self.running:
             raise oefmt(self.space.w_ValueError,
                         "this object was already flushed")
@@ -617,7 +651,7 @@ def descr_decompressor__new__(space, w_subtype):
     return x
 
 
-class W_BZ2Decompressor(W_Root):
+class W_BZ2Decompressor(W_BZ2Object):
     """BZ2Decompressor() -> decompressor object
 
     Create a new decompressor object. This object may be used to decompress
@@ -625,7 +659,7 @@ class W_BZ2Decompressor(W_Root):
     decompress() function instead."""
 
     def __init__(self, space):
-        self.space = space
+        W_BZ2Object.__init__(self, space)
 
         self.bzs = lltype.malloc(bz_stream.TO, flavor='raw', zero=True)
         try:
@@ -662,7 +696,13 @@ class W_BZ2Decompressor(W_Root):
         after the end of stream is found, EOFError will be raised. If any data
         was found after the end of stream, it'll be ignored and saved in
         unused_data attribute."""
+        self.lock()
+        try:
+            return self._decompress(data)
+        finally:
+            self.unlock()
 
+    def _decompress(self, data):
         assert data is not None
         if not self.running:
             raise oefmt(self.space.w_EOFError,
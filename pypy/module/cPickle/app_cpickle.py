@@ -0,0 +1,13 @@
+# The exceptions are the ones of pickle.py, so that code catching
+# pickle.PicklingError also works with cPickle, like with lib_pypy/cPickle.py
+from pickle import PickleError, PicklingError, UnpicklingError
+
+BadPickleGet = KeyError
+UnpickleableError = PicklingError
+
+compatible_formats = ["1.0",            # Original protocol 0
+                      "1.1",            # Protocol 0 with INST added
+                      "1.2",            # Original protocol 1
+                      "1.3",            # Protocol 1 with BINFLOAT added
+                      "2.0",            # Protocol 2
+                      ]                 # Old format versions we can read
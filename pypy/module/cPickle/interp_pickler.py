@@ -0,0 +1,946 @@
+from rpython.rlib import jit
+from rpython.rlib.objectmodel import r_dict, compute_identity_hash
+from rpython.rlib.rarithmetic import intmask
+from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.rstruct.ieee import float_pack
+from rpython.rlib import rutf8
+
+from pypy.interpreter import gateway, unicodehelper
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module.cPickle import opcodes
+
+
+HIGHEST_PROTOCOL = 2
+
+# Same value as pickle.Pickler._BATCHSIZE
+BATCHSIZE = 1000
+
+# When pickling to a file, the output is handed to file.write() whenever
+# that much of it is ready
+FLUSH_SIZE = 65536
+
+
+def pickling_error(space, msg):
+    w_module = space.getbuiltinmodule('cPickle')
+    w_error = space.getattr(w_module, space.newtext('PicklingError'))
+    return OperationError(w_error, space.newtext(msg))
+
+def check_protocol(space, w_protocol):
+    """ Turn the protocol argument of dump() and dumps() into an int. """
+    if space.is_none(w_protocol):
+        return 0
+    proto = space.int_w(w_protocol)
+    if proto > HIGHEST_PROTOCOL:
+        raise oefmt(space.w_ValueError,
+                    "pickle protocol %d asked for; the highest available "
+                    "protocol is %d", proto, HIGHEST_PROTOCOL)
+    if proto < 0:
+        proto = HIGHEST_PROTOCOL
+    return proto
+
+
+def _memo_hash(w_obj):
+    """ The hash of the keys of the memo. The memo compares its keys with
+    space.is_w(), like id() does, and for a few immutable types that means
+    comparing the values: the hash must agree with that. """
+    from pypy.objspace.std.bytesobject import W_BytesObject
+    from pypy.objspace.std.unicodeobject import W_UnicodeObject
+    from pypy.objspace.std.intobject import W_IntObject
+    from pypy.objspace.std.floatobject import W_FloatObject
+    from pypy.objspace.std.longobject import W_AbstractLongObject
+    from pypy.objspace.std.complexobject import W_ComplexObject
+    from pypy.objspace.std.tupleobject import W_AbstractTupleObject
+    from pypy.objspace.std.setobject import W_FrozensetObject
+    if not w_obj.user_overridden_class:
+        if isinstance(w_obj, W_BytesObject):
+            s = w_obj._value
+            if len(s) > 1:
+                return compute_identity_hash(s)
+            return len(s) and ord(s[0])
+        if isinstance(w_obj, W_UnicodeObject):
+            s = w_obj._utf8
+            if len(s) > 2:
+                return compute_identity_hash(s)
+            return len(s) and ord(s[0])
+        if isinstance(w_obj, W_IntObject):
+            return w_obj.intval
+        if (isinstance(w_obj, W_FloatObject) or
+                isinstance(w_obj, W_AbstractLongObject) or
+                isinstance(w_obj, W_ComplexObject)):
+            # only ever in the memo after going through __reduce_ex__()
+            return 0
+        if (isinstance(w_obj, W_AbstractTupleObject) or
+                isinstance(w_obj, W_FrozensetObject)) and w_obj.length() == 0:
+            return 0
+    return compute_identity_hash(w_obj)
+
+
+class W_Pickler(W_Root):
+    """Pickler(file, protocol=0) -- Create a pickler.
+
+This takes a file-like object for writing a pickle data stream.
+The optional proto argument tells the pickler to use the given
+protocol; supported protocols are 0, 1, 2.  The default
+protocol is 0, to be backwards compatible.
+
+Pickler(protocol) creates a pickler that keeps the pickles in memory,
+they are returned by getvalue()."""
+
+    def __init__(self, space, w_file, proto):
+        self.space = space
+        self.w_file = w_file
+        if w_file is not None:
+            self.w_write = space.getattr(w_file, space.newtext('write'))
+        else:
+            self.w_write = None
+        self.proto = proto
+        self.bin = proto >= 1
+        self.fast = 0
+        self.builder = StringBuilder()
+        self.memo = r_dict(space.is_w, _memo_hash)
+        # the last index used in the memo
+        self.memo_count = 0
+        # objects that only need to be kept alive while pickling, see
+        # pickle._keep_alive().  It takes a slot in the memo numbering.
+        self.keep_alive_w = None
+        self.w_persistent_id = None
+        self.w_pid_func = None
+        self.w_dispatch_table = None
+
+    # ____________________________________________________________
+    # output
+
+    def write(self, s):
+        self.builder.append(s)
+
+    def write_char(self, c):
+        self.builder.append(c)
+
+    def write_int32(self, x):
+        b = self.builder
+        b.append(chr(x & 0xff))
+        b.append(chr((x >> 8) & 0xff))
+        b.append(chr((x >> 16) & 0xff))
+        b.append(chr((x >> 24) & 0xff))
+
+    def flush(self):
+        """ Pass what is ready to the file. """
+        from pypy.module.cStringIO.interp_stringio import W_OutputType
+        space = self.space
+        if self.w_write is None or self.builder.getlength() == 0:
+            return
+        data = self.builder.build()
+        self.builder = StringBuilder()
+        w_file = self.w_file
+        if isinstance(w_file, W_OutputType):
+            w_file.check_closed()
+            w_file.write(data)
+        else:
+            space.call_function(self.w_write, space.newbytes(data))
+
+    # ____________________________________________________________
+    # the memo
+
+    def memo_index(self, w_obj):
+        return self.memo.get(w_obj, -1)
+
+    def memoize(self, w_obj):
+        if self.fast:
+            return
+        # like cPickle, start counting at one
+        self.memo_count += 1
+        self.put(self.memo_count)
+        self.memo[w_obj] = self.memo_count
+
+    def keep_alive(self, w_obj):
+        if self.keep_alive_w is None:
+            self.keep_alive_w = []
+            self.memo_count += 1
+        self.keep_alive_w.append(w_obj)
+
+    def put(self, i):
+        if self.bin:
+            if i < 256:
+                self.write_char(opcodes.BINPUT)
+                self.write_char(chr(i))
+            else:
+                self.write_char(opcodes.LONG_BINPUT)
+                self.write_int32(i)
+        else:
+            self.write_char(opcodes.PUT)
+            self.write(str(i))
+            self.write_char('\n')
+
+    def get(self, i):
+        if self.bin:
+            if i < 256:
+                self.write_char(opcodes.BINGET)
+                self.write_char(chr(i))
+            else:
+                self.write_char(opcodes.LONG_BINGET)
+                self.write_int32(i)
+        else:
+            self.write_char(opcodes.GET)
+            self.write(str(i))
+            self.write_char('\n')
+
+    # ____________________________________________________________
+    # saving
+
+    def dump(self, w_obj):
+        space = self.space
+        w_pid_func = space.findattr(self, space.newtext('persistent_id'))
+        if not space.is_none(w_pid_func):
+            self.w_pid_func = w_pid_func
+        self.w_dispatch_table = get_dispatch_table(space)
+        try:
+            if self.proto >= 2:
+                self.write_char(opcodes.PROTO)
+                self.write_char(chr(self.proto))
+            self.save(w_obj)
+            self.write_char(opcodes.STOP)
+            self.flush()
+        finally:
+            self.w_pid_func = None
+            self.w_dispatch_table = None
+
+    def save(self, w_obj):
+        from pypy.interpreter.function import Function, BuiltinFunction
+        from pypy.module.__builtin__.interp_classobj import (
+            W_ClassObject, W_InstanceObject)
+        space = self.space
+        if self.builder.getlength() >= FLUSH_SIZE:
+            self.flush()
+        if self.w_pid_func is not None:
+            w_pid = space.call_function(self.w_pid_func, w_obj)
+            if not space.is_w(w_pid, space.w_None):
+                self.save_pers(w_pid)
+                return
+        if len(self.memo) > 0:
+            index = self.memo_index(w_obj)
+            if index >= 0:
+                self.get(index)
+                return
+        # dispatch on the exact type, like pickle.Pickler.dispatch
+        w_type = space.type(w_obj)
+        if space.is_w(w_obj, space.w_None):
+            self.write_char(opcodes.NONE)
+        elif space.is_w(w_type, space.w_bool):
+            self.save_bool(space.is_true(w_obj))
+        elif space.is_w(w_type, space.w_int):
+            self.save_int(space.int_w(w_obj))
+        elif space.is_w(w_type, space.w_long):
+            self.save_long(w_obj)
+        elif space.is_w(w_type, space.w_float):
+            self.save_float(space.float_w(w_obj))
+        elif space.is_w(w_type, space.w_bytes):
+            self.save_bytes(w_obj)
+        elif space.is_w(w_type, space.w_unicode):
+            self.save_unicode(w_obj)
+        elif space.is_w(w_type, space.w_tuple):
+            self.save_tuple(w_obj)
+        elif space.is_w(w_type, space.w_list):
+            self.save_list(w_obj)
+        elif space.is_w(w_type, space.w_dict):
+            self.save_dict(w_obj)
+        elif isinstance(w_obj, W_InstanceObject):
+            self.save_inst(w_obj)
+        elif (isinstance(w_obj, W_ClassObject) or
+                space.is_w(w_type, space.w_type) or
+                space.is_w(w_type, space.gettypeobject(
+                    BuiltinFunction.typedef))):
+            self.save_global(w_obj, None)
+        elif space.is_w(w_type, space.gettypeobject(Function.typedef)):
+            self.save_function(w_obj)
+        else:
+            self.save_other(w_obj, w_type)
+
+    def save_pers(self, w_pid):
+        space = self.space
+        if self.bin:
+            self.save(w_pid)
+            self.write_char(opcodes.BINPERSID)
+        else:
+            self.write_char(opcodes.PERSID)
+            self.write(space.text_w(space.str(w_pid)))
+            self.write_char('\n')
+
+    def save_bool(self, value):
+        if self.proto >= 2:
+            if value:
+                self.write_char(opcodes.NEWTRUE)
+            else:
+                self.write_char(opcodes.NEWFALSE)
+        else:
+            if value:
+                self.write(opcodes.TRUE)
+            else:
+                self.write(opcodes.FALSE)
+
+    def save_int(self, value):
+        if self.bin:
+            if value >= 0:
+                if value <= 0xff:
+                    self.write_char(opcodes.BININT1)
+                    self.write_char(chr(value))
+                    return
+                if value <= 0xffff:
+                    self.write_char(opcodes.BININT2)
+                    self.write_char(chr(value & 0xff))
+                    self.write_char(chr(value >> 8))
+                    return
+            high_bits = value >> 31
+            if high_bits == 0 or high_bits == -1:
+                self.write_char(opcodes.BININT)
+                self.write_int32(value)
+                return
+        self.write_char(opcodes.INT)
+        self.write(str(value))
+        self.write_char('\n')
+
+    def save_long(self, w_obj):
+        space = self.space
+        bigint = space.bigint_w(w_obj)
+        if self.proto >= 2:
+            # the shortest two's complement little-endian representation
+            if bigint.sign == 0:
+                data = ''
+            else:
+                if bigint.sign > 0:
+                    nbits = bigint.bit_length()
+                else:
+                    nbits = bigint.invert().bit_length()
+                data = bigint.tobytes((nbits >> 3) + 1, 'little', True)
+            if len(data) < 256:
+                self.write_char(opcodes.LONG1)
+                self.write_char(chr(len(data)))
+            else:
+                self.write_char(opcodes.LONG4)
+                self.write_int32(len(data))
+            self.write(data)
+            return
+        self.write_char(opcodes.LONG)
+        self.write(bigint.str())
+        self.write('L\n')
+
+    def save_float(self, value):
+        from pypy.objspace.std.floatobject import float2string
+        if self.bin:
+            bits = float_pack(value, 8)
+            self.write_char(opcodes.BINFLOAT)
+            for i in range(7, -1, -1):
+                self.write_char(chr(intmask(bits >> (i * 8)) & 0xff))
+        else:
+            self.write_char(opcodes.FLOAT)
+            self.write(float2string(value, 'r', 0))
+            self.write_char('\n')
+
+    def save_bytes(self, w_obj):
+        space = self.space
+        if self.bin:
+            s = space.bytes_w(w_obj)
+            if len(s) < 256:
+                self.write_char(opcodes.SHORT_BINSTRING)
+                self.write_char(chr(len(s)))
+            else:
+                self.write_char(opcodes.BINSTRING)
+                self.write_int32(len(s))
+            self.write(s)
+        else:
+            self.write_char(opcodes.STRING)
+            self.write(space.text_w(space.repr(w_obj)))
+            self.write_char('\n')
+        self.memoize(w_obj)
+
+    def save_unicode(self, w_obj):
+        space = self.space
+        utf8 = space.utf8_w(w_obj)
+        if self.bin:
+            if rutf8.has_surrogates(utf8):
+                utf8 = rutf8.reencode_utf8_with_surrogates(utf8)
+            self.write_char(opcodes.BINUNICODE)
+            self.write_int32(len(utf8))
+            self.write(utf8)
+        else:
+            utf8 = utf8.replace('\\', '\\u005c')
+            utf8 = utf8.replace('\n', '\\u000a')
+            self.write_char(opcodes.UNICODE)
+            self.write(unicodehelper.utf8_encode_raw_unicode_escape(
+                utf8, 'strict', None))
+            self.write_char('\n')
+        self.memoize(w_obj)
+
+    def save_tuple(self, w_obj):
+        space = self.space
+        items_w = space.fixedview(w_obj)
+        n = len(items_w)
+        if n == 0:
+            if self.proto:
+                self.write_char(opcodes.EMPTY_TUPLE)
+            else:
+                self.write_char(opcodes.MARK)
+                self.write_char(opcodes.TUPLE)
+            return
+        if n <= 3 and self.proto >= 2:
+            for w_item in items_w:
+                self.save(w_item)
+            index = self.memo_index(w_obj)
+            if index >= 0:
+                # the tuple is recursive, see pickle.Pickler.save_tuple()
+                for i in range(n):
+                    self.write_char(opcodes.POP)
+                self.get(index)
+            else:
+                self.write_char(opcodes.TUPLESIZE2CODE[n])
+                self.memoize(w_obj)
+            return
+        self.write_char(opcodes.MARK)
+        for w_item in items_w:
+            self.save(w_item)
+        index = self.memo_index(w_obj)
+        if index >= 0:
+            if self.proto:
+                self.write_char(opcodes.POP_MARK)
+            else:
+                for i in range(n + 1):
+                    self.write_char(opcodes.POP)
+            self.get(index)
+            return
+        self.write_char(opcodes.TUPLE)
+        self.memoize(w_obj)
+
+    def save_list(self, w_list):
+        if self.bin:
+            self.write_char(opcodes.EMPTY_LIST)
+        else:
+            self.write_char(opcodes.MARK)
+            self.write_char(opcodes.LIST)
+        self.memoize(w_list)
+        if self.w_pid_func is None:
+            # neither ints nor floats can be in the memo
+            intlist = w_list.getitems_int()
+            if intlist is not None:
+                self.batch_appends_int(intlist)
+                return
+            floatlist = w_list.getitems_float()
+            if floatlist is not None:
+                self.batch_appends_float(floatlist)
+                return
+        self.batch_appends_list(w_list.getitems_copy())
+
+    def _start_batch(self, n):
+        if n > 1:
+            self.write_char(opcodes.MARK)
+
+    def _end_batch(self, n, setitems):
+        if n > 1:
+            if setitems:
+                self.write_char(opcodes.SETITEMS)
+            else:
+                self.write_char(opcodes.APPENDS)
+        elif n:
+            if setitems:
+                self.write_char(opcodes.SETITEM)
+            else:
+                self.write_char(opcodes.APPEND)
+
+    def batch_appends_int(self, intlist):
+        if not self.bin:
+            for value in intlist:
+                self.save_int(value)
+                self.write_char(opcodes.APPEND)
+            return
+        start = 0
+        while start < len(intlist):
+            n = min(len(intlist) - start, BATCHSIZE)
+            self._start_batch(n)
+            for i in range(start, start + n):
+                self.save_int(intlist[i])
+            self._end_batch(n, False)
+            start += n
+
+    def batch_appends_float(self, floatlist):
+        if not self.bin:
+            for value in floatlist:
+                self.save_float(value)
+                self.write_char(opcodes.APPEND)
+            return
+        start = 0
+        while start < len(floatlist):
+            n = min(len(floatlist) - start, BATCHSIZE)
+            self._start_batch(n)
+            for i in range(start, start + n):
+                self.save_float(floatlist[i])
+            self._end_batch(n, False)
+            start += n
+
+    def batch_appends_list(self, items_w):
+        if not self.bin:
+            for w_item in items_w:
+                self.save(w_item)
+                self.write_char(opcodes.APPEND)
+            return
+        start = 0
+        while start < len(items_w):
+            n = min(len(items_w) - start, BATCHSIZE)
+            self._start_batch(n)
+            for i in range(start, start + n):
+                self.save(items_w[i])
+            self._end_batch(n, False)
+            start += n
+
+    def batch_appends(self, w_iterator):
+        """ Like pickle.Pickler._batch_appends(), for the listitems
+        returned by __reduce__(). """
+        space = self.space
+        if not self.bin:
+            while True:
+                w_item = self._next_or_none(w_iterator)
+                if w_item is None:
+                    break
+                self.save(w_item)
+                self.write_char(opcodes.APPEND)
+            return
+        while w_iterator is not None:
+            batch_w = []
+            while len(batch_w) < BATCHSIZE:
+                w_item = self._next_or_none(w_iterator)
+                if w_item is None:
+                    w_iterator = None
+                    break
+                batch_w.append(w_item)
+            self._start_batch(len(batch_w))
+            for w_item in batch_w:
+                self.save(w_item)
+            self._end_batch(len(batch_w), False)
+
+    def save_dict(self, w_dict):
+        from pypy.objspace.std.dictmultiobject import W_DictMultiObject
+        space = self.space
+        assert isinstance(w_dict, W_DictMultiObject)
+        w_name = w_dict.getitem_str('__name__')
+        if w_name is not None and space.is_w(space.type(w_name),
+                                             space.w_bytes):
+            w_saver = moduledict_reduce(space, w_dict, w_name)
+            if not space.is_w(w_saver, space.w_None):
+                w_func, w_args = space.fixedview(w_saver, 2)
+                self.save_reduce(w_func, w_args, None, None, None, None)
+                return
+        if self.bin:
+            self.write_char(opcodes.EMPTY_DICT)
+        else:
+            self.write_char(opcodes.MARK)
+            self.write_char(opcodes.DICT)
+        self.memoize(w_dict)
+        if not self.bin:
+            w_iter = w_dict.iteritems()
+            while True:
+                w_key, w_value = w_iter.next_item()
+                if w_key is None:
+                    break
+                self.save(w_key)
+                self.save(w_value)
+                self.write_char(opcodes.SETITEM)
+            return
+        w_iter = w_dict.iteritems()
+        while w_iter is not None:
+            keys_w = []
+            values_w = []
+            while len(keys_w) < BATCHSIZE:
+                w_key, w_value = w_iter.next_item()
+                if w_key is None:
+                    w_iter = None
+                    break
+                keys_w.append(w_key)
+                values_w.append(w_value)
+            self._start_batch(len(keys_w))
+            for i in range(len(keys_w)):
+                self.save(keys_w[i])
+                self.save(values_w[i])
+            self._end_batch(len(keys_w), True)
+
+    def batch_setitems(self, w_iterator):
+        """ Like pickle.Pickler._batch_setitems(), for the dictitems
+        returned by __reduce__(). """
+        space = self.space
+        if not self.bin:
+            while True:
+                w_item = self._next_or_none(w_iterator)
+                if w_item is None:
+                    break
+                w_key, w_value = space.fixedview(w_item, 2)
+                self.save(w_key)
+                self.save(w_value)
+                self.write_char(opcodes.SETITEM)
+            return
+        while w_iterator is not None:
+            batch_w = []
+            while len(batch_w) < BATCHSIZE:
+                w_item = self._next_or_none(w_iterator)
+                if w_item is None:
+                    w_iterator = None
+                    break
+                batch_w.append(w_item)
+            self._start_batch(len(batch_w))
+            for w_item in batch_w:
+                w_key, w_value = space.fixedview(w_item, 2)
+                self.save(w_key)
+                self.save(w_value)
+            self._end_batch(len(batch_w), True)
+
+    def _next_or_none(self, w_iterator):
+        space = self.space
+        try:
+            return space.next(w_iterator)
+        except OperationError as e:
+            if not e.match(space, space.w_StopIteration):
+                raise
+            return None
+
+    def save_inst(self, w_obj):
+        space = self.space
+        w_cls = space.getattr(w_obj, space.newtext('__class__'))
+        w_getinitargs = space.findattr(w_obj, space.newtext('__getinitargs__'))
+        if w_getinitargs is not None:
+            w_args = space.call_function(w_getinitargs)
+            space.len_w(w_args)     # XXX Assert it's a sequence
+            self.keep_alive(w_args)
+            args_w = space.listview(w_args)
+        else:
+            args_w = []
+        self.write_char(opcodes.MARK)
+        if self.bin:
+            self.save(w_cls)
+            for w_arg in args_w:
+                self.save(w_arg)
+            self.write_char(opcodes.OBJ)
+        else:
+            for w_arg in args_w:
+                self.save(w_arg)
+            self.write_char(opcodes.INST)
+            self.write(space.text_w(
+                space.getattr(w_cls, space.newtext('__module__'))))
+            self.write_char('\n')
+            self.write(space.text_w(
+                space.getattr(w_cls, space.newtext('__name__'))))
+            self.write_char('\n')
+        self.memoize(w_obj)
+        w_getstate = space.findattr(w_obj, space.newtext('__getstate__'))
+        if w_getstate is None:
+            w_stuff = space.getattr(w_obj, space.newtext('__dict__'))
+        else:
+            w_stuff = space.call_function(w_getstate)
+            self.keep_alive(w_stuff)
+        self.save(w_stuff)
+        self.write_char(opcodes.BUILD)
+
+    def save_global(self, w_obj, w_name):
+        space = self.space
+        if w_name is None:
+            w_name = space.w_None
+        w_info = global_info(space, w_obj, w_name, space.newint(self.proto))
+        w_module, w_name, w_code = space.fixedview(w_info, 3)
+        code = space.int_w(w_code)
+        if code:
+            assert code > 0
+            if code <= 0xff:
+                self.write_char(opcodes.EXT1)
+                self.write_char(chr(code))
+            elif code <= 0xffff:
+                self.write_char(opcodes.EXT2)
+                self.write_char(chr(code & 0xff))
+                self.write_char(chr(code >> 8))
+            else:
+                self.write_char(opcodes.EXT4)
+                self.write_int32(code)
+            return
+        self.write_char(opcodes.GLOBAL)
+        self.write(space.text_w(w_module))
+        self.write_char('\n')
+        self.write(space.text_w(w_name))
+        self.write_char('\n')
+        self.memoize(w_obj)
+
+    def save_function(self, w_obj):
+        space = self.space
+        try:
+            self.save_global(w_obj, None)
+            return
+        except OperationError as e:
+            w_module = space.getbuiltinmodule('cPickle')
+            w_error = space.getattr(w_module, space.newtext('PicklingError'))
+            if not e.match(space, w_error):
+                raise
+        self.save_other(w_obj, space.type(w_obj))
+
+    def save_other(self, w_obj, w_type):
+        """ Save an object of a type that doesn't have a specific save_xxx()
+        method: use copy_reg.dispatch_table or __reduce_ex__(). """
+        space = self.space
+        w_reduce = space.finditem(self.w_dispatch_table, w_type)
+        if w_reduce is not None:
+            w_rv = space.call_function(w_reduce, w_obj)
+        else:
+            if space.issubtype_w(w_type, space.w_type):
+                # a class with a custom metaclass
+                self.save_global(w_obj, None)
+                return
+            w_reduce = space.findattr(w_obj, space.newtext('__reduce_ex__'))
+            if w_reduce is not None:
+                w_rv = space.call_function(w_reduce,
+                                           space.newint(self.proto))
+            else:
+                w_reduce = space.findattr(w_obj, space.newtext('__reduce__'))
+                if w_reduce is None:
+                    w_module = space.getbuiltinmodule('cPickle')
+                    w_error = space.getattr(w_module,
+                                            space.newtext('PicklingError'))
+                    raise oefmt(w_error, "Can't pickle %N object: %R",
+                                w_type, w_obj)
+                w_rv = space.call_function(w_reduce)
+        w_rvtype = space.type(w_rv)
+        if space.is_w(w_rvtype, space.w_bytes):
+            self.save_global(w_obj, w_rv)
+            return
+        if not space.is_w(w_rvtype, space.w_tuple):
+            raise pickling_error(space, "%s must return string or tuple" %
+                                 space.text_w(space.str(w_reduce)))
+        rv_w = space.fixedview(w_rv)
+        if not 2 <= len(rv_w) <= 5:
+            raise pickling_error(space, "Tuple returned by %s must have "
+                                 "two to five elements" %
+                                 space.text_w(space.str(w_reduce)))
+        args_w = [None] * 5
+        for i in range(len(rv_w)):
+            args_w[i] = rv_w[i]
+        self.save_reduce(args_w[0], args_w[1], args_w[2], args_w[3],
+                         args_w[4], w_obj)
+
+    def save_reduce(self, w_func, w_args, w_state, w_listitems, w_dictitems,
+                    w_obj):
+        """ Like pickle.Pickler.save_reduce(). None arguments and wrapped
+        None are equivalent. """
+        space = self.space
+        if not space.isinstance_w(w_args, space.w_tuple):
+            raise pickling_error(space,
+                                 "args from reduce() should be a tuple")
+        if space.findattr(w_func, space.newtext('__call__')) is None:
+            raise pickling_error(space,
+                                 "func from reduce should be callable")
+        if self.proto >= 2 and self._is_newobj(w_func):
+            args_w = space.fixedview(w_args)
+            if len(args_w) == 0:
+                raise oefmt(space.w_IndexError, "tuple index out of range")
+            w_cls = args_w[0]
+            if space.findattr(w_cls, space.newtext('__new__')) is None:
+                raise pickling_error(
+                    space, "args[0] from __newobj__ args has no __new__")
+            if w_obj is not None and not space.is_w(
+                    w_cls, space.getattr(w_obj, space.newtext('__class__'))):
+                raise pickling_error(
+                    space, "args[0] from __newobj__ args has the wrong class")
+            self.save(w_cls)
+            self.save(space.newtuple(args_w[1:]))
+            self.write_char(opcodes.NEWOBJ)
+        else:
+            self.save(w_func)
+            self.save(w_args)
+            self.write_char(opcodes.REDUCE)
+        if w_obj is not None:
+            index = self.memo_index(w_obj)
+            if index >= 0:
+                # the object is recursive: throw away everything that was
+                # put on the stack, and fetch it back from the memo
+                self.write_char(opcodes.POP)
+                self.get(index)
+            else:
+                self.memoize(w_obj)
+        if w_listitems is not None and not space.is_w(w_listitems,
+                                                      space.w_None):
+            self.batch_appends(w_listitems)
+        if w_dictitems is not None and not space.is_w(w_dictitems,
+                                                      space.w_None):
+            self.batch_setitems(w_dictitems)
+        if w_state is not None and not space.is_w(w_state, space.w_None):
+            self.save(w_state)
+            self.write_char(opcodes.BUILD)
+
+    def _is_newobj(self, w_func):
+        space = self.space
+        w_name = space.findattr(w_func, space.newtext('__name__'))
+        if w_name is None:
+            return False
+        return space.eq_w(w_name, space.newtext('__newobj__'))
+
+    # ____________________________________________________________
+    # app-level interface
+
+    @jit.dont_look_inside
+    def descr_dump(self, space, w_obj):
+        """dump(object) -- Write an object in pickle format to the
+pickler's file"""
+        self.dump(w_obj)
+        return self
+
+    def descr_clear_memo(self, space):
+        """clear_memo() -- Clear the picklers memo"""
+        self.memo.clear()
+        self.memo_count = 0
+        self.keep_alive_w = None
+
+    def descr_getvalue(self, space):
+        """getvalue() -- Finish picking a list-based pickle"""
+        if self.w_file is not None:
+            return space.w_None
+        data = self.builder.build()
+        self.builder = StringBuilder()
+        self.builder.append(data)
+        return space.newbytes(data)
+
+    def descr_get_memo(self, space):
+        w_memo = space.newdict()
+        for w_key, index in self.memo.iteritems():
+            space.setitem(w_memo, space.id(w_key),
+                          space.newtuple([space.newint(index), w_key]))
+        return w_memo
+
+    def descr_set_memo(self, space, w_memo):
+        if not space.isinstance_w(w_memo, space.w_dict):
+            raise oefmt(space.w_TypeError, "memo must be a dictionary")
+        memo = r_dict(space.is_w, _memo_hash)
+        count = 0
+        for w_value in space.unpackiterable(
+                space.call_method(w_memo, 'itervalues')):
+            w_index, w_obj = space.fixedview(w_value, 2)
+            index = space.int_w(w_index)
+            memo[w_obj] = index
+            count = max(count, index)
+        self.memo = memo
+        self.memo_count = count
+        self.keep_alive_w = None
+
+    def descr_get_fast(self, space):
+        return space.newint(self.fast)
+
+    def descr_set_fast(self, space, w_value):
+        self.fast = space.int_w(w_value)
+
+    def descr_get_binary(self, space):
+        return space.newbool(self.bin)
+
+    def descr_get_persistent_id(self, space):
+        if self.w_persistent_id is None:
+            return space.w_None
+        return self.w_persistent_id
+
+    def descr_set_persistent_id(self, space, w_value):
+        self.w_persistent_id = w_value
+
+
+@unwrap_spec(w_protocol=gateway.WrappedDefault(None))
+def W_Pickler___new__(space, w_subtype, w_file, w_protocol=None):
+    if space.is_none(w_protocol) and space.isinstance_w(w_file, space.w_int):
+        # Pickler(protocol): keep the pickles in memory
+        w_protocol = w_file
+        w_file = None
+    if space.is_none(w_protocol):
+        proto = 0
+    else:
+        proto = space.int_w(w_protocol)
+    if proto < 0:
+        proto = HIGHEST_PROTOCOL
+    elif proto > HIGHEST_PROTOCOL:
+        raise oefmt(space.w_ValueError, "pickle protocol must be <= %d",
+                    HIGHEST_PROTOCOL)
+    w_pickler = space.allocate_instance(W_Pickler, w_subtype)
+    W_Pickler.__init__(w_pickler, space, w_file, proto)
+    return w_pickler
+
+
+W_Pickler.typedef = TypeDef(
+    'cPickle.Pickler',
+    __new__ = interp2app(W_Pickler___new__),
+    dump = interp2app(W_Pickler.descr_dump),
+    clear_memo = interp2app(W_Pickler.descr_clear_memo),
+    getvalue = interp2app(W_Pickler.descr_getvalue),
+    memo = GetSetProperty(W_Pickler.descr_get_memo, W_Pickler.descr_set_memo,
+                          doc="A copy of the memo, as {id(obj): (index, obj)}."
+                              "  Assigning a dict like that replaces the memo."),
+    fast = GetSetProperty(W_Pickler.descr_get_fast, W_Pickler.descr_set_fast),
+    binary = GetSetProperty(W_Pickler.descr_get_binary),
+    persistent_id = GetSetProperty(W_Pickler.descr_get_persistent_id,
+                                   W_Pickler.descr_set_persistent_id),
+    __doc__ = W_Pickler.__doc__,
+)
+
+
+@jit.dont_look_inside
+def dump(space, w_obj, w_file, w_protocol=None):
+    """dump(obj, file, protocol=0) -- Write an object in pickle format to
+the given file.
+
+See the Pickler docstring for the meaning of optional argument proto."""
+    proto = check_protocol(space, w_protocol)
+    W_Pickler(space, w_file, proto).dump(w_obj)
+
+@jit.dont_look_inside
+def dumps(space, w_obj, w_protocol=None):
+    """dumps(obj, protocol=0) -- Return a string containing an object in
+pickle format.
+
+See the Pickler docstring for the meaning of optional argument proto."""
+    proto = check_protocol(space, w_protocol)
+    pickler = W_Pickler(space, None, proto)
+    pickler.dump(w_obj)
+    return space.newbytes(pickler.builder.build())
+
+
+app = gateway.applevel('''
+    def get_dispatch_table():
+        from copy_reg import dispatch_table
+        return dispatch_table
+
+    def global_info(obj, name, proto):
+        "The app-level part of save_global(): returns (module, name, code)."
+        import sys
+        from pickle import whichmodule, PicklingError
+        from copy_reg import _extension_registry
+        if name is None:
+            name = obj.__name__
+        module = getattr(obj, "__module__", None)
+        if module is None:
+            module = whichmodule(obj, name)
+        try:
+            __import__(module)
+            mod = sys.modules[module]
+            klass = getattr(mod, name)
+        except (ImportError, KeyError, AttributeError):
+            raise PicklingError(
+                "Can't pickle %r: it's not found as %s.%s" %
+                (obj, module, name))
+        else:
+            if klass is not obj:
+                raise PicklingError(
+                    "Can't pickle %r: it's not the same object as %s.%s" %
+                    (obj, module, name))
+        code = 0
+        if proto >= 2:
+            code = _extension_registry.get((module, name), 0)
+        return module, name, code
+
+    def moduledict_reduce(obj, name):
+        "Save a module dictionary as getattr(module, '__dict__')."
+        import sys
+        from types import ModuleType
+        themodule = sys.modules.get(name)
+        if type(themodule) is not ModuleType or themodule.__dict__ is not obj:
+            return None
+        return getattr, (themodule, '__dict__')
+''', filename=__file__)
+
+get_dispatch_table = app.interphook('get_dispatch_table')
+global_info = app.interphook('global_info')
+moduledict_reduce = app.interphook('moduledict_reduce')
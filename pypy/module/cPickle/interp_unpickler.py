@@ -0,0 +1,594 @@
+from rpython.rlib import jit
+from rpython.rlib.rarithmetic import string_to_int
+from rpython.rlib.rbigint import rbigint
+from rpython.rlib.rfloat import string_to_float
+from rpython.rlib.rstring import ParseStringError, ParseStringOverflowError
+from rpython.rlib.rstruct.ieee import unpack_float
+
+from pypy.interpreter import gateway, unicodehelper
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module.cPickle import opcodes
+
+
+def unpickling_error(space, msg):
+    w_module = space.getbuiltinmodule('cPickle')
+    w_error = space.getattr(w_module, space.newtext('UnpicklingError'))
+    return OperationError(w_error, space.newtext(msg))
+
+
+class W_Unpickler(W_Root):
+    """Unpickler(file) -- Create an unpickler.
+
+This takes a file-like object for reading a pickle data stream.
+The file-like object must have two methods, a read() method that
+takes an integer argument, and a readline() method that requires no
+arguments.  Both methods should return a string."""
+
+    def __init__(self, space, w_file):
+        from pypy.module.cStringIO.interp_stringio import W_InputType
+        self.space = space
+        if isinstance(w_file, W_InputType):
+            # read directly from the string of cStringIO.StringIO objects
+            self.input = w_file
+            self.w_read = None
+            self.w_readline = None
+        else:
+            self.input = None
+            self.w_readline = space.getattr(w_file, space.newtext('readline'))
+            self.w_read = space.getattr(w_file, space.newtext('read'))
+        self.stack_w = []
+        # the positions in stack_w of the marks
+        self.marks = []
+        self.memo = {}
+        self.w_find_global = find_global_function(space)
+        self.w_persistent_load = None
+
+    # ____________________________________________________________
+    # input
+
+    def read(self, n):
+        if self.input is not None:
+            data = self.input.read(n)
+        else:
+            space = self.space
+            w_data = space.call_function(self.w_read, space.newint(n))
+            data = space.bytes_w(w_data)
+        if len(data) < n:
+            raise OperationError(self.space.w_EOFError, self.space.w_None)
+        return data
+
+    def read_char(self):
+        input = self.input
+        if input is not None:
+            pos = input.pos
+            if pos >= len(input.string):
+                raise OperationError(self.space.w_EOFError, self.space.w_None)
+            input.pos = pos + 1
+            return input.string[pos]
+        return self.read(1)[0]
+
+    def read_int32(self):
+        data = self.read(4)
+        high = ord(data[3])
+        if high >= 0x80:
+            high -= 0x100
+        return (ord(data[0]) | (ord(data[1]) << 8) | (ord(data[2]) << 16) |
+                (high << 24))
+
+    def readline(self):
+        if self.input is not None:
+            return self.input.readline()
+        space = self.space
+        return space.bytes_w(space.call_function(self.w_readline))
+
+    def readline_arg(self):
+        """ The argument of a text opcode, without the final newline. """
+        line = self.readline()
+        if len(line) == 0:
+            return line
+        end = len(line) - 1
+        assert end >= 0
+        return line[:end]
+
+    # ____________________________________________________________
+    # the stack
+
+    def push(self, w_obj):
+        self.stack_w.append(w_obj)
+
+    def pop(self):
+        if len(self.stack_w) == 0 or (len(self.marks) > 0 and
+                                      self.marks[-1] == len(self.stack_w)):
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        return self.stack_w.pop()
+
+    def top(self):
+        if len(self.stack_w) == 0:
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        return self.stack_w[-1]
+
+    def set_top(self, w_obj):
+        self.stack_w[-1] = w_obj
+
+    def pop_mark(self):
+        """ Remove the topmost mark, returns the position of the items that
+        were pushed after it. """
+        if len(self.marks) == 0:
+            raise unpickling_error(self.space, "could not find MARK")
+        return self.marks.pop()
+
+    def pop_items(self, start):
+        """ Remove and return all the items from the position start. """
+        assert start >= 0
+        items_w = self.stack_w[start:]
+        del self.stack_w[start:]
+        return items_w
+
+    # ____________________________________________________________
+    # loading
+
+    def load(self):
+        if self.input is not None:
+            self.input.check_closed()
+        self.stack_w = []
+        self.marks = []
+        while True:
+            key = self.read_char()
+            if key == opcodes.STOP:
+                break
+            self.dispatch(key)
+        return self.pop()
+
+    def dispatch(self, key):
+        space = self.space
+        if key == opcodes.MARK:
+            self.marks.append(len(self.stack_w))
+        elif key == opcodes.BININT1:
+            self.push(space.newint(ord(self.read_char())))
+        elif key == opcodes.BININT2:
+            data = self.read(2)
+            self.push(space.newint(ord(data[0]) | (ord(data[1]) << 8)))
+        elif key == opcodes.BININT:
+            self.push(space.newint(self.read_int32()))
+        elif key == opcodes.BINPUT:
+            self.memo[ord(self.read_char())] = self.top()
+        elif key == opcodes.LONG_BINPUT:
+            self.memo[self.read_int32()] = self.top()
+        elif key == opcodes.BINGET:
+            self.push(self.memo_get(ord(self.read_char())))
+        elif key == opcodes.LONG_BINGET:
+            self.push(self.memo_get(self.read_int32()))
+        elif key == opcodes.SHORT_BINSTRING:
+            n = ord(self.read_char())
+            self.push(space.newbytes(self.read(n)))
+        elif key == opcodes.BINSTRING:
+            n = self.read_int32()
+            if n < 0:
+                raise unpickling_error(
+                    space, "BINSTRING pickle has negative byte count")
+            self.push(space.newbytes(self.read(n)))
+        elif key == opcodes.BINUNICODE:
+            n = self.read_int32()
+            if n < 0:
+                raise unpickling_error(
+                    space, "BINUNICODE pickle has negative byte count")
+            data = self.read(n)
+            length = unicodehelper.check_utf8_or_raise(space, data)
+            self.push(space.newutf8(data, length))
+        elif key == opcodes.BINFLOAT:
+            self.push(space.newfloat(unpack_float(self.read(8), True)))
+        elif key == opcodes.NONE:
+            self.push(space.w_None)
+        elif key == opcodes.NEWTRUE:
+            self.push(space.w_True)
+        elif key == opcodes.NEWFALSE:
+            self.push(space.w_False)
+        elif key == opcodes.EMPTY_TUPLE:
+            self.push(space.newtuple([]))
+        elif key == opcodes.TUPLE1:
+            self.load_small_tuple(1)
+        elif key == opcodes.TUPLE2:
+            self.load_small_tuple(2)
+        elif key == opcodes.TUPLE3:
+            self.load_small_tuple(3)
+        elif key == opcodes.TUPLE:
+            self.push(space.newtuple(self.pop_items(self.pop_mark())))
+        elif key == opcodes.EMPTY_LIST:
+            self.push(space.newlist([]))
+        elif key == opcodes.LIST:
+            self.push(space.newlist(self.pop_items(self.pop_mark())))
+        elif key == opcodes.EMPTY_DICT:
+            self.push(space.newdict())
+        elif key == opcodes.DICT:
+            items_w = self.pop_items(self.pop_mark())
+            w_dict = space.newdict()
+            for i in range(0, len(items_w) - 1, 2):
+                space.setitem(w_dict, items_w[i], items_w[i + 1])
+            self.push(w_dict)
+        elif key == opcodes.APPEND:
+            w_value = self.pop()
+            self.append_items(self.top(), [w_value])
+        elif key == opcodes.APPENDS:
+            start = self.pop_mark()
+            items_w = self.pop_items(start)
+            self.append_items(self.top(), items_w)
+        elif key == opcodes.SETITEM:
+            w_value = self.pop()
+            w_key = self.pop()
+            space.setitem(self.top(), w_key, w_value)
+        elif key == opcodes.SETITEMS:
+            start = self.pop_mark()
+            items_w = self.pop_items(start)
+            w_dict = self.top()
+            for i in range(0, len(items_w) - 1, 2):
+                space.setitem(w_dict, items_w[i], items_w[i + 1])
+        elif key == opcodes.LONG1:
+            n = ord(self.read_char())
+            self.push(self.decode_long(self.read(n)))
+        elif key == opcodes.LONG4:
+            n = self.read_int32()
+            if n < 0:
+                raise unpickling_error(
+                    space, "LONG pickle has negative byte count")
+            self.push(self.decode_long(self.read(n)))
+        elif key == opcodes.GLOBAL:
+            w_module = space.newtext(self.readline_arg())
+            w_name = space.newtext(self.readline_arg())
+            self.push(self.find_class(w_module, w_name))
+        elif key == opcodes.REDUCE:
+            w_args = self.pop()
+            w_func = self.top()
+            self.set_top(space.call(w_func, w_args))
+        elif key == opcodes.NEWOBJ:
+            w_args = self.pop()
+            w_cls = self.top()
+            w_new = space.getattr(w_cls, space.newtext('__new__'))
+            args_w = [w_cls] + space.fixedview(w_args)
+            self.set_top(space.call(w_new, space.newtuple(args_w)))
+        elif key == opcodes.BUILD:
+            w_state = self.pop()
+            self.build(self.top(), w_state)
+        elif key == opcodes.OBJ:
+            start = self.pop_mark()
+            items_w = self.pop_items(start)
+            if len(items_w) == 0:
+                raise unpickling_error(space, "unpickling stack underflow")
+            w_cls = items_w[0]
+            self.push(instantiate(space, w_cls, space.newtuple(items_w[1:])))
+        elif key == opcodes.INST:
+            w_module = space.newtext(self.readline_arg())
+            w_name = space.newtext(self.readline_arg())
+            w_cls = self.find_class(w_module, w_name)
+            w_args = space.newtuple(self.pop_items(self.pop_mark()))
+            self.push(instantiate(space, w_cls, w_args))
+        elif key == opcodes.POP:
+            if len(self.marks) > 0 and self.marks[-1] == len(self.stack_w):
+                self.marks.pop()
+            else:
+                self.pop()
+        elif key == opcodes.POP_MARK:
+            self.pop_items(self.pop_mark())
+        elif key == opcodes.DUP:
+            self.push(self.top())
+        elif key == opcodes.PROTO:
+            proto = ord(self.read_char())
+            if not 0 <= proto <= 2:
+                raise oefmt(space.w_ValueError,
+                            "unsupported pickle protocol: %d", proto)
+        elif key == opcodes.INT:
+            self.push(self.load_int(self.readline()))
+        elif key == opcodes.LONG:
+            self.push(space.call_function(space.w_long,
+                                          space.newtext(self.readline_arg()),
+                                          space.newint(0)))
+        elif key == opcodes.FLOAT:
+            self.push(self.load_float(self.readline_arg()))
+        elif key == opcodes.STRING:
+            self.push(self.load_string(self.readline()))
+        elif key == opcodes.UNICODE:
+            utf8, length = unicodehelper.decode_raw_unicode_escape(
+                space, self.readline_arg())
+            self.push(space.newutf8(utf8, length))
+        elif key == opcodes.PUT:
+            self.memo[self.memo_key(self.readline_arg())] = self.top()
+        elif key == opcodes.GET:
+            line = self.readline_arg()
+            try:
+                index = string_to_int(line)
+            except (ParseStringError, ParseStringOverflowError):
+                raise OperationError(space.w_KeyError, space.newtext(line))
+            self.push(self.memo_get(index))
+        elif key == opcodes.PERSID:
+            w_pid = space.newtext(self.readline_arg())
+            self.push(self.persistent_load(w_pid))
+        elif key == opcodes.BINPERSID:
+            w_pid = self.pop()
+            self.push(self.persistent_load(w_pid))
+        elif key == opcodes.EXT1:
+            self.push(self.get_extension(ord(self.read_char())))
+        elif key == opcodes.EXT2:
+            data = self.read(2)
+            self.push(self.get_extension(ord(data[0]) | (ord(data[1]) << 8)))
+        elif key == opcodes.EXT4:
+            self.push(self.get_extension(self.read_int32()))
+        else:
+            raise unpickling_error(space, "invalid load key, %s." %
+                                   space.text_w(space.repr(
+                                       space.newbytes(key))))
+
+    def memo_get(self, index):
+        try:
+            return self.memo[index]
+        except KeyError:
+            space = self.space
+            raise OperationError(space.w_KeyError, space.newtext(str(index)))
+
+    def memo_key(self, arg):
+        space = self.space
+        try:
+            return string_to_int(arg)
+        except (ParseStringError, ParseStringOverflowError):
+            return space.int_w(space.call_function(space.w_int,
+                                                   space.newtext(arg)))
+
+    def load_small_tuple(self, n):
+        if len(self.stack_w) < n:
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        start = len(self.stack_w) - n
+        self.push(self.space.newtuple(self.pop_items(start)))
+
+    def load_int(self, line):
+        space = self.space
+        if line == opcodes.TRUE[1:]:
+            return space.w_True
+        if line == opcodes.FALSE[1:]:
+            return space.w_False
+        stripped = line
+        if stripped.endswith('\n'):
+            stripped = line[:-1]
+        try:
+            return space.newint(string_to_int(stripped))
+        except (ParseStringError, ParseStringOverflowError):
+            # int() also handles the overflow to long and the errors
+            return space.call_function(space.w_int, space.newtext(line))
+
+    def load_float(self, arg):
+        space = self.space
+        try:
+            return space.newfloat(string_to_float(arg))
+        except ParseStringError:
+            return space.call_function(space.w_float, space.newtext(arg))
+
+    def load_string(self, rep):
+        from pypy.interpreter.pyparser.parsestring import (
+            PyString_DecodeEscape)
+        space = self.space
+        if len(rep) < 3:
+            raise oefmt(space.w_ValueError, "insecure string pickle")
+        quote = rep[0]
+        if (quote != "'" and quote != '"') or rep[len(rep) - 2] != quote:
+            raise oefmt(space.w_ValueError, "insecure string pickle")
+        end = len(rep) - 2
+        assert end >= 1
+        rep = rep[1:end]
+        if '\\' in rep:
+            rep = PyString_DecodeEscape(space, rep, 'strict', None)
+        return space.newbytes(rep)
+
+    def decode_long(self, data):
+        return self.space.newlong_from_rbigint(
+            rbigint.frombytes(data, 'little', True))
+
+    def append_items(self, w_list, items_w):
+        from pypy.objspace.std.listobject import W_ListObject
+        space = self.space
+        if type(w_list) is W_ListObject:
+            for w_item in items_w:
+                w_list.append(w_item)
+        elif len(items_w) == 1:
+            space.call_method(w_list, 'append', items_w[0])
+        else:
+            space.call_method(w_list, 'extend', space.newlist(items_w))
+
+    def build(self, w_inst, w_state):
+        from pypy.objspace.std.dictmultiobject import W_DictMultiObject
+        space = self.space
+        w_setstate = space.findattr(w_inst, space.newtext('__setstate__'))
+        if w_setstate is not None:
+            space.call_function(w_setstate, w_state)
+            return
+        if not space.is_w(space.type(w_state), space.w_dict):
+            build_slowpath(space, w_inst, w_state)
+            return
+        assert isinstance(w_state, W_DictMultiObject)
+        if w_state.length() == 0:
+            return
+        w_dict = space.getattr(w_inst, space.newtext('__dict__'))
+        w_iter = w_state.iteritems()
+        while True:
+            w_key, w_value = w_iter.next_item()
+            if w_key is None:
+                break
+            if not space.is_w(space.type(w_key), space.w_bytes):
+                # keys in state don't have to be strings
+                space.call_method(w_dict, 'update', w_state)
+                break
+            space.setitem(w_dict, space.new_interned_w_str(w_key), w_value)
+
+    def find_class(self, w_module, w_name):
+        space = self.space
+        w_find_global = space.getattr(self, space.newtext('find_global'))
+        if space.is_w(w_find_global, space.w_None):
+            raise unpickling_error(
+                space, "Global and instance pickles are not supported.")
+        return space.call_function(w_find_global, w_module, w_name)
+
+    def persistent_load(self, w_pid):
+        space = self.space
+        w_persistent_load = space.getattr(self,
+                                          space.newtext('persistent_load'))
+        if space.is_w(w_persistent_load, space.w_None):
+            raise unpickling_error(
+                space, "A load persistent id instruction was encountered,\n"
+                       "but no persistent_load function was specified.")
+        return space.call_function(w_persistent_load, w_pid)
+
+    def get_extension(self, code):
+        space = self.space
+        w_find_class = space.getattr(self, space.newtext('find_class'))
+        return get_extension(space, w_find_class, space.newint(code))
+
+    # ____________________________________________________________
+    # app-level interface
+
+    @jit.dont_look_inside
+    def descr_load(self, space):
+        """load() -- Load a pickle"""
+        return self.load()
+
+    def descr_find_class(self, space, w_module, w_name):
+        return self.find_class(w_module, w_name)
+
+    def descr_get_memo(self, space):
+        w_memo = space.newdict()
+        for index, w_obj in self.memo.iteritems():
+            space.setitem(w_memo, space.newtext(str(index)), w_obj)
+        return w_memo
+
+    def descr_set_memo(self, space, w_memo):
+        if not space.isinstance_w(w_memo, space.w_dict):
+            raise oefmt(space.w_TypeError, "memo must be a dictionary")
+        memo = {}
+        for w_item in space.unpackiterable(
+                space.call_method(w_memo, 'iteritems')):
+            w_key, w_obj = space.fixedview(w_item, 2)
+            if space.isinstance_w(w_key, space.w_int):
+                index = space.int_w(w_key)
+            else:
+                index = self.memo_key(space.text_w(w_key))
+            memo[index] = w_obj
+        self.memo = memo
+
+    def descr_get_find_global(self, space):
+        return self.w_find_global
+
+    def descr_set_find_global(self, space, w_value):
+        self.w_find_global = w_value
+
+    def descr_get_persistent_load(self, space):
+        if self.w_persistent_load is None:
+            return space.w_None
+        return self.w_persistent_load
+
+    def descr_set_persistent_load(self, space, w_value):
+        self.w_persistent_load = w_value
+
+
+def W_Unpickler___new__(space, w_subtype, w_file):
+    w_unpickler = space.allocate_instance(W_Unpickler, w_subtype)
+    W_Unpickler.__init__(w_unpickler, space, w_file)
+    return w_unpickler
+
+
+W_Unpickler.typedef = TypeDef(
+    'cPickle.Unpickler',
+    __new__ = interp2app(W_Unpickler___new__),
+    load = interp2app(W_Unpickler.descr_load),
+    find_class = interp2app(W_Unpickler.descr_find_class),
+    memo = GetSetProperty(W_Unpickler.descr_get_memo,
+                          W_Unpickler.descr_set_memo,
+                          doc="A copy of the memo, as {str(index): obj}."
+                              "  Assigning a dict like that replaces the memo."),
+    find_global = GetSetProperty(W_Unpickler.descr_get_find_global,
+                                 W_Unpickler.descr_set_find_global),
+    persistent_load = GetSetProperty(W_Unpickler.descr_get_persistent_load,
+                                     W_Unpickler.descr_set_persistent_load),
+    __doc__ = W_Unpickler.__doc__,
+)
+
+
+@jit.dont_look_inside
+def load(space, w_file):
+    """load(file) -- Load a pickle from the given file"""
+    return W_Unpickler(space, w_file).load()
+
+@jit.dont_look_inside
+def loads(space, w_data):
+    """loads(string) -- Load a pickle from the given string"""
+    from pypy.module.cStringIO.interp_stringio import W_InputType
+    data = space.bufferstr_w(w_data)
+    return W_Unpickler(space, W_InputType(space, data)).load()
+
+
+app = gateway.applevel('''
+    class _EmptyClass:
+        pass
+
+    def find_global(module, name):
+        import sys
+        __import__(module)
+        mod = sys.modules[module]
+        return getattr(mod, name)
+
+    def instantiate(klass, args):
+        "The INST and OBJ opcodes."
+        import sys
+        from types import ClassType
+        if (not args and type(klass) is ClassType and
+                not hasattr(klass, "__getinitargs__")):
+            try:
+                value = _EmptyClass()
+                value.__class__ = klass
+                return value
+            except RuntimeError:
+                # In restricted execution, assignment to inst.__class__ is
+                # prohibited
+                pass
+        try:
+            return klass(*args)
+        except TypeError, err:
+            raise TypeError, "in constructor for %s: %s" % (
+                klass.__name__, str(err)), sys.exc_info()[2]
+
+    def build_slowpath(inst, state):
+        "The BUILD opcode, if the state is not a plain dict."
+        slotstate = None
+        if isinstance(state, tuple) and len(state) == 2:
+            state, slotstate = state
+        if state:
+            d = inst.__dict__
+            try:
+                for k, v in state.iteritems():
+                    d[intern(k)] = v
+            # keys in state don't have to be strings
+            # don't blow up, but don't go out of our way
+            except TypeError:
+                d.update(state)
+        if slotstate:
+            for k, v in slotstate.items():
+                setattr(inst, k, v)
+
+    def get_extension(find_class, code):
+        "The EXT1, EXT2 and EXT4 opcodes."
+        from copy_reg import _inverted_registry, _extension_cache
+        nil = []
+        obj = _extension_cache.get(code, nil)
+        if obj is not nil:
+            return obj
+        key = _inverted_registry.get(code)
+        if not key:
+            raise ValueError("unregistered extension code %d" % code)
+        obj = find_class(*key)
+        _extension_cache[code] = obj
+        return obj
+''', filename=__file__)
+
+instantiate = app.interphook('instantiate')
+build_slowpath = app.interphook('build_slowpath')
+get_extension = app.interphook('get_extension')
+
+def find_global_function(space):
+    return app.wget(space, 'find_global')
@@ -0,0 +1,27 @@
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """C implementation and optimization of the Python pickle module."""
+
+    appleveldefs = {
+        'PickleError':       'app_cpickle.PickleError',
+        'PicklingError':     'app_cpickle.PicklingError',
+        'UnpicklingError':   'app_cpickle.UnpicklingError',
+        'BadPickleGet':      'app_cpickle.BadPickleGet',
+        'UnpickleableError': 'app_cpickle.UnpickleableError',
+        'compatible_formats': 'app_cpickle.compatible_formats',
+    }
+
+    interpleveldefs = {
+        '__version__':      'space.wrap("1.71")',
+        'format_version':   'space.wrap("2.0")',
+        'HIGHEST_PROTOCOL': 'space.wrap(interp_pickler.HIGHEST_PROTOCOL)',
+
+        'Pickler':   'interp_pickler.W_Pickler',
+        'dump':      'interp_pickler.dump',
+        'dumps':     'interp_pickler.dumps',
+        'Unpickler': 'interp_unpickler.W_Unpickler',
+        'load':      'interp_unpickler.load',
+        'loads':     'interp_unpickler.loads',
+    }
@@ -0,0 +1,344 @@
+class AppTestCPickle(object):
+    spaceconfig = dict(usemodules=['cPickle', 'cStringIO', 'struct',
+                                   'binascii'])
+
+    def setup_class(cls):
+        cls.w_reference_dumps = cls.space.appexec([], """():
+            import pickle, StringIO
+            class RefPickler(pickle.Pickler):
+                # what lib_pypy/cPickle.py does
+                def memoize(self, obj):
+                    self.memo[id(None)] = None
+                    return pickle.Pickler.memoize(self, obj)
+            def reference_dumps(obj, protocol=0):
+                f = StringIO.StringIO()
+                RefPickler(f, protocol).dump(obj)
+                return f.getvalue()
+            return reference_dumps
+        """)
+
+    def test_simple_values(self):
+        import cPickle
+        values = [None, True, False, 0, 1, -1, 255, 256, 65535, 65536,
+                  2**31 - 1, -2**31, 2**31, -2**31 - 1, 2**62, 0L, 1L, -1L,
+                  255L, -128L, -129L, 2**100, -2**100, 0.0, -1.5, 1e300,
+                  float('inf'), '', 'a', 'abc' * 100, u'', u'abc',
+                  u'\u1234\n\\', (), (1,), (1, 2), (1, 2, 3), (1, 2, 3, 4),
+                  [], [1, 2], {}, {'a': 1}]
+        for proto in range(3):
+            for value in values:
+                data = cPickle.dumps(value, proto)
+                assert cPickle.loads(data) == value
+                assert type(cPickle.loads(data)) is type(value)
+
+    def test_byte_compatible(self):
+        import cPickle, os, UserDict
+        shared = ['shared']
+        recursive = [1, 2]
+        recursive.append(recursive)
+        values = [
+            [shared, shared, (shared,)],
+            recursive,
+            range(1100),
+            [x * 0.5 for x in range(1100)],
+            ['x%d' % i for i in range(1010)],
+            dict.fromkeys(range(1050)),
+            {'a': [1, 2.5, u'\xe9', 'b'], 'b': (None, True, False)},
+            [2**70, -2**70, 2**31, -2**31 - 1, 123456789012],
+            [u'\ud800\udc00', u'a\\b\nc', u'\U00012345'],
+            [complex(1, 2), set([1, 2]), frozenset()],
+            [len, object, ValueError, os.path.join, UserDict.UserDict],
+        ]
+        for proto in range(3):
+            for value in values:
+                expected = self.reference_dumps(value, proto)
+                got = cPickle.dumps(value, proto)
+                assert got == expected, (value, proto, got, expected)
+
+    def test_instances(self):
+        import cPickle
+        ns = {}
+        exec """if 1:
+            class New(object):
+                def __init__(self, x):
+                    self.x = x
+            class Old:
+                def __init__(self, x):
+                    self.x = x
+            class WithInitArgs:
+                def __init__(self, a, b):
+                    self.a = a
+                    self.b = b
+                def __getinitargs__(self):
+                    return (self.a, self.b)
+            class WithState(object):
+                def __getstate__(self):
+                    return {'state': 42}
+                def __setstate__(self, state):
+                    self.restored = state
+            class WithSlots(object):
+                __slots__ = ['a', 'b']
+            class Reduced(object):
+                def __reduce__(self):
+                    return (Reduced, (), None, iter([1, 2]),
+                            iter([('k', 'v')]))
+                def append(self, x):
+                    self.__dict__.setdefault('items', []).append(x)
+                def extend(self, items):
+                    for x in items:
+                        self.append(x)
+                def __setitem__(self, k, v):
+                    self.__dict__[k] = v
+            class MyList(list):
+                pass
+            class MyDict(dict):
+                pass
+        """ in ns
+        import sys, types
+        mod = types.ModuleType('cpickle_test_module')
+        sys.modules['cpickle_test_module'] = mod
+        for name, value in ns.items():
+            if isinstance(value, (type, types.ClassType)):
+                value.__module__ = 'cpickle_test_module'
+                setattr(mod, name, value)
+        try:
+            slots = mod.WithSlots()
+            slots.a = 5
+            mylist = mod.MyList([1, 2, 3])
+            mylist.attr = 'x'
+            mydict = mod.MyDict(a=1)
+            values = [mod.New(5), mod.Old([1]), mod.WithInitArgs(1, 'b'),
+                      mod.WithState(), mod.Reduced(), mylist, mydict]
+            for proto in range(3):
+                if proto >= 2:
+                    values.append(slots)
+                data = cPickle.dumps(values, proto)
+                expected = self.reference_dumps(values, proto)
+                assert data == expected, (proto, data, expected)
+                res = cPickle.loads(data)
+                assert res[0].x == 5
+                assert res[1].__class__ is mod.Old and res[1].x == [1]
+                assert (res[2].a, res[2].b) == (1, 'b')
+                assert res[3].restored == {'state': 42}
+                assert res[4].items == [1, 2] and res[4].k == 'v'
+                assert res[5] == [1, 2, 3] and res[5].attr == 'x'
+                assert res[6] == {'a': 1}
+                if proto >= 2:
+                    assert res[7].a == 5
+                else:
+                    raises(TypeError, cPickle.dumps, slots, proto)
+        finally:
+            del sys.modules['cpickle_test_module']
+
+    def test_shared_and_recursive(self):
+        import cPickle
+        a = [1]
+        d = {}
+        d['self'] = d
+        for proto in range(3):
+            b, c = cPickle.loads(cPickle.dumps([a, a], proto))
+            assert b is c
+            d2 = cPickle.loads(cPickle.dumps(d, proto))
+            assert d2['self'] is d2
+
+    def test_memo_starts_at_one(self):
+        import cPickle
+        assert cPickle.dumps([], 1) == ']q\x01.'
+        assert cPickle.dumps([], 0) == '(lp1\n.'
+
+    def test_pickler_object(self):
+        import cPickle, cStringIO
+        f = cStringIO.StringIO()
+        p = cPickle.Pickler(f, 2)
+        l = [1, 2]
+        p.dump(l)
+        p.dump(l)
+        assert len(p.memo) == 1
+        f.seek(0)
+        u = cPickle.Unpickler(f)
+        assert u.load() == [1, 2]
+        assert u.load() == [1, 2]
+        raises(EOFError, u.load)
+        #
+        p = cPickle.Pickler(1)
+        p.dump(5)
+        p.dump('abc')
+        value = p.getvalue()
+        assert value == cPickle.dumps(5, 1) + 'U\x03abcq\x01.'
+        p.clear_memo()
+        assert len(p.memo) == 0
+        assert cPickle.Pickler(f).getvalue() is None
+
+    def test_set_memo(self):
+        import cPickle
+        l = [1, 2]
+        p = cPickle.Pickler(1)
+        p.dump(l)
+        memo = p.memo
+        assert memo == {id(l): (1, l)}
+        memo.clear()
+        assert len(p.memo) == 1     # the getter returns a copy
+        # share the memo with another pickler: 'l' is only a reference
+        p2 = cPickle.Pickler(1)
+        p2.memo = p.memo
+        other = []
+        p2.dump([l, other])
+        value = p2.getvalue()
+        assert value == ']q\x02(h\x01]q\x03e.'
+        assert p2.memo[id(other)] == (3, other)
+        p2.memo = {}
+        assert p2.memo == {}
+        raises(TypeError, setattr, p2, 'memo', [])
+        #
+        import cStringIO
+        u = cPickle.Unpickler(cStringIO.StringIO(''))
+        u.memo = {'1': l, 5: 'x'}
+        assert u.memo == {'1': l, '5': 'x'}
+        u = cPickle.Unpickler(cStringIO.StringIO(value))
+        u.memo = {'1': l}
+        res = u.load()
+        assert res == [l, []] and res[0] is l
+        raises(TypeError, setattr, u, 'memo', None)
+
+    def test_cannot_pickle_message(self):
+        import cPickle
+        class X(object):
+            def __getattribute__(self, name):
+                if name in ('__reduce_ex__', '__reduce__'):
+                    raise AttributeError(name)
+                return object.__getattribute__(self, name)
+            def __repr__(self):
+                return 'xx'
+        e = raises(cPickle.PicklingError, cPickle.dumps, X())
+        assert str(e.value) == "Can't pickle X object: xx"
+
+    def test_file_objects(self):
+        import cPickle
+        class Writer(object):
+            def __init__(self):
+                self.chunks = []
+            def write(self, data):
+                self.chunks.append(data)
+        class Reader(object):
+            def __init__(self, data):
+                self.data = data
+                self.pos = 0
+            def read(self, n):
+                res = self.data[self.pos:self.pos + n]
+                self.pos += len(res)
+                return res
+            def readline(self):
+                end = self.data.find('\n', self.pos) + 1
+                if end == 0:
+                    end = len(self.data)
+                res = self.data[self.pos:end]
+                self.pos = end
+                return res
+        value = {'a': [1, 2.5, (u'x', None)], 'b': range(1100)}
+        for proto in range(3):
+            w = Writer()
+            cPickle.dump(value, w, proto)
+            data = ''.join(w.chunks)
+            assert data == cPickle.dumps(value, proto)
+            assert cPickle.load(Reader(data)) == value
+
+    def test_protocol_errors(self):
+        import cPickle
+        exc = raises(ValueError, cPickle.dumps, 1, 3)
+        assert str(exc.value) == ("pickle protocol 3 asked for; the highest "
+                                  "available protocol is 2")
+        raises(ValueError, cPickle.Pickler, None, 3)
+        assert cPickle.dumps(1, -1) == cPickle.dumps(1, 2)
+        raises(ValueError, cPickle.loads, '\x80\x03N.')
+
+    def test_stack_underflow(self):
+        import cPickle
+        raises(cPickle.UnpicklingError, cPickle.loads, "a string")
+
+    def test_bad_key(self):
+        import cPickle
+        exc = raises(cPickle.UnpicklingError, cPickle.loads, "v")
+        assert str(exc.value) == "invalid load key, 'v'."
+
+    def test_eof(self):
+        import cPickle
+        raises(EOFError, cPickle.loads, "")
+        raises(EOFError, cPickle.loads, "(lp1\n")
+        raises(EOFError, cPickle.loads, "U\x05ab")
+
+    def test_find_global(self):
+        import cPickle, cStringIO, time
+        entry = time.strptime('Fri Mar 27 22:20:42 2017')
+        f = cStringIO.StringIO()
+        cPickle.Pickler(f).dump(entry)
+
+        f = cStringIO.StringIO(f.getvalue())
+        e = cPickle.Unpickler(f).load()
+        assert e == entry
+
+        f = cStringIO.StringIO(f.getvalue())
+        up = cPickle.Unpickler(f)
+        up.find_global = None
+        exc = raises(cPickle.UnpicklingError, up.load)
+        assert str(exc.value) == (
+            "Global and instance pickles are not supported.")
+
+        f = cStringIO.StringIO(f.getvalue())
+        up = cPickle.Unpickler(f)
+        up.find_global = lambda module, name: lambda a, b: (name, a, b)
+        e = up.load()
+        assert e == ('struct_time', (2017, 3, 27, 22, 20, 42, 4, 86, -1), {})
+
+    def test_persistent_id(self):
+        import cPickle, cStringIO
+        for proto in range(3):
+            f = cStringIO.StringIO()
+            p = cPickle.Pickler(f, proto)
+            p.persistent_id = lambda obj: 'pid' if obj == 42 else None
+            p.dump([1, 42, 'x'])
+            u = cPickle.Unpickler(cStringIO.StringIO(f.getvalue()))
+            raises(cPickle.UnpicklingError, u.load)
+            u = cPickle.Unpickler(cStringIO.StringIO(f.getvalue()))
+            u.persistent_load = lambda pid: (pid,)
+            assert u.load() == [1, ('pid',), 'x']
+
+    def test_subclass(self):
+        import cPickle, cStringIO
+        class MyPickler(cPickle.Pickler):
+            def persistent_id(self, obj):
+                if obj == 'secret':
+                    return 'S'
+        class MyUnpickler(cPickle.Unpickler):
+            def persistent_load(self, pid):
+                return 'loaded ' + pid
+        f = cStringIO.StringIO()
+        MyPickler(f, 2).dump(['secret', 'public'])
+        u = MyUnpickler(cStringIO.StringIO(f.getvalue()))
+        assert u.load() == ['loaded S', 'public']
+
+    def test_unpickleable(self):
+        import cPickle
+        class BadReduce(object):
+            def __reduce__(self):
+                return 42
+        exc = raises(cPickle.PicklingError, cPickle.dumps, BadReduce())
+        assert 'must return string or tuple' in str(exc.value)
+        class ShortReduce(object):
+            def __reduce__(self):
+                return (BadReduce,)
+        raises(cPickle.PicklingError, cPickle.dumps, ShortReduce())
+        import pickle
+        assert cPickle.PicklingError is pickle.PicklingError
+
+    def test_load_text_opcodes(self):
+        import cPickle
+        assert cPickle.loads("I01\n.") is True
+        assert cPickle.loads("I00\n.") is False
+        assert cPickle.loads("I12345678901234567890\n.") == 12345678901234567890
+        assert cPickle.loads("F1.5\n.") == 1.5
+        assert cPickle.loads("S'a\\nb'\np1\n.") == 'a\nb'
+        assert cPickle.loads('S"x"\n.') == 'x'
+        raises(ValueError, cPickle.loads, "S'x\n.")
+        assert cPickle.loads("Vx\\u1234\n.") == u'x\u1234'
+        assert cPickle.loads("L-5L\n.") == -5L
+        assert cPickle.loads("(I1\nI2\nlp1\ng1\n2.") == [1, 2]
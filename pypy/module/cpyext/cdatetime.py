@@ -10,7 +10,7 @@ from pypy.module.cpyext.import_ import PyImport_Import
 from pypy.module.cpyext.typeobject import PyTypeObjectPtr
 from pypy.interpreter.error import OperationError
 from pypy.module.__pypy__.interp_pypydatetime import (W_DateTime_Date,
-    W_DateTime_Time, W_DateTime_Delta)
+    W_DateTime_DateTime, W_DateTime_Time, W_DateTime_Delta)
 from rpython.tool.sourcetools import func_renamer
 from pypy.module.cpyext.state import State
 
@@ -33,10 +33,6 @@ def _PyDateTime_Import(space):
     w_type = space.getattr(w_datetime, space.newtext("date"))
     datetimeAPI.c_DateType = rffi.cast(
         PyTypeObjectPtr, make_ref(space, w_type))
-    # convenient place to modify this, needed since the make_typedescr attach
-    # links the "wrong" struct to W_DateTime_Date, which in turn is needed
-    # because datetime, with a tzinfo entry, inherits from date, without one
-    datetimeAPI.c_DateType.c_tp_basicsize = rffi.sizeof(PyObject.TO)
 
     w_type = space.getattr(w_datetime, space.newtext("datetime"))
     datetimeAPI.c_DateTimeType = rffi.cast(
@@ -130,6 +126,10 @@ def init_datetime(space):
                   )
 
     make_typedescr(W_DateTime_Date.typedef,
+                   basestruct=PyDateTime_Date.TO,
+                  )
+
+    make_typedescr(W_DateTime_DateTime.typedef,
                    basestruct=PyDateTime_DateTime.TO,
                    attach=type_attach,
                    dealloc=type_dealloc,
@@ -142,57 +142,37 @@ def init_datetime(space):
 
 def type_attach(space, py_obj, w_obj, w_userdata=None):
     '''Fills a newly allocated py_obj from the w_obj
-    If it is a datetime.time or datetime.datetime, it may have tzinfo
+    It is a datetime.time or datetime.datetime, which may have tzinfo
     '''
-    state = space.fromcache(State)
-    if len(state.datetimeAPI) ==0:
-        # can happen in subclassing
-        _PyDateTime_Import(space)
-    if state.datetimeAPI[0].c_TimeType == py_obj.c_ob_type:
-        py_datetime = rffi.cast(PyDateTime_Time, py_obj)
-        w_tzinfo = space.getattr(w_obj, space.newtext('tzinfo'))
-        if space.is_none(w_tzinfo):
-            py_datetime.c_hastzinfo = cts.cast('unsigned char', 0)
-            py_datetime.c_tzinfo = lltype.nullptr(PyObject.TO)
-        else:
-            py_datetime.c_hastzinfo = cts.cast('unsigned char', 1)
-            py_datetime.c_tzinfo = make_ref(space, w_tzinfo)
-    elif state.datetimeAPI[0].c_DateTimeType == py_obj.c_ob_type:
-        # For now this is exactly the same structure as PyDateTime_Time
-        py_datetime = rffi.cast(PyDateTime_DateTime, py_obj)
-        w_tzinfo = space.getattr(w_obj, space.newtext('tzinfo'))
-        if space.is_none(w_tzinfo):
-            py_datetime.c_hastzinfo = cts.cast('unsigned char', 0)
-            py_datetime.c_tzinfo = lltype.nullptr(PyObject.TO)
-        else:
-            py_datetime.c_hastzinfo = cts.cast('unsigned char', 1)
-            py_datetime.c_tzinfo = make_ref(space, w_tzinfo)
+    if isinstance(w_obj, W_DateTime_Time):
+        w_tzinfo = w_obj.w_tzinfo
+    else:
+        assert isinstance(w_obj, W_DateTime_DateTime)
+        w_tzinfo = w_obj.w_tzinfo
+    # PyDateTime_DateTime has exactly the same structure as PyDateTime_Time
+    py_datetime = rffi.cast(PyDateTime_Time, py_obj)
+    if w_tzinfo is None:
+        py_datetime.c_hastzinfo = cts.cast('unsigned char', 0)
+        py_datetime.c_tzinfo = lltype.nullptr(PyObject.TO)
+    else:
+        py_datetime.c_hastzinfo = cts.cast('unsigned char', 1)
+        py_datetime.c_tzinfo = make_ref(space, w_tzinfo)
 
 @slot_function([PyObject], lltype.Void)
 def type_dealloc(space, py_obj):
     from pypy.module.cpyext.object import _dealloc
-    state = space.fromcache(State)
-    # cannot raise here, so just crash
-    assert len(state.datetimeAPI) > 0
-    if state.datetimeAPI[0].c_TimeType == py_obj.c_ob_type:
-        py_datetime = rffi.cast(PyDateTime_Time, py_obj)
-        if (widen(py_datetime.c_hastzinfo) != 0):
-            decref(space, py_datetime.c_tzinfo)
-    elif state.datetimeAPI[0].c_DateTimeType == py_obj.c_ob_type:
-        py_datetime = rffi.cast(PyDateTime_DateTime, py_obj)
-        if (widen(py_datetime.c_hastzinfo) != 0):
-            decref(space, py_datetime.c_tzinfo)
+    py_datetime = rffi.cast(PyDateTime_Time, py_obj)
+    if (widen(py_datetime.c_hastzinfo) != 0):
+        decref(space, py_datetime.c_tzinfo)
     _dealloc(space, py_obj)
 
 def timedeltatype_attach(space, py_obj, w_obj, w_userdata=None):
     "Fills a newly allocated py_obj from the w_obj"
+    assert isinstance(w_obj, W_DateTime_Delta)
     py_delta = rffi.cast(PyDateTime_Delta, py_obj)
-    days = space.int_w(space.getattr(w_obj, space.newtext('days')))
-    py_delta.c_days = cts.cast('int', days)
-    seconds = space.int_w(space.getattr(w_obj, space.newtext('seconds')))
-    py_delta.c_seconds = cts.cast('int', seconds)
-    microseconds = space.int_w(space.getattr(w_obj, space.newtext('microseconds')))
-    py_delta.c_microseconds = cts.cast('int', microseconds)
+    py_delta.c_days = cts.cast('int', w_obj.days)
+    py_delta.c_seconds = cts.cast('int', w_obj.seconds)
+    py_delta.c_microseconds = cts.cast('int', w_obj.microseconds)
 
 # Constructors. They are better used as macros.
 
@@ -300,18 +280,24 @@ def _PyDelta_FromDelta(space, days, seconds, useconds, normalize, w_type):
 def PyDateTime_GET_YEAR(space, w_obj):
     """Return the year, as a positive int.
     """
+    if isinstance(w_obj, W_DateTime_Date):
+        return w_obj.year
     return space.int_w(space.getattr(w_obj, space.newtext("year")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_GET_MONTH(space, w_obj):
     """Return the month, as an int from 1 through 12.
     """
+    if isinstance(w_obj, W_DateTime_Date):
+        return w_obj.month
     return space.int_w(space.getattr(w_obj, space.newtext("month")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_GET_DAY(space, w_obj):
     """Return the day, as an int from 1 through 31.
     """
+    if isinstance(w_obj, W_DateTime_Date):
+        return w_obj.day
     return space.int_w(space.getattr(w_obj, space.newtext("day")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
@@ -322,6 +308,8 @@ def PyDateTime_DATE_GET_HOUR(space, w_obj):
     # call this macro with a datetime.date object.  I think it returns
     # nonsense in CPython, but it doesn't crash.  We'll just return zero
     # in case there is no field 'hour'.
+    if isinstance(w_obj, W_DateTime_DateTime):
+        return w_obj.hour
     try:
         return space.int_w(space.getattr(w_obj, space.newtext("hour")))
     except OperationError:
@@ -331,6 +319,8 @@ def PyDateTime_DATE_GET_HOUR(space, w_obj):
 def PyDateTime_DATE_GET_MINUTE(space, w_obj):
     """Return the minute, as an int from 0 through 59.
     """
+    if isinstance(w_obj, W_DateTime_DateTime):
+        return w_obj.minute
     try:
         return space.int_w(space.getattr(w_obj, space.newtext("minute")))
     except OperationError:
@@ -340,6 +330,8 @@ def PyDateTime_DATE_GET_MINUTE(space, w_obj):
 def PyDateTime_DATE_GET_SECOND(space, w_obj):
     """Return the second, as an int from 0 through 59.
     """
+    if isinstance(w_obj, W_DateTime_DateTime):
+        return w_obj.second
     try:
         return space.int_w(space.getattr(w_obj, space.newtext("second")))
     except OperationError:
@@ -349,6 +341,8 @@ def PyDateTime_DATE_GET_SECOND(space, w_obj):
 def PyDateTime_DATE_GET_MICROSECOND(space, w_obj):
     """Return the microsecond, as an int from 0 through 999999.
     """
+    if isinstance(w_obj, W_DateTime_DateTime):
+        return w_obj.microsecond
     try:
         return space.int_w(space.getattr(w_obj, space.newtext("microsecond")))
     except OperationError:
@@ -358,24 +352,32 @@ def PyDateTime_DATE_GET_MICROSECOND(space, w_obj):
 def PyDateTime_TIME_GET_HOUR(space, w_obj):
     """Return the hour, as an int from 0 through 23.
     """
+    if isinstance(w_obj, W_DateTime_Time):
+        return w_obj.hour
     return space.int_w(space.getattr(w_obj, space.newtext("hour")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_TIME_GET_MINUTE(space, w_obj):
     """Return the minute, as an int from 0 through 59.
     """
+    if isinstance(w_obj, W_DateTime_Time):
+        return w_obj.minute
     return space.int_w(space.getattr(w_obj, space.newtext("minute")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_TIME_GET_SECOND(space, w_obj):
     """Return the second, as an int from 0 through 59.
     """
+    if isinstance(w_obj, W_DateTime_Time):
+        return w_obj.second
     return space.int_w(space.getattr(w_obj, space.newtext("second")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_TIME_GET_MICROSECOND(space, w_obj):
     """Return the microsecond, as an int from 0 through 999999.
     """
+    if isinstance(w_obj, W_DateTime_Time):
+        return w_obj.microsecond
     return space.int_w(space.getattr(w_obj, space.newtext("microsecond")))
 
 # XXX these functions are not present in the Python API
@@ -384,12 +386,18 @@ def PyDateTime_TIME_GET_MICROSECOND(space, w_obj):
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_DELTA_GET_DAYS(space, w_obj):
+    if isinstance(w_obj, W_DateTime_Delta):
+        return w_obj.days
     return space.int_w(space.getattr(w_obj, space.newtext("days")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_DELTA_GET_SECONDS(space, w_obj):
+    if isinstance(w_obj, W_DateTime_Delta):
+        return w_obj.seconds
     return space.int_w(space.getattr(w_obj, space.newtext("seconds")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_DELTA_GET_MICROSECONDS(space, w_obj):
+    if isinstance(w_obj, W_DateTime_Delta):
+        return w_obj.microseconds
     return space.int_w(space.getattr(w_obj, space.newtext("microseconds")))
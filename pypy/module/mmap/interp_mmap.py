@@ -1,5 +1,8 @@
+import sys
+
 from pypy.interpreter.error import OperationError, oefmt, wrap_oserror
 from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.buffer import SimpleView
 from pypy.interpreter.typedef import TypeDef
 from pypy.interpreter.gateway import interp2app, unwrap_spec
 from rpython.rlib import rmmap, rarithmetic, objectmodel
@@ -18,6 +21,13 @@ class W_MMap(W_Root):
         self.space = space
         self.mmap = mmap_obj
 
+    def buffer_w(self, space, flags):
+        # slicing the resulting memoryview does not copy the data
+        self.check_valid()
+        readonly = self.mmap.access == rmmap.ACCESS_READ
+        space.check_buf_flags(flags, readonly)
+        return SimpleView(MMapBuffer(self.space, self.mmap, readonly))
+
     def readbuf_w(self, space):
         self.check_valid()
         return MMapBuffer(self.space, self.mmap, True)
@@ -40,6 +50,10 @@ class W_MMap(W_Root):
         self.check_valid()
         return self.space.newbytes(self.mmap.readline())
 
+    def iterlines(self):
+        self.check_valid()
+        return W_MMapLineIterator(self)
+
     @unwrap_spec(num=int)
     def read(self, num=-1):
         self.check_valid()
@@ -120,6 +134,17 @@ class W_MMap(W_Root):
         except OSError as e:
             raise mmap_error(self.space, e)
 
+    if rmmap._POSIX and rmmap.has_madvise:
+        @unwrap_spec(option=int, start=int, length=int)
+        def madvise(self, option, start=0, length=sys.maxint):
+            self.check_valid()
+            try:
+                self.mmap.madvise(option, start, length)
+            except RValueError as v:
+                raise mmap_error(self.space, v)
+            except OSError as e:
+                raise mmap_error(self.space, e)
+
     @unwrap_spec(dest=int, src=int, count=int)
     def move(self, dest, src, count):
         self.check_valid()
@@ -304,7 +329,34 @@ W_MMap.typedef = TypeDef("mmap.mmap", None, None, "read-write",
     __setitem__ = interp2app(W_MMap.descr_setitem),
     __getslice__ = interp2app(W_MMap.descr_getslice),
     __setslice__ = interp2app(W_MMap.descr_setslice),
+    iterlines = interp2app(W_MMap.iterlines),
+)
+if rmmap._POSIX and rmmap.has_madvise:
+    W_MMap.typedef.rawdict['madvise'] = interp2app(W_MMap.madvise)
+
+
+class W_MMapLineIterator(W_Root):
+    """Iterates over the lines of a mmap, from its current position;
+    the position moves to the end of each line returned."""
+
+    def __init__(self, w_mmap):
+        self.w_mmap = w_mmap
+
+    def descr_iter(self, space):
+        return self
+
+    def descr_next(self, space):
+        self.w_mmap.check_valid()
+        line = self.w_mmap.mmap.readline()
+        if not line:
+            raise OperationError(space.w_StopIteration, space.w_None)
+        return space.newbytes(line)
+
+W_MMapLineIterator.typedef = TypeDef("mmap.lineiterator",
+    __iter__ = interp2app(W_MMapLineIterator.descr_iter),
+    next = interp2app(W_MMapLineIterator.descr_next),
 )
+W_MMapLineIterator.typedef.acceptable_as_base_class = False
 
 constants = rmmap.constants
 PAGESIZE = rmmap.PAGESIZE
@@ -592,16 +592,71 @@ class AppTestMMap:
         f.close()
 
     def test_memoryview(self):
-        from mmap import mmap
+        from mmap import mmap, ACCESS_READ
         f = open(self.tmpname + "y", "w+")
         f.write("foobar")
         f.flush()
         m = mmap(f.fileno(), 6)
         m[5] = '?'
-        exc = raises(TypeError, memoryview, m)
-        assert 'buffer interface' in str(exc.value)
+        view = memoryview(m)
+        assert len(view) == 6
+        assert not view.readonly
+        assert view[1:4].tobytes() == "oob"
+        view[0] = 'F'
+        assert m[:2] == "Fo"
+        m.close()
+        raises(ValueError, memoryview, m)
+        m = mmap(f.fileno(), 6, access=ACCESS_READ)
+        assert memoryview(m).readonly
+        m.close()
+        f.close()
+
+    def test_memoryview_slicing(self):
+        import mmap, re
+        m = mmap.mmap(-1, 64)
+        m[:] = " " * 20 + "key=value;" + " " * 34
+        view = memoryview(m)[15:40]
+        m[20:23] = "KEY"
+        # the slice is a view on the mapping, not a copy
+        assert view[5:8].tobytes() == "KEY"
+        match = re.search(r"(\w+)=(\w+)", view)
+        assert match.span() == (5, 14)
+        assert match.group(2) == "value"
+        assert re.search("KEY", m).start() == 20
+        m.close()
+
+    def test_iterlines(self):
+        import mmap
+        m = mmap.mmap(-1, 16)
+        m.write("ab\n\ncd\nlast")
+        m.seek(3)
+        it = m.iterlines()
+        assert iter(it) is it
+        assert list(it) == ["\n", "cd\n", "last\0\0\0\0\0"]
+        assert m.tell() == 16
+        raises(StopIteration, it.next)
+        m.seek(0)
+        assert next(m.iterlines()) == "ab\n"
         m.close()
-        f.close()
+        raises(ValueError, m.iterlines)
+        raises(ValueError, it.next)
+
+    def test_madvise(self):
+        import mmap
+        if not hasattr(mmap.mmap, 'madvise'):
+            skip("no madvise")
+        m = mmap.mmap(-1, mmap.PAGESIZE * 4)
+        assert m.madvise(mmap.MADV_SEQUENTIAL) is None
+        m.madvise(mmap.MADV_WILLNEED, mmap.PAGESIZE)
+        m.madvise(mmap.MADV_DONTNEED, 0, mmap.PAGESIZE * 100)
+        m.madvise(mmap.MADV_NORMAL, mmap.PAGESIZE * 3, 1)
+        raises(ValueError, m.madvise, mmap.MADV_NORMAL, -1)
+        raises(ValueError, m.madvise, mmap.MADV_NORMAL, len(m))
+        raises(ValueError, m.madvise, mmap.MADV_NORMAL, 0, -1)
+        # the start must be aligned on a page
+        raises(mmap.error, m.madvise, mmap.MADV_NORMAL, 1)
+        m.close()
+        raises(ValueError, m.madvise, mmap.MADV_NORMAL)
 
     def test_offset(self):
         from mmap import mmap, ALLOCATIONGRANULARITY
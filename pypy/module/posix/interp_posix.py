@@ -156,6 +156,120 @@ actually written, which may be smaller than len(data)."""
     else:
         return space.newint(res)
 
+@unwrap_spec(fd=c_int, buffersize=int, offset=r_longlong)
+def pread(space, fd, buffersize, offset):
+    """Read a string of at most buffersize bytes from a file descriptor,
+starting at offset.  The current file position is not changed."""
+    try:
+        s = rposix.pread(fd, buffersize, offset)
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    else:
+        return space.newbytes(s)
+
+@unwrap_spec(fd=c_int, offset=r_longlong)
+def pwrite(space, fd, w_data, offset):
+    """Write a string to a file descriptor at offset.  The current file
+position is not changed.  Return the number of bytes written."""
+    data = space.getarg_w('s*', w_data)
+    try:
+        res = rposix.pwrite(fd, data.as_str(), offset)
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    else:
+        return space.newint(res)
+
+def _writable_buffers(space, w_buffers):
+    return [space.writebuf_w(w_buffer)
+            for w_buffer in space.unpackiterable(w_buffers)]
+
+def _readable_chunks(space, w_buffers):
+    return [space.getarg_w('s*', w_buffer).as_str()
+            for w_buffer in space.unpackiterable(w_buffers)]
+
+def _fill_buffers(buffers, chunks):
+    total = 0
+    for i in range(len(buffers)):
+        chunk = chunks[i]
+        if chunk:
+            buffers[i].setslice(0, chunk)
+            total += len(chunk)
+    return total
+
+@unwrap_spec(fd=c_int)
+def readv(space, fd, w_buffers):
+    """readv(fd, buffers) -> bytesread
+
+Read from a file descriptor into a sequence of writable buffers, with a
+single system call, filling each buffer before moving to the next one.
+Return the total number of bytes read."""
+    buffers = _writable_buffers(space, w_buffers)
+    try:
+        chunks = rposix.readv(fd, [buf.getlength() for buf in buffers])
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    return space.newint(_fill_buffers(buffers, chunks))
+
+@unwrap_spec(fd=c_int)
+def writev(space, fd, w_buffers):
+    """writev(fd, buffers) -> byteswritten
+
+Write the contents of a sequence of buffers to a file descriptor, with a
+single system call.  Return the total number of bytes written."""
+    chunks = _readable_chunks(space, w_buffers)
+    try:
+        res = rposix.writev(fd, chunks)
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    return space.newint(res)
+
+@unwrap_spec(fd=c_int, offset=r_longlong)
+def preadv(space, fd, w_buffers, offset):
+    """preadv(fd, buffers, offset) -> bytesread
+
+Like readv(), but read starting at offset, without changing the current
+file position."""
+    buffers = _writable_buffers(space, w_buffers)
+    try:
+        chunks = rposix.preadv(fd, [buf.getlength() for buf in buffers],
+                               offset)
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    return space.newint(_fill_buffers(buffers, chunks))
+
+@unwrap_spec(fd=c_int, offset=r_longlong)
+def pwritev(space, fd, w_buffers, offset):
+    """pwritev(fd, buffers, offset) -> byteswritten
+
+Like writev(), but write starting at offset, without changing the current
+file position."""
+    chunks = _readable_chunks(space, w_buffers)
+    try:
+        res = rposix.pwritev(fd, chunks, offset)
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    return space.newint(res)
+
+@unwrap_spec(out=c_int, in_=c_int, count=int)
+def sendfile(space, out, in_, w_offset, count):
+    """sendfile(out, in, offset, count) -> byteswritten
+
+Copy count bytes from file descriptor in to file descriptor out, starting
+at the given offset of in.  If offset is None, read from the current
+position of in and update it.  The copy is done by the kernel without
+going through a user-space buffer."""
+    if count < 0:
+        raise oefmt(space.w_ValueError, "count must be non-negative")
+    try:
+        if space.is_none(w_offset):
+            res = rposix.sendfile_no_offset(out, in_, count)
+        else:
+            offset = space.r_longlong_w(w_offset)
+            res = rposix.sendfile(out, in_, offset, count)
+    except OSError as e:
+        raise wrap_oserror(space, e)
+    return space.newint(res)
+
 @unwrap_spec(fd=c_int)
 def close(space, fd):
     """Close a file descriptor (for low level IO)."""
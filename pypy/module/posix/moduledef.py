@@ -2,6 +2,7 @@ from pypy.interpreter.mixedmodule import MixedModule
 from rpython.rlib import rposix
 
 import os
+import sys
 exec 'import %s as posix' % os.name
 
 class Module(MixedModule):
@@ -171,6 +172,11 @@ corresponding Unix manual entries for more information on calls."""
         interpleveldefs['_getfullpathname'] = 'interp_posix._getfullpathname'
     if hasattr(os, 'chroot'):
         interpleveldefs['chroot'] = 'interp_posix.chroot'
+    for name in ['pread', 'pwrite', 'readv', 'writev', 'preadv', 'pwritev']:
+        if hasattr(rposix, name):
+            interpleveldefs[name] = 'interp_posix.%s' % (name,)
+    if hasattr(rposix, 'sendfile') and sys.platform.startswith('linux'):
+        interpleveldefs['sendfile'] = 'interp_posix.sendfile'
 
     for name in rposix.WAIT_MACROS:
         if hasattr(os, name):
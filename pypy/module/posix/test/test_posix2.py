@@ -897,6 +897,83 @@ class AppTestPosix:
             with raises(ValueError):
                 os.fdatasync(-1)
 
+    if hasattr(rposix, 'pread'):
+        def test_pread_pwrite(self):
+            os = self.posix
+            fd = os.open(self.path2, os.O_RDWR | os.O_CREAT | os.O_TRUNC)
+            try:
+                os.write(fd, b'Hello world')
+                assert os.pwrite(fd, b'ea', 1) == 2
+                assert os.pwrite(fd, buffer(b'!'), 11) == 1
+                assert os.lseek(fd, 0, 1) == 11
+                assert os.pread(fd, 4, 0) == b'Heal'
+                assert os.pread(fd, 100, 6) == b'world!'
+                assert os.pread(fd, 4, 100) == b''
+                assert os.lseek(fd, 0, 1) == 11
+            finally:
+                os.close(fd)
+            raises(OSError, os.pread, fd, 4, 0)
+
+    if hasattr(rposix, 'writev'):
+        def test_readv_writev(self):
+            os = self.posix
+            r, w = os.pipe()
+            try:
+                assert os.writev(w, [b'head', buffer(b'+payload'),
+                                     bytearray(b'+trailer')]) == 20
+                bufs = [bytearray(6), bytearray(0), bytearray(10),
+                        bytearray(10)]
+                assert os.readv(r, [memoryview(b) for b in bufs]) == 20
+                assert bufs[0] == b'head+p'
+                assert bufs[2] == b'ayload+tra'
+                assert bufs[3] == b'iler\0\0\0\0\0\0'
+                assert os.writev(w, []) == 0
+                raises(TypeError, os.writev, w, [42])
+                raises(TypeError, os.readv, r, [b'readonly'])
+            finally:
+                os.close(r)
+                os.close(w)
+            raises(OSError, os.writev, w, [b'x'])
+
+    if hasattr(rposix, 'pwritev'):
+        def test_preadv_pwritev(self):
+            os = self.posix
+            fd = os.open(self.path2, os.O_RDWR | os.O_CREAT | os.O_TRUNC)
+            try:
+                os.write(fd, b'Hello world')
+                assert os.pwritev(fd, [b'e', b'a'], 1) == 2
+                buf1 = bytearray(3)
+                buf2 = bytearray(4)
+                assert os.preadv(fd, [buf1, buf2], 2) == 7
+                assert buf1 == b'alo'
+                assert buf2 == b' wor'
+                assert os.lseek(fd, 0, 1) == 11
+            finally:
+                os.close(fd)
+
+    if sys.platform.startswith('linux'):
+        def test_sendfile(self):
+            os = self.posix
+            with open(self.path2, "wb") as f:
+                f.write("abcdefghij" * 1000)
+            fd = os.open(self.path2, os.O_RDONLY)
+            r, w = os.pipe()
+            try:
+                assert os.sendfile(w, fd, 5, 10) == 10
+                assert os.read(r, 100) == "fghijabcde"
+                # the offset of 'fd' was not changed
+                assert os.lseek(fd, 0, 1) == 0
+                assert os.sendfile(w, fd, None, 3) == 3
+                assert os.read(r, 100) == "abc"
+                assert os.lseek(fd, 0, 1) == 3
+                assert os.sendfile(w, fd, 10000, 5) == 0
+                raises(ValueError, os.sendfile, w, fd, 0, -1)
+                raises(OSError, os.sendfile, w, -1, 0, 1)
+            finally:
+                os.close(fd)
+                os.close(r)
+                os.close(w)
+
     if hasattr(os, 'fchdir'):
         def test_fchdir(self):
             os = self.posix
@@ -0,0 +1,424 @@
+from __future__ import with_statement
+
+import errno
+
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.error import exception_from_saved_errno
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module.select.interp_epoll import (
+    epoll_event, epoll_create, epoll_ctl, epoll_wait, EPOLL_CTL_ADD,
+    EPOLL_CTL_MOD, EPOLL_CTL_DEL, DEF_REGISTER_EVENTMASK)
+from rpython.rtyper.lltypesystem import lltype, rffi
+from rpython.rlib import rtime
+from rpython.rlib._rsocket_rffi import socketclose, FD_SETSIZE
+from rpython.rlib.rposix import get_saved_errno
+
+
+EVENT_ARRAY = rffi.CArray(epoll_event)
+DEFAULT_MAXEVENTS = 1024
+# the heap of timers is rebuilt without the cancelled ones when they are
+# more than half of it, like asyncio does
+MIN_TIMERS_TO_CLEANUP = 100
+
+
+def monotonic():
+    with lltype.scoped_alloc(rtime.TIMESPEC) as ts:
+        rtime.c_clock_gettime(rtime.CLOCK_MONOTONIC, ts)
+        return (float(rffi.getintfield(ts, 'c_tv_sec')) +
+                float(rffi.getintfield(ts, 'c_tv_nsec')) * 0.000000001)
+
+
+def _check_callable(space, w_callback):
+    if not space.is_true(space.callable(w_callback)):
+        raise oefmt(space.w_TypeError, "callback must be callable")
+
+
+class W_ReactorTimer(W_Root):
+    """A callback scheduled with call_later() or call_at()."""
+
+    def __init__(self, reactor, when, seq, w_callback):
+        self.reactor = reactor      # None when not in the heap any more
+        self.when = when
+        self.seq = seq
+        self.w_callback = w_callback
+
+    def lt(self, other):
+        if self.when != other.when:
+            return self.when < other.when
+        return self.seq < other.seq
+
+    def descr_cancel(self, space):
+        if self.w_callback is not None:
+            self.w_callback = None
+            if self.reactor is not None:
+                self.reactor.timer_cancelled()
+
+    def descr_get_cancelled(self, space):
+        return space.newbool(self.w_callback is None)
+
+    def descr_get_when(self, space):
+        return space.newfloat(self.when)
+
+
+W_ReactorTimer.typedef = TypeDef("select.reactor_timer",
+    cancel = interp2app(W_ReactorTimer.descr_cancel),
+    cancelled = GetSetProperty(W_ReactorTimer.descr_get_cancelled),
+    when = GetSetProperty(W_ReactorTimer.descr_get_when),
+)
+W_ReactorTimer.typedef.acceptable_as_base_class = False
+
+
+class W_Reactor(W_Root):
+    """An event loop core on top of epoll: the file descriptors are
+    registered together with their callback, and run_once() calls the
+    callbacks of the ready ones directly from a preallocated event array,
+    followed by the expired timers of a heap."""
+
+    def __init__(self, space, epfd, maxevents):
+        self.space = space
+        self.epfd = epfd
+        self.maxevents = maxevents
+        self.evs = lltype.malloc(EVENT_ARRAY, maxevents, flavor='raw',
+                                 track_allocation=False)
+        self.handlers = {}      # fd -> callback
+        self.timers = []        # heap of W_ReactorTimer
+        self.timer_seq = 0
+        self.num_cancelled = 0  # cancelled timers still in the heap
+        # the events returned by epoll_wait() that were not dispatched yet,
+        # because a callback raised
+        self.next_event = 0
+        self.num_events = 0
+        self.running = False
+        self.stopping = False
+        self.register_finalizer(space)
+
+    @unwrap_spec(sizehint=int, maxevents=int)
+    def descr__new__(space, w_subtype, sizehint=-1, maxevents=-1):
+        if sizehint == -1:
+            sizehint = FD_SETSIZE - 1
+        elif sizehint < 0:
+            raise oefmt(space.w_ValueError,
+                        "sizehint must be greater than zero, got %d", sizehint)
+        if maxevents == -1:
+            maxevents = DEFAULT_MAXEVENTS
+        elif maxevents < 1:
+            raise oefmt(space.w_ValueError,
+                        "maxevents must be greater than 0, not %d", maxevents)
+        epfd = epoll_create(sizehint)
+        if epfd < 0:
+            raise exception_from_saved_errno(space, space.w_IOError)
+        return W_Reactor(space, epfd, maxevents)
+
+    def _finalize_(self):
+        self.close()
+
+    def check_closed(self, space):
+        if self.get_closed():
+            raise oefmt(space.w_ValueError,
+                        "I/O operation on closed reactor")
+
+    def get_closed(self):
+        return self.epfd < 0
+
+    def close(self):
+        if not self.get_closed():
+            socketclose(self.epfd)
+            self.epfd = -1
+            lltype.free(self.evs, flavor='raw', track_allocation=False)
+            self.evs = lltype.nullptr(EVENT_ARRAY)
+            self.num_events = 0
+            self.handlers.clear()
+            for timer in self.timers:
+                timer.reactor = None
+            self.timers = []
+            self.num_cancelled = 0
+            self.may_unregister_rpython_finalizer(self.space)
+
+    def _ctl(self, space, ctl, fd, eventmask, ignore_ebadf=False):
+        with lltype.scoped_alloc(epoll_event) as ev:
+            ev.c_events = rffi.cast(rffi.UINT, eventmask)
+            rffi.setintfield(ev.c_data, 'c_fd', fd)
+            result = epoll_ctl(self.epfd, ctl, fd, ev)
+            if ignore_ebadf and get_saved_errno() == errno.EBADF:
+                result = 0
+            if result < 0:
+                raise exception_from_saved_errno(space, space.w_IOError)
+
+    def descr_get_closed(self, space):
+        return space.newbool(self.get_closed())
+
+    def descr_fileno(self, space):
+        self.check_closed(space)
+        return space.newint(self.epfd)
+
+    def descr_close(self, space):
+        self.close()
+
+    @unwrap_spec(eventmask=int)
+    def descr_register(self, space, w_fd, w_callback,
+                       eventmask=DEF_REGISTER_EVENTMASK):
+        """register(fd, callback[, eventmask]) -> None
+
+Register a file descriptor; callback(fd, events) is called by run_once()
+when it is ready."""
+        self.check_closed(space)
+        fd = space.c_filedescriptor_w(w_fd)
+        _check_callable(space, w_callback)
+        self._ctl(space, EPOLL_CTL_ADD, fd, eventmask)
+        self.handlers[fd] = w_callback
+
+    @unwrap_spec(eventmask=int)
+    def descr_modify(self, space, w_fd, eventmask, w_callback=None):
+        """modify(fd, eventmask[, callback]) -> None
+
+Change the events of a registered file descriptor, and its callback if
+one is given."""
+        self.check_closed(space)
+        fd = space.c_filedescriptor_w(w_fd)
+        if w_callback is not None:
+            _check_callable(space, w_callback)
+        self._ctl(space, EPOLL_CTL_MOD, fd, eventmask)
+        if w_callback is not None:
+            self.handlers[fd] = w_callback
+
+    def descr_unregister(self, space, w_fd):
+        """unregister(fd) -> None
+
+Remove a registered file descriptor.  Pending events for it are
+dropped."""
+        self.check_closed(space)
+        fd = space.c_filedescriptor_w(w_fd)
+        try:
+            del self.handlers[fd]
+        except KeyError:
+            raise oefmt(space.w_KeyError, "%d is not registered", fd)
+        self._ctl(space, EPOLL_CTL_DEL, fd, 0, ignore_ebadf=True)
+
+    def descr_len(self, space):
+        return space.newint(len(self.handlers))
+
+    def descr_time(self, space):
+        """time() -> float
+
+Return the current time of the clock used for the timers."""
+        return space.newfloat(monotonic())
+
+    # ____________________________________________________________
+    # timers
+
+    def _push_timer(self, timer):
+        timers = self.timers
+        timers.append(timer)
+        pos = len(timers) - 1
+        while pos > 0:
+            parentpos = (pos - 1) >> 1
+            parent = timers[parentpos]
+            if not timer.lt(parent):
+                break
+            timers[pos] = parent
+            pos = parentpos
+        timers[pos] = timer
+
+    def _sift_down(self, pos, timer):
+        # put 'timer' at 'pos', or lower if one of its children is smaller
+        timers = self.timers
+        size = len(timers)
+        while True:
+            childpos = 2 * pos + 1
+            if childpos >= size:
+                break
+            rightpos = childpos + 1
+            if rightpos < size and timers[rightpos].lt(timers[childpos]):
+                childpos = rightpos
+            if not timers[childpos].lt(timer):
+                break
+            timers[pos] = timers[childpos]
+            pos = childpos
+        timers[pos] = timer
+
+    def _pop_timer(self):
+        timers = self.timers
+        result = timers[0]
+        last = timers.pop()
+        if len(timers) > 0:
+            self._sift_down(0, last)
+        result.reactor = None
+        if result.w_callback is None:
+            self.num_cancelled -= 1
+        return result
+
+    def timer_cancelled(self):
+        self.num_cancelled += 1
+
+    def _discard_cancelled_timers(self):
+        if (self.num_cancelled > MIN_TIMERS_TO_CLEANUP and
+                self.num_cancelled * 2 > len(self.timers)):
+            # rebuild the heap from the remaining timers
+            timers = []
+            for timer in self.timers:
+                if timer.w_callback is None:
+                    timer.reactor = None
+                else:
+                    timers.append(timer)
+            self.timers = timers
+            self.num_cancelled = 0
+            pos = len(timers) // 2 - 1
+            while pos >= 0:
+                self._sift_down(pos, timers[pos])
+                pos -= 1
+        else:
+            while self.timers and self.timers[0].w_callback is None:
+                self._pop_timer()
+
+    def _add_timer(self, space, when, w_callback):
+        _check_callable(space, w_callback)
+        self.timer_seq += 1
+        timer = W_ReactorTimer(self, when, self.timer_seq, w_callback)
+        self._push_timer(timer)
+        return timer
+
+    @unwrap_spec(delay=float)
+    def descr_call_later(self, space, delay, w_callback):
+        """call_later(delay, callback) -> timer
+
+Call callback() from run_once() after 'delay' seconds.  The returned
+object has a cancel() method."""
+        self.check_closed(space)
+        return self._add_timer(space, monotonic() + delay, w_callback)
+
+    @unwrap_spec(when=float)
+    def descr_call_at(self, space, when, w_callback):
+        """call_at(when, callback) -> timer
+
+Like call_later(), but with an absolute time given by time()."""
+        self.check_closed(space)
+        return self._add_timer(space, when, w_callback)
+
+    # ____________________________________________________________
+    # dispatching
+
+    def _wait(self, space, timeout):
+        self._discard_cancelled_timers()
+        if self.timers:
+            delay = self.timers[0].when - monotonic()
+            if delay < 0.0:
+                delay = 0.0
+            if timeout < 0.0 or delay < timeout:
+                timeout = delay
+        if timeout < 0.0:
+            ms = -1
+        else:
+            # round up, to avoid a busy loop waiting for the next timer
+            ms = int(timeout * 1000.0)
+            if float(ms) < timeout * 1000.0:
+                ms += 1
+        nfds = epoll_wait(self.epfd, self.evs, self.maxevents, ms)
+        if nfds < 0:
+            if get_saved_errno() == errno.EINTR:
+                space.getexecutioncontext().checksignals()
+                return
+            raise exception_from_saved_errno(space, space.w_IOError)
+        self.next_event = 0
+        self.num_events = nfds
+
+    def _dispatch_events(self, space):
+        count = 0
+        while self.next_event < self.num_events:
+            event = self.evs[self.next_event]
+            fd = rffi.getintfield(event.c_data, 'c_fd')
+            events = rffi.cast(lltype.Signed, event.c_events)
+            self.next_event += 1
+            w_callback = self.handlers.get(fd, None)
+            if w_callback is not None:
+                count += 1
+                space.call_function(w_callback, space.newint(fd),
+                                    space.newint(events))
+        return count
+
+    def _dispatch_timers(self, space):
+        count = 0
+        now = monotonic()
+        while self.timers and self.timers[0].when <= now:
+            timer = self._pop_timer()
+            w_callback = timer.w_callback
+            if w_callback is not None:
+                timer.w_callback = None
+                count += 1
+                space.call_function(w_callback)
+        return count
+
+    def _run_once(self, space, timeout):
+        count = 0
+        if self.next_event >= self.num_events:
+            self._wait(space, timeout)
+        count += self._dispatch_events(space)
+        if self.get_closed():
+            return count
+        count += self._dispatch_timers(space)
+        return count
+
+    @unwrap_spec(timeout=float)
+    def descr_run_once(self, space, timeout=-1.0):
+        """run_once([timeout]) -> count
+
+Wait until a registered file descriptor is ready, the next timer expires
+or 'timeout' seconds have elapsed, and call the callbacks.  Return the
+number of callbacks called.  If a callback raises, the exception is
+propagated and the remaining ready events are dispatched by the next
+call, without waiting."""
+        self.check_closed(space)
+        if self.running:
+            raise oefmt(space.w_RuntimeError, "reactor is already running")
+        self.running = True
+        try:
+            return space.newint(self._run_once(space, timeout))
+        finally:
+            self.running = False
+
+    def descr_run(self, space):
+        """run() -> None
+
+Call run_once() until stop() is called, or until there are no registered
+file descriptors and no timers left."""
+        self.check_closed(space)
+        if self.running:
+            raise oefmt(space.w_RuntimeError, "reactor is already running")
+        self.running = True
+        self.stopping = False
+        try:
+            while not self.stopping and not self.get_closed():
+                self._discard_cancelled_timers()
+                if not self.handlers and not self.timers:
+                    break
+                self._run_once(space, -1.0)
+        finally:
+            self.running = False
+            self.stopping = False
+
+    def descr_stop(self, space):
+        """stop() -> None
+
+Make run() return after the current iteration."""
+        self.stopping = True
+
+
+W_Reactor.typedef = TypeDef("select.reactor",
+    __doc__ = W_Reactor.__doc__,
+    __new__ = interp2app(W_Reactor.descr__new__.im_func),
+    __len__ = interp2app(W_Reactor.descr_len),
+    closed = GetSetProperty(W_Reactor.descr_get_closed),
+    fileno = interp2app(W_Reactor.descr_fileno),
+    close = interp2app(W_Reactor.descr_close),
+    register = interp2app(W_Reactor.descr_register),
+    modify = interp2app(W_Reactor.descr_modify),
+    unregister = interp2app(W_Reactor.descr_unregister),
+    time = interp2app(W_Reactor.descr_time),
+    call_later = interp2app(W_Reactor.descr_call_later),
+    call_at = interp2app(W_Reactor.descr_call_at),
+    run_once = interp2app(W_Reactor.descr_run_once),
+    run = interp2app(W_Reactor.descr_run),
+    stop = interp2app(W_Reactor.descr_stop),
+)
+W_Reactor.typedef.acceptable_as_base_class = False
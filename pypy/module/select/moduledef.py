@@ -20,6 +20,7 @@ class Module(MixedModule):
 
     if sys.platform.startswith('linux'):
         interpleveldefs['epoll'] = 'interp_epoll.W_Epoll'
+        interpleveldefs['reactor'] = 'interp_reactor.W_Reactor'
         from pypy.module.select.interp_epoll import public_symbols
         for symbol, value in public_symbols.iteritems():
             if value is not None:
@@ -0,0 +1,164 @@
+import py
+import sys
+
+
+class AppTestReactor(object):
+    spaceconfig = {
+        "usemodules": ["select", "posix", "time"],
+    }
+
+    def setup_class(cls):
+        if not sys.platform.startswith('linux'):
+            py.test.skip("test requires linux")
+
+    def test_create(self):
+        import select
+
+        r = select.reactor()
+        assert r.fileno() > 0
+        assert not r.closed
+        assert len(r) == 0
+        r.close()
+        assert r.closed
+        raises(ValueError, r.fileno)
+        raises(ValueError, r.run_once, 0)
+        raises(ValueError, select.reactor, -2)
+        raises(ValueError, select.reactor, 16, 0)
+
+    def test_dispatch(self):
+        import select, os
+
+        r = select.reactor(maxevents=2)
+        calls = []
+        def on_ready(fd, events):
+            calls.append((fd, events))
+            os.read(fd, 100)
+        pipes = [os.pipe() for i in range(3)]
+        try:
+            for rfd, wfd in pipes:
+                r.register(rfd, on_ready, select.EPOLLIN)
+            assert len(r) == 3
+            raises(IOError, r.register, pipes[0][0], on_ready)
+            raises(TypeError, r.register, pipes[0][0], 42)
+            assert r.run_once(0) == 0
+            for rfd, wfd in pipes:
+                os.write(wfd, b'x')
+            # at most 'maxevents' callbacks per call
+            assert r.run_once(1.0) == 2
+            assert r.run_once(1.0) == 1
+            assert sorted(calls) == sorted([(rfd, select.EPOLLIN)
+                                            for rfd, wfd in pipes])
+            del calls[:]
+            other = []
+            r.modify(pipes[0][0], select.EPOLLIN,
+                     lambda fd, events: other.append(fd))
+            r.unregister(pipes[1][0])
+            raises(KeyError, r.unregister, pipes[1][0])
+            for rfd, wfd in pipes:
+                os.write(wfd, b'x')
+            assert r.run_once(1.0) == 2
+            assert other == [pipes[0][0]]
+            assert calls == [(pipes[2][0], select.EPOLLIN)]
+        finally:
+            r.close()
+            for rfd, wfd in pipes:
+                os.close(rfd)
+                os.close(wfd)
+
+    def test_exception_in_callback(self):
+        import select, os
+
+        r = select.reactor()
+        calls = []
+        def on_ready(fd, events):
+            calls.append(fd)
+            if len(calls) == 1:
+                raise ZeroDivisionError
+        pipes = [os.pipe() for i in range(2)]
+        try:
+            for rfd, wfd in pipes:
+                # edge-triggered: the events are only reported once
+                r.register(rfd, on_ready, select.EPOLLIN | select.EPOLLET)
+                os.write(wfd, b'x')
+            raises(ZeroDivisionError, r.run_once, 1.0)
+            assert len(calls) == 1
+            # the second event is dispatched by the next call
+            assert r.run_once(1.0) == 1
+            assert sorted(calls) == sorted([rfd for rfd, wfd in pipes])
+            assert r.run_once(0) == 0
+        finally:
+            r.close()
+            for rfd, wfd in pipes:
+                os.close(rfd)
+                os.close(wfd)
+
+    def test_timers(self):
+        import select
+
+        r = select.reactor()
+        calls = []
+        t0 = r.time()
+        r.call_later(0.03, lambda: calls.append(3))
+        r.call_later(0.01, lambda: calls.append(1))
+        t = r.call_later(0.02, lambda: calls.append(2))
+        r.call_at(t0 + 0.015, lambda: calls.append(4))
+        raises(TypeError, r.call_later, 0, None)
+        assert t.when >= t0 + 0.02
+        t.cancel()
+        assert t.cancelled
+        while len(calls) < 3:
+            r.run_once()
+        assert calls == [1, 4, 3]
+        assert r.time() - t0 >= 0.03
+        r.close()
+
+    def test_many_cancelled_timers(self):
+        import select
+
+        r = select.reactor()
+        calls = []
+        t0 = r.time()
+        timers = [r.call_at(t0 - 1000 + i, lambda i=i: calls.append(i))
+                  for i in range(300)]
+        for i in range(6, 300):
+            if i % 10 != 3:
+                timers[i].cancel()
+        # cancelling twice, or after the timer ran, is harmless
+        timers[-2].cancel()
+        assert r.run_once(0) == 5 + 30
+        assert calls == [i for i in range(300) if i <= 5 or i % 10 == 3]
+        timers[0].cancel()
+        assert timers[0].cancelled
+        t = r.call_later(0, lambda: calls.append('x'))
+        assert r.run_once(0) == 1
+        assert calls[-1] == 'x'
+        r.close()
+
+    def test_run_and_stop(self):
+        import select, os
+
+        r = select.reactor()
+        rfd, wfd = os.pipe()
+        received = []
+        def on_ready(fd, events):
+            received.append(os.read(fd, 100))
+            if received[-1].endswith(b'stop'):
+                r.stop()
+        def write(data):
+            os.write(wfd, data)
+        r.register(rfd, on_ready, select.EPOLLIN)
+        r.call_later(0, lambda: write(b'a'))
+        r.call_later(0.01, lambda: write(b'stop'))
+        r.run()
+        assert b''.join(received) == b'astop'
+        # not reentrant
+        r.call_later(0, r.run_once)
+        raises(RuntimeError, r.run_once, 1.0)
+        # run() returns when there is nothing left to wait for
+        r.unregister(rfd)
+        r.call_later(0, lambda: received.append(None))
+        r.run()
+        assert received[-1] is None
+        r.close()
+        os.close(rfd)
+        os.close(wfd)
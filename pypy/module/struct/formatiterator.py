@@ -3,7 +3,8 @@ from rpython.rlib.rarithmetic import (r_uint, r_ulonglong, r_longlong,
 from rpython.rlib import jit, rutf8
 from rpython.rlib.objectmodel import specialize
 from rpython.rlib.rstruct.error import StructError
-from rpython.rlib.rstruct.formatiterator import FormatIterator
+from rpython.rlib.rstruct.formatiterator import (
+    FormatIterator, unroll_native_fmtdescs, unroll_standard_fmtdescs)
 
 from pypy.interpreter.error import OperationError
 
@@ -161,6 +162,10 @@ class UnpackFormatIterator(FormatIterator):
 
     @specialize.argtype(1)
     def appendobj(self, value):
+        self.result_w.append(self.wrapobj(value))
+
+    @specialize.argtype(1)
+    def wrapobj(self, value):
         # CPython tries hard to return int objects whenever it can, but
         # space.newint returns a long if we pass a r_uint, r_ulonglong or
         # r_longlong. So, we need special care in those cases.
@@ -188,7 +193,7 @@ class UnpackFormatIterator(FormatIterator):
             w_value = self.space.newutf8(value.decode('utf-8'), len(value))
         else:
             assert 0, "unreachable"
-        self.result_w.append(w_value)
+        return w_value
 
     def append_utf8(self, value):
         w_ch = self.space.newutf8(rutf8.unichr_as_utf8(r_uint(value)), 1)
@@ -202,3 +207,174 @@ class UnpackFormatIterator(FormatIterator):
 
     def skip(self, size):
         self.read(size) # XXX, could avoid taking the slice
+
+
+class StructOp(object):
+    """One value of a record: the format character, its offset in the
+    record, and its repeat count for 's' and 'p'."""
+    _immutable_fields_ = ['fmtchar', 'offset', 'count']
+
+    def __init__(self, fmtchar, offset, count):
+        self.fmtchar = fmtchar
+        self.offset = offset
+        self.count = count
+
+
+class CompiledFormat(object):
+    """A format string turned into a flat list of StructOps, so that
+    unpacking many records does not parse the format again for each."""
+    _immutable_fields_ = ['ops[*]', 'native', 'bigendian']
+
+    def __init__(self, ops, native, bigendian):
+        self.ops = ops
+        self.native = native
+        self.bigendian = bigendian
+
+
+class CompileFormatIterator(FormatIterator):
+    def __init__(self):
+        self.pos = 0
+        self.ops = []
+
+    def operate(self, fmtdesc, repetitions):
+        if fmtdesc.fmtchar == 'x':
+            pass
+        elif fmtdesc.needcount:
+            self.ops.append(StructOp(fmtdesc.fmtchar, self.pos, repetitions))
+        else:
+            for i in range(repetitions):
+                self.ops.append(StructOp(fmtdesc.fmtchar,
+                                         self.pos + i * fmtdesc.size, 1))
+        self.pos += fmtdesc.size * repetitions
+
+    def align(self, mask):
+        self.pos = (self.pos + mask) & ~mask
+
+
+def compile_format(format):
+    """Return the CompiledFormat of a format string; it must be a valid
+    one, i.e. one that calcsize() accepts."""
+    fmtiter = CompileFormatIterator()
+    fmtiter.interpret(format)
+    native = len(format) == 0 or format[0] not in '=<>!'
+    return CompiledFormat(fmtiter.ops[:], native, fmtiter.bigendian)
+
+
+@specialize.argtype(0)
+def _unpack_op(fmtiter, native, op):
+    if native:
+        for fmtdesc in unroll_native_fmtdescs:
+            if op.fmtchar == fmtdesc.fmtchar:
+                if fmtdesc.needcount:
+                    fmtdesc.unpack(fmtiter, op.count)
+                else:
+                    fmtdesc.unpack(fmtiter)
+                return
+    else:
+        for fmtdesc in unroll_standard_fmtdescs:
+            if op.fmtchar == fmtdesc.fmtchar:
+                if fmtdesc.needcount:
+                    fmtdesc.unpack(fmtiter, op.count)
+                else:
+                    fmtdesc.unpack(fmtiter)
+                return
+    raise AssertionError("unreachable")
+
+@jit.unroll_safe
+@specialize.argtype(0)
+def unpack_record(fmtiter, compiled, start):
+    """Unpack the record starting at position 'start' of the buffer of
+    'fmtiter', which must be large enough."""
+    fmtiter.bigendian = compiled.bigendian
+    for op in compiled.ops:
+        fmtiter.pos = start + op.offset
+        _unpack_op(fmtiter, compiled.native, op)
+
+
+COLUMN_EMPTY, COLUMN_INT, COLUMN_FLOAT, COLUMN_OBJECT = range(4)
+
+class Column(object):
+    """The values of one field of all the records.  Ints and floats are
+    kept unwrapped as long as all the values are of the same type."""
+
+    def __init__(self):
+        self.kind = COLUMN_EMPTY
+        self.ints = []
+        self.floats = []
+        self.items_w = []
+
+    def append_int(self, space, value):
+        if self.kind == COLUMN_EMPTY:
+            self.kind = COLUMN_INT
+        if self.kind == COLUMN_INT:
+            self.ints.append(value)
+        else:
+            self.append_w(space, space.newint(value))
+
+    def append_float(self, space, value):
+        if self.kind == COLUMN_EMPTY:
+            self.kind = COLUMN_FLOAT
+        if self.kind == COLUMN_FLOAT:
+            self.floats.append(value)
+        else:
+            self.append_w(space, space.newfloat(value))
+
+    def append_w(self, space, w_value):
+        if self.kind == COLUMN_INT:
+            self.items_w = [space.newint(x) for x in self.ints]
+            self.ints = []
+        elif self.kind == COLUMN_FLOAT:
+            self.items_w = [space.newfloat(x) for x in self.floats]
+            self.floats = []
+        self.kind = COLUMN_OBJECT
+        self.items_w.append(w_value)
+
+    def wrap(self, space):
+        if self.kind == COLUMN_INT:
+            return space.newlist_int(self.ints)
+        elif self.kind == COLUMN_FLOAT:
+            return space.newlist_float(self.floats)
+        else:
+            return space.newlist(self.items_w)
+
+
+class ColumnsUnpackFormatIterator(UnpackFormatIterator):
+    """Sends the values to a list of Columns instead of result_w."""
+
+    def __init__(self, space, buf, ncolumns):
+        UnpackFormatIterator.__init__(self, space, buf)
+        self.columns = [Column() for i in range(ncolumns)]
+        self.index = 0
+
+    def next_column(self):
+        column = self.columns[self.index]
+        self.index += 1
+        if self.index == len(self.columns):
+            self.index = 0
+        return column
+
+    @specialize.argtype(1)
+    def appendobj(self, value):
+        column = self.next_column()
+        if isinstance(value, bool):
+            column.append_w(self.space, self.space.newbool(value))
+        elif isinstance(value, float):
+            column.append_float(self.space, value)
+        elif isinstance(value, int):
+            column.append_int(self.space, value)
+        elif isinstance(value, r_uint) or isinstance(value, r_ulonglong):
+            if value <= maxint:
+                column.append_int(self.space, intmask(value))
+            else:
+                column.append_w(self.space, self.space.newint(value))
+        elif isinstance(value, r_longlong):
+            if value == r_longlong(intmask(value)):
+                column.append_int(self.space, intmask(value))
+            else:
+                column.append_w(self.space, self.space.newint(value))
+        else:
+            column.append_w(self.space, self.wrapobj(value))
+
+    def append_utf8(self, value):
+        w_ch = self.space.newutf8(rutf8.unichr_as_utf8(r_uint(value)), 1)
+        self.next_column().append_w(self.space, w_ch)
@@ -10,13 +10,19 @@ from pypy.interpreter.error import OperationError, oefmt
 from pypy.interpreter.typedef import TypeDef, interp_attrproperty
 from pypy.interpreter.typedef import make_weakref_descr
 from pypy.module.struct.formatiterator import (
-    PackFormatIterator, UnpackFormatIterator
+    PackFormatIterator, UnpackFormatIterator, ColumnsUnpackFormatIterator,
+    compile_format, unpack_record
 )
 
 
+# the number of formats whose CompiledFormat the module-level functions keep
+MAXCACHE = 100
+
+
 class Cache:
     def __init__(self, space):
         self.error = space.new_exception_class("struct.error", space.w_Exception)
+        self.compiled = {}      # format -> CompiledFormat
 
 
 def get_error(space):
@@ -34,6 +40,21 @@ def _calcsize(space, format):
     return fmtiter.totalsize
 
 
+def _get_compiled(space, format):
+    """The CompiledFormat of a valid format, cached like CPython caches the
+Struct objects of the module-level functions."""
+    cache = space.fromcache(Cache).compiled
+    try:
+        return cache[format]
+    except KeyError:
+        pass
+    if len(cache) >= MAXCACHE:
+        cache.clear()
+    compiled = compile_format(format)
+    cache[format] = compiled
+    return compiled
+
+
 @unwrap_spec(format='text')
 def calcsize(space, format):
     """Return size of C struct described by format string fmt."""
@@ -119,11 +140,116 @@ fmt, starting at offset. Requires len(buffer[offset:]) >= calcsize(fmt)."""
     return _unpack(space, format, buf)
 
 
+def _unpack_many(space, compiled, size, w_buffer, count, offset, columns):
+    buf = space.getarg_w('s*', w_buffer)
+    length = buf.getlength()
+    if size == 0:
+        raise oefmt(get_error(space),
+                    "cannot unpack many records with a struct of length 0")
+    if offset < 0:
+        offset += length
+    if offset < 0 or offset > length:
+        raise oefmt(get_error(space), "offset out of range")
+    available = (length - offset) // size
+    if count < 0:
+        count = available
+    elif count > available:
+        raise oefmt(get_error(space),
+                    "unpack_many requires a buffer of at least %d bytes",
+                    offset + count * size)
+    try:
+        if columns:
+            fmtiter = ColumnsUnpackFormatIterator(space, buf,
+                                                  len(compiled.ops))
+            for i in range(count):
+                unpack_record(fmtiter, compiled, offset + i * size)
+            return space.newlist([column.wrap(space)
+                                  for column in fmtiter.columns])
+        fmtiter = UnpackFormatIterator(space, buf)
+        result_w = [None] * count
+        for i in range(count):
+            unpack_record(fmtiter, compiled, offset + i * size)
+            result_w[i] = space.newtuple(fmtiter.result_w[:])
+            del fmtiter.result_w[:]
+        return space.newlist(result_w)
+    except StructOverflowError as e:
+        raise OperationError(space.w_OverflowError, space.newtext(e.msg))
+    except StructError as e:
+        raise OperationError(get_error(space), space.newtext(e.msg))
+
+
+@unwrap_spec(format='text', count=int, offset=int, columns=bool)
+def unpack_many(space, format, w_buffer, count=-1, offset=0, columns=False):
+    """Unpack 'count' consecutive records of the buffer, starting at
+'offset', or as many as the buffer holds if 'count' is negative.  Return
+a list of tuples, or if 'columns' is true a list with, for each field of
+the format, the list of its values in all the records."""
+    size = _calcsize(space, format)
+    return _unpack_many(space, _get_compiled(space, format), size, w_buffer,
+                        count, offset, columns)
+
+
+@unwrap_spec(format='text')
+def iter_unpack(space, format, w_buffer):
+    """Return an iterator unpacking the buffer as consecutive records of
+the format.  The buffer size must be a multiple of calcsize(format)."""
+    size = _calcsize(space, format)
+    return W_UnpackIter(space, _get_compiled(space, format), size, w_buffer)
+
+
+class W_UnpackIter(W_Root):
+    def __init__(self, space, compiled, size, w_buffer):
+        buf = space.getarg_w('s*', w_buffer)
+        length = buf.getlength()
+        if size == 0:
+            raise oefmt(get_error(space),
+                        "cannot iteratively unpack with a struct of length 0")
+        if length % size != 0:
+            raise oefmt(get_error(space),
+                        "iterative unpacking requires a buffer of a "
+                        "multiple of %d bytes", size)
+        self.compiled = compiled
+        self.size = size
+        self.w_buffer = w_buffer
+        self.fmtiter = UnpackFormatIterator(space, buf)
+        self.index = 0
+        self.count = length // size
+
+    def descr_iter(self, space):
+        return self
+
+    def descr_next(self, space):
+        if self.index >= self.count:
+            raise OperationError(space.w_StopIteration, space.w_None)
+        fmtiter = self.fmtiter
+        try:
+            unpack_record(fmtiter, self.compiled, self.index * self.size)
+        except StructOverflowError as e:
+            raise OperationError(space.w_OverflowError, space.newtext(e.msg))
+        except StructError as e:
+            raise OperationError(get_error(space), space.newtext(e.msg))
+        self.index += 1
+        w_result = space.newtuple(fmtiter.result_w[:])
+        del fmtiter.result_w[:]
+        return w_result
+
+    def descr_length_hint(self, space):
+        return space.newint(self.count - self.index)
+
+W_UnpackIter.typedef = TypeDef("unpack_iterator",
+    __iter__=interp2app(W_UnpackIter.descr_iter),
+    next=interp2app(W_UnpackIter.descr_next),
+    __length_hint__=interp2app(W_UnpackIter.descr_length_hint),
+)
+W_UnpackIter.typedef.acceptable_as_base_class = False
+
+
 class W_Struct(W_Root):
-    _immutable_fields_ = ["format", "size"]
+    _immutable_fields_ = ["format", "size", "compiled?"]
 
     format = ""
     size = -1
+    compiled = None
 
     def descr__new__(space, w_subtype, __args__):
         return space.allocate_instance(W_Struct, w_subtype)
@@ -132,6 +258,7 @@ class W_Struct(W_Root):
     def descr__init__(self, space, format):
         self.format = format
         self.size = _calcsize(space, format)
+        self.compiled = None
 
     def descr_pack(self, space, args_w):
         return pack(space, jit.promote_string(self.format), args_w)
@@ -147,6 +274,28 @@ class W_Struct(W_Root):
     def descr_unpack_from(self, space, w_buffer, offset=0):
         return unpack_from(space, jit.promote_string(self.format), w_buffer, offset)
 
+    def _get_compiled(self):
+        compiled = self.compiled
+        if compiled is None:
+            compiled = compile_format(self.format)
+            self.compiled = compiled
+        return compiled
+
+    @unwrap_spec(count=int, offset=int, columns=bool)
+    def descr_unpack_many(self, space, w_buffer, count=-1, offset=0,
+                          columns=False):
+        """Unpack 'count' consecutive records of the buffer, starting at
+'offset', or as many as the buffer holds if 'count' is negative.  Return
+a list of tuples, or if 'columns' is true a list with, for each field,
+the list of its values in all the records."""
+        return _unpack_many(space, self._get_compiled(), self.size, w_buffer,
+                            count, offset, columns)
+
+    def descr_iter_unpack(self, space, w_buffer):
+        """Return an iterator unpacking the buffer as consecutive records.
+The buffer size must be a multiple of the struct size."""
+        return W_UnpackIter(space, self._get_compiled(), self.size, w_buffer)
+
 W_Struct.typedef = TypeDef("Struct",
     __new__=interp2app(W_Struct.descr__new__.im_func),
     __init__=interp2app(W_Struct.descr__init__),
@@ -157,8 +306,11 @@ W_Struct.typedef = TypeDef("Struct",
     unpack=interp2app(W_Struct.descr_unpack),
     pack_into=interp2app(W_Struct.descr_pack_into),
     unpack_from=interp2app(W_Struct.descr_unpack_from),
+    unpack_many=interp2app(W_Struct.descr_unpack_many),
+    iter_unpack=interp2app(W_Struct.descr_iter_unpack),
     __weakref__=make_weakref_descr(W_Struct),
 )
 
 def clearcache(space):
-    """No-op on PyPy"""
+    """Clear the internal cache of compiled formats."""
+    space.fromcache(Cache).compiled.clear()
@@ -462,6 +462,85 @@ class AppTestStruct(object):
         assert val == sys.maxint+1
         assert type(val) is long
 
+    def test_iter_unpack(self):
+        struct = self.struct
+        s = struct.Struct('<hxd')
+        data = s.pack(1, 1.5) + s.pack(-2, 2.5) + s.pack(3, -0.5)
+        it = s.iter_unpack(data)
+        assert iter(it) is it
+        assert it.__length_hint__() == 3
+        assert next(it) == (1, 1.5)
+        assert it.__length_hint__() == 2
+        assert list(it) == [(-2, 2.5), (3, -0.5)]
+        raises(StopIteration, next, it)
+        assert list(struct.iter_unpack('<hxd', buffer(data))) == [
+            (1, 1.5), (-2, 2.5), (3, -0.5)]
+        assert list(struct.iter_unpack('b', '')) == []
+        raises(struct.error, s.iter_unpack, data[:-1])
+        raises(struct.error, struct.iter_unpack, '0b', 'abc')
+        raises(struct.error, struct.iter_unpack, 'y', 'abc')
+
+    def test_unpack_many(self):
+        import sys
+        struct = self.struct
+        records = [(i, 'ab%d' % i, i * 0.25, i % 2 == 0, 'c')
+                   for i in range(10)]
+        s = struct.Struct('=i3s d?c')
+        data = ''.join([s.pack(*r) for r in records])
+        assert s.unpack_many(data) == records
+        assert struct.unpack_many('=i3s d?c', data) == records
+        assert s.unpack_many(data, 3) == records[:3]
+        assert s.unpack_many(data, 3, s.size * 2) == records[2:5]
+        assert s.unpack_many(data, offset=s.size * 8) == records[8:]
+        assert s.unpack_many(data + 'xyz') == records
+        assert s.unpack_many(data, offset=-s.size) == records[-1:]
+        assert s.unpack_many(data, 0) == []
+        raises(struct.error, s.unpack_many, data, 11)
+        raises(struct.error, s.unpack_many, data, 1, len(data) + 1)
+        raises(struct.error, struct.unpack_many, '0i', data)
+        # the same through the native format, with its padding
+        s = struct.Struct('i3s d?c')
+        data = ''.join([s.pack(*r) for r in records])
+        assert s.unpack_many(data) == records
+        # re-initializing the Struct changes the format
+        s.__init__('<H')
+        assert s.unpack_many('\x01\x00\x02\x00') == [(1,), (2,)]
+
+    def test_unpack_many_cached_format(self):
+        struct = self.struct
+        data = struct.pack('<4h', 1, 2, 3, 4)
+        for i in range(3):
+            assert struct.unpack_many('<h', data) == [(1,), (2,), (3,), (4,)]
+            assert list(struct.iter_unpack('<2h', data)) == [(1, 2), (3, 4)]
+        # more formats than the cache holds
+        for i in range(1, 250):
+            assert struct.unpack_many('<%dx' % i, 'x' * i) == [()]
+        struct._clearcache()
+        assert struct.unpack_many('<h', data) == [(1,), (2,), (3,), (4,)]
+
+    def test_unpack_many_columns(self):
+        import sys, __pypy__
+        struct = self.struct
+        s = struct.Struct('<iQdc')
+        data = ''.join([s.pack(i, i * 3, i / 2.0, chr(65 + i))
+                        for i in range(5)])
+        ints, longs, floats, chars = s.unpack_many(data, columns=True)
+        assert ints == [0, 1, 2, 3, 4]
+        assert longs == [0, 3, 6, 9, 12]
+        assert floats == [0.0, 0.5, 1.0, 1.5, 2.0]
+        assert chars == ['A', 'B', 'C', 'D', 'E']
+        assert __pypy__.strategy(ints) == 'IntegerListStrategy'
+        assert __pypy__.strategy(longs) == 'IntegerListStrategy'
+        assert __pypy__.strategy(floats) == 'FloatListStrategy'
+        assert s.unpack_many(data, 0, columns=True) == [[], [], [], []]
+        # values that do not fit in an int
+        data = struct.pack('<QQ', 5, 2 * sys.maxint + 1)
+        column, = struct.unpack_many('<Q', data, columns=True)
+        assert column == [5, 2 * sys.maxint + 1]
+        data = struct.pack('<??', True, False)
+        assert struct.unpack_many('<?', data, columns=True) == [
+            [True, False]]
+
 class AppTestStructBuffer(object):
     spaceconfig = dict(usemodules=['struct', '__pypy__'])
 
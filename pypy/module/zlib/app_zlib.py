@@ -0,0 +1,190 @@
+import sys
+
+GZIP_FNAME = 0x08
+
+
+def _le32(value):
+    value &= 0xffffffff
+    return (chr(value & 0xff) + chr((value >> 8) & 0xff) +
+            chr((value >> 16) & 0xff) + chr(value >> 24))
+
+def _cpu_count():
+    import os
+    try:
+        return max(os.sysconf('SC_NPROCESSORS_ONLN'), 1)
+    except (AttributeError, ValueError, OSError):
+        return 1
+
+
+class _Block(object):
+    """One block of the input, compressed in its own thread."""
+
+    def __init__(self, data, level, last, lock):
+        self.data = data
+        self.level = level
+        self.last = last
+        self.result = None
+        self.crc = 0
+        self.error = None
+        self.done = lock
+        if lock is not None:
+            lock.acquire()
+
+    def run(self):
+        import zlib
+        try:
+            # a raw deflate stream; all blocks but the last one end with a
+            # sync flush, so that their concatenation is a single stream
+            c = zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS)
+            if self.last:
+                mode = zlib.Z_FINISH
+            else:
+                mode = zlib.Z_SYNC_FLUSH
+            self.result = c.compress(self.data) + c.flush(mode)
+            self.crc = zlib.crc32(self.data)
+        except:
+            self.error = sys.exc_info()
+        finally:
+            if self.done is not None:
+                self.done.release()
+
+    def wait(self, block):
+        if self.done is not None:
+            if not self.done.acquire(block):
+                return False
+            self.done.release()
+        return True
+
+
+class ParallelCompress(object):
+    """parallel_compressobj([level[, threads[, blocksize[, mtime[, filename]]]]])
+    -- Return a compressor object producing a gzip stream.
+
+The input is cut into blocks of 'blocksize' bytes which are compressed
+independently by up to 'threads' threads (by default, one per CPU), like
+pigz does.  The result is a standard gzip file, slightly larger than with
+a single compressor since no block can refer to the data of the previous
+one.  'mtime' and 'filename' go into the gzip header.
+"""
+
+    def __init__(self, level=-1, threads=0, blocksize=1024*1024, mtime=0,
+                 filename=''):
+        import zlib
+        zlib.compressobj(level)      # check the level
+        if blocksize <= 0:
+            raise ValueError("blocksize must be positive")
+        if threads <= 0:
+            threads = _cpu_count()
+        try:
+            import thread
+        except ImportError:
+            threads = 1
+        self._level = level
+        self._threads = threads
+        self._blocksize = blocksize
+        self._pending = []        # input not compressed yet
+        self._pending_size = 0
+        self._blocks = []         # the blocks being compressed, in order
+        self._output = []         # compressed data not returned yet
+        self._crc = 0
+        self._size = 0
+        self._finished = False
+        flags = 0
+        if filename:
+            flags |= GZIP_FNAME
+        if level == 9:
+            xfl = '\x02'
+        elif level == 1:
+            xfl = '\x04'
+        else:
+            xfl = '\x00'
+        header = ('\x1f\x8b\x08' + chr(flags) + _le32(int(mtime)) +
+                  xfl + '\xff')
+        if filename:
+            header += filename + '\x00'
+        self._output.append(header)
+
+    def compress(self, data):
+        """compress(data) -- Return a string containing data compressed.
+
+Most of the compressed data of the blocks handed to the threads is only
+returned by later calls, or by flush()."""
+        import zlib
+        if self._finished:
+            raise zlib.error("compressor object already flushed")
+        if not isinstance(data, str):
+            data = memoryview(data).tobytes()
+        if data:
+            self._pending.append(data)
+            self._pending_size += len(data)
+        if self._pending_size >= self._blocksize:
+            data = ''.join(self._pending)
+            blocksize = self._blocksize
+            end = len(data) - len(data) % blocksize
+            for start in range(0, end, blocksize):
+                self._start_block(data[start:start + blocksize], False)
+            self._pending = [data[end:]]
+            self._pending_size = len(data) - end
+        return self._collect(False)
+
+    def flush(self, mode=None):
+        """flush([mode]) -- Return a string containing the remaining
+compressed data.
+
+With mode Z_SYNC_FLUSH or Z_FULL_FLUSH, the data given so far is
+compressed and returned, and the compressor can still be used.  With the
+default mode Z_FINISH, the gzip trailer is added and the compressor
+cannot be used any more."""
+        import zlib
+        if mode is None:
+            mode = zlib.Z_FINISH
+        if self._finished:
+            raise zlib.error("compressor object already flushed")
+        if mode == zlib.Z_NO_FLUSH:
+            return ''
+        last = mode == zlib.Z_FINISH
+        if self._pending_size > 0 or last:
+            self._start_block(''.join(self._pending), last)
+            self._pending = []
+            self._pending_size = 0
+        result = self._collect(True)
+        if last:
+            self._finished = True
+            result += _le32(self._crc) + _le32(self._size)
+        return result
+
+    def _start_block(self, data, last):
+        # at most 'threads' blocks are compressed at the same time
+        while len(self._blocks) >= self._threads:
+            self._blocks[0].wait(True)
+            self._pop_block()
+        if self._threads > 1:
+            import thread
+            block = _Block(data, self._level, last, thread.allocate_lock())
+            thread.start_new_thread(block.run, ())
+        else:
+            block = _Block(data, self._level, last, None)
+            block.run()
+        self._blocks.append(block)
+
+    def _pop_block(self):
+        """Remove the finished block at the front of the queue and keep
+        its output."""
+        import zlib
+        block = self._blocks.pop(0)
+        if block.error is not None:
+            self._finished = True
+            raise block.error[0], block.error[1], block.error[2]
+        self._output.append(block.result)
+        self._crc = zlib._crc32_combine(self._crc, block.crc,
+                                        len(block.data))
+        self._size += len(block.data)
+
+    def _collect(self, wait):
+        """Return the output of the finished blocks at the front of the
+        queue.  If 'wait' is true, wait for all the blocks."""
+        while self._blocks and self._blocks[0].wait(wait):
+            self._pop_block()
+        output = ''.join(self._output)
+        self._output = []
+        return output
@@ -56,6 +56,22 @@ def adler32(space, string, start=rzlib.ADLER32_DEFAULT_START):
     return space.newint(checksum)
 
 
+@unwrap_spec(crc1='truncatedint_w', crc2='truncatedint_w', length=int)
+def crc32_combine(space, crc1, crc2, length):
+    """
+    _crc32_combine(crc1, crc2, length) -- Compute the CRC-32 checksum of
+    the concatenation of two strings, given the checksum of each of them
+    and the length of the second one.
+    """
+    if length < 0:
+        raise oefmt(space.w_ValueError, "negative length")
+    checksum = rzlib.crc32_combine(r_uint(crc1), r_uint(crc2), length)
+    # See comments in crc32() for the following line
+    checksum = unsigned_to_signed_32bit(checksum)
+
+    return space.newint(checksum)
+
+
 class Cache:
     def __init__(self, space):
         self.w_error = space.new_exception_class("zlib.error")
@@ -18,6 +18,8 @@ compressobj([level]) -- Return a compressor object.
 crc32(string[, start]) -- Compute a CRC-32 checksum.
 decompress(string,[wbits],[bufsize]) -- Decompresses a compressed string.
 decompressobj([wbits]) -- Return a decompressor object.
+parallel_compressobj([level[, threads[, blocksize[, mtime[, filename]]]]])
+ -- Return a multi-threaded gzip compressor.
 
 'wbits' is window buffer size.
 Compressor objects support compress() and flush() methods; decompressor
@@ -30,11 +32,13 @@ objects support decompress() and flush()."""
         'decompressobj': 'interp_zlib.Decompress',
         'compress': 'interp_zlib.compress',
         'decompress': 'interp_zlib.decompress',
+        '_crc32_combine': 'interp_zlib.crc32_combine',
         '__version__': 'space.newtext("1.0")',
         'error': 'space.fromcache(interp_zlib.Cache).w_error',
         }
 
     appleveldefs = {
+        'parallel_compressobj': 'app_zlib.ParallelCompress',
         }
 
 
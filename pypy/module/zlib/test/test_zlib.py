@@ -365,3 +365,96 @@ class AppTestZlib(object):
         dco.flush()
         # multiple flush calls should not raise
         dco.flush()
+
+
+class AppTestParallelCompress(object):
+    spaceconfig = dict(usemodules=['zlib', 'thread'])
+
+    def setup_class(cls):
+        import random
+        r = random.Random(42)
+        words = ['alpha', 'beta', 'gamma', 'delta', 'epsilon', '\n']
+        data = ' '.join([r.choice(words) for i in range(3000)])
+        cls.w_data = cls.space.newbytes(data)
+
+    def test_crc32_combine(self):
+        import zlib
+        a, b = self.data[:1000], self.data[1000:]
+        assert zlib._crc32_combine(zlib.crc32(a), zlib.crc32(b),
+                                   len(b)) == zlib.crc32(self.data)
+        raises(ValueError, zlib._crc32_combine, 0, 0, -1)
+
+    def test_gzip_stream(self):
+        import zlib
+        for threads in [1, 3]:
+            c = zlib.parallel_compressobj(9, threads=threads, blocksize=1000,
+                                          mtime=1234, filename='data.txt')
+            parts = [c.compress(self.data[i:i + 700])
+                     for i in range(0, len(self.data), 700)]
+            parts.append(c.flush())
+            raises(zlib.error, c.compress, 'x')
+            raises(zlib.error, c.flush)
+            stream = ''.join(parts)
+            assert stream.startswith('\x1f\x8b\x08\x08\xd2\x04\x00\x00'
+                                     '\x02\xffdata.txt\x00')
+            assert zlib.decompress(stream, 16 + zlib.MAX_WBITS) == self.data
+            # the trailer
+            crc = zlib.crc32(self.data) & 0xffffffff
+            size = len(self.data)
+            assert [ord(ch) for ch in stream[-8:]] == [
+                (crc >> shift) & 0xff for shift in (0, 8, 16, 24)] + [
+                (size >> shift) & 0xff for shift in (0, 8, 16, 24)]
+
+    def test_empty_and_sync_flush(self):
+        import zlib
+        c = zlib.parallel_compressobj(threads=2)
+        assert zlib.decompress(c.flush(), 31) == ''
+        c = zlib.parallel_compressobj(threads=2, blocksize=100)
+        first = c.compress(self.data[:150])
+        first += c.flush(zlib.Z_SYNC_FLUSH)
+        d = zlib.decompressobj(31)
+        assert d.decompress(first) == self.data[:150]
+        assert c.flush(zlib.Z_NO_FLUSH) == ''
+        rest = c.compress(buffer(self.data, 150)) + c.flush()
+        assert d.decompress(rest) == self.data[150:]
+        raises(ValueError, zlib.parallel_compressobj, blocksize=0)
+        raises(ValueError, zlib.parallel_compressobj, 42)
+
+    def test_threads_limit(self):
+        import zlib, thread, time
+        lock = thread.allocate_lock()
+        state = {'running': 0, 'max': 0, 'started': 0}
+        original = thread.start_new_thread
+        class Done(object):
+            # the lock of a block, released by its thread when it is done
+            def __init__(self, done):
+                self.done = done
+                self.finished = False
+            def acquire(self, *args):
+                return self.done.acquire(*args)
+            def release(self):
+                if not self.finished:
+                    self.finished = True
+                    with lock:
+                        state['running'] -= 1
+                self.done.release()
+        def start_new_thread(function, args):
+            block = function.im_self
+            block.done = Done(block.done)
+            def run():
+                with lock:
+                    state['running'] += 1
+                    state['max'] = max(state['max'], state['running'])
+                time.sleep(0.01)
+                function(*args)
+            state['started'] += 1
+            return original(run, ())
+        thread.start_new_thread = start_new_thread
+        try:
+            c = zlib.parallel_compressobj(threads=2, blocksize=1000)
+            stream = c.compress('x' * 20000) + c.flush()
+        finally:
+            thread.start_new_thread = original
+        assert zlib.decompress(stream, 31) == 'x' * 20000
+        assert state['started'] == 21
+        assert state['max'] <= 2
@@ -0,0 +1,37 @@
+""" timings for list.sort() and sorted() with key=, which sort on the
+unwrapped keys when they are all ints, all floats or all strings
+"""
+
+import random, time
+
+def count_operation(name, function):
+    t0 = time.time()
+    retval = function()
+    tk = time.time()
+    print name, " takes: %f" % (tk - t0)
+    return retval
+
+def bench_sort_key(SIZE = 200000, REPEAT = 5):
+    records = [(random.randrange(SIZE), random.random(), str(random.random()))
+               for i in xrange(SIZE)]
+
+    def sort_by(key, reverse=False):
+        for i in xrange(REPEAT):
+            l = records[:]
+            l.sort(key=key, reverse=reverse)
+        return l
+
+    count_operation("Int keys", lambda : sort_by(lambda r: r[0]))
+    count_operation("Float keys", lambda : sort_by(lambda r: r[1]))
+    count_operation("String keys", lambda : sort_by(lambda r: r[2]))
+    count_operation("Int keys, reversed",
+                    lambda : sort_by(lambda r: r[0], True))
+    # keys of mixed types take the generic path
+    count_operation("Mixed keys",
+                    lambda : sort_by(lambda r: r[0] if r[0] & 1 else r[1]))
+    count_operation("sorted(), int keys",
+                    lambda : [sorted(records, key=lambda r: r[0])
+                              for i in xrange(REPEAT)])
+
+if __name__ == '__main__':
+    bench_sort_key()
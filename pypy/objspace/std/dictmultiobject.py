@@ -1,5 +1,7 @@
 """The builtin dict implementation"""
 
+import math
+
 from rpython.rlib import jit, rerased, objectmodel, rutf8
 from rpython.rlib.debug import mark_dict_non_null
 from rpython.rlib.objectmodel import newlist_hint, r_dict, specialize
@@ -666,6 +668,7 @@ class EmptyDictStrategy(DictStrategy):
         return self.erase(None)
 
     def switch_to_correct_strategy(self, w_dict, w_key):
+        from pypy.objspace.std.tupledict import is_simple_tuple_key
         if type(w_key) is self.space.StringObjectCls:
             self.switch_to_bytes_strategy(w_dict)
             return
@@ -675,6 +678,12 @@ class EmptyDictStrategy(DictStrategy):
         w_type = self.space.type(w_key)
         if self.space.is_w(w_type, self.space.w_int):
             self.switch_to_int_strategy(w_dict)
+        elif (self.space.is_w(w_type, self.space.w_float) and
+                not math.isnan(self.space.float_w(w_key))):
+            self.switch_to_float_strategy(w_dict)
+        elif (self.space.is_w(w_type, self.space.w_tuple) and
+                is_simple_tuple_key(w_key)):
+            self.switch_to_tuple_strategy(w_dict)
         elif w_type.compares_by_identity():
             self.switch_to_identity_strategy(w_dict)
         else:
@@ -698,6 +707,19 @@ class EmptyDictStrategy(DictStrategy):
         w_dict.set_strategy(strategy)
         w_dict.dstorage = storage
 
+    def switch_to_float_strategy(self, w_dict):
+        strategy = self.space.fromcache(FloatDictStrategy)
+        storage = strategy.get_empty_storage()
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = storage
+
+    def switch_to_tuple_strategy(self, w_dict):
+        from pypy.objspace.std.tupledict import TupleDictStrategy
+        strategy = self.space.fromcache(TupleDictStrategy)
+        storage = strategy.get_empty_storage()
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = storage
+
     def switch_to_identity_strategy(self, w_dict):
         from pypy.objspace.std.identitydict import IdentityDictStrategy
         strategy = self.space.fromcache(IdentityDictStrategy)
@@ -1334,6 +1356,61 @@ class IntDictStrategy(AbstractTypedStrategy, DictStrategy):
 create_iterator_classes(IntDictStrategy)
 
 
+# ints in this range are exactly representable as floats
+MAX_EXACT_FLOAT_INT = 2 ** 53
+
+class FloatDictStrategy(AbstractTypedStrategy, DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("float")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def wrap(self, unwrapped):
+        return self.space.newfloat(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.float_w(wrapped)
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def is_correct_type(self, w_obj):
+        # NaNs are not equal to themselves, and a dict must still find
+        # them by identity: they go to the ObjectDictStrategy
+        space = self.space
+        return (space.is_w(space.type(w_obj), space.w_float) and
+                not math.isnan(space.float_w(w_obj)))
+
+    def _never_equal_to(self, w_lookup_type):
+        space = self.space
+        return (space.is_w(w_lookup_type, space.w_NoneType) or
+                space.is_w(w_lookup_type, space.w_bytes) or
+                space.is_w(w_lookup_type, space.w_unicode)
+                )
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        w_type = space.type(w_key)
+        if space.is_w(w_type, space.w_float):
+            floatval = space.float_w(w_key)
+            if math.isnan(floatval):
+                return None   # a NaN can only be found by identity
+            return self.unerase(w_dict.dstorage).get(floatval, None)
+        elif space.is_w(w_type, space.w_int):
+            # look for 1.0 when given 1, as long as the conversion is exact
+            intval = space.int_w(w_key)
+            if -MAX_EXACT_FLOAT_INT <= intval <= MAX_EXACT_FLOAT_INT:
+                return self.unerase(w_dict.dstorage).get(float(intval), None)
+        return AbstractTypedStrategy.getitem(self, w_dict, w_key)
+
+    def wrapkey(space, key):
+        return space.newfloat(key)
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_float(self.unerase(w_dict.dstorage).keys())
+
+create_iterator_classes(FloatDictStrategy)
+
+
 def update1(space, w_dict, w_data):
     if isinstance(w_data, W_DictMultiObject):    # optimization case only
         update1_dict_dict(space, w_dict, w_data)
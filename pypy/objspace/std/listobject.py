@@ -33,6 +33,7 @@ from pypy.objspace.std.iterobject import (
     W_FastListIterObject, W_ReverseSeqIterObject)
 from pypy.objspace.std.sliceobject import (
     W_SliceObject, normalize_simple_slice, unwrap_start_stop)
+from pypy.objspace.std.specialisedtupleobject import Cls_ff, Cls_ii
 from pypy.objspace.std.tupleobject import W_AbstractTupleObject
 from pypy.objspace.std.unicodeobject import W_UnicodeObject
 from pypy.objspace.std.util import get_positive_index, negate
@@ -116,6 +117,22 @@ def get_strategy_from_list_objects(space, list_w, sizehint):
         else:
             return space.fromcache(FloatListStrategy)
 
+    elif isinstance(w_firstobj, Cls_ii):
+        # check for all-(int, int) tuples
+        for i in range(1, len(list_w)):
+            if not isinstance(list_w[i], Cls_ii):
+                break
+        else:
+            return space.fromcache(IntPairListStrategy)
+
+    elif isinstance(w_firstobj, Cls_ff):
+        # check for all-(float, float) tuples
+        for i in range(1, len(list_w)):
+            if not isinstance(list_w[i], Cls_ff):
+                break
+        else:
+            return space.fromcache(FloatPairListStrategy)
+
     if check_int_or_float:
         for w_obj in list_w:
             if type(w_obj) is W_IntObject:
@@ -714,23 +731,32 @@ class W_ListObject(W_Root):
             self.__init__(space, [])
 
             # wrap each item in a KeyContainer if needed
+            sorted_by_keys = False
             if has_key:
+                keys_w = [None] * sorter.listlength
                 for i in range(sorter.listlength):
-                    w_item = sorter.list[i]
-                    w_keyitem = space.call_function(w_key, w_item)
-                    sorter.list[i] = KeyContainer(w_keyitem, w_item)
-
-            # Reverse sort stability achieved by initially reversing the list,
-            # applying a stable forward sort, then reversing the final result.
-            if reverse:
-                sorter.list.reverse()
-
-            # perform the sort
-            sorter.sort()
-
-            # reverse again
-            if reverse:
-                sorter.list.reverse()
+                    keys_w[i] = space.call_function(w_key, sorter.list[i])
+                if not has_cmp:
+                    sorted_by_keys = sort_by_unwrapped_keys(
+                        space, sorter.list, keys_w, reverse)
+                if not sorted_by_keys:
+                    for i in range(sorter.listlength):
+                        sorter.list[i] = KeyContainer(keys_w[i],
+                                                      sorter.list[i])
+
+            if not sorted_by_keys:
+                # Reverse sort stability achieved by initially reversing the
+                # list, applying a stable forward sort, then reversing the
+                # final result.
+                if reverse:
+                    sorter.list.reverse()
+
+                # perform the sort
+                sorter.sort()
+
+                # reverse again
+                if reverse:
+                    sorter.list.reverse()
 
         finally:
             # unwrap each item if needed
@@ -953,6 +979,10 @@ class EmptyListStrategy(ListStrategy):
             strategy = self.space.fromcache(AsciiListStrategy)
         elif type(w_item) is W_FloatObject:
             strategy = self.space.fromcache(FloatListStrategy)
+        elif isinstance(w_item, Cls_ii):
+            strategy = self.space.fromcache(IntPairListStrategy)
+        elif isinstance(w_item, Cls_ff):
+            strategy = self.space.fromcache(FloatPairListStrategy)
         else:
             strategy = self.space.fromcache(ObjectListStrategy)
 
@@ -2024,6 +2054,301 @@ class AsciiListStrategy(ListStrategy):
     def getitems_ascii(self, w_list):
         return self.unerase(w_list.lstorage)
 
+
+class AbstractPairListStrategy(object):
+    """Lists of tuples of two ints or two floats, like the rows returned
+    by zip() or the points of a curve.  The items of the tuples are stored
+    one after the other in a single flat list, and the tuples are rebuilt
+    by getitem(); they are identical to the original ones (see is_w() in
+    specialisedtupleobject.py).  Any other item switches the list to the
+    ObjectListStrategy."""
+
+    def wrap(self, first, second):
+        raise NotImplementedError
+
+    def unwrap(self, w_item):
+        """Returns the two items of w_item, as a tuple."""
+        raise NotImplementedError
+
+    @staticmethod
+    def unerase(storage):
+        raise NotImplementedError("abstract base class")
+
+    @staticmethod
+    def erase(obj):
+        raise NotImplementedError("abstract base class")
+
+    def is_correct_type(self, w_obj):
+        raise NotImplementedError("abstract base class")
+
+    def list_is_correct_type(self, w_list):
+        return w_list.strategy is self
+
+    def item_eq(self, a, b):
+        return a == b
+
+    def init_from_list_w(self, w_list, list_w):
+        l = newlist_hint(2 * len(list_w))
+        for w_item in list_w:
+            first, second = self.unwrap(w_item)
+            l.append(first)
+            l.append(second)
+        w_list.lstorage = self.erase(l)
+
+    def get_empty_storage(self, sizehint):
+        if sizehint == -1:
+            return self.erase([])
+        return self.erase(newlist_hint(2 * sizehint))
+
+    def clone(self, w_list):
+        l = self.unerase(w_list.lstorage)
+        storage = self.erase(l[:])
+        return W_ListObject.from_storage_and_strategy(
+                self.space, storage, self)
+
+    def _resize_hint(self, w_list, hint):
+        resizelist_hint(self.unerase(w_list.lstorage), 2 * hint)
+
+    def copy_into(self, w_list, w_other):
+        w_other.strategy = self
+        items = self.unerase(w_list.lstorage)[:]
+        w_other.lstorage = self.erase(items)
+
+    def getstorage_copy(self, w_list):
+        items = self.unerase(w_list.lstorage)[:]
+        return self.erase(items)
+
+    def find(self, w_list, w_obj, start, stop):
+        if not self.is_correct_type(w_obj):
+            return ListStrategy.find(self, w_list, w_obj, start, stop)
+        first, second = self.unwrap(w_obj)
+        l = self.unerase(w_list.lstorage)
+        for i in range(start, min(stop, len(l) >> 1)):
+            if (self.item_eq(l[2 * i], first) and
+                    self.item_eq(l[2 * i + 1], second)):
+                return i
+        raise ValueError
+
+    def length(self, w_list):
+        return len(self.unerase(w_list.lstorage)) >> 1
+
+    def _position(self, l, index):
+        length = len(l) >> 1
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError
+        return 2 * index
+
+    def getitem(self, w_list, index):
+        l = self.unerase(w_list.lstorage)
+        pos = self._position(l, index)
+        return self.wrap(l[pos], l[pos + 1])
+
+    @jit.look_inside_iff(lambda self, w_list:
+            jit.loop_unrolling_heuristic(w_list, w_list.length(),
+                                         UNROLL_CUTOFF))
+    def getitems_copy(self, w_list):
+        l = self.unerase(w_list.lstorage)
+        return [self.wrap(l[2 * i], l[2 * i + 1])
+                for i in range(len(l) >> 1)]
+
+    @jit.unroll_safe
+    def getitems_unroll(self, w_list):
+        l = self.unerase(w_list.lstorage)
+        return [self.wrap(l[2 * i], l[2 * i + 1])
+                for i in range(len(l) >> 1)]
+
+    @jit.look_inside_iff(lambda self, w_list:
+            jit.loop_unrolling_heuristic(w_list, w_list.length(),
+                                         UNROLL_CUTOFF))
+    def getitems_fixedsize(self, w_list):
+        return self.getitems_unroll(w_list)
+
+    def getslice(self, w_list, start, stop, step, length):
+        l = self.unerase(w_list.lstorage)
+        if step == 1 and 0 <= start <= stop:
+            assert start >= 0
+            assert stop >= 0
+            sublist = l[2 * start:2 * stop]
+        else:
+            sublist = newlist_hint(2 * length)
+            for i in range(length):
+                pos = self._position(l, start)
+                sublist.append(l[pos])
+                sublist.append(l[pos + 1])
+                start += step
+        return W_ListObject.from_storage_and_strategy(
+                self.space, self.erase(sublist), self)
+
+    def append(self, w_list, w_item):
+        if self.is_correct_type(w_item):
+            first, second = self.unwrap(w_item)
+            l = self.unerase(w_list.lstorage)
+            l.append(first)
+            l.append(second)
+            return
+        w_list.switch_to_object_strategy()
+        w_list.append(w_item)
+
+    def insert(self, w_list, index, w_item):
+        if self.is_correct_type(w_item):
+            first, second = self.unwrap(w_item)
+            l = self.unerase(w_list.lstorage)
+            l.insert(2 * index, second)
+            l.insert(2 * index, first)
+            return
+        w_list.switch_to_object_strategy()
+        w_list.insert(index, w_item)
+
+    def _extend_from_list(self, w_list, w_other):
+        if self.list_is_correct_type(w_other):
+            l = self.unerase(w_list.lstorage)
+            l += self.unerase(w_other.lstorage)
+            return
+        elif w_other.strategy.is_empty_strategy():
+            return
+        w_other = w_other._temporarily_as_objects()
+        w_list.switch_to_object_strategy()
+        w_list.extend(w_other)
+
+    def setitem(self, w_list, index, w_item):
+        if self.is_correct_type(w_item):
+            first, second = self.unwrap(w_item)
+            l = self.unerase(w_list.lstorage)
+            pos = self._position(l, index)
+            l[pos] = first
+            l[pos + 1] = second
+            return
+        w_list.switch_to_object_strategy()
+        w_list.setitem(index, w_item)
+
+    def setslice(self, w_list, start, step, slicelength, w_other):
+        if (step == 1 and start >= 0 and (self.list_is_correct_type(w_other)
+                or w_other.strategy.is_empty_strategy())):
+            l = self.unerase(w_list.lstorage)
+            if w_other.strategy.is_empty_strategy():
+                other = []
+            else:
+                other = self.unerase(w_other.lstorage)
+            stop = start + slicelength
+            assert start >= 0
+            assert stop >= 0
+            newitems = l[:2 * start] + other + l[2 * stop:]
+            w_list.lstorage = self.erase(newitems)
+            return
+        w_list.switch_to_object_strategy()
+        w_list.setslice(start, step, slicelength, w_other)
+
+    def deleteslice(self, w_list, start, step, slicelength):
+        if slicelength == 0:
+            return
+        if step < 0:
+            start = start + step * (slicelength - 1)
+            step = -step
+        l = self.unerase(w_list.lstorage)
+        if step == 1:
+            assert start >= 0
+            del l[2 * start:2 * (start + slicelength)]
+            return
+        newitems = newlist_hint(len(l) - 2 * slicelength)
+        stop = start + step * slicelength
+        for i in range(len(l) >> 1):
+            if start <= i < stop and (i - start) % step == 0:
+                continue
+            newitems.append(l[2 * i])
+            newitems.append(l[2 * i + 1])
+        w_list.lstorage = self.erase(newitems)
+
+    def pop_end(self, w_list):
+        l = self.unerase(w_list.lstorage)
+        second = l.pop()
+        first = l.pop()
+        return self.wrap(first, second)
+
+    def pop(self, w_list, index):
+        l = self.unerase(w_list.lstorage)
+        pos = self._position(l, index)
+        w_item = self.wrap(l[pos], l[pos + 1])
+        del l[pos:pos + 2]
+        return w_item
+
+    def mul(self, w_list, times):
+        l = self.unerase(w_list.lstorage)
+        return W_ListObject.from_storage_and_strategy(
+            self.space, self.erase(l * times), self)
+
+    def inplace_mul(self, w_list, times):
+        l = self.unerase(w_list.lstorage)
+        l *= times
+
+    def reverse(self, w_list):
+        l = self.unerase(w_list.lstorage)
+        l.reverse()
+        for i in range(0, len(l), 2):
+            l[i], l[i + 1] = l[i + 1], l[i]
+
+    def sort(self, w_list, reverse):
+        # sort the indexes of the tuples, comparing them like tuples
+        l = self.unerase(w_list.lstorage)
+        length = len(l) >> 1
+        sorter = self.make_sorter(_sort_indexes(length, reverse), length)
+        sorter.items = l
+        sorter.sort()
+        indexes = sorter.list
+        if reverse:
+            indexes.reverse()
+        newitems = newlist_hint(2 * length)
+        for i in indexes:
+            newitems.append(l[2 * i])
+            newitems.append(l[2 * i + 1])
+        w_list.lstorage = self.erase(newitems)
+
+
+class IntPairListStrategy(ListStrategy):
+    import_from_mixin(AbstractPairListStrategy)
+
+    def wrap(self, first, second):
+        return Cls_ii(self.space, first, second)
+
+    erase, unerase = rerased.new_erasing_pair("intpair")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def unwrap(self, w_item):
+        assert isinstance(w_item, Cls_ii)
+        return w_item.value0, w_item.value1
+
+    def is_correct_type(self, w_obj):
+        return isinstance(w_obj, Cls_ii)
+
+    def make_sorter(self, indexes, length):
+        return IntPairSort(indexes, length)
+
+
+class FloatPairListStrategy(ListStrategy):
+    import_from_mixin(AbstractPairListStrategy)
+
+    def wrap(self, first, second):
+        return Cls_ff(self.space, first, second)
+
+    erase, unerase = rerased.new_erasing_pair("floatpair")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def unwrap(self, w_item):
+        assert isinstance(w_item, Cls_ff)
+        return w_item.value0, w_item.value1
+
+    def is_correct_type(self, w_obj):
+        return isinstance(w_obj, Cls_ff)
+
+    def item_eq(self, a, b):
+        return _float_items_eq(a, b)
+
+    def make_sorter(self, indexes, length):
+        return FloatPairSort(indexes, length)
+
 # _______________________________________________________
 
 init_signature = Signature(['sequence'], None, None)
@@ -2057,6 +2382,11 @@ IntBaseTimSort = make_timsort_class()
 FloatBaseTimSort = make_timsort_class()
 IntOrFloatBaseTimSort = make_timsort_class()
 UnicodeBaseTimSort = make_timsort_class()
+IntKeyBaseTimSort = make_timsort_class()
+FloatKeyBaseTimSort = make_timsort_class()
+BytesKeyBaseTimSort = make_timsort_class()
+IntPairBaseTimSort = make_timsort_class()
+FloatPairBaseTimSort = make_timsort_class()
 
 
 class KeyContainer(W_Root):
@@ -2127,6 +2457,105 @@ class CustomKeyCompareSort(CustomCompareSort):
         return CustomCompareSort.lt(self, a.w_key, b.w_key)
 
 
+# Sorting with key=: when all the keys are exact ints, exact floats or exact
+# strings, they are copied into an unwrapped list and we sort the indexes of
+# the items, comparing the unwrapped keys directly.
+
+class IntKeySort(IntKeyBaseTimSort):
+    def lt(self, a, b):
+        return self.keys[a] < self.keys[b]
+
+
+class FloatKeySort(FloatKeyBaseTimSort):
+    def lt(self, a, b):
+        return self.keys[a] < self.keys[b]
+
+
+class BytesKeySort(BytesKeyBaseTimSort):
+    def lt(self, a, b):
+        return self.keys[a] < self.keys[b]
+
+
+def sort_by_unwrapped_keys(space, items_w, keys_w, reverse):
+    """Sort items_w in place by the corresponding keys_w, if these keys
+    all have the same primitive type.  Returns False if they don't, without
+    changing items_w."""
+    length = len(keys_w)
+    if length < 2:
+        return length == 1
+    w_first = keys_w[0]
+    if type(w_first) is W_IntObject:
+        intkeys = [0] * length
+        for i in range(length):
+            w_keyitem = keys_w[i]
+            if type(w_keyitem) is not W_IntObject:
+                return False
+            intkeys[i] = space.int_w(w_keyitem)
+        sorter = IntKeySort(_sort_indexes(length, reverse), length)
+        sorter.keys = intkeys
+    elif type(w_first) is W_FloatObject:
+        floatkeys = [0.0] * length
+        for i in range(length):
+            w_keyitem = keys_w[i]
+            if type(w_keyitem) is not W_FloatObject:
+                return False
+            floatkeys[i] = space.float_w(w_keyitem)
+        sorter = FloatKeySort(_sort_indexes(length, reverse), length)
+        sorter.keys = floatkeys
+    elif type(w_first) is W_BytesObject:
+        byteskeys = [''] * length
+        for i in range(length):
+            w_keyitem = keys_w[i]
+            if type(w_keyitem) is not W_BytesObject:
+                return False
+            byteskeys[i] = space.bytes_w(w_keyitem)
+        sorter = BytesKeySort(_sort_indexes(length, reverse), length)
+        sorter.keys = byteskeys
+    else:
+        return False
+    sorter.sort()
+    indexes = sorter.list
+    # stable reverse sort, like in descr_sort()
+    if reverse:
+        indexes.reverse()
+    sorted_w = [items_w[index] for index in indexes]
+    for i in range(length):
+        items_w[i] = sorted_w[i]
+    return True
+
+# Sorting lists of pairs: 'items' is the flat storage of the list, and we
+# sort the indexes of the pairs.  Like tuple comparison, the first item
+# that differs decides.
+
+class IntPairSort(IntPairBaseTimSort):
+    def lt(self, a, b):
+        first_a = self.items[2 * a]
+        first_b = self.items[2 * b]
+        if first_a != first_b:
+            return first_a < first_b
+        return self.items[2 * a + 1] < self.items[2 * b + 1]
+
+
+class FloatPairSort(FloatPairBaseTimSort):
+    def lt(self, a, b):
+        first_a = self.items[2 * a]
+        first_b = self.items[2 * b]
+        if not _float_items_eq(first_a, first_b):
+            return first_a < first_b
+        return self.items[2 * a + 1] < self.items[2 * b + 1]
+
+
+def _float_items_eq(a, b):
+    # equal, or identical like two NaNs with the same bits
+    return a == b or (longlong2float.float2longlong(a) ==
+                      longlong2float.float2longlong(b))
+
+def _sort_indexes(length, reverse):
+    if reverse:
+        return range(length - 1, -1, -1)
+    return range(length)
+
+
 W_ListObject.typedef = TypeDef("list",
     __doc__ = """list() -> new empty list
 list(iterable) -> new list initialized from iterable's items""",
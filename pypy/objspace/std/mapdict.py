@@ -10,6 +10,8 @@ from pypy.objspace.std.dictmultiobject import (
     W_DictObject, BytesDictStrategy, UnicodeDictStrategy
 )
 from pypy.objspace.std.typeobject import MutableCell
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.floatobject import W_FloatObject
 
 
 erase_item, unerase_item = rerased.new_erasing_pair("mapdict storage item")
@@ -29,6 +31,19 @@ NUM_DIGITS_POW2 = 1 << NUM_DIGITS
 # dict)
 LIMIT_MAP_ATTRIBUTES = 80
 
+# how the values of an attribute are stored: as W_Root, or unboxed in an
+# UnboxedStorage (only as long as all of them are exact ints, or floats)
+BOXED = 0
+UNBOXED_INT = 1
+UNBOXED_FLOAT = 2
+
+def unboxed_type(w_value):
+    if type(w_value) is W_IntObject:
+        return UNBOXED_INT
+    if type(w_value) is W_FloatObject:
+        return UNBOXED_FLOAT
+    return BOXED
+
 
 class AbstractAttribute(object):
     _immutable_fields_ = ['terminator']
@@ -49,9 +64,11 @@ class AbstractAttribute(object):
             jit.isconstant(obj) and
             not attr.ever_mutated
         ):
+            if isinstance(attr, UnboxedPlainAttribute):
+                return attr._pure_unboxed_read(obj)
             return self._pure_mapdict_read_storage(obj, attr.storageindex)
         else:
-            return obj._mapdict_read_storage(attr.storageindex)
+            return attr._direct_read(obj)
 
     @jit.elidable
     def _pure_mapdict_read_storage(self, obj, storageindex):
@@ -63,7 +80,7 @@ class AbstractAttribute(object):
             return self.terminator._write_terminator(obj, name, index, w_value)
         if not attr.ever_mutated:
             attr.ever_mutated = True
-        obj._mapdict_write_storage(attr.storageindex, w_value)
+        attr._direct_write(obj, w_value)
         return True
 
     def delete(self, obj, name, index):
@@ -120,6 +137,11 @@ class AbstractAttribute(object):
     def length(self):
         raise NotImplementedError("abstract base class")
 
+    def num_attributes(self):
+        # the number of attributes, which can be more than length() when some
+        # of them are unboxed
+        return 0
+
     def get_terminator(self):
         return self.terminator
 
@@ -134,13 +156,19 @@ class AbstractAttribute(object):
         return None
 
     @jit.elidable
-    def _get_new_attr(self, name, index):
+    def _get_new_attr(self, name, index, typ):
+        # 'typ' is the unboxed type of the first value written to the
+        # attribute.  It only matters when the attribute is created: later
+        # values of another type are handled by UnboxedPlainAttribute
         cache = self.cache_attrs
         if cache is None:
             cache = self.cache_attrs = {}
         attr = cache.get((name, index), None)
         if attr is None:
-            attr = PlainAttribute(name, index, self)
+            if typ == BOXED or index == SPECIAL:
+                attr = PlainAttribute(name, index, self)
+            else:
+                attr = UnboxedPlainAttribute(name, index, self, typ)
             cache[name, index] = attr
         return attr
 
@@ -155,7 +183,7 @@ class AbstractAttribute(object):
             oldattr._size_estimate = size_est
 
     def _add_attr_without_reordering(self, obj, name, index, w_value):
-        attr = self._get_new_attr(name, index)
+        attr = self._get_new_attr(name, index, unboxed_type(w_value))
         attr._switch_map_and_write_storage(obj, w_value)
 
     @jit.unroll_safe
@@ -170,11 +198,11 @@ class AbstractAttribute(object):
         # the order is important here: first change the map, then the storage,
         # for the benefit of the special subclasses
         obj._set_mapdict_map(self)
-        obj._mapdict_write_storage(self.storageindex, w_value)
+        self._write_new(obj, w_value)
 
 
     @jit.elidable
-    def _find_branch_to_move_into(self, name, index):
+    def _find_branch_to_move_into(self, name, index, typ):
         # walk up the map chain to find an ancestor with lower order that
         # already has the current name as a child inserted
         current_order = sys.maxint
@@ -189,7 +217,7 @@ class AbstractAttribute(object):
                 # we reached the top, so we didn't find it anywhere,
                 # just add it to the top attribute
                 if not isinstance(current, PlainAttribute):
-                    return 0, self._get_new_attr(name, index)
+                    return 0, self._get_new_attr(name, index, typ)
 
             else:
                 return number_to_readd, attr
@@ -226,17 +254,17 @@ class AbstractAttribute(object):
         stack_index = 0
         while True:
             current = self
-            number_to_readd, attr = self._find_branch_to_move_into(name, index)
+            number_to_readd, attr = self._find_branch_to_move_into(
+                    name, index, unboxed_type(w_value))
             # we found the attributes further up, need to save the
             # previous values of the attributes we passed
             if number_to_readd:
                 if stack is None:
-                    stack = [erase_map(None)] * (self.length() * 2)
+                    stack = [erase_map(None)] * (self.num_attributes() * 2)
                 current = self
                 for i in range(number_to_readd):
                     assert isinstance(current, PlainAttribute)
-                    w_self_value = obj._mapdict_read_storage(
-                            current.storageindex)
+                    w_self_value = current._direct_read(obj)
                     stack[stack_index] = erase_map(current)
                     stack[stack_index + 1] = erase_item(w_self_value)
                     stack_index += 2
@@ -374,7 +402,8 @@ class DevolvedDictTerminator(Terminator):
         return Terminator.set_terminator(self, obj, terminator)
 
 class PlainAttribute(AbstractAttribute):
-    _immutable_fields_ = ['name', 'index', 'storageindex', 'back', 'ever_mutated?', 'order']
+    _immutable_fields_ = ['name', 'index', 'storageindex', 'back', 'ever_mutated?', 'order',
+                          '_num_attributes']
 
     def __init__(self, name, index, back):
         AbstractAttribute.__init__(self, back.space, back.terminator)
@@ -385,6 +414,16 @@ class PlainAttribute(AbstractAttribute):
         self._size_estimate = self.length() * NUM_DIGITS_POW2
         self.ever_mutated = False
         self.order = len(back.cache_attrs) if back.cache_attrs else 0
+        self._num_attributes = back.num_attributes() + 1
+
+    def _direct_read(self, obj):
+        return obj._mapdict_read_storage(self.storageindex)
+
+    def _direct_write(self, obj, w_value):
+        obj._mapdict_write_storage(self.storageindex, w_value)
+
+    def _write_new(self, obj, w_value):
+        obj._mapdict_write_storage(self.storageindex, w_value)
 
     def _copy_attr(self, obj, new_obj):
         w_value = self.read(obj, self.name, self.index)
@@ -409,6 +448,9 @@ class PlainAttribute(AbstractAttribute):
     def length(self):
         return self.storageindex + 1
 
+    def num_attributes(self):
+        return self._num_attributes
+
     def set_terminator(self, obj, terminator):
         new_obj = self.back.set_terminator(obj, terminator)
         self._copy_attr(obj, new_obj)
@@ -423,7 +465,7 @@ class PlainAttribute(AbstractAttribute):
         new_obj = self.back.materialize_r_dict(space, obj, dict_w)
         if self.index == DICT:
             w_attr = space.newtext(self.name)
-            dict_w[w_attr] = obj._mapdict_read_storage(self.storageindex)
+            dict_w[w_attr] = self._direct_read(obj)
         else:
             self._copy_attr(obj, new_obj)
         return new_obj
@@ -431,7 +473,7 @@ class PlainAttribute(AbstractAttribute):
     def materialize_str_dict(self, space, obj, str_dict):
         new_obj = self.back.materialize_str_dict(space, obj, str_dict)
         if self.index == DICT:
-            str_dict[self.name] = obj._mapdict_read_storage(self.storageindex)
+            str_dict[self.name] = self._direct_read(obj)
         else:
             self._copy_attr(obj, new_obj)
         return new_obj
@@ -445,6 +487,165 @@ class PlainAttribute(AbstractAttribute):
     def __repr__(self):
         return "<PlainAttribute %s %s %s %r>" % (self.name, self.index, self.storageindex, self.back)
 
+
+class UnboxedStorage(W_Root):
+    # the unboxed values of one object.  Like WeakrefLifeline, this inherits
+    # from W_Root only so that it can sit in the mapdict storage; it has no
+    # typedef and is never seen by app-level code
+
+    def __init__(self, num_ints, num_floats):
+        self.ints = [0] * num_ints
+        self.floats = [0.0] * num_floats
+
+    def ensure_int_index(self, listindex, size):
+        if listindex >= len(self.ints):
+            newlist = [0] * max(listindex + 1, size)
+            for i in range(len(self.ints)):
+                newlist[i] = self.ints[i]
+            self.ints = newlist
+
+    def ensure_float_index(self, listindex, size):
+        if listindex >= len(self.floats):
+            newlist = [0.0] * max(listindex + 1, size)
+            for i in range(len(self.floats)):
+                newlist[i] = self.floats[i]
+            self.floats = newlist
+
+
+class UnboxedPlainAttribute(PlainAttribute):
+    """ An attribute whose values have so far all been exact ints (or all
+    exact floats).  The values are stored unboxed in an UnboxedStorage, which
+    is shared by all the unboxed attributes of an object and kept in the
+    storage slot of the first of them.  When a value of another type is
+    written, the object switches to a map where the attribute is a normal
+    PlainAttribute, and so do all the objects that get the attribute later:
+    the map stays in the cache of 'back', which is read by elidable
+    functions, but redirects to 'boxed_attr' as soon as that is set.
+    """
+    _immutable_fields_ = ['typ', 'listindex', 'owns_storage', 'owner',
+                          '_length', 'boxed_attr?']
+
+    def __init__(self, name, index, back, typ):
+        assert typ != BOXED
+        owner = None
+        listindex = 0
+        attr = back
+        while isinstance(attr, PlainAttribute):
+            if isinstance(attr, UnboxedPlainAttribute):
+                if owner is None:
+                    owner = attr.owner
+                if attr.typ == typ:
+                    listindex = attr.listindex + 1
+                    break
+            attr = attr.back
+        self.owns_storage = owner is None
+        if self.owns_storage:
+            owner = self
+            storageindex = back.length()
+            self._length = back.length() + 1
+        else:
+            storageindex = owner.storageindex
+            self._length = back.length()
+        PlainAttribute.__init__(self, name, index, back)
+        self.storageindex = storageindex
+        self.typ = typ
+        self.listindex = listindex
+        self.owner = owner
+        self.boxed_attr = None
+        # on the owner: the largest number of unboxed ints and floats that
+        # the maps sharing its storage have needed so far, used to size
+        # the lists of new UnboxedStorages
+        self.num_ints_estimate = 0
+        self.num_floats_estimate = 0
+
+    def length(self):
+        return self._length
+
+    def _get_storage(self, obj):
+        storage = obj._mapdict_read_storage(self.storageindex)
+        assert isinstance(storage, UnboxedStorage)
+        return storage
+
+    def _direct_read(self, obj):
+        storage = self._get_storage(obj)
+        if self.typ == UNBOXED_INT:
+            return W_IntObject(storage.ints[self.listindex])
+        return W_FloatObject(storage.floats[self.listindex])
+
+    @jit.elidable
+    def _pure_unboxed_read(self, obj):
+        return self._direct_read(obj)
+
+    def _store(self, storage, w_value):
+        if self.typ == UNBOXED_INT:
+            assert isinstance(w_value, W_IntObject)
+            storage.ints[self.listindex] = w_value.intval
+        else:
+            assert isinstance(w_value, W_FloatObject)
+            storage.floats[self.listindex] = w_value.floatval
+
+    def _direct_write(self, obj, w_value):
+        if unboxed_type(w_value) != self.typ:
+            self._switch_to_boxed(obj, w_value)
+            return
+        self._store(self._get_storage(obj), w_value)
+
+    def _write_new(self, obj, w_value):
+        owner = self.owner
+        if self.typ == UNBOXED_INT:
+            if self.listindex >= owner.num_ints_estimate:
+                owner.num_ints_estimate = self.listindex + 1
+        else:
+            if self.listindex >= owner.num_floats_estimate:
+                owner.num_floats_estimate = self.listindex + 1
+        if self.owns_storage:
+            storage = UnboxedStorage(owner.num_ints_estimate,
+                                     owner.num_floats_estimate)
+            obj._mapdict_write_storage(self.storageindex, storage)
+        else:
+            storage = self._get_storage(obj)
+            if self.typ == UNBOXED_INT:
+                storage.ensure_int_index(self.listindex,
+                                         owner.num_ints_estimate)
+            else:
+                storage.ensure_float_index(self.listindex,
+                                           owner.num_floats_estimate)
+        self._store(storage, w_value)
+
+    def _switch_map_and_write_storage(self, obj, w_value):
+        attr = self.boxed_attr
+        if attr is None and unboxed_type(w_value) != self.typ:
+            attr = self._get_boxed_attr()
+        if attr is not None:
+            attr._switch_map_and_write_storage(obj, w_value)
+            return
+        PlainAttribute._switch_map_and_write_storage(self, obj, w_value)
+
+    def _get_boxed_attr(self):
+        attr = self.boxed_attr
+        if attr is None:
+            # takes the place of 'self' in the insertion order of 'back'.
+            # Setting the quasi-immutable 'boxed_attr' invalidates the
+            # loops that added 'self' to objects
+            attr = PlainAttribute(self.name, self.index, self.back)
+            attr.order = self.order
+            self.boxed_attr = attr
+        return attr
+
+    @jit.dont_look_inside
+    def _switch_to_boxed(self, obj, w_value):
+        self._get_boxed_attr()
+        map = obj._get_mapdict_map()
+        new_obj = map.delete(obj, self.name, self.index)
+        new_obj._get_mapdict_map().add_attr(new_obj, self.name, self.index,
+                                            w_value)
+        obj._set_mapdict_storage_and_map(new_obj.storage, new_obj.map)
+
+    def __repr__(self):
+        return "<UnboxedPlainAttribute %s %s %s %s %s %r>" % (
+            self.name, self.index, self.typ, self.storageindex,
+            self.listindex, self.back)
+
 class MapAttrCache(object):
     def __init__(self, space):
         SIZE = 1 << space.config.objspace.std.methodcachesizeexp
@@ -970,6 +1171,7 @@ class MapDictIteratorItems(BaseItemIterator):
 class CacheEntry(object):
     version_tag = None
     storageindex = 0
+    unboxed_attr = None
     w_method = None # for callmethod
     success_counter = 0
     failure_counter = 0
@@ -1002,7 +1204,8 @@ def init_mapdict_cache(pycode):
     pycode._mapdict_caches = [INVALID_CACHE_ENTRY] * num_entries
 
 @jit.dont_look_inside
-def _fill_cache(pycode, nameindex, map, version_tag, storageindex, w_method=None):
+def _fill_cache(pycode, nameindex, map, version_tag, storageindex, w_method=None,
+                unboxed_attr=None):
     if not pycode.space._side_effects_ok():
         return
     entry = pycode._mapdict_caches[nameindex]
@@ -1012,6 +1215,7 @@ def _fill_cache(pycode, nameindex, map, version_tag, storageindex, w_method=None
     entry.map_wref = weakref.ref(map)
     entry.version_tag = version_tag
     entry.storageindex = storageindex
+    entry.unboxed_attr = unboxed_attr
     entry.w_method = w_method
     if pycode.space.config.objspace.std.withmethodcachecounter:
         entry.failure_counter += 1
@@ -1023,6 +1227,8 @@ def LOAD_ATTR_caching(pycode, w_obj, nameindex):
     map = w_obj._get_mapdict_map()
     if entry.is_valid_for_map(map) and entry.w_method is None:
         # everything matches, it's incredibly fast
+        if entry.unboxed_attr is not None:
+            return entry.unboxed_attr._direct_read(w_obj)
         return w_obj._mapdict_read_storage(entry.storageindex)
     return LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map)
 LOAD_ATTR_caching._always_inline_ = True
@@ -1069,8 +1275,12 @@ def LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map):
                     # Note that if map.terminator is a DevolvedDictTerminator
                     # or the class provides its own dict, not using mapdict, then:
                     # map.find_map_attr will always return None if index==DICT.
-                    _fill_cache(pycode, nameindex, map, version_tag, attr.storageindex)
-                    return w_obj._mapdict_read_storage(attr.storageindex)
+                    unboxed_attr = None
+                    if isinstance(attr, UnboxedPlainAttribute):
+                        unboxed_attr = attr
+                    _fill_cache(pycode, nameindex, map, version_tag,
+                                attr.storageindex, unboxed_attr=unboxed_attr)
+                    return attr._direct_read(w_obj)
     if space.config.objspace.std.withmethodcachecounter:
         INVALID_CACHE_ENTRY.failure_counter += 1
     return space.getattr(w_obj, w_name)
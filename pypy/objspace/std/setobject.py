@@ -1,9 +1,12 @@
+import math
+
 from pypy.interpreter import gateway
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.error import OperationError, oefmt
 from pypy.interpreter.signature import Signature
 from pypy.interpreter.typedef import TypeDef
 from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.floatobject import W_FloatObject
 from pypy.objspace.std.intobject import W_IntObject
 from pypy.objspace.std.unicodeobject import W_UnicodeObject
 from pypy.objspace.std.util import IDTAG_SPECIAL, IDTAG_SHIFT
@@ -17,6 +20,9 @@ from rpython.rlib import rerased, jit, rutf8
 
 UNROLL_CUTOFF = 5
 
+# ints in this range are exactly representable as floats
+MAX_EXACT_FLOAT_INT = 2 ** 53
+
 
 class W_BaseSetObject(W_Root):
     typedef = None
@@ -53,6 +59,11 @@ class W_BaseSetObject(W_Root):
         self.strategy = strategy = space.fromcache(ObjectSetStrategy)
         self.sstorage = strategy.erase(d)
 
+    def switch_to_unicode_strategy(self):
+        # an ascii set has the same storage as a general unicode one
+        assert self.strategy is self.space.fromcache(AsciiSetStrategy)
+        self.strategy = self.space.fromcache(UnicodeSetStrategy)
+
     def switch_to_empty_strategy(self):
         self.strategy = strategy = self.space.fromcache(EmptySetStrategy)
         self.sstorage = strategy.get_empty_storage()
@@ -95,6 +106,10 @@ class W_BaseSetObject(W_Root):
         """ If this is an int set return its contents as a list of uwnrapped ints. Otherwise return None. """
         return self.strategy.listview_int(self)
 
+    def listview_float(self):
+        """ If this is a float set return its contents as a list of uwnrapped floats. Otherwise return None. """
+        return self.strategy.listview_float(self)
+
     def get_storage_copy(self):
         """ Returns a copy of the storage. Needed when we want to clone all elements from one set and
         put them into another. """
@@ -719,6 +734,9 @@ class SetStrategy(object):
     def listview_int(self, w_set):
         return None
 
+    def listview_float(self, w_set):
+        return None
+
     #def erase(self, storage):
     #    raise NotImplementedError
 
@@ -820,6 +838,11 @@ class EmptySetStrategy(SetStrategy):
             strategy = self.space.fromcache(BytesSetStrategy)
         elif type(w_key) is W_UnicodeObject and w_key.is_ascii():
             strategy = self.space.fromcache(AsciiSetStrategy)
+        elif type(w_key) is W_UnicodeObject:
+            strategy = self.space.fromcache(UnicodeSetStrategy)
+        elif (type(w_key) is W_FloatObject and
+                not math.isnan(self.space.float_w(w_key))):
+            strategy = self.space.fromcache(FloatSetStrategy)
         elif self.space.type(w_key).compares_by_identity():
             strategy = self.space.fromcache(IdentitySetStrategy)
         else:
@@ -899,6 +922,21 @@ class AbstractUnwrappedSetStrategy(object):
         """ Returns a wrapped version of the given unwrapped item. """
         raise NotImplementedError
 
+    def shares_storage_with(self, strategy):
+        """ Checks whether the storage of a set with the given strategy can be
+        combined with ours without wrapping the items. """
+        return strategy is self
+
+    def union_strategy(self, strategy):
+        """ Returns the strategy for the items of both sets, when strategy
+        shares our storage. """
+        return self
+
+    def intersection_strategy(self, strategy):
+        """ Returns the strategy for the items common to both sets, when
+        strategy shares our storage. """
+        return self
+
     @jit.look_inside_iff(lambda self, list_w:
             jit.loop_unrolling_heuristic(list_w, len(list_w), UNROLL_CUTOFF))
     def get_storage_from_list(self, list_w):
@@ -983,7 +1021,7 @@ class AbstractUnwrappedSetStrategy(object):
         if w_set.length() == 0:
             return True
         # it's possible to have 0-length strategy that's not empty
-        if w_set.strategy is w_other.strategy:
+        if self.shares_storage_with(w_other.strategy):
             return self._issubset_unwrapped(w_set, w_other)
         if not self.may_contain_equal_elements(w_other.strategy):
             return False
@@ -1012,7 +1050,7 @@ class AbstractUnwrappedSetStrategy(object):
         return self.erase(result_dict)
 
     def _difference_base(self, w_set, w_other):
-        if self is w_other.strategy:
+        if self.shares_storage_with(w_other.strategy):
             storage = self._difference_unwrapped(w_set, w_other)
         elif not w_set.strategy.may_contain_equal_elements(w_other.strategy):
             d = self.unerase(w_set.sstorage)
@@ -1039,12 +1077,21 @@ class AbstractUnwrappedSetStrategy(object):
                 pass
 
     def _difference_update_wrapped(self, w_set, w_other):
+        d = self.unerase(w_set.sstorage)
         w_iterator = w_other.iter()
         while True:
             w_item = w_iterator.next_entry()
             if w_item is None:
                 break
-            w_set.remove(w_item)
+            if not self.is_correct_type(w_item):
+                # don't switch to the object strategy: only keep the items
+                # that are not in w_other
+                w_set.sstorage = self._difference_wrapped(w_set, w_other)
+                return
+            try:
+                del d[self.unwrap(w_item)]
+            except KeyError:
+                pass
 
     def difference_update(self, w_set, w_other):
         if self.length(w_set) < w_other.strategy.length(w_other):
@@ -1053,7 +1100,7 @@ class AbstractUnwrappedSetStrategy(object):
             w_set.sstorage = storage
         else:
             # big_set -= small_set: be more subtle
-            if self is w_other.strategy:
+            if self.shares_storage_with(w_other.strategy):
                 self._difference_update_unwrapped(w_set, w_other)
             elif w_set.strategy.may_contain_equal_elements(w_other.strategy):
                 self._difference_update_wrapped(w_set, w_other)
@@ -1091,8 +1138,8 @@ class AbstractUnwrappedSetStrategy(object):
         return strategy.erase(newsetdata)
 
     def _symmetric_difference_base(self, w_set, w_other):
-        if self is w_other.strategy:
-            strategy = w_set.strategy
+        if self.shares_storage_with(w_other.strategy):
+            strategy = self.union_strategy(w_other.strategy)
             storage = self._symmetric_difference_unwrapped(w_set, w_other)
         else:
             strategy = self.space.fromcache(ObjectSetStrategy)
@@ -1113,8 +1160,8 @@ class AbstractUnwrappedSetStrategy(object):
         w_set.sstorage = storage
 
     def _intersect_base(self, w_set, w_other):
-        if self is w_other.strategy:
-            strategy = self
+        if self.shares_storage_with(w_other.strategy):
+            strategy = self.intersection_strategy(w_other.strategy)
             if w_set.length() > w_other.length():
                 # swap operands
                 storage = self._intersect_unwrapped(w_other, w_set)
@@ -1124,24 +1171,25 @@ class AbstractUnwrappedSetStrategy(object):
             strategy = self.space.fromcache(EmptySetStrategy)
             storage = strategy.get_empty_storage()
         else:
-            strategy = self.space.fromcache(ObjectSetStrategy)
+            # the result only contains items of the set we iterate over,
+            # so it can keep its strategy
             if w_set.length() > w_other.length():
                 # swap operands
+                strategy = w_other.strategy
                 storage = w_other.strategy._intersect_wrapped(w_other, w_set)
             else:
+                strategy = self
                 storage = self._intersect_wrapped(w_set, w_other)
         return storage, strategy
 
     def _intersect_wrapped(self, w_set, w_other):
-        result = newset(self.space)
+        result = self.get_empty_dict()
         for key in self.unerase(w_set.sstorage):
             self.intersect_jmp.jit_merge_point()
             w_key = self.wrap(key)
             if w_other.has_key(w_key):
-                result[w_key] = None
-
-        strategy = self.space.fromcache(ObjectSetStrategy)
-        return strategy.erase(result)
+                result[key] = None
+        return self.erase(result)
 
     def _intersect_unwrapped(self, w_set, w_other):
         result = self.get_empty_dict()
@@ -1185,7 +1233,7 @@ class AbstractUnwrappedSetStrategy(object):
         if w_set.length() == 0:
             return True
 
-        if w_set.strategy is w_other.strategy:
+        if self.shares_storage_with(w_other.strategy):
             return self._issubset_unwrapped(w_set, w_other)
         elif not w_set.strategy.may_contain_equal_elements(w_other.strategy):
             return False
@@ -1213,7 +1261,7 @@ class AbstractUnwrappedSetStrategy(object):
         if w_set.length() > w_other.length():
             return w_other.isdisjoint(w_set)
 
-        if w_set.strategy is w_other.strategy:
+        if self.shares_storage_with(w_other.strategy):
             return self._isdisjoint_unwrapped(w_set, w_other)
         elif not w_set.strategy.may_contain_equal_elements(w_other.strategy):
             return True
@@ -1221,7 +1269,8 @@ class AbstractUnwrappedSetStrategy(object):
             return self._isdisjoint_wrapped(w_set, w_other)
 
     def update(self, w_set, w_other):
-        if self is w_other.strategy:
+        if self.shares_storage_with(w_other.strategy):
+            w_set.strategy = self.union_strategy(w_other.strategy)
             d_set = self.unerase(w_set.sstorage)
             d_other = self.unerase(w_other.sstorage)
             d_set.update(d_other)
@@ -1265,6 +1314,8 @@ class BytesSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     def may_contain_equal_elements(self, strategy):
         if strategy is self.space.fromcache(IntegerSetStrategy):
             return False
+        elif strategy is self.space.fromcache(FloatSetStrategy):
+            return False
         elif strategy is self.space.fromcache(EmptySetStrategy):
             return False
         elif strategy is self.space.fromcache(IdentitySetStrategy):
@@ -1304,12 +1355,21 @@ class AsciiSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     def may_contain_equal_elements(self, strategy):
         if strategy is self.space.fromcache(IntegerSetStrategy):
             return False
+        elif strategy is self.space.fromcache(FloatSetStrategy):
+            return False
         elif strategy is self.space.fromcache(EmptySetStrategy):
             return False
         elif strategy is self.space.fromcache(IdentitySetStrategy):
             return False
         return True
 
+    def shares_storage_with(self, strategy):
+        return (strategy is self or
+                strategy is self.space.fromcache(UnicodeSetStrategy))
+
+    def union_strategy(self, strategy):
+        return strategy
+
     def unwrap(self, w_item):
         return self.space.utf8_w(w_item)
 
@@ -1319,6 +1379,69 @@ class AsciiSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     def iter(self, w_set):
         return UnicodeIteratorImplementation(self.space, self, w_set)
 
+    def add(self, w_set, w_key):
+        if type(w_key) is W_UnicodeObject and not w_key.is_ascii():
+            w_set.switch_to_unicode_strategy()
+            w_set.add(w_key)
+        else:
+            AbstractUnwrappedSetStrategy.add(self, w_set, w_key)
+
+    def remove(self, w_set, w_item):
+        if type(w_item) is W_UnicodeObject and not w_item.is_ascii():
+            return False
+        return AbstractUnwrappedSetStrategy.remove(self, w_set, w_item)
+
+    def has_key(self, w_set, w_key):
+        if type(w_key) is W_UnicodeObject and not w_key.is_ascii():
+            return False
+        return AbstractUnwrappedSetStrategy.has_key(self, w_set, w_key)
+
+
+class UnicodeSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
+    # the same storage as AsciiSetStrategy, so that an ascii set can
+    # switch to this strategy without copying its items
+    erase = staticmethod(AsciiSetStrategy.erase)
+    unerase = staticmethod(AsciiSetStrategy.unerase)
+
+    intersect_jmp = jit.JitDriver(greens = [], reds = 'auto',
+                                  name='set(utf8).intersect')
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def get_empty_dict(self):
+        return {}
+
+    def is_correct_type(self, w_key):
+        return type(w_key) is W_UnicodeObject
+
+    def may_contain_equal_elements(self, strategy):
+        if strategy is self.space.fromcache(IntegerSetStrategy):
+            return False
+        elif strategy is self.space.fromcache(FloatSetStrategy):
+            return False
+        elif strategy is self.space.fromcache(EmptySetStrategy):
+            return False
+        elif strategy is self.space.fromcache(IdentitySetStrategy):
+            return False
+        return True
+
+    def shares_storage_with(self, strategy):
+        return (strategy is self or
+                strategy is self.space.fromcache(AsciiSetStrategy))
+
+    def intersection_strategy(self, strategy):
+        return strategy
+
+    def unwrap(self, w_item):
+        return self.space.utf8_w(w_item)
+
+    def wrap(self, item):
+        return self.space.newutf8(item, rutf8.codepoints_in_utf8(item))
+
+    def iter(self, w_set):
+        return Utf8IteratorImplementation(self.space, self, w_set)
+
 
 class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     erase, unerase = rerased.new_erasing_pair("integer")
@@ -1345,6 +1468,8 @@ class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
             return False
         elif strategy is self.space.fromcache(AsciiSetStrategy):
             return False
+        elif strategy is self.space.fromcache(UnicodeSetStrategy):
+            return False
         elif strategy is self.space.fromcache(EmptySetStrategy):
             return False
         elif strategy is self.space.fromcache(IdentitySetStrategy):
@@ -1360,6 +1485,66 @@ class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     def iter(self, w_set):
         return IntegerIteratorImplementation(self.space, self, w_set)
 
+    def has_key(self, w_set, w_key):
+        if type(w_key) is W_FloatObject:
+            # answer directly for the floats that cannot be equal to a
+            # big int, instead of switching to the object strategy
+            x = self.space.float_w(w_key)
+            if math.floor(x) != x:      # also true for NaN
+                return False
+            if -MAX_EXACT_FLOAT_INT <= x <= MAX_EXACT_FLOAT_INT:
+                return int(x) in self.unerase(w_set.sstorage)
+        return AbstractUnwrappedSetStrategy.has_key(self, w_set, w_key)
+
+
+class FloatSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
+    erase, unerase = rerased.new_erasing_pair("float")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    intersect_jmp = jit.JitDriver(greens = [], reds = 'auto',
+                                  name='set(float).intersect')
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def get_empty_dict(self):
+        return {}
+
+    def listview_float(self, w_set):
+        return self.unerase(w_set.sstorage).keys()
+
+    def is_correct_type(self, w_key):
+        # NaN is not equal to itself: only the object strategy can find it
+        return (type(w_key) is W_FloatObject and
+                not math.isnan(self.space.float_w(w_key)))
+
+    def may_contain_equal_elements(self, strategy):
+        if strategy is self.space.fromcache(IntegerSetStrategy):
+            return True
+        elif strategy is self.space.fromcache(ObjectSetStrategy):
+            return True
+        return strategy is self
+
+    def unwrap(self, w_item):
+        return self.space.float_w(w_item)
+
+    def wrap(self, item):
+        return self.space.newfloat(item)
+
+    def iter(self, w_set):
+        return FloatIteratorImplementation(self.space, self, w_set)
+
+    def has_key(self, w_set, w_key):
+        if type(w_key) is W_IntObject:
+            x = self.space.int_w(w_key)
+            if -MAX_EXACT_FLOAT_INT <= x <= MAX_EXACT_FLOAT_INT:
+                return float(x) in self.unerase(w_set.sstorage)
+        elif (type(w_key) is W_FloatObject and
+                math.isnan(self.space.float_w(w_key))):
+            return False    # never in the set
+        return AbstractUnwrappedSetStrategy.has_key(self, w_set, w_key)
+
 
 class ObjectSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     erase, unerase = rerased.new_erasing_pair("object")
@@ -1436,6 +1621,10 @@ class IdentitySetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
             return False
         if strategy is self.space.fromcache(AsciiSetStrategy):
             return False
+        if strategy is self.space.fromcache(UnicodeSetStrategy):
+            return False
+        if strategy is self.space.fromcache(FloatSetStrategy):
+            return False
         return True
 
     def unwrap(self, w_item):
@@ -1523,6 +1712,19 @@ class UnicodeIteratorImplementation(IteratorImplementation):
             return None
 
 
+class Utf8IteratorImplementation(IteratorImplementation):
+    def __init__(self, space, strategy, w_set):
+        IteratorImplementation.__init__(self, space, strategy, w_set)
+        d = strategy.unerase(w_set.sstorage)
+        self.iterator = d.iterkeys()
+
+    def next_entry(self):
+        for key in self.iterator:
+            return self.space.newutf8(key, rutf8.codepoints_in_utf8(key))
+        else:
+            return None
+
+
 class IntegerIteratorImplementation(IteratorImplementation):
     #XXX same implementation in dictmultiobject on dictstrategy-branch
     def __init__(self, space, strategy, w_set):
@@ -1537,6 +1739,18 @@ class IntegerIteratorImplementation(IteratorImplementation):
         else:
             return None
 
+class FloatIteratorImplementation(IteratorImplementation):
+    def __init__(self, space, strategy, w_set):
+        IteratorImplementation.__init__(self, space, strategy, w_set)
+        d = strategy.unerase(w_set.sstorage)
+        self.iterator = d.iterkeys()
+
+    def next_entry(self):
+        for key in self.iterator:
+            return self.space.newfloat(key)
+        else:
+            return None
+
 class IdentityIteratorImplementation(IteratorImplementation):
     def __init__(self, space, strategy, w_set):
         IteratorImplementation.__init__(self, space, strategy, w_set)
@@ -1628,6 +1842,13 @@ def set_strategy_and_setdata(space, w_set, w_iterable):
         w_set.sstorage = strategy.get_storage_from_unwrapped_list(intlist)
         return
 
+    floatlist = space.listview_float(w_iterable)
+    if floatlist is not None and not _contains_nan(floatlist):
+        strategy = space.fromcache(FloatSetStrategy)
+        w_set.strategy = strategy
+        w_set.sstorage = strategy.get_storage_from_unwrapped_list(floatlist)
+        return
+
     length_hint = space.length_hint(w_iterable, 0)
 
     if jit.isconstant(length_hint):
@@ -1636,6 +1857,13 @@ def set_strategy_and_setdata(space, w_set, w_iterable):
     _create_from_iterable(space, w_set, w_iterable)
 
 
+def _contains_nan(floatlist):
+    for x in floatlist:
+        if math.isnan(x):
+            return True
+    return False
+
+
 @jit.unroll_safe
 def _pick_correct_strategy_unroll(space, w_set, w_iterable):
 
@@ -1667,6 +1895,24 @@ def _pick_correct_strategy_unroll(space, w_set, w_iterable):
         w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
         return
 
+    for w_item in iterable_w:
+        if type(w_item) is not W_UnicodeObject:
+            break
+    else:
+        w_set.strategy = space.fromcache(UnicodeSetStrategy)
+        w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
+        return
+
+    # check for floats, except NaN
+    strategy = space.fromcache(FloatSetStrategy)
+    for w_item in iterable_w:
+        if not strategy.is_correct_type(w_item):
+            break
+    else:
+        w_set.strategy = strategy
+        w_set.sstorage = strategy.get_storage_from_list(iterable_w)
+        return
+
     # check for compares by identity
     for w_item in iterable_w:
         if not space.type(w_item).compares_by_identity():
@@ -1,8 +1,10 @@
 from pypy.interpreter.error import oefmt
 from pypy.objspace.std.tupleobject import W_AbstractTupleObject
-from pypy.objspace.std.util import negate
+from pypy.objspace.std.util import (
+    negate, IDTAG_SHIFT, IDTAG_INT_PAIR, IDTAG_FLOAT_PAIR)
 from rpython.rlib.objectmodel import specialize
-from rpython.rlib.rarithmetic import intmask
+from rpython.rlib.rarithmetic import intmask, r_ulonglong
+from rpython.rlib.rbigint import rbigint
 from rpython.rlib.unroll import unrolling_iterable
 from rpython.tool.sourcetools import func_with_new_name
 from rpython.rlib.longlong2float import float2longlong
@@ -122,6 +124,38 @@ def make_specialised_class(typetuple):
 
         descr_ne = negate(descr_eq)
 
+        if typetuple == (int, int) or typetuple == (float, float):
+            # like ints and floats, these tuples are identical if their
+            # values are: lists store them unboxed and rebuild them in
+            # getitem (see IntPairListStrategy and FloatPairListStrategy).
+            # Subclasses of tuple never use these classes.
+            def _bits(self, value):
+                if typetuple[0] == float:
+                    value = float2longlong(value)
+                return r_ulonglong(value)
+
+            def is_w(self, space, w_other):
+                if not isinstance(w_other, cls):
+                    return False
+                for i in iter_n:
+                    myval = getattr(self, 'value%s' % i)
+                    otherval = getattr(w_other, 'value%s' % i)
+                    if self._bits(myval) != self._bits(otherval):
+                        return False
+                return True
+
+            def immutable_unique_id(self, space):
+                b = rbigint.fromint(0)
+                for i in iter_n:
+                    value = getattr(self, 'value%s' % i)
+                    bits = rbigint.fromrarith_int(self._bits(value))
+                    b = b.lshift(64).or_(bits)
+                if typetuple[0] == int:
+                    b = b.lshift(IDTAG_SHIFT).int_or_(IDTAG_INT_PAIR)
+                else:
+                    b = b.lshift(IDTAG_SHIFT).int_or_(IDTAG_FLOAT_PAIR)
+                return space.newlong_from_rbigint(b)
+
         def getitem(self, space, index):
             if index < 0:
                 index += typelen
@@ -1170,6 +1170,71 @@ class AppTestStrategies(object):
         assert "IntDictStrategy" in self.get_strategy(d)
         assert d[1L] == "hi"
 
+    def test_empty_to_float(self):
+        d = {}
+        d[1.5] = "a"
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        d[-0.0] = "b"
+        assert d[1.5] == "a"
+        assert d[0.0] == "b"
+        assert d[0] == "b"
+        assert d.get(3) is None
+        assert d.get(-2 ** 53) is None
+        assert d.get("x") is None
+        assert d.get(float("nan")) is None
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        assert sorted(d.keys()) == [-0.0, 1.5]
+        assert sorted(d.items()) == [(-0.0, "b"), (1.5, "a")]
+        d[1] = "c"
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d == {1.5: "a", 0.0: "b", 1: "c"}
+
+        nan = float("nan")
+        d = {}
+        d[nan] = 1
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d[nan] == 1
+        d = {2.5: 1}
+        d[nan] = 2
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d[nan] == 2
+        assert d[2.5] == 1
+
+    def test_empty_to_tuple(self):
+        d = {}
+        d[("north", 3)] = 1
+        assert "TupleDictStrategy" in self.get_strategy(d)
+        d[(1, 2)] = 2
+        d[tuple(["north", 3, 4])] = 3
+        d[()] = 4
+        assert d[("north", 3)] == 1
+        assert d[tuple([1, 2])] == 2
+        assert d[("north", 3, 4)] == 3
+        assert d[()] == 4
+        assert ("north", 4) not in d
+        assert (3, "north") not in d
+        assert (1, 2, 3) not in d
+        assert d.get(1) is None
+        assert d.get("north") is None
+        d[("north", 3)] += 1
+        assert d[("north", 3)] == 2
+        del d[(1, 2)]
+        assert (1, 2) not in d
+        assert "TupleDictStrategy" in self.get_strategy(d)
+        assert sorted(d.keys()) == [(), ("north", 3), ("north", 3, 4)]
+        d2 = d.copy()
+        assert "TupleDictStrategy" in self.get_strategy(d2)
+        assert d2 == d
+        # equal to an int tuple, but not stored in this strategy
+        assert d.get((1.0, 2.0)) is None
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d[("north", 3)] == 2
+
+        d = {(1, 2): 1}
+        d[(1, 2.5)] = 2
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d == {(1, 2): 1, (1, 2.5): 2}
+
     def test_iter_dict_length_change(self):
         d = {1: 2, 3: 4, 5: 6}
         it = d.iteritems()
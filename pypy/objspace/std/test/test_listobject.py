@@ -681,6 +681,28 @@ class AppTestListObject(object):
         r.sort(key=lambda x: -x)
         assert r == range(9, -1, -1)
 
+    def test_sort_key_unwrapped(self):
+        # the keys are all ints, all floats or all strings: the sort is
+        # done on the unwrapped keys, and must still be stable
+        items = [(i % 3, i) for i in range(20)]
+        for key in [lambda t: t[0], lambda t: t[0] * 0.5,
+                    lambda t: str(t[0]), lambda t: [t[0], 0.5][t[1] % 2]]:
+            l = items[:]
+            l.sort(key=key)
+            assert l == sorted(items, cmp=lambda a, b: cmp(key(a), key(b)))
+            l = items[:]
+            l.sort(key=key, reverse=True)
+            assert l == sorted(items, cmp=lambda a, b: cmp(key(b), key(a)))
+        l = [3.0, float('nan'), 1.0, 2.0]
+        assert sorted(l, key=float) == sorted(l)
+        assert sorted(['b', 'a'], key=lambda x: x) == ['a', 'b']
+        assert sorted([2, 1], key=lambda x: x, reverse=True) == [2, 1]
+        l = [1, 2]
+        def key(x):
+            l.append(x)
+            return x
+        raises(ValueError, l.sort, key=key)
+
     def test_sort_reversed(self):
         l = range(10)
         l.sort(reverse=True)
@@ -4,7 +4,7 @@ from pypy.objspace.std.listobject import (
     W_ListObject, EmptyListStrategy, ObjectListStrategy, IntegerListStrategy,
     FloatListStrategy, BytesListStrategy, RangeListStrategy,
     SimpleRangeListStrategy, make_range_list, AsciiListStrategy,
-    IntOrFloatListStrategy)
+    IntOrFloatListStrategy, IntPairListStrategy, FloatPairListStrategy)
 from pypy.objspace.std import listobject
 from pypy.objspace.std.test.test_listobject import TestW_ListObject
 
@@ -1051,6 +1051,47 @@ class TestW_ListStrategies(TestW_ListObject):
         assert isinstance(w_item, space.StringObjectCls)
 
 
+class TestW_PairListStrategies:
+    spaceconfig = {"objspace.std.withspecialisedtuple": True}
+
+    def pairs(self, l):
+        space = self.space
+        return [space.newtuple([space.wrap(x), space.wrap(y)]) for x, y in l]
+
+    def test_check_strategy(self):
+        space = self.space
+        l = W_ListObject(space, self.pairs([(1, 2), (3, 4)]))
+        assert isinstance(l.strategy, IntPairListStrategy)
+        assert l.strategy.unerase(l.lstorage) == [1, 2, 3, 4]
+        l = W_ListObject(space, self.pairs([(1.5, 2.5)]))
+        assert isinstance(l.strategy, FloatPairListStrategy)
+        l = W_ListObject(space, self.pairs([(1, 2), (3.5, 4.5)]))
+        assert isinstance(l.strategy, ObjectListStrategy)
+        l = W_ListObject(space, self.pairs([(1, 2), (3, 'x')]))
+        assert isinstance(l.strategy, ObjectListStrategy)
+
+    def test_empty_to_pairs(self):
+        space = self.space
+        l = W_ListObject(space, [])
+        w_item = self.pairs([(1, 2)])[0]
+        l.append(w_item)
+        assert isinstance(l.strategy, IntPairListStrategy)
+        assert l.getitem(0) is not w_item
+        assert space.is_w(l.getitem(0), w_item)
+
+    def test_switch_to_object(self):
+        space = self.space
+        l = W_ListObject(space, self.pairs([(1, 2), (3, 4)]))
+        l.setitem(0, space.wrap(5))
+        assert isinstance(l.strategy, ObjectListStrategy)
+        assert space.eq_w(l.getitem(1), space.newtuple([space.wrap(3),
+                                                         space.wrap(4)]))
+        l = W_ListObject(space, self.pairs([(1, 2), (3, 4)]))
+        l.extend(W_ListObject(space, self.pairs([(1.5, 2.5)])))
+        assert isinstance(l.strategy, ObjectListStrategy)
+        assert l.length() == 3
+
+
 class TestW_ListStrategiesDisabled:
     spaceconfig = {"objspace.std.withliststrategies": False}
 
@@ -1,5 +1,7 @@
 from pypy.objspace.std.test.test_dictmultiobject import FakeSpace, W_DictObject
 from pypy.objspace.std.mapdict import *
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.floatobject import W_FloatObject
 
 class Config:
     class objspace:
@@ -508,6 +510,136 @@ def test_materialize_r_dict():
     assert obj.storage == [50, 60, 70, w_d]
 
 
+def test_unboxed_attributes():
+    cls = Class()
+    obj = cls.instantiate()
+    obj.setdictvalue(space, "a", W_IntObject(1))
+    obj.setdictvalue(space, "b", W_FloatObject(2.5))
+    obj.setdictvalue(space, "c", "x")
+    obj.setdictvalue(space, "d", W_IntObject(4))
+    assert obj.map.length() == 2
+    assert isinstance(obj.map, UnboxedPlainAttribute)
+    assert not obj.map.owns_storage
+    assert obj.map.listindex == 1
+    storage = obj.storage[0]
+    assert isinstance(storage, UnboxedStorage)
+    assert storage.ints[:2] == [1, 4]
+    assert storage.floats[:1] == [2.5]
+    assert obj.storage[1] == "x"
+    assert obj.getdictvalue(space, "a").intval == 1
+    assert obj.getdictvalue(space, "b").floatval == 2.5
+    assert obj.getdictvalue(space, "c") == "x"
+    assert obj.getdictvalue(space, "d").intval == 4
+
+    map1 = obj.map
+    obj.setdictvalue(space, "a", W_IntObject(10))
+    obj.setdictvalue(space, "b", W_FloatObject(-1.0))
+    assert obj.map is map1
+    assert storage.ints[0] == 10
+    assert storage.floats[0] == -1.0
+
+    obj2 = cls.instantiate()
+    obj2.setdictvalue(space, "a", W_IntObject(5))
+    obj2.setdictvalue(space, "b", W_FloatObject(6.5))
+    obj2.setdictvalue(space, "c", "y")
+    obj2.setdictvalue(space, "d", W_IntObject(7))
+    assert obj2.map is map1
+    assert obj2.storage[0] is not storage
+    assert obj.getdictvalue(space, "a").intval == 10
+    assert obj2.getdictvalue(space, "a").intval == 5
+
+def test_unboxed_attribute_type_change():
+    cls = Class()
+    obj = cls.instantiate()
+    obj.setdictvalue(space, "a", W_IntObject(1))
+    obj.setdictvalue(space, "b", W_IntObject(2))
+    assert isinstance(obj.map.back, UnboxedPlainAttribute)
+    obj.setdictvalue(space, "a", "x")
+    assert obj.getdictvalue(space, "a") == "x"
+    assert obj.getdictvalue(space, "b").intval == 2
+    assert obj.map.back.name == "a"
+    assert type(obj.map.back) is PlainAttribute
+    assert isinstance(obj.map, UnboxedPlainAttribute)
+
+    # from now on, new objects store 'a' boxed
+    obj2 = cls.instantiate()
+    obj2.setdictvalue(space, "a", W_IntObject(3))
+    obj2.setdictvalue(space, "b", W_IntObject(4))
+    assert obj2.map is obj.map
+    assert obj2.getdictvalue(space, "a").intval == 3
+    assert obj2.getdictvalue(space, "b").intval == 4
+
+    # a value of another type when the attribute is added
+    obj3 = cls.instantiate()
+    obj3.setdictvalue(space, "c", W_FloatObject(1.5))
+    obj4 = cls.instantiate()
+    obj4.setdictvalue(space, "c", W_IntObject(2))
+    assert type(obj4.map) is PlainAttribute
+    assert isinstance(obj3.map, UnboxedPlainAttribute)
+    assert obj3.getdictvalue(space, "c").floatval == 1.5
+    assert obj4.getdictvalue(space, "c").intval == 2
+
+def test_unboxed_attribute_type_change_keeps_cache():
+    # _get_new_attr() is elidable: it must keep returning the same map,
+    # which then redirects to its boxed replacement
+    cls = Class()
+    obj = cls.instantiate()
+    obj.setdictvalue(space, "a", W_IntObject(1))
+    attr = obj.map
+    obj.setdictvalue(space, "a", "x")
+    assert cls.terminator._get_new_attr("a", DICT, UNBOXED_INT) is attr
+    assert type(attr.boxed_attr) is PlainAttribute
+    assert obj.map is attr.boxed_attr
+
+    obj2 = cls.instantiate()
+    obj2.setdictvalue(space, "a", W_IntObject(2))
+    assert obj2.map is attr.boxed_attr
+    assert obj2.getdictvalue(space, "a").intval == 2
+
+def test_unboxed_storage_size():
+    cls = Class()
+    obj = cls.instantiate()
+    for name in "abc":
+        obj.setdictvalue(space, name, W_IntObject(1))
+    obj.setdictvalue(space, "d", W_FloatObject(1.5))
+    assert len(obj.storage[0].ints) == 3
+    assert len(obj.storage[0].floats) == 1
+
+    # the next objects get lists of the right size from the start
+    obj2 = cls.instantiate()
+    obj2.setdictvalue(space, "a", W_IntObject(2))
+    storage = obj2.storage[0]
+    ints = storage.ints
+    assert len(ints) == 3
+    assert len(storage.floats) == 1
+    obj2.setdictvalue(space, "b", W_IntObject(3))
+    obj2.setdictvalue(space, "c", W_IntObject(4))
+    obj2.setdictvalue(space, "d", W_FloatObject(5.5))
+    assert obj2.storage[0] is storage
+    assert storage.ints is ints
+    assert ints == [2, 3, 4]
+    assert storage.floats == [5.5]
+
+def test_unboxed_attributes_delete_and_materialize():
+    cls = Class()
+    obj = cls.instantiate()
+    obj.setdictvalue(space, "a", W_IntObject(1))
+    obj.setdictvalue(space, "b", W_IntObject(2))
+    obj.setdictvalue(space, "c", W_FloatObject(3.0))
+    obj.deldictvalue(space, "a")
+    assert obj.getdictvalue(space, "a") is None
+    assert obj.getdictvalue(space, "b").intval == 2
+    assert obj.getdictvalue(space, "c").floatval == 3.0
+    obj.setdictvalue(space, "a", W_IntObject(4))
+
+    d = {}
+    materialize_str_dict(space, obj, d)
+    assert sorted(d) == ["a", "b", "c"]
+    assert d["a"].intval == 4
+    assert d["b"].intval == 2
+    assert d["c"].floatval == 3.0
+
+
 def test_size_prediction():
     for i in range(10):
         c = Class()
@@ -897,6 +1029,33 @@ class AppTestWithMapDict(object):
         d = x.__dict__
         assert list(__pypy__.reversed_dict(d)) == d.keys()[::-1]
 
+    def test_unboxed_attributes(self):
+        class A(object):
+            pass
+        a = A()
+        a.x = 1
+        a.y = 2.5
+        a.z = "z"
+        for i in range(10):
+            a.x += 1
+            a.y *= 2
+        assert a.x == 11
+        assert a.y == 2560.0
+        assert a.__dict__ == {"x": 11, "y": 2560.0, "z": "z"}
+        a.x = "x"
+        a.y = 7
+        assert (a.x, a.y, a.z) == ("x", 7, "z")
+        b = A()
+        b.x = 2
+        b.y = 3.5
+        b.z = None
+        assert (b.x, b.y, b.z) == (2, 3.5, None)
+        assert type(b.x) is int
+        b.x = True
+        assert b.x is True
+        del b.y
+        assert b.__dict__ == {"x": True, "z": None}
+
     def test_bug_materialize_huge_dict(self):
         import __pypy__
         d = __pypy__.newdict("instance")
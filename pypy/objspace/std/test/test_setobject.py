@@ -81,7 +81,7 @@ class TestW_SetObject:
     def test_create_set_from_list(self):
         from pypy.interpreter.baseobjspace import W_Root
         from pypy.objspace.std.setobject import BytesSetStrategy, ObjectSetStrategy
-        from pypy.objspace.std.floatobject import W_FloatObject
+        from pypy.objspace.std.setobject import FloatSetStrategy
 
         w = self.space.wrap
         wb = self.space.newbytes
@@ -116,9 +116,9 @@ class TestW_SetObject:
         w_list = W_ListObject(self.space, [w(1.0), w(2.0), w(3.0)])
         w_set = W_SetObject(self.space)
         _initialize_set(self.space, w_set, w_list)
-        assert w_set.strategy is self.space.fromcache(ObjectSetStrategy)
-        for item in w_set.strategy.unerase(w_set.sstorage):
-            assert isinstance(item, W_FloatObject)
+        assert w_set.strategy is self.space.fromcache(FloatSetStrategy)
+        assert w_set.strategy.unerase(w_set.sstorage) == {1.0:None, 2.0:None,
+                                                          3.0:None}
 
         # changed cached object, need to change it back for other tests to pass
         intstr.get_storage_from_list = tmp_func
@@ -1064,6 +1064,46 @@ class AppTestAppSetTest:
         s.intersection_update(set())
         assert strategy(s) == "EmptySetStrategy"
 
+    def test_float_and_unicode_strategies(self):
+        from __pypy__ import strategy
+        s = set([1.5, 2.5, -0.0])
+        assert strategy(s) == "FloatSetStrategy"
+        assert 0 in s and 0.0 in s and 1.5 in s
+        assert 2 not in s and float('nan') not in s
+        assert strategy(s) == "FloatSetStrategy"
+        assert set([1, 2]) & set([1.0, 2.5]) == set([1])
+        s.add(float('nan'))
+        assert strategy(s) == "ObjectSetStrategy"
+        #
+        assert 2.0 in set([1, 2]) and 2.5 not in set([1, 2])
+        #
+        u = set([u'a', u'b'])
+        assert strategy(u) == "AsciiSetStrategy"
+        assert u'\xe9' not in u
+        assert strategy(u) == "AsciiSetStrategy"
+        u.add(u'\xe9')
+        assert strategy(u) == "UnicodeSetStrategy"
+        assert sorted(u) == [u'a', u'b', u'\xe9']
+        a = set([u'a', u'c'])
+        assert strategy(u & a) == "AsciiSetStrategy"
+        assert u & a == set([u'a'])
+        a |= u
+        assert strategy(a) == "UnicodeSetStrategy"
+        assert a == set([u'a', u'b', u'c', u'\xe9'])
+        assert u <= a and not a <= u
+
+    def test_mixed_strategies_stay_unwrapped(self):
+        from __pypy__ import strategy
+        s = set([1, 2, 3]) & set([2, 3, 'x'])
+        assert strategy(s) == "IntegerSetStrategy"
+        assert s == set([2, 3])
+        s = set([1, 2, 3])
+        s -= set([2, 'x'])
+        assert strategy(s) == "IntegerSetStrategy"
+        assert s == set([1, 3])
+        s = set(frozenset([1.5, 2.5]))
+        assert strategy(s) == "FloatSetStrategy"
+
     def test_weird_exception_from_iterable(self):
         def f():
            raise ValueError
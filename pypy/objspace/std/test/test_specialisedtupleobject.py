@@ -251,6 +251,65 @@ class AppTestW_SpecialisedTupleObject:
         assert T == (N, N)
         assert (0.0, 0.0) == (-0.0, -0.0)
 
+    def test_identity_of_pairs(self):
+        # pairs of ints or floats are identical if their values are
+        def make(x, y):
+            return (x, y)
+        N = float('nan')
+        l = [make(1, 2), make(1, 2), make(2, 1), make(1.0, 2.0),
+             make(1.0, 2.0), make(0.0, -0.0), make(-0.0, 0.0), make(N, N),
+             make(N, N), make(1, 2.0), make(-1, -2), make(-1, -2)]
+        for i, a in enumerate(l):
+            for b in l[i:]:
+                assert (a is b) == (id(a) == id(b))
+        assert l[0] is l[1]
+        assert l[0] is not l[2] and l[0] is not l[3]
+        assert l[5] is not l[6]
+        assert l[7] is l[8]
+        assert l[9] is not make(1, 2.0)
+        assert l[10] is l[11]
+        class T(tuple):
+            pass
+        assert T((1, 2)) is not T((1, 2))
+
+    def test_list_of_pairs(self):
+        from __pypy__ import strategy
+        l = [(i, -i) for i in range(5)]
+        assert strategy(l) == "IntPairListStrategy"
+        t = (7, 8)
+        l.append(t)
+        assert l[-1] is t
+        l.insert(1, (2, 2))
+        assert l == [(0, 0), (2, 2), (1, -1), (2, -2), (3, -3), (4, -4),
+                     (7, 8)]
+        assert l.index((3, -3)) == 4
+        assert (2, -2) in l and (2, 3) not in l
+        assert l[1:3] == [(2, 2), (1, -1)]
+        assert l[::-3] == [(7, 8), (2, -2), (0, 0)]
+        assert l.pop() == (7, 8) and l.pop(1) == (2, 2)
+        del l[::2]
+        assert l == [(1, -1), (3, -3)]
+        l[1:1] = [(5, 5), (5, 4)]
+        l.sort()
+        assert l == [(1, -1), (3, -3), (5, 4), (5, 5)]
+        l.reverse()
+        assert l == [(5, 5), (5, 4), (3, -3), (1, -1)]
+        assert strategy(l) == "IntPairListStrategy"
+        l.append((1, 'x'))
+        assert strategy(l) == "ObjectListStrategy"
+        assert l[-2:] == [(1, -1), (1, 'x')]
+        #
+        N = float('nan')
+        l = [(1.5, 0.0), (N, 1.0), (1.5, -0.0), (N, 0.5)]
+        assert strategy(l) == "FloatPairListStrategy"
+        assert l[1] is l[1] and l.index(l[3]) == 3
+        l = [(1.5, 0.0), (0.5, 1.0), (1.5, -0.0)]
+        # stable, and (1.5, 0.0) is not (1.5, -0.0)
+        assert sorted(l)[1] is l[0] and sorted(l)[2] is l[2]
+        assert sorted(l, reverse=True)[0] is l[0]
+        assert sorted(l, reverse=True)[2] == (0.5, 1.0)
+        assert strategy(zip([1, 2], [3, 4])) == "IntPairListStrategy"
+
 
 class AppTestAll(test_tupleobject.AppTestW_TupleObject):
     spaceconfig = {"objspace.std.withspecialisedtuple": True}
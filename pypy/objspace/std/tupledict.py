@@ -0,0 +1,151 @@
+## ----------------------------------------------------------------------------
+## dict strategy (see dictmultiobject.py)
+
+from rpython.rlib import rerased
+from rpython.rlib.objectmodel import compute_hash, r_dict
+from rpython.rlib.rarithmetic import intmask
+from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.dictmultiobject import (AbstractTypedStrategy,
+                                               DictStrategy,
+                                               create_iterator_classes)
+from pypy.objspace.std.intobject import W_IntObject, _hash_int
+from pypy.objspace.std.specialisedtupleobject import Cls_ii, Cls_oo
+from pypy.objspace.std.tupleobject import W_AbstractTupleObject, W_TupleObject
+
+
+# The keys are the tuple objects themselves, but they are only compared and
+# hashed through their items, which must all be exact ints or exact strings:
+# this never calls space.eq_w() or space.hash_w(), and never allocates when
+# the tuple is a specialised one.  The dict remembers the hash of each key.
+
+def _is_simple_item(w_item):
+    return type(w_item) is W_IntObject or type(w_item) is W_BytesObject
+
+def is_simple_tuple_key(w_key):
+    """Check that w_key, an exact tuple, only contains exact ints and exact
+    strings."""
+    if isinstance(w_key, Cls_ii):
+        return True
+    if isinstance(w_key, Cls_oo):
+        return _is_simple_item(w_key.value0) and _is_simple_item(w_key.value1)
+    if isinstance(w_key, W_TupleObject):
+        for w_item in w_key.wrappeditems:
+            if not _is_simple_item(w_item):
+                return False
+        return True
+    return False
+
+def _get_item(w_key, i):
+    # not for Cls_ii, whose items are not boxed
+    if isinstance(w_key, Cls_oo):
+        if i == 0:
+            return w_key.value0
+        return w_key.value1
+    assert isinstance(w_key, W_TupleObject)
+    return w_key.wrappeditems[i]
+
+def _get_int_item(w_key, i):
+    if isinstance(w_key, Cls_ii):
+        if i == 0:
+            return w_key.value0
+        return w_key.value1
+    w_item = _get_item(w_key, i)
+    assert isinstance(w_item, W_IntObject)
+    return w_item.intval
+
+def _is_int_item(w_key, i):
+    if isinstance(w_key, Cls_ii):
+        return True
+    return type(_get_item(w_key, i)) is W_IntObject
+
+def _hash_item(w_key, i):
+    if _is_int_item(w_key, i):
+        return _hash_int(_get_int_item(w_key, i))
+    w_item = _get_item(w_key, i)
+    assert isinstance(w_item, W_BytesObject)
+    return compute_hash(w_item._value)
+
+def _items_equal(w_key1, w_key2, i):
+    if _is_int_item(w_key1, i):
+        return (_is_int_item(w_key2, i) and
+                _get_int_item(w_key1, i) == _get_int_item(w_key2, i))
+    if _is_int_item(w_key2, i):
+        return False
+    w_item1 = _get_item(w_key1, i)
+    w_item2 = _get_item(w_key2, i)
+    assert isinstance(w_item1, W_BytesObject)
+    assert isinstance(w_item2, W_BytesObject)
+    return w_item1._value == w_item2._value
+
+def tuple_key_hash(w_key):
+    # the same mixing as W_TupleObject.descr_hash()
+    assert isinstance(w_key, W_AbstractTupleObject)
+    mult = 1000003
+    x = 0x345678
+    z = w_key.length()
+    for i in range(w_key.length()):
+        y = _hash_item(w_key, i)
+        x = (x ^ y) * mult
+        z -= 1
+        mult += 82520 + z + z
+    x += 97531
+    return intmask(x)
+
+def tuple_key_eq(w_key1, w_key2):
+    if w_key1 is w_key2:
+        return True
+    assert isinstance(w_key1, W_AbstractTupleObject)
+    assert isinstance(w_key2, W_AbstractTupleObject)
+    if w_key1.length() != w_key2.length():
+        return False
+    if isinstance(w_key1, Cls_ii) and isinstance(w_key2, Cls_ii):
+        return (w_key1.value0 == w_key2.value0 and
+                w_key1.value1 == w_key2.value1)
+    for i in range(w_key1.length()):
+        if not _items_equal(w_key1, w_key2, i):
+            return False
+    return True
+
+
+# this strategy is selected by EmptyDictStrategy.switch_to_correct_strategy
+class TupleDictStrategy(AbstractTypedStrategy, DictStrategy):
+    """
+    Strategy for dicts whose keys are tuples of ints and strings, like
+    'counts[(region, day)]'.  Looking up a key of another type, or a tuple
+    containing something else, switches to the ObjectDictStrategy; only the
+    types that are never equal to a tuple are answered directly.
+    """
+
+    erase, unerase = rerased.new_erasing_pair("tupledict")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def wrap(self, unwrapped):
+        return unwrapped
+
+    def unwrap(self, wrapped):
+        return wrapped
+
+    def get_empty_storage(self):
+        d = r_dict(tuple_key_eq, tuple_key_hash, force_non_null=True)
+        return self.erase(d)
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return (space.is_w(space.type(w_obj), space.w_tuple) and
+                is_simple_tuple_key(w_obj))
+
+    def _never_equal_to(self, w_lookup_type):
+        space = self.space
+        return (space.is_w(w_lookup_type, space.w_NoneType) or
+                space.is_w(w_lookup_type, space.w_int) or
+                space.is_w(w_lookup_type, space.w_bool) or
+                space.is_w(w_lookup_type, space.w_float) or
+                space.is_w(w_lookup_type, space.w_bytes) or
+                space.is_w(w_lookup_type, space.w_unicode)
+                )
+
+    def w_keys(self, w_dict):
+        return self.space.newlist(self.unerase(w_dict.dstorage).keys())
+
+create_iterator_classes(TupleDictStrategy)
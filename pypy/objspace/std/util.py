@@ -9,6 +9,8 @@ IDTAG_LONG    = 3
 IDTAG_FLOAT   = 5
 IDTAG_COMPLEX = 7
 IDTAG_UNBOUND_METHOD = 9
+IDTAG_INT_PAIR = 13
+IDTAG_FLOAT_PAIR = 15
 IDTAG_SPECIAL = 11    # -1 - (-maxunicode-1): unichar
                       # 0 - 255: char
                       # 256: empty string
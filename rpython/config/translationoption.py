@@ -172,6 +172,10 @@ translation_optiondescription = OptionDescription(
     IntOption("make_jobs", "Specify -j argument to make for compilation"
               " (C backend only)",
               cmdline="--make-jobs", default=detect_number_of_processors()),
+    StrOption("objcache", "Directory in which to keep the compiled object "
+              "files, so that the next translations only recompile the C "
+              "files that changed (C backend only)",
+              cmdline="--objcache", default=None),
 
     # Flags of the TranslationContext:
     BoolOption("list_comprehension_operations",
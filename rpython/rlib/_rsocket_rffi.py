@@ -164,7 +164,7 @@ IP_MULTICAST_LOOP IP_MULTICAST_TTL IP_OPTIONS IP_RECVDSTADDR IP_RECVOPTS
 IP_RECVRETOPTS IP_RETOPTS IP_TOS IP_TTL
 
 MSG_BTAG MSG_ETAG MSG_CTRUNC MSG_DONTROUTE MSG_DONTWAIT MSG_EOR MSG_OOB
-MSG_PEEK MSG_TRUNC MSG_WAITALL MSG_ERRQUEUE
+MSG_PEEK MSG_TRUNC MSG_WAITALL MSG_ERRQUEUE MSG_WAITFORONE
 
 NI_DGRAM NI_MAXHOST NI_MAXSERV NI_NAMEREQD NI_NOFQDN NI_NUMERICHOST
 NI_NUMERICSERV
@@ -878,6 +878,113 @@ if HAVE_SENDMSG:
             return retval;
         }
 
+        // ################################################################################################
+        // Multiple messages: recvmmsg and sendmmsg
+
+        /*
+            recvmmsg_implementation receives up to no_of_messages datagrams
+            with one system call, datagram i going into messages[i].  On
+            input, message_lengths[i] is the size of the buffer and
+            address_lengths[i] the size of the sockaddr at addresses[i]; on
+            output they are the size of the datagram and of the sender's
+            address.  Returns the number of datagrams received.
+        */
+        #ifdef RPY_HAVE_RECVMMSG
+        RPY_EXTERN
+        int recvmmsg_implementation(int socket_fd,
+                                    char** messages,
+                                    int* message_lengths,
+                                    char** addresses,
+                                    int* address_lengths,
+                                    int no_of_messages,
+                                    int flags)
+        {
+            struct mmsghdr *msgs;
+            struct iovec *iovs;
+            int i, retval, saved_errno;
+
+            msgs = (struct mmsghdr*) calloc(no_of_messages, sizeof(struct mmsghdr));
+            iovs = (struct iovec*) calloc(no_of_messages, sizeof(struct iovec));
+            if (msgs == NULL || iovs == NULL) {
+                free(msgs);
+                free(iovs);
+                errno = ENOMEM;
+                return -1;
+            }
+            for (i = 0; i < no_of_messages; i++) {
+                iovs[i].iov_base = messages[i];
+                iovs[i].iov_len = message_lengths[i];
+                msgs[i].msg_hdr.msg_iov = &iovs[i];
+                msgs[i].msg_hdr.msg_iovlen = 1;
+                msgs[i].msg_hdr.msg_name = addresses[i];
+                msgs[i].msg_hdr.msg_namelen = address_lengths[i];
+            }
+
+            retval = recvmmsg(socket_fd, msgs, no_of_messages, flags, NULL);
+
+            saved_errno = errno;
+            for (i = 0; i < retval; i++) {
+                message_lengths[i] = msgs[i].msg_len;
+                address_lengths[i] = msgs[i].msg_hdr.msg_namelen;
+            }
+            free(msgs);
+            free(iovs);
+            errno = saved_errno;
+            return retval;
+        }
+        #endif
+
+        /*
+            sendmmsg_implementation sends no_of_messages datagrams with one
+            system call, all to the same address (or to the peer of a
+            connected socket if address is NULL).  The datagrams are stored
+            one after the other in data.  Returns the number of datagrams
+            sent.
+        */
+        #ifdef RPY_HAVE_SENDMMSG
+        RPY_EXTERN
+        int sendmmsg_implementation(int socket_fd,
+                                    struct sockaddr* address,
+                                    socklen_t addrlen,
+                                    char* data,
+                                    long* message_lengths,
+                                    int no_of_messages,
+                                    int flags)
+        {
+            struct mmsghdr *msgs;
+            struct iovec *iovs;
+            int i, retval, saved_errno;
+
+            msgs = (struct mmsghdr*) calloc(no_of_messages, sizeof(struct mmsghdr));
+            iovs = (struct iovec*) calloc(no_of_messages, sizeof(struct iovec));
+            if (msgs == NULL || iovs == NULL) {
+                free(msgs);
+                free(iovs);
+                errno = ENOMEM;
+                return -1;
+            }
+            for (i = 0; i < no_of_messages; i++) {
+                iovs[i].iov_base = data;
+                iovs[i].iov_len = message_lengths[i];
+                data += message_lengths[i];
+                msgs[i].msg_hdr.msg_iov = &iovs[i];
+                msgs[i].msg_hdr.msg_iovlen = 1;
+                if (address != NULL) {
+                    msgs[i].msg_hdr.msg_name = address;
+                    msgs[i].msg_hdr.msg_namelen = addrlen;
+                }
+            }
+
+            retval = sendmmsg(socket_fd, msgs, no_of_messages, flags);
+
+            saved_errno = errno;
+            free(msgs);
+            free(iovs);
+            errno = saved_errno;
+            return retval;
+        }
+        #endif
+
         // ################################################################################################
         // Wrappers for CMSG_SPACE and CMSG_LEN
 
@@ -952,6 +1059,10 @@ if HAVE_SENDMSG:
                          "static "
                          "int get_CMSG_SPACE(size_t length, size_t *result);\n"
                          "RPY_EXTERN "
+                         "int recvmmsg_implementation(int socket_fd, char** messages, int* message_lengths, char** addresses, int* address_lengths, int no_of_messages, int flags);\n"
+                         "RPY_EXTERN "
+                         "int sendmmsg_implementation(int socket_fd, struct sockaddr* address, socklen_t addrlen, char* data, long* message_lengths, int no_of_messages, int flags);\n"
+                         "RPY_EXTERN "
                          "size_t CMSG_LEN_wrapper(size_t desired_len);\n"
                          "RPY_EXTERN "
                          "size_t CMSG_SPACE_wrapper(size_t desired_space);\n"
@@ -964,12 +1075,31 @@ if HAVE_SENDMSG:
                          ]
 
 
+    # configured here rather than in CConfig, because the C code above
+    # must be compiled under the same condition as the llexternals below
+    class CConfigMMsg:
+        _compilation_info_ = eci
+        HAVE_RECVMMSG = platform.Has('recvmmsg')
+        HAVE_SENDMMSG = platform.Has('sendmmsg')
+        HAVE_MSG_WAITFORONE = platform.Defined('MSG_WAITFORONE')
+    mmsg_config = platform.configure(CConfigMMsg)
+    HAVE_RECVMMSG = bool(mmsg_config['HAVE_RECVMMSG'] and
+                         mmsg_config['HAVE_MSG_WAITFORONE'])
+    HAVE_SENDMMSG = bool(mmsg_config['HAVE_SENDMMSG'])
+    pre_include_bits = []
+    if HAVE_RECVMMSG:
+        pre_include_bits.append("#define RPY_HAVE_RECVMMSG 1")
+    if HAVE_SENDMMSG:
+        pre_include_bits.append("#define RPY_HAVE_SENDMMSG 1")
+
     compilation_info = eci.merge(ExternalCompilationInfo(
                                     includes=includes,
                                     separate_module_sources=separate_module_sources,
+                                    pre_include_bits=pre_include_bits,
                                     post_include_bits=post_include_bits,
                                ))
 else:
+    HAVE_RECVMMSG = HAVE_SENDMMSG = False
     compilation_info = eci
 
 
@@ -1271,6 +1401,18 @@ sendmsg = jit.dont_look_inside(rffi.llexternal("sendmsg_implementation",
                                 rffi.SIGNEDP, rffi.SIGNEDP, rffi.CCHARPP, rffi.SIGNEDP, rffi.INT, rffi.INT],
                                rffi.INT, save_err=SAVE_ERR,
                                compilation_info=compilation_info))
+if HAVE_RECVMMSG:
+    recvmmsg = jit.dont_look_inside(rffi.llexternal(
+        "recvmmsg_implementation",
+        [rffi.INT, rffi.CCHARPP, rffi.INTP, rffi.CCHARPP, rffi.INTP,
+         rffi.INT, rffi.INT], rffi.INT,
+        save_err=SAVE_ERR, compilation_info=compilation_info))
+if HAVE_SENDMMSG:
+    sendmmsg = jit.dont_look_inside(rffi.llexternal(
+        "sendmmsg_implementation",
+        [rffi.INT, sockaddr_ptr, socklen_t, rffi.CCHARP, rffi.SIGNEDP,
+         rffi.INT, rffi.INT], rffi.INT,
+        save_err=SAVE_ERR, compilation_info=compilation_info))
 CMSG_SPACE = jit.dont_look_inside(rffi.llexternal("CMSG_SPACE_wrapper",[size_t], size_t, save_err=SAVE_ERR,compilation_info=compilation_info))
 CMSG_LEN = jit.dont_look_inside(rffi.llexternal("CMSG_LEN_wrapper",[size_t], size_t, save_err=SAVE_ERR,compilation_info=compilation_info))
 
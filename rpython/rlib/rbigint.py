@@ -92,6 +92,22 @@ KARATSUBA_SQUARE_CUTOFF = 2 * KARATSUBA_CUTOFF
 
 FIVEARY_CUTOFF = 8
 
+# For division, use the O(N**2) school algorithm unless both the divisor
+# and the quotient contain at least DIV_CUTOFF digits.  In that case, use
+# the recursive algorithm of Burnikel and Ziegler, which splits the
+# division into multiplications and has the complexity of Karatsuba.
+# The value comes from the crossover measured by targetbigintbenchmark.
+
+DIV_CUTOFF = 4 * KARATSUBA_CUTOFF
+
+# For converting a string in a base that is not a power of two, use the
+# O(N**2) algorithm unless the string has more than FROMSTR_CUTOFF
+# characters.  In that case, the number is built by multiplying pieces of
+# similar size together.  The reverse conversion, in _format(), always
+# splits the number recursively.
+
+FROMSTR_CUTOFF = 1000
+
 @specialize.argtype(0)
 def _mask_digit(x):
     return UDIGIT_MASK(x & MASK)
@@ -2133,6 +2149,8 @@ def _divrem(a, b):
     if size_b == 1:
         z, urem = _divrem1(a, b.digit(0))
         rem = rbigint([_store_digit(urem)], int(urem != 0), 1)
+    elif size_b >= DIV_CUTOFF and size_a - size_b >= DIV_CUTOFF:
+        z, rem = _bz_divrem(a, b)
     else:
         z, rem = _x_divrem(a, b)
     # Set the signs.
@@ -2145,6 +2163,91 @@ def _divrem(a, b):
         rem.sign = - rem.sign
     return z, rem
 
+def _digits_slice(a, start, end):
+    """ Return the number made of the digits start to end of |a|. """
+    assert start >= 0
+    end = min(end, a.numdigits())
+    if start >= end:
+        return NULLRBIGINT
+    z = rbigint(a._digits[start:end], 1, end - start)
+    z._normalize()
+    return z
+
+def _digits_lshift(a, n):
+    """ Return |a| * BASE**n. """
+    if a.sign == 0:
+        return NULLRBIGINT
+    size_a = a.numdigits()
+    return rbigint([NULLDIGIT] * n + a._digits[:size_a], 1, size_a + n)
+
+def _bz_div2n1n(a, b, n):
+    """ Divide a by the n-digit b, knowing that a < b * BASE**n and that
+        the top bit of b is set.  a and b are non-negative. """
+    if n < DIV_CUTOFF:
+        return _divrem(a, b)
+    pad = n & 1
+    if pad:
+        a = _digits_lshift(a, 1)
+        b = _digits_lshift(b, 1)
+        n += 1
+    half_n = n >> 1
+    b1 = _digits_slice(b, half_n, n)
+    b2 = _digits_slice(b, 0, half_n)
+    q1, r = _bz_div3n2n(_digits_slice(a, n, a.numdigits()),
+                        _digits_slice(a, half_n, n), b, b1, b2, half_n)
+    q2, r = _bz_div3n2n(r, _digits_slice(a, 0, half_n), b, b1, b2, half_n)
+    if pad:
+        r = _digits_slice(r, 1, r.numdigits())
+    return _digits_lshift(q1, half_n).add(q2), r
+
+def _bz_div3n2n(a12, a3, b, b1, b2, n):
+    """ Divide a12 * BASE**n + a3 by b == b1 * BASE**n + b2, knowing that
+        the quotient fits in n digits. """
+    if _digits_slice(a12, n, a12.numdigits()).eq(b1):
+        q = rbigint([_store_digit(MASK)] * n, 1, n)
+        r = a12.sub(_digits_lshift(b1, n)).add(b1)
+    else:
+        q, r = _bz_div2n1n(a12, b1, n)
+    r = _digits_lshift(r, n).add(a3).sub(q.mul(b2))
+    while r.sign < 0:
+        q = q.int_sub(1)
+        r = r.add(b)
+    return q, r
+
+def _bz_divrem(a1, b1):
+    """ Unsigned bigint division with remainder, for a large divisor and
+        a large quotient -- the algorithm of Burnikel and Ziegler.  The
+        dividend is cut in pieces of the size of the divisor, that are
+        divided from the top one by one. """
+    # normalize, like in _x_divrem, so that the top bit of b is set
+    size_b = b1.numdigits()
+    d = SHIFT - bits_in_digit(b1.digit(abs(size_b-1)))
+    a = a1.abs().lshift(d)
+    b = b1.abs().lshift(d)
+    assert b.numdigits() == size_b
+
+    size_a = a.numdigits()
+    npieces = (size_a + size_b - 1) // size_b
+    q_digits = [NULLDIGIT] * (npieces * size_b)
+    r = NULLRBIGINT
+    i = npieces - 1
+    while i >= 0:
+        piece = _digits_slice(a, i * size_b, (i + 1) * size_b)
+        q, r = _bz_div2n1n(_digits_lshift(r, size_b).add(piece), b, size_b)
+        if q.sign != 0:
+            j = 0
+            while j < q.numdigits():
+                q_digits[i * size_b + j] = q._digits[j]
+                j += 1
+        i -= 1
+    z = rbigint(q_digits, 1, len(q_digits))
+    z._normalize()
+    rem = r.rshift(d)
+    if rem is r and rem.sign != 0:
+        # the caller changes the sign of the result
+        rem = rbigint(rem._digits, 1, rem.numdigits())
+    return z, rem
+
 def _x_int_lt(a, b, eq=False):
     """ Compare bigint a with int b for less than or less than or equal """
     osign = 1
@@ -2880,6 +2983,16 @@ def _decimalstr_to_bigint(s):
     elif s[p] == '+':
         p += 1
 
+    if lim - p > FROMSTR_CUTOFF:
+        ord0 = ord('0')
+        digits = [0] * (lim - p)
+        for i in range(lim - p):
+            digits[i] = ord(s[p + i]) - ord0
+        a = _digit_list_to_bigint(digits, 10)
+        if sign:
+            a = a.neg()
+        return a
+
     a = NULLRBIGINT
     tens = 1
     dig = 0
@@ -2901,6 +3014,17 @@ def parse_digit_string(parser):
     base = parser.base
     if (base & (base - 1)) == 0 and base >= 2:
         return parse_string_from_binary_base(parser)
+    if base > 2 and parser.end - parser.start > FROMSTR_CUTOFF:
+        digits = []
+        while True:
+            digit = parser.next_digit()
+            if digit < 0:
+                break
+            digits.append(digit)
+        a = _digit_list_to_bigint(digits, base)
+        if parser.sign < 0:
+            a = a.neg()
+        return a
     a = NULLRBIGINT
     digitmax = BASE_MAX[base]
     tens, dig = 1, 0
@@ -2918,6 +3042,42 @@ def parse_digit_string(parser):
     a.sign *= parser.sign
     return a
 
+def _digit_list_to_bigint(digits, base):
+    """ Turn the list of the digits of a number in base 'base', most
+        significant first, into a bigint.  The digits are grouped in
+        machine-sized pieces that are then combined two by two, so that
+        the multiplications are between numbers of similar size. """
+    mindigits = _parts_cache.get_mindigits(base)
+    num_digits = len(digits)
+    if num_digits == 0:
+        return NULLRBIGINT
+    npieces = (num_digits + mindigits - 1) // mindigits
+    level = [NULLRBIGINT] * npieces
+    end = num_digits
+    for i in range(npieces):
+        start = max(end - mindigits, 0)
+        piece = 0
+        for j in range(start, end):
+            piece = piece * base + digits[j]
+        level[i] = rbigint.fromint(piece)
+        end = start
+
+    pts = _parts_cache.get_cached_parts(base)
+    i = 0
+    while len(level) > 1:
+        if i == len(pts):
+            pts.append(pts[-1].mul(pts[-1]))
+        part = pts[i]
+        size = len(level)
+        newlevel = [NULLRBIGINT] * ((size + 1) // 2)
+        for j in range(size // 2):
+            newlevel[j] = level[2 * j + 1].mul(part).add(level[2 * j])
+        if size & 1:
+            newlevel[-1] = level[-1]
+        level = newlevel
+        i += 1
+    return level[0]
+
 def parse_string_from_binary_base(parser):
     # The point to this routine is that it takes time linear in the number of
     # string characters.
@@ -77,6 +77,14 @@ if _POSIX:
         rffi_platform.DefinedConstantInteger('MADV_DONTNEED'))
     CConfig.MADV_FREE = (
         rffi_platform.DefinedConstantInteger('MADV_FREE'))
+    # the other advice values for mmap.madvise()
+    madvise_constant_names = ['MADV_NORMAL', 'MADV_RANDOM',
+                              'MADV_SEQUENTIAL', 'MADV_WILLNEED',
+                              'MADV_REMOVE', 'MADV_DONTFORK', 'MADV_DOFORK',
+                              'MADV_HUGEPAGE', 'MADV_NOHUGEPAGE',
+                              'MADV_MERGEABLE', 'MADV_UNMERGEABLE']
+    for name in madvise_constant_names:
+        setattr(CConfig, name, rffi_platform.DefinedConstantInteger(name))
 
 elif _MS_WINDOWS:
     constant_names = ['PAGE_READONLY', 'PAGE_READWRITE', 'PAGE_WRITECOPY',
@@ -148,6 +156,8 @@ if _CYGWIN:
     _, c_free_safe = external('free', [PTR], lltype.Void, macro=True)
 
 c_memmove, _ = external('memmove', [PTR, PTR, size_t], lltype.Void)
+_, c_memchr_safe = external('memchr', [PTR, rffi.INT, size_t], PTR)
+_, c_memcmp_safe = external('memcmp', [PTR, PTR, size_t], rffi.INT)
 
 if _POSIX:
     has_mremap = cConfig['has_mremap']
@@ -165,6 +175,8 @@ if _POSIX:
     if has_madvise:
         _, c_madvise_safe = external('madvise', [PTR, size_t, rffi.INT],
                                      rffi.INT, _nowrapper=True)
+        c_madvise, _ = external('madvise', [PTR, size_t, rffi.INT], rffi.INT,
+                                save_err_on_unsafe=rffi.RFFI_SAVE_ERRNO)
 
     # this one is always safe
     _pagesize = rffi_platform.getintegerfunctionresult('getpagesize',
@@ -379,14 +391,24 @@ class MMap(object):
         else:
             raise RValueError("read byte out of range")
 
+    def _memchr(self, start, stop, c):
+        """Return the offset of the first 'c' in data[start:stop],
+        or -1."""
+        if start >= stop:
+            return -1
+        found = c_memchr_safe(self.getptr(start),
+                              rffi.cast(rffi.INT, ord(c)), stop - start)
+        if not found:
+            return -1
+        return (rffi.cast(lltype.Signed, found) -
+                rffi.cast(lltype.Signed, self.data))
+
     def readline(self):
-        data = self.data
-        for pos in xrange(self.pos, self.size):
-            if data[pos] == '\n':
-                eol = pos + 1 # we're interested in the position after new line
-                break
-        else: # no '\n' found
+        eol = self._memchr(self.pos, self.size, '\n')
+        if eol < 0: # no '\n' found
             eol = self.size
+        else:
+            eol += 1 # we're interested in the position after new line
 
         res = self.getslice(self.pos, eol - self.pos)
         self.pos += len(res)
@@ -421,10 +443,12 @@ class MMap(object):
         #
         upto = end - len(tofind)
         if not reverse:
+            if start > upto:
+                return -1      # failure (empty range to search)
+            if len(tofind) > 0:
+                return self._find_forward(tofind, start, upto)
             step = 1
             p = start
-            if p > upto:
-                return -1      # failure (empty range to search)
         else:
             step = -1
             p = upto
@@ -446,6 +470,38 @@ class MMap(object):
                 return -1   # failure
             p += step
 
+    def _find_forward(self, tofind, start, upto):
+        # look for the first character with memchr(), and compare the
+        # rest with memcmp()
+        n = len(tofind)
+        with rffi.scoped_nonmovingbuffer(tofind) as needle:
+            p = start
+            while p <= upto:
+                p = self._memchr(p, upto + 1, tofind[0])
+                if p < 0:
+                    break
+                if (n == 1 or
+                    rffi.cast(lltype.Signed, c_memcmp_safe(
+                        self.getptr(p + 1), rffi.ptradd(needle, 1),
+                        n - 1)) == 0):
+                    return p
+                p += 1
+        return -1
+
+    if _POSIX and has_madvise:
+        def madvise(self, option, start, length):
+            if start < 0 or start >= self.size:
+                raise RValueError("madvise start out of bounds")
+            if length < 0:
+                raise RValueError("madvise length invalid")
+            if length > self.size - start:
+                length = self.size - start
+            res = c_madvise(self.getptr(start), length,
+                            rffi.cast(rffi.INT, option))
+            if res == -1:
+                errno = rposix.get_saved_errno()
+                raise OSError(errno, os.strerror(errno))
+
     def seek(self, pos, whence=0):
         dist = pos
         how = whence
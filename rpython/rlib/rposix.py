@@ -620,6 +620,120 @@ if not _WIN32:
     def lockf(fd, cmd, length):
         return handle_posix_error('lockf', c_lockf(fd, cmd, length))
 
+    uio_eci = eci.merge(ExternalCompilationInfo(includes=['sys/uio.h',
+                                                          'limits.h']))
+
+    class CConfig:
+        _compilation_info_ = uio_eci
+        IOV_MAX = rffi_platform.DefinedConstantInteger('IOV_MAX')
+        HAVE_PREADV = rffi_platform.Has('preadv')
+        HAVE_PWRITEV = rffi_platform.Has('pwritev')
+        IOVEC = rffi_platform.Struct('struct iovec',
+                                     [('iov_base', rffi.VOIDP),
+                                      ('iov_len', rffi.SIZE_T)])
+
+    config = rffi_platform.configure(CConfig)
+    globals().update(config)
+    if IOV_MAX is None:
+        IOV_MAX = 16     # _XOPEN_IOV_MAX, the minimum allowed by POSIX
+    IOVEC_ARRAY = rffi.CArray(IOVEC)
+
+    c_readv = external('readv', [rffi.INT, lltype.Ptr(IOVEC_ARRAY), rffi.INT],
+                       rffi.SSIZE_T, compilation_info=uio_eci,
+                       save_err=rffi.RFFI_SAVE_ERRNO)
+    c_writev = external('writev', [rffi.INT, lltype.Ptr(IOVEC_ARRAY), rffi.INT],
+                        rffi.SSIZE_T, compilation_info=uio_eci,
+                        save_err=rffi.RFFI_SAVE_ERRNO)
+
+    def _c_readv(fd, iov, iovcnt, offset):
+        return c_readv(fd, iov, iovcnt)
+
+    def _c_writev(fd, iov, iovcnt, offset):
+        return c_writev(fd, iov, iovcnt)
+
+    @specialize.arg(0, 1)
+    def _readv(c_func, name, fd, counts, offset):
+        iovcnt = len(counts)
+        if iovcnt > IOV_MAX:
+            raise OSError(errno.EINVAL, None)
+        total = 0
+        for count in counts:
+            if count < 0:
+                raise OSError(errno.EINVAL, None)
+            total += count
+        with lltype.scoped_alloc(IOVEC_ARRAY, iovcnt) as iov:
+            with rffi.scoped_alloc_buffer(total) as buf:
+                pos = 0
+                for i in range(iovcnt):
+                    iov[i].c_iov_base = rffi.cast(rffi.VOIDP,
+                                                  rffi.ptradd(buf.raw, pos))
+                    iov[i].c_iov_len = rffi.cast(rffi.SIZE_T, counts[i])
+                    pos += counts[i]
+                got = handle_posix_error(name, c_func(fd, iov, iovcnt, offset))
+                data = buf.str(got)
+        result = []
+        pos = 0
+        for count in counts:
+            end = min(pos + count, got)
+            assert end >= 0
+            result.append(data[pos:end])
+            pos = end
+        return result
+
+    @specialize.arg(0, 1)
+    def _writev(c_func, name, fd, chunks, offset):
+        iovcnt = len(chunks)
+        if iovcnt > IOV_MAX:
+            raise OSError(errno.EINVAL, None)
+        llobjs = []
+        flags = []
+        with lltype.scoped_alloc(IOVEC_ARRAY, iovcnt) as iov:
+            try:
+                for i in range(iovcnt):
+                    data = chunks[i]
+                    buf, llobj, flag = rffi.get_nonmovingbuffer_ll(data)
+                    iov[i].c_iov_base = rffi.cast(rffi.VOIDP, buf)
+                    iov[i].c_iov_len = rffi.cast(rffi.SIZE_T, len(data))
+                    llobjs.append(llobj)
+                    flags.append(flag)
+                res = c_func(fd, iov, iovcnt, offset)
+            finally:
+                for i in range(len(llobjs)):
+                    buf = rffi.cast(rffi.CCHARP, iov[i].c_iov_base)
+                    rffi.free_nonmovingbuffer_ll(buf, llobjs[i], flags[i])
+            return handle_posix_error(name, res)
+
+    def readv(fd, counts):
+        """Read with a single readv() call into len(counts) buffers of the
+        given sizes.  Returns the list of the filled parts of the buffers;
+        the ones after the end of the data are empty."""
+        return _readv(_c_readv, 'readv', fd, counts, 0)
+
+    def writev(fd, chunks):
+        """Write the list of strings with a single writev() call.  Returns
+        the number of bytes written."""
+        return _writev(_c_writev, 'writev', fd, chunks, 0)
+
+    if HAVE_PREADV:
+        c_preadv = external('preadv',
+                            [rffi.INT, lltype.Ptr(IOVEC_ARRAY), rffi.INT, OFF_T],
+                            rffi.SSIZE_T, compilation_info=uio_eci,
+                            save_err=rffi.RFFI_SAVE_ERRNO)
+
+        @enforceargs(int, None, None)
+        def preadv(fd, counts, offset):
+            return _readv(c_preadv, 'preadv', fd, counts, offset)
+
+    if HAVE_PWRITEV:
+        c_pwritev = external('pwritev',
+                             [rffi.INT, lltype.Ptr(IOVEC_ARRAY), rffi.INT, OFF_T],
+                             rffi.SSIZE_T, compilation_info=uio_eci,
+                             save_err=rffi.RFFI_SAVE_ERRNO)
+
+        @enforceargs(int, None, None)
+        def pwritev(fd, chunks, offset):
+            return _writev(c_pwritev, 'pwritev', fd, chunks, offset)
+
 c_ftruncate = external('ftruncate', [rffi.INT, rffi.LONGLONG], rffi.INT,
                        macro=_MACRO_ON_POSIX, save_err=rffi.RFFI_SAVE_ERRNO)
 c_fsync = external('fsync' if not _WIN32 else '_commit', [rffi.INT], rffi.INT,
@@ -1073,6 +1073,68 @@ class RSocket(object):
                     "ancillary data")
             raise last_error()
 
+    if _c.HAVE_RECVMMSG:
+        @jit.dont_look_inside
+        def recvmmsg_into(self, buffers, flags=0):
+            """Receive several datagrams with a single system call, the i-th
+            one into buffers[i].  Wait until a datagram is available, but not
+            for the following ones (MSG_WAITFORONE).  Return a list of
+            (nbytes, address) tuples, one per datagram received."""
+            self.wait_for_data(False)
+            nbuf = len(buffers)
+            addresses = [None] * nbuf
+            messages = lltype.malloc(rffi.CCHARPP.TO, nbuf, flavor='raw')
+            message_lengths = lltype.malloc(rffi.INTP.TO, nbuf, flavor='raw')
+            addr_ps = lltype.malloc(rffi.CCHARPP.TO, nbuf, flavor='raw')
+            addr_lengths = lltype.malloc(rffi.INTP.TO, nbuf, flavor='raw')
+            # buffers without a raw address are received into a scratch
+            # raw buffer, which is copied into them afterwards
+            scratch = [lltype.nullptr(rffi.CCHARP.TO)] * nbuf
+            try:
+                for i in range(nbuf):
+                    address, maxlen = make_null_address(self.family)
+                    addresses[i] = address
+                    addr_ps[i] = rffi.cast(rffi.CCHARP, address.addr_p)
+                    addr_lengths[i] = rffi.cast(rffi.INT, maxlen)
+                    length = buffers[i].getlength()
+                    try:
+                        raw = buffers[i].get_raw_address()
+                    except ValueError:
+                        raw = lltype.malloc(rffi.CCHARP.TO, length,
+                                            flavor='raw')
+                        scratch[i] = raw
+                    messages[i] = raw
+                    message_lengths[i] = rffi.cast(rffi.INT, length)
+                count = rffi.cast(lltype.Signed, _c.recvmmsg(
+                    self.fd, messages, message_lengths, addr_ps, addr_lengths,
+                    rffi.cast(rffi.INT, nbuf),
+                    rffi.cast(rffi.INT, flags | MSG_WAITFORONE)))
+                keepalive_until_here(buffers)
+                if count < 0:
+                    raise self.error_handler()
+                result = []
+                for i in range(count):
+                    address = addresses[i]
+                    addrlen = rffi.cast(lltype.Signed, addr_lengths[i])
+                    if addrlen:
+                        address.addrlen = addrlen
+                    else:
+                        address = None
+                    nbytes = rffi.cast(lltype.Signed, message_lengths[i])
+                    if scratch[i]:
+                        buffers[i].setslice(0, rffi.charpsize2str(scratch[i],
+                                                                  nbytes))
+                    result.append((nbytes, address))
+                return result
+            finally:
+                for raw in scratch:
+                    if raw:
+                        lltype.free(raw, flavor='raw')
+                lltype.free(addr_lengths, flavor='raw')
+                lltype.free(addr_ps, flavor='raw')
+                lltype.free(message_lengths, flavor='raw')
+                lltype.free(messages, flavor='raw')
+
     def send_raw(self, dataptr, length, flags=0):
         """Send data from a CCHARP buffer."""
         self.wait_for_data(True)
@@ -1207,6 +1269,47 @@ class RSocket(object):
 
         return bytes_sent
 
+    if _c.HAVE_SENDMMSG:
+        @jit.dont_look_inside
+        def sendmmsg(self, messages, flags=0, address=None):
+            """Send each string of the list 'messages' as a separate datagram,
+            with a single system call.  'address' is the destination, or None
+            for a connected socket.  Return the number of datagrams sent, which
+            may be less than len(messages) if the network is busy."""
+            self.wait_for_data(True)
+            nmsg = len(messages)
+            total = 0
+            for message in messages:
+                total += len(message)
+            data = lltype.malloc(rffi.CCHARP.TO, max(total, 1), flavor='raw')
+            lengths = lltype.malloc(rffi.SIGNEDP.TO, nmsg, flavor='raw')
+            if address is None:
+                addr = lltype.nullptr(_c.sockaddr)
+                addrlen = 0
+            else:
+                addr = address.lock()
+                addrlen = address.addrlen
+            try:
+                offset = 0
+                for i in range(nmsg):
+                    message = messages[i]
+                    length = len(message)
+                    rffi.str2rawmem(message, rffi.ptradd(data, offset), 0,
+                                    length)
+                    lengths[i] = length
+                    offset += length
+                count = rffi.cast(lltype.Signed, _c.sendmmsg(
+                    self.fd, addr, rffi.cast(_c.socklen_t, addrlen), data,
+                    lengths, rffi.cast(rffi.INT, nmsg), rffi.cast(rffi.INT, flags)))
+            finally:
+                if address is not None:
+                    address.unlock()
+                lltype.free(lengths, flavor='raw')
+                lltype.free(data, flavor='raw')
+            if count < 0:
+                raise self.error_handler()
+            return count
+
     def setblocking(self, block):
         if block:
             timeout = -1.0
@@ -84,6 +84,11 @@ INPUT_BUFFER_MAX = 2047*1024*1024
 # from an input of INPUT_BUFFER_MAX bytes.  This should be true by a
 # large margin (I think zlib never compresses by more than ~1000x).
 
+# The GIL is released around each call to deflate() or inflate(), which
+# fills at most one output buffer.  For large inputs we use a buffer of
+# up to this size, to avoid taking the GIL back every 32KB.
+MAX_OUTPUT_BUFFER_SIZE = 1024*1024
+
 
 class ComplexCConfig:
     """
@@ -126,6 +131,8 @@ def zlib_external(*a, **kw):
 
 _crc32 = zlib_external('crc32', [uLong, Bytefp, uInt], uLong)
 _adler32 = zlib_external('adler32', [uLong, Bytefp, uInt], uLong)
+_crc32_combine = zlib_external('crc32_combine', [uLong, uLong, rffi.LONG],
+                               uLong, releasegil=False)
 
 
 # XXX I want to call deflateInit2, not deflateInit2_
@@ -198,6 +205,13 @@ def crc32(string, start=CRC32_DEFAULT_START):
     """
     return _crc_or_adler(string, start, _crc32)
 
+def crc32_combine(crc1, crc2, len2):
+    """
+    Return the CRC32 checksum of the concatenation of two strings, given
+    the checksum of each of them and the length of the second one.
+    """
+    return _crc32_combine(crc1, crc2, len2)
+
 ADLER32_DEFAULT_START = 1
 
 def adler32(string, start=ADLER32_DEFAULT_START):
@@ -431,7 +445,9 @@ def _operate(stream, data, flush, max_length, cfunc, while_doing, zdict=None):
         end_inbuf = rffi.ptradd(stream.c_next_in, len(data))
 
         # Prepare the output buffer
-        with lltype.scoped_alloc(rffi.CCHARP.TO, OUTPUT_BUFFER_SIZE) as outbuf:
+        outbuf_size = min(max(len(data), OUTPUT_BUFFER_SIZE),
+                          MAX_OUTPUT_BUFFER_SIZE)
+        with lltype.scoped_alloc(rffi.CCHARP.TO, outbuf_size) as outbuf:
             # Strategy: we call deflate() to get as much output data as fits in
             # the buffer, then accumulate all output into a StringBuffer
             # 'result'.
@@ -444,7 +460,7 @@ def _operate(stream, data, flush, max_length, cfunc, while_doing, zdict=None):
                 rffi.setintfield(stream, 'c_avail_in', avail_in)
 
                 stream.c_next_out = rffi.cast(Bytefp, outbuf)
-                bufsize = OUTPUT_BUFFER_SIZE
+                bufsize = outbuf_size
                 if max_length < bufsize:
                     if max_length <= 0:
                         err = Z_OK
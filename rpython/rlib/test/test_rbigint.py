@@ -1007,6 +1007,57 @@ class TestInternalFunctions(object):
         assert rem.tolong() == _rem
 
 
+    def test__bz_divrem(self):
+        for size_b, size_q in [(lobj.DIV_CUTOFF, lobj.DIV_CUTOFF),
+                               (2 * lobj.DIV_CUTOFF + 1, 3 * lobj.DIV_CUTOFF),
+                               (5 * lobj.DIV_CUTOFF, lobj.DIV_CUTOFF + 3)]:
+            for i in range(3):
+                y = long(randint(1, 1 << (SHIFT * size_b)))
+                x = long(randint(0, 1 << (SHIFT * (size_b + size_q))))
+                f1 = rbigint.fromlong(x)
+                f2 = rbigint.fromlong(y)
+                div, rem = lobj._bz_divrem(f1, f2)
+                _div, _rem = divmod(x, y)
+                assert div.tolong() == _div
+                assert rem.tolong() == _rem
+            # all the digits of the quotient are MASK
+            y = (1 << (SHIFT * size_b - 1)) + 12345
+            x = y * ((1 << (SHIFT * size_q)) - 1) + y - 1
+            div, rem = lobj._bz_divrem(rbigint.fromlong(x),
+                                       rbigint.fromlong(y))
+            assert div.tolong() == (1 << (SHIFT * size_q)) - 1
+            assert rem.tolong() == y - 1
+
+    def test_divmod_big(self):
+        y = long(randint(1, 1 << (SHIFT * 3 * lobj.DIV_CUTOFF)))
+        x = long(randint(0, 1 << (SHIFT * 7 * lobj.DIV_CUTOFF)))
+        for sx, sy in (1, 1), (1, -1), (-1, -1), (-1, 1):
+            sx *= x
+            sy *= y
+            div, rem = rbigint.fromlong(sx).divmod(rbigint.fromlong(sy))
+            assert div.tolong() == sx // sy
+            assert rem.tolong() == sx % sy
+        m = long(randint(1, 1 << (SHIFT * 2 * lobj.DIV_CUTOFF)))
+        res = rbigint.fromlong(x).pow(rbigint.fromint(3), rbigint.fromlong(m))
+        assert res.tolong() == pow(x, 3, m)
+
+    def test_str_big(self):
+        x = 3 ** 12345 - 7 ** 2345
+        for num in [x, -x, 10 ** 5000, 10 ** 5000 - 1]:
+            s = str(num)
+            assert len(s) > lobj.FROMSTR_CUTOFF
+            assert rbigint.fromlong(num).str() == s
+            assert rbigint.fromdecimalstr(s).tolong() == num
+            assert rbigint.fromstr(s).tolong() == num
+        s = '0' * 3000 + '1' + '0' * 3000
+        assert rbigint.fromdecimalstr(s).tolong() == 10 ** 3000
+        assert rbigint.fromstr(s, 10).tolong() == 10 ** 3000
+        s = '_'.join(['123'] * 1000)
+        assert rbigint.fromstr(s, 7, allow_underscores=True).tolong() == (
+            long(s.replace('_', ''), 7))
+        assert rbigint.fromstr('-' + 'z' * 2000, 36).tolong() == (
+            -(36 ** 2000 - 1))
+
     def test_int_divmod(self):
         for x in long_vals:
             for y in int_vals + [-sys.maxint-1]:
@@ -1099,6 +1150,8 @@ class TestInternalFunctions(object):
                 self.sign = sign
                 self.i = 0
                 self._digits = digits
+                self.start = 0
+                self.end = len(digits)
             def next_digit(self):
                 i = self.i
                 if i == len(self._digits):
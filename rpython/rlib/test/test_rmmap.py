@@ -207,6 +207,44 @@ class TestMMap:
         interpret(func, [f.fileno()])
         f.close()
 
+    def test_find_repeated_first_char(self):
+        data = "aaabaabaaab" * 5 + "aaaab"
+        f = open(self.tmpname + "g2", "w+")
+        f.write(data)
+        f.flush()
+        m = mmap.mmap(f.fileno(), len(data))
+        for needle in ["aaaab", "aab", "b", "ba", "abaaa", "aaaaa", ""]:
+            for start in range(0, len(data), 7):
+                assert m.find(needle, start, len(data)) == (
+                    data.find(needle, start))
+        m.close()
+        f.close()
+
+    def test_madvise(self):
+        if not (os.name == "posix" and mmap.has_madvise):
+            py.test.skip("no madvise")
+        def func():
+            m = mmap.mmap(-1, mmap.PAGESIZE * 4)
+            m.madvise(mmap.MADV_SEQUENTIAL, 0, m.size)
+            m.madvise(mmap.MADV_WILLNEED, mmap.PAGESIZE, sys.maxint)
+            m.madvise(mmap.MADV_NORMAL, mmap.PAGESIZE * 3, 1)
+            try:
+                m.madvise(mmap.MADV_NORMAL, m.size, 1)
+            except RValueError:
+                pass
+            else:
+                raise Exception("Did not raise")
+            try:
+                m.madvise(mmap.MADV_NORMAL, 1, 1)   # not page-aligned
+            except OSError:
+                pass
+            else:
+                raise Exception("Did not raise")
+            m.close()
+
+        func()
+        interpret(func, [])
+
     def test_is_modifiable(self):
         f = open(self.tmpname + "h", "w+")
         
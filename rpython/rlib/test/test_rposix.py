@@ -762,6 +762,47 @@ def test_pwrite():
         os.close(fd)
     py.test.raises(OSError, rposix.pwrite, fd, b'ea', 1)
 
+@rposix_requires('writev')
+def test_readv_writev():
+    r, w = os.pipe()
+    try:
+        assert rposix.writev(w, [b'Hello', b'', b' world']) == 11
+        assert rposix.readv(r, [2, 0, 5, 100, 3]) == [
+            b'He', b'', b'llo w', b'orld', b'']
+        py.test.raises(OSError, rposix.readv, r, [-1])
+        py.test.raises(OSError, rposix.writev, w,
+                       [b'x'] * (rposix.IOV_MAX + 1))
+    finally:
+        os.close(r)
+        os.close(w)
+    py.test.raises(OSError, rposix.writev, w, [b'x'])
+
+@rposix_requires('pwritev')
+def test_preadv_pwritev():
+    fname = str(udir.join('os_test_vectored.txt'))
+    fd = os.open(fname, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0777)
+    try:
+        os.write(fd, b'Hello world')
+        assert rposix.pwritev(fd, [b'e', b'a'], 1) == 2
+        assert rposix.preadv(fd, [3, 4], 2) == [b'alo', b' wor']
+        assert rposix.preadv(fd, [3, 4], 9) == [b'ld', b'']
+        assert os.lseek(fd, 0, 1) == 11
+    finally:
+        os.close(fd)
+
+@rposix_requires('writev')
+def test_readv_writev_compiled():
+    def f(n):
+        r, w = os.pipe()
+        chunks = [str(i) * n for i in range(5)]
+        total = rposix.writev(w, chunks)
+        res = rposix.readv(r, [n + 1] * 4)
+        os.close(r)
+        os.close(w)
+        return total * 1000 + len(res[3]) * 10 + len(''.join(res))
+    fc = compile(f, [int])
+    assert fc(3) == f(3) == 15000 + 30 + 15
+
 @rposix_requires('posix_fadvise')
 def test_posix_fadvise():
     if sys.maxint <= 2**32:
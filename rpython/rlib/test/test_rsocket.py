@@ -317,6 +317,77 @@ def test_simple_udp(do_recv):
     s1.close()
     s2.close()
 
+@pytest.mark.skipif(not rsocket._c.HAVE_SENDMMSG or
+                    not rsocket._c.HAVE_RECVMMSG,
+                    reason="no sendmmsg()/recvmmsg()")
+def test_udp_mmsg():
+    s1 = RSocket(AF_INET, SOCK_DGRAM)
+    s1.bind(INETAddress('127.0.0.1', INADDR_ANY))
+    addr1 = s1.getsockname()
+    s2 = RSocket(AF_INET, SOCK_DGRAM)
+    s2.bind(INETAddress('127.0.0.1', INADDR_ANY))
+    addr2 = s2.getsockname()
+
+    count = s2.sendmmsg(['a', 'bc' * 10, '', 'def'], 0, addr1)
+    assert count == 4
+    s1.settimeout(10.0)
+    bufs = [RawByteBuffer(10) for i in range(6)]
+    res = s1.recvmmsg_into(bufs)
+    assert [nbytes for nbytes, addr in res] == [1, 10, 0, 3]
+    for nbytes, addr in res:
+        assert addr.get_port() == addr2.get_port()
+    assert bufs[0].as_str()[:1] == 'a'
+    assert bufs[1].as_str() == 'bc' * 5
+    assert bufs[3].as_str()[:3] == 'def'
+
+    s2.connect(addr1)
+    assert s2.sendmmsg(['x', 'yz']) == 2
+    res = s1.recvmmsg_into(bufs[:1])
+    assert len(res) == 1 and res[0][0] == 1
+    res = s1.recvmmsg_into(bufs)
+    assert len(res) == 1 and res[0][0] == 2
+    assert bufs[0].as_str()[:2] == 'yz'
+
+    s1.settimeout(0.0)
+    err = pytest.raises(CSocketError, s1.recvmmsg_into, bufs)
+    assert err.value.errno in (errno.EAGAIN, errno.EWOULDBLOCK)
+    s1.close()
+    s2.close()
+
+@pytest.mark.skipif(not rsocket._c.HAVE_SENDMMSG or
+                    not rsocket._c.HAVE_RECVMMSG,
+                    reason="no sendmmsg()/recvmmsg()")
+def test_udp_mmsg_no_raw_address():
+    from rpython.rlib.buffer import Buffer
+
+    class ListBuffer(Buffer):
+        # a writable buffer that cannot give its raw address
+        def __init__(self, n):
+            self.data = ['\0'] * n
+            self.readonly = False
+        def getlength(self):
+            return len(self.data)
+        def getitem(self, index):
+            return self.data[index]
+        def setitem(self, index, char):
+            self.data[index] = char
+
+    s1 = RSocket(AF_INET, SOCK_DGRAM)
+    s1.bind(INETAddress('127.0.0.1', INADDR_ANY))
+    s2 = RSocket(AF_INET, SOCK_DGRAM)
+    s2.bind(INETAddress('127.0.0.1', INADDR_ANY))
+    s2.connect(s1.getsockname())
+    assert s2.sendmmsg(['hello', 'world!']) == 2
+    s1.settimeout(10.0)
+    bufs = [ListBuffer(5), RawByteBuffer(10)]
+    pytest.raises(ValueError, bufs[0].get_raw_address)
+    res = s1.recvmmsg_into(bufs)
+    assert [nbytes for nbytes, addr in res] == [5, 6]
+    assert ''.join(bufs[0].data) == 'hello'
+    assert bufs[1].as_str()[:6] == 'world!'
+    s1.close()
+    s2.close()
+
 def test_nonblocking(do_recv):
     sock = RSocket()
     sock.setblocking(False)
@@ -38,6 +38,19 @@ def test_crc32_start_value():
     assert helloworldcrc == rzlib.crc32(hello + world)
 
 
+def test_crc32_combine():
+    """
+    rzlib.crc32_combine() should compute the CRC32 of the concatenation of
+    two strings from their own CRC32.
+    """
+    hello = 'hello, '
+    world = 'world.'
+    crc = rzlib.crc32_combine(rzlib.crc32(hello), rzlib.crc32(world),
+                              len(world))
+    assert crc == rzlib.crc32(hello + world)
+    assert rzlib.crc32_combine(rzlib.crc32(hello), 0, 0) == rzlib.crc32(hello)
+
+
 def test_adler32():
     """
     When called with a string, zlib.crc32 should compute its adler 32
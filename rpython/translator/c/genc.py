@@ -358,8 +358,13 @@ class CStandaloneBuilder(CBuilder):
             extra_opts += ["lldebug"]
         elif self.config.translation.lldebug0:
             extra_opts += ["lldebug0"]
+        objcache = self.get_object_cache(extra_opts)
+        if objcache is not None:
+            objcache.restore()
         self.translator.platform.execute_makefile(self.targetdir,
                                                   extra_opts)
+        if objcache is not None:
+            objcache.store()
         if shared:
             self.shared_library_name = self.executable_name.new(
                 purebasename='lib' + self.executable_name.purebasename,
@@ -367,6 +372,19 @@ class CStandaloneBuilder(CBuilder):
         self._compiled = True
         return self.executable_name
 
+    def get_object_cache(self, extra_opts):
+        cachedir = self.config.translation.objcache
+        if (not cachedir or self.config.translation.dont_write_c_files or
+                self.translator.platform.name == 'msvc'):
+            return None
+        from rpython.translator.c.objcache import ObjectCache
+        objcache = ObjectCache(cachedir, self.targetdir,
+                               [self.targetdir.join(cfile)
+                                for cfile in self.makefile_cfiles],
+                               self.translator.platform, extra_opts)
+        objcache.compute_keys(self.eci.include_dirs)
+        return objcache
+
     def gen_makefile(self, targetdir, exe_name=None, headers_to_precompile=[]):
         module_files = self.eventually_copy(self.eci.separate_module_files)
         self.eci.separate_module_files = []
@@ -520,6 +538,7 @@ class CStandaloneBuilder(CBuilder):
         else:
             mk.rule('debug_target', '$(DEFAULT_TARGET)', '#')
         mk.write()
+        self.makefile_cfiles = mk.cfiles
         #self.translator.platform,
         #                           ,
         #                           self.eci, profbased=self.getprofbased()
@@ -0,0 +1,247 @@
+""" A cache of compiled object files, shared between translations.
+
+The key of an object file is a hash of the content of its C source, of the
+headers that it includes from the generated sources and from the checkout,
+of the Makefile that compiles it and of the version of the compiler.  When a
+translation produces a C file with the same key as in a previous
+translation, the object file is put back in place before 'make' runs, which
+then only recompiles the files that changed.  The generated C code of a
+function only stays the same if the annotations and the names that it
+depends on did not change, which in practice means that a change in one
+module only recompiles the files that contain its functions.
+
+structdef.h and forwarddecl.h declare the whole program and change with
+every change to it, so they are not part of the key as a whole: a C file
+only depends on the declarations of the names that it uses, and of the
+names that these declarations use in turn.
+
+Headers outside of the checkout (i.e. the system ones) are not part of the
+key: remove the cache directory after upgrading libraries.
+"""
+
+import os
+import re
+import py
+from hashlib import sha1
+
+from rpython.tool.runsubprocess import run_subprocess
+from rpython.tool.udir import udir
+from rpython.translator.c.support import log
+
+RPYDIR = py.path.local(__file__).dirpath().dirpath().dirpath()
+CHECKOUTDIR = RPYDIR.dirpath()
+
+# the generated headers that declare the whole program
+WHOLE_PROGRAM_HEADERS = ['structdef.h', 'forwarddecl.h']
+
+r_include = re.compile(r'^[ \t]*#[ \t]*include[ \t]*(?:"([^"]+)"|(<))', re.M)
+r_identifier = re.compile(r'[A-Za-z_]\w*')
+r_declarations = [
+    # structdef.h
+    re.compile(r'(?:struct|union)\s+(\w+)\s*[;{]'),
+    re.compile(r'typedef\b[^;]*?(\w+)\s*;'),
+    re.compile(r'#define\s+(\w+)'),
+    # forwarddecl.h: functions, then variables
+    re.compile(r'RPY_\w+\s[^(;]*?\b(\w+)\('),
+    re.compile(r'RPY_\w+\s[^(;=\[]*?\b(\w+)\s*(?:\[[^]]*\]\s*)*;'),
+]
+C_KEYWORDS = set(['void', 'char', 'short', 'int', 'long', 'float', 'double',
+                  'signed', 'unsigned', 'struct', 'union', 'enum', 'const',
+                  'volatile'])
+
+
+def _split_declarations(source):
+    """ Split a whole-program header into its top-level declarations, and
+    return a list of (declared name, identifiers, text).  The declared name
+    is None for the parts that are not understood, which go into every key.
+    """
+    chunks = []
+    lines = []
+    for line in source.splitlines(True):
+        if lines and (line[:1].isspace() or line.startswith('}') or
+                      lines[-1].rstrip().endswith('\\')):
+            lines.append(line)
+        else:
+            if lines:
+                chunks.append(''.join(lines))
+            lines = [line]
+    if lines:
+        chunks.append(''.join(lines))
+    result = []
+    for text in chunks:
+        name = None
+        for r in r_declarations:
+            match = r.match(text)
+            if match:
+                name = match.group(1)
+                break
+        if name in C_KEYWORDS:
+            name = None
+        result.append((name, set(r_identifier.findall(text)), text))
+    return result
+
+
+class _Headers(object):
+    """ The headers that the C files include, each read only once. """
+
+    def __init__(self, targetdir, include_dirs):
+        self.targetdir = targetdir
+        self.dirs = []
+        for d in [targetdir] + include_dirs:
+            d = py.path.local(d)
+            if d.check(dir=1) and d not in self.dirs:
+                self.dirs.append(d)
+        self.parsed = {}
+        self.declarations = {}
+        self.declared_by = {}
+        for basename in WHOLE_PROGRAM_HEADERS:
+            path = targetdir.join(basename)
+            if path.check(file=1):
+                decls = _split_declarations(path.read('rb'))
+                self.declarations[path] = decls
+                for i, (name, _, _) in enumerate(decls):
+                    if name is not None:
+                        self.declared_by.setdefault(name, []).append((path, i))
+
+    def find(self, name, includer):
+        """ The header that '#include "name"' in 'includer' refers to, or
+        None if it is neither generated nor in the checkout. """
+        for d in [includer.dirpath()] + self.dirs:
+            path = d.join(name)
+            if path.check(file=1):
+                if path.relto(self.targetdir) or path.relto(CHECKOUTDIR):
+                    return path
+                return None
+        return None
+
+    def parse(self, path):
+        """ The quoted includes and the identifiers of a file. """
+        try:
+            return self.parsed[path]
+        except KeyError:
+            pass
+        source = path.read('rb')
+        includes = [name for name, angle in r_include.findall(source)
+                    if not angle]
+        result = (source, includes, set(r_identifier.findall(source)))
+        self.parsed[path] = result
+        return result
+
+    def hash_dependencies(self, h, cfile):
+        """ Hash the headers that 'cfile' includes, directly or not. """
+        identifiers = set()
+        headers = set()
+        pending = [cfile]
+        while pending:
+            path = pending.pop()
+            _, includes, idents = self.parse(path)
+            identifiers |= idents
+            for name in includes:
+                header = self.find(name, path)
+                if header is not None and header not in headers:
+                    headers.add(header)
+                    if header not in self.declarations:
+                        pending.append(header)
+        for header in sorted(headers):
+            if header.relto(self.targetdir):
+                h.update(header.relto(self.targetdir) + '\0')
+            else:
+                h.update(header.relto(CHECKOUTDIR) + '\0')
+            if header not in self.declarations:
+                h.update(self.parse(header)[0])
+        self._hash_declarations(h, headers, identifiers)
+
+    def _hash_declarations(self, h, headers, identifiers):
+        # the declarations of the identifiers used, then of the identifiers
+        # that these declarations use, and so on
+        used = {}
+        for header in headers:
+            if header in self.declarations:
+                used[header] = set([i for i, (name, _, _) in
+                                    enumerate(self.declarations[header])
+                                    if name is None])
+        pending = list(identifiers)
+        while pending:
+            for header, i in self.declared_by.get(pending.pop(), ()):
+                if header in used and i not in used[header]:
+                    used[header].add(i)
+                    for ident in self.declarations[header][i][1]:
+                        if ident not in identifiers:
+                            identifiers.add(ident)
+                            pending.append(ident)
+        for header in sorted(used):
+            decls = self.declarations[header]
+            for i in sorted(used[header]):
+                h.update(decls[i][2])
+
+
+def _compiler_version(cc):
+    try:
+        returncode, stdout, stderr = run_subprocess(cc, ['--version'])
+    except (OSError, EnvironmentError):
+        return ''
+    return stdout
+
+
+class ObjectCache(object):
+
+    def __init__(self, cachedir, targetdir, cfiles, platform, extra_opts=[]):
+        self.cachedir = py.path.local(cachedir).ensure(dir=1)
+        self.targetdir = targetdir
+        self.cfiles = [cfile for cfile in cfiles
+                       if cfile.relto(targetdir) and cfile.check(file=1)]
+        self.platform = platform
+        self.extra_opts = extra_opts
+        self.keys = {}
+
+    def _common_hash(self):
+        h = sha1()
+        makefile = self.targetdir.join('Makefile')
+        if makefile.check(file=1):
+            # the name of the usession directory changes every time
+            h.update(makefile.read('rb').replace(str(udir), '$(UDIR)'))
+        h.update(' '.join(self.extra_opts) + '\0')
+        h.update(_compiler_version(self.platform.cc))
+        return h
+
+    def compute_keys(self, include_dirs):
+        common = self._common_hash()
+        headers = _Headers(self.targetdir, [
+            d for d in include_dirs
+            if py.path.local(d).relto(CHECKOUTDIR)])
+        for cfile in self.cfiles:
+            h = common.copy()
+            h.update(cfile.relto(self.targetdir) + '\0')
+            h.update(cfile.read('rb'))
+            headers.hash_dependencies(h, cfile)
+            self.keys[cfile] = h.hexdigest()
+
+    def _cached(self, cfile):
+        key = self.keys[cfile]
+        return self.cachedir.join(key[:2], key[2:] + '.o')
+
+    def restore(self):
+        """ Copy the cached object files next to their C sources.  The copies
+        are newer than the sources, so 'make' does not rebuild them. """
+        count = 0
+        for cfile in self.cfiles:
+            cached = self._cached(cfile)
+            if cached.check(file=1):
+                cached.copy(cfile.new(ext='.o'))
+                count += 1
+        log.objcache('reusing %d of %d object files from %s' % (
+            count, len(self.cfiles), self.cachedir))
+        return count
+
+    def store(self):
+        """ Add the object files produced by 'make' to the cache. """
+        for cfile in self.cfiles:
+            ofile = cfile.new(ext='.o')
+            cached = self._cached(cfile)
+            if ofile.check(file=1) and not cached.check(file=1):
+                cached.dirpath().ensure(dir=1)
+                # write and rename, in case of concurrent translations
+                tmp = cached.new(basename='%s.tmp%d' % (cached.basename,
+                                                        os.getpid()))
+                ofile.copy(tmp)
+                tmp.rename(cached)
@@ -0,0 +1,139 @@
+from rpython.annotator.listdef import s_list_of_strings
+from rpython.translator.translator import TranslationContext
+from rpython.translator.c.genc import CStandaloneBuilder
+from rpython.translator.c import objcache
+from rpython.tool.udir import udir
+
+
+class FakePlatform(object):
+    cc = 'does-not-exist-cc'
+
+
+def test_keys(tmpdir):
+    targetdir = tmpdir.ensure('target', dir=1)
+    targetdir.join('a.c').write('#include "x.h"\nint a;')
+    targetdir.join('b.c').write('int b;')
+    targetdir.join('x.h').write('#define X 1')
+    cache = objcache.ObjectCache(tmpdir.join('cache'), targetdir,
+                                 [targetdir.join('a.c'), targetdir.join('b.c'),
+                                  tmpdir.join('outside.c')],
+                                 FakePlatform())
+    assert cache.cfiles == [targetdir.join('a.c'), targetdir.join('b.c')]
+    cache.compute_keys([])
+    keys = cache.keys.copy()
+    assert keys[targetdir.join('a.c')] != keys[targetdir.join('b.c')]
+    #
+    targetdir.join('a.o').write('object a')
+    cache.store()
+    assert len(tmpdir.join('cache').listdir()) == 1
+    targetdir.join('a.o').remove()
+    assert cache.restore() == 1
+    assert targetdir.join('a.o').read() == 'object a'
+    #
+    targetdir.join('b.c').write('int b = 2;')
+    cache.compute_keys([])
+    assert cache.keys[targetdir.join('a.c')] == keys[targetdir.join('a.c')]
+    assert cache.keys[targetdir.join('b.c')] != keys[targetdir.join('b.c')]
+    targetdir.join('x.h').write('#define X 2')
+    keys = cache.keys.copy()
+    cache.compute_keys([])
+    assert cache.keys[targetdir.join('a.c')] != keys[targetdir.join('a.c')]
+    # b.c does not include x.h
+    assert cache.keys[targetdir.join('b.c')] == keys[targetdir.join('b.c')]
+    cache.extra_opts = ['lldebug']
+    keys = cache.keys.copy()
+    cache.compute_keys([])
+    assert cache.keys[targetdir.join('a.c')] != keys[targetdir.join('a.c')]
+
+
+STRUCTDEF = """\
+#ifndef _PYPY_STRUCTDEF_H
+#define _PYPY_STRUCTDEF_H
+struct pypy_a0;
+struct pypy_b0;
+struct pypy_a0 {
+\tstruct pypy_b0 *a_b;
+};
+struct pypy_b0 {
+\tSigned b_x;
+};
+#endif
+"""
+
+FORWARDDECL = """\
+#ifndef _PYPY_FORWARDDECL_H
+#define _PYPY_FORWARDDECL_H
+RPY_EXTERN struct pypy_a0 *pypy_g_f(Signed l_x_1);
+RPY_EXTERN Signed pypy_g_g(void);
+RPY_EXTERN struct pypy_b0 pypy_g_b;
+#endif
+"""
+
+def test_keys_whole_program_headers(tmpdir):
+    targetdir = tmpdir.ensure('target', dir=1)
+    header = '#include "structdef.h"\n#include "forwarddecl.h"\n'
+    targetdir.join('f.c').write(header + 'void h(void) { pypy_g_f(1); }')
+    targetdir.join('g.c').write(header + 'void k(void) { pypy_g_g(); }')
+    targetdir.join('structdef.h').write(STRUCTDEF)
+    targetdir.join('forwarddecl.h').write(FORWARDDECL)
+    cache = objcache.ObjectCache(tmpdir.join('cache'), targetdir,
+                                 [targetdir.join('f.c'),
+                                  targetdir.join('g.c')],
+                                 FakePlatform())
+    cache.compute_keys([])
+    keys = cache.keys.copy()
+    f_key = keys[targetdir.join('f.c')]
+    g_key = keys[targetdir.join('g.c')]
+    # a new function does not change the keys of the others
+    targetdir.join('forwarddecl.h').write(FORWARDDECL.replace(
+        '#endif', 'RPY_EXTERN Signed pypy_g_new(void);\n#endif'))
+    cache.compute_keys([])
+    assert cache.keys[targetdir.join('f.c')] == f_key
+    assert cache.keys[targetdir.join('g.c')] == g_key
+    # a struct that pypy_g_f() returns a pointer to, which has a pointer
+    # to the struct that changes
+    targetdir.join('structdef.h').write(STRUCTDEF.replace(
+        'Signed b_x;', 'Signed b_x;\n\tSigned b_y;'))
+    cache.compute_keys([])
+    assert cache.keys[targetdir.join('f.c')] != f_key
+    assert cache.keys[targetdir.join('g.c')] == g_key
+    # a changed signature
+    targetdir.join('forwarddecl.h').write(FORWARDDECL.replace(
+        'pypy_g_g(void)', 'pypy_g_g(Signed l_y_2)'))
+    cache.compute_keys([])
+    assert cache.keys[targetdir.join('g.c')] != g_key
+
+
+def test_rebuild(monkeypatch):
+    cachedir = udir.join('test_objcache_rebuild')
+    def entry_point(argv):
+        print 'hello, objcache'
+        return 0
+    restored = []
+    real_restore = objcache.ObjectCache.restore.im_func
+    def restore(self):
+        res = real_restore(self)
+        restored.append((res, len(self.cfiles)))
+        return res
+    monkeypatch.setattr(objcache.ObjectCache, 'restore', restore)
+
+    t = TranslationContext()
+    t.config.translation.objcache = str(cachedir)
+    t.buildannotator().build_types(entry_point, [s_list_of_strings])
+    t.buildrtyper().specialize()
+    cbuilder = CStandaloneBuilder(t, entry_point, t.config)
+    cbuilder.generate_source()
+    cbuilder.compile()
+    assert cbuilder.cmdexec('') == 'hello, objcache\n'
+    # rebuild from a clean tree: every object file comes from the cache
+    for ofile in cbuilder.targetdir.listdir('*.o'):
+        ofile.remove()
+    cbuilder.executable_name.remove()
+    cbuilder._compiled = False
+    cbuilder.compile()
+    assert cbuilder.cmdexec('') == 'hello, objcache\n'
+
+    (first, n1), (second, n2) = restored
+    assert first == 0
+    assert n1 == n2 > 0
+    assert second == n2
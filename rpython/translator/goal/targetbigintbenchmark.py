@@ -2,7 +2,7 @@
 
 import sys
 from time import time
-from rpython.rlib.rbigint import rbigint
+from rpython.rlib.rbigint import rbigint, _x_divrem, _bz_divrem
 
 # __________  Entry point  __________
 
@@ -262,8 +262,61 @@ def entry_point(argv):
 
     sumTime += _time
 
+    # the following ones are used to tune DIV_CUTOFF and FROMSTR_CUTOFF
+    t = time()
+    num = rbigint.pow(rbigint.fromint(7), rbigint.fromint(400000))
+    by = rbigint.pow(rbigint.fromint(3), rbigint.fromint(300000))
+    for n in xrange(20):
+        rbigint.divmod(num, by)
+
+    _time = time() - t
+    sumTime += _time
+    print "divmod 1.1M bits by 475k bits:", _time
+
+    t = time()
+    modulus = rbigint.pow(rbigint.fromint(3), rbigint.fromint(2600)).int_add(2)
+    base = rbigint.pow(rbigint.fromint(5), rbigint.fromint(1700))
+    for n in xrange(10):
+        rbigint.pow(base, modulus, modulus)
+
+    _time = time() - t
+    sumTime += _time
+    print "pow with a 4k bits modulus:", _time
+
+    t = time()
+    num = rbigint.pow(rbigint.fromint(10), rbigint.fromint(200000)).int_sub(1)
+    s = num.str()
+    for n in xrange(4):
+        num.str()
+
+    _time = time() - t
+    sumTime += _time
+    print "str() of 200000 digits:", _time
+
+    t = time()
+    for n in xrange(5):
+        rbigint.fromstr(s)
+
+    _time = time() - t
+    sumTime += _time
+    print "fromstr() of 200000 digits:", _time
+
     print "Sum: ", sumTime
 
+    # crossover between the two division algorithms, for DIV_CUTOFF
+    for size in [20, 40, 80, 160, 320]:
+        by = rbigint.pow(rbigint.fromint(3), rbigint.fromint(size * 40))
+        num = by.mul(by).int_add(12345)
+        t = time()
+        for n in xrange(100000 // size):
+            _x_divrem(num, by)
+        _time = time() - t
+        t = time()
+        for n in xrange(100000 // size):
+            _bz_divrem(num, by)
+        print "divmod of %d digits by %d digits:" % (
+            num.numdigits(), by.numdigits()), _time, time() - t
+
     return 0
 
 # _____ Define and setup target ___
@@ -1,4 +1,4 @@
-import sys, os, signal, thread, Queue, time
+import sys, os, signal, thread, threading, Queue, time
 import py
 import subprocess, optparse
 
@@ -54,18 +54,35 @@ EXECUTEFAILED = -1001
 RUNFAILED  = -1000
 TIMEDOUT = -999
 
-def busywait(p, timeout):
-    t0 = time.time()
-    delay = 0.5
-    while True:
-        time.sleep(delay)
-        returncode = p.poll()
-        if returncode is not None:
-            return returncode
-        tnow = time.time()
-        if (tnow-t0) >= timeout:
-            return None
-        delay = min(delay * 1.15, 7.2)
+KILL_GRACE_PERIOD = 10
+
+def wait_with_timeout(p, timeout):
+    """Block until the process p finishes.  If it takes more than timeout
+    seconds, it is sent SIGTERM, and SIGKILL KILL_GRACE_PERIOD seconds later
+    if it is still there.  Returns the exit code, or None on timeout."""
+    timed_out = []
+    def kill_later(sig, delay):
+        timer = threading.Timer(delay, kill, (sig,))
+        timer.daemon = True
+        timer.start()
+        timers.append(timer)
+    def kill(sig):
+        if p.returncode is not None:
+            return
+        timed_out.append(sig)
+        _kill(p.pid, sig)
+        if sig != SIGKILL:
+            kill_later(SIGKILL, KILL_GRACE_PERIOD)
+    timers = []
+    kill_later(SIGTERM, timeout)
+    try:
+        returncode = p.wait()
+    finally:
+        for timer in timers:
+            timer.cancel()
+    if timed_out:
+        return None
+    return returncode
 
 def run(args, cwd, out, timeout=None):
     f = out.open('w')
@@ -81,13 +98,9 @@ def run(args, cwd, out, timeout=None):
         if timeout is None:
             return p.wait()
         else:
-            returncode = busywait(p, timeout)
+            returncode = wait_with_timeout(p, timeout)
             if returncode is not None:
                 return returncode
-            # timeout!
-            _kill(p.pid, SIGTERM)
-            if busywait(p, 10) is None:
-                _kill(p.pid, SIGKILL)
             return TIMEDOUT
     finally:
         f.close()
@@ -287,6 +300,25 @@ def execute_tests(run_param, testdirs, logfile, out):
     return failure
 
 
+def read_filetimes(fname):
+    """Read the per-file durations, as printed by filetimes.py: lines
+    'path total_seconds number_of_tests'.  Other lines are ignored."""
+    filetimes = {}
+    f = open(fname, READ_MODE)
+    try:
+        for line in f:
+            parts = line.split()
+            if len(parts) != 3 or not parts[0].endswith('.py'):
+                continue
+            try:
+                filetimes[parts[0].replace(os.sep, '/')] = float(parts[1])
+            except ValueError:
+                pass
+    finally:
+        f.close()
+    return filetimes
+
+
 class RunParam(object):
     dry_run = False
     interp = [os.path.abspath(sys.executable)]
@@ -299,10 +331,17 @@ class RunParam(object):
     parallel_runs = 1
     timeout = None
     cherrypick = None
+    # durations of the test files from a previous run, see read_filetimes()
+    filetimes = None
+    # test directories expected to take longer than that many seconds are
+    # split into one run per file; by default, a quarter of the time that
+    # each worker is expected to spend
+    shard_threshold = None
 
     def __init__(self, root):
         self.root = root
         self.self = self
+        self.collected_files = {}
 
     def startup(self):
         pass
@@ -339,15 +378,51 @@ class RunParam(object):
         if p != self.root:
             for p1 in entries:
                 if self.is_test_py_file(p1):
-                    self.collect_one_testdir(testdirs, reldir,
-                                   [self.reltoroot(t) for t in entries
-                                    if self.is_test_py_file(t)])
+                    tests = [self.reltoroot(t) for t in entries
+                             if self.is_test_py_file(t)]
+                    self.collected_files[reldir] = tests
+                    self.collect_one_testdir(testdirs, reldir, tests)
                     break
 
         for p1 in entries:
             if p1.check(dir=1, link=0):
                 self.collect_testdirs(testdirs, p1)
 
+    def schedule_testdirs(self, testdirs):
+        """Return the tests in the order in which the workers should pick
+        them: longest first according to self.filetimes, with the longest
+        directories split into one test per file, so that the run does not
+        end waiting for a single long directory.  Without filetimes, the
+        order is left unchanged."""
+        if not self.filetimes:
+            return testdirs
+        known = self.filetimes.values()
+        default_time = sum(known) / len(known)
+
+        def estimate(test):
+            files = self.collected_files.get(test)
+            if files is None:
+                files = [test]
+            return sum([self.filetimes.get(f, default_time) for f in files])
+
+        estimates = dict([(test, estimate(test)) for test in testdirs])
+        threshold = self.shard_threshold
+        if threshold is None:
+            threshold = sum(estimates.values()) / (4.0 * self.parallel_runs)
+        tests = []
+        for test in testdirs:
+            files = self.collected_files.get(test, [])
+            if (self.parallel_runs > 1 and len(files) > 1 and
+                    estimates[test] > threshold):
+                for f in files:
+                    estimates[f] = estimate(f)
+                    tests.append(f)
+            else:
+                tests.append(test)
+        # sort() is stable: tests with the same estimate keep their order
+        tests.sort(key=lambda test: -estimates[test])
+        return tests
+
     def cleanup(self, testdir):
         pass
 
@@ -372,6 +447,14 @@ def main(args):
     parser.add_option("--timeout", dest="timeout", default=None,
                       type="int",
                       help="timeout in secs for test processes")
+    parser.add_option("--filetimes", dest="filetimes", default=None,
+                      help="durations of the test files from a previous "
+                           "run, as printed by filetimes.py, used to start "
+                           "the longest tests first")
+    parser.add_option("--shard-threshold", dest="shard_threshold",
+                      default=None, type="float",
+                      help="run test directories expected to take longer "
+                           "than that many secs as one test run per file")
 
     opts, args = parser.parse_args(args)
 
@@ -412,8 +495,14 @@ def main(args):
         run_param.parallel_runs = opts.parallel_runs
     if opts.timeout:
         run_param.timeout = opts.timeout
+    if opts.filetimes:
+        run_param.filetimes = read_filetimes(opts.filetimes)
+    if opts.shard_threshold is not None:
+        run_param.shard_threshold = opts.shard_threshold
     run_param.dry_run = opts.dry_run
 
+    testdirs = run_param.schedule_testdirs(testdirs)
+
     if run_param.dry_run:
         print >>out, '\n'.join([str((k, getattr(run_param, k))) \
                         for k in dir(run_param) if k[:2] != '__'])
@@ -1,4 +1,4 @@
-import py, sys, os, signal, cStringIO, tempfile
+import py, sys, os, signal, cStringIO, tempfile, time, subprocess
 
 import runner
 import pypy
@@ -6,41 +6,32 @@ import pypy
 pytest_script = py.path.local(pypy.__file__).dirpath('test_all.py')
 
 
-def test_busywait():
-    class FakeProcess:
-        def poll(self):
-            if timers[0] >= timers[1]:
-                return 42
-            return None
-    class FakeTime:
-        def sleep(self, delay):
-            timers[0] += delay
-        def time(self):
-            timers[2] += 1
-            return 12345678.9 + timers[0]
-    p = FakeProcess()
-    prevtime = runner.time
+def test_wait_with_timeout():
+    p = subprocess.Popen([sys.executable, "-c", "import sys; sys.exit(3)"])
+    assert runner.wait_with_timeout(p, 100) == 3
+    #
+    t0 = time.time()
+    p = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    assert runner.wait_with_timeout(p, 1) is None
+    assert time.time() - t0 < 30
+    assert p.returncode is not None
+
+def test_wait_with_timeout_sigkill():
+    if sys.platform == 'win32':
+        py.test.skip("no SIGTERM on windows")
+    prev = runner.KILL_GRACE_PERIOD
+    runner.KILL_GRACE_PERIOD = 1
     try:
-        runner.time = FakeTime()
-        #
-        timers = [0.0, 0.0, 0]
-        returncode = runner.busywait(p, 10)
-        assert returncode == 42 and 0.0 <= timers[0] <= 1.0
-        #
-        timers = [0.0, 3.0, 0]
-        returncode = runner.busywait(p, 10)
-        assert returncode == 42 and 3.0 <= timers[0] <= 5.0 and timers[2] <= 10
-        #
-        timers = [0.0, 500.0, 0]
-        returncode = runner.busywait(p, 1000)
-        assert returncode == 42 and 500.0<=timers[0]<=510.0 and timers[2]<=100
-        #
-        timers = [0.0, 500.0, 0]
-        returncode = runner.busywait(p, 100)    # get a timeout
-        assert returncode == None and 100.0 <= timers[0] <= 110.0
-        #
+        p = subprocess.Popen([sys.executable, "-c", """if 1:
+            import signal, time
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            time.sleep(60)"""])
+        t0 = time.time()
+        assert runner.wait_with_timeout(p, 1) is None
+        assert time.time() - t0 < 30
+        assert p.returncode == -signal.SIGKILL
     finally:
-        runner.time = prevtime
+        runner.KILL_GRACE_PERIOD = prev
 
 def test_should_report_failure():
     should_report_failure = runner.should_report_failure
@@ -421,3 +412,68 @@ class TestRunnerNoThreads(RunnerTests):
 class TestRunner(RunnerTests):
     pass
 
+
+def test_read_filetimes(tmpdir):
+    fname = tmpdir.join('filetimes.txt')
+    fname.write("""garbage 12.5 3
+a/test/test_one.py 10.0 5
+a/test/test_two.py 2.5 1
+------------------------------
+{'classname': 'x', 'time': '1.0'}
+""")
+    assert runner.read_filetimes(str(fname)) == {
+        'a/test/test_one.py': 10.0, 'a/test/test_two.py': 2.5}
+
+
+class TestSchedule(object):
+
+    def make_run_param(self, parallel_runs=4):
+        run_param = runner.RunParam(py.path.local('.'))
+        run_param.parallel_runs = parallel_runs
+        run_param.collected_files = {
+            'a/test': ['a/test/test_1.py', 'a/test/test_2.py'],
+            'b/test': ['b/test/test_1.py'],
+            'c/test': ['c/test/test_1.py', 'c/test/test_2.py',
+                       'c/test/test_3.py'],
+        }
+        return run_param
+
+    def test_no_filetimes(self):
+        run_param = self.make_run_param()
+        testdirs = ['a/test', 'b/test', 'c/test']
+        assert run_param.schedule_testdirs(testdirs) == testdirs
+
+    def test_longest_first(self):
+        run_param = self.make_run_param()
+        run_param.filetimes = {'a/test/test_1.py': 1.0,
+                               'a/test/test_2.py': 2.0,
+                               'b/test/test_1.py': 5.0,
+                               'c/test/test_1.py': 1.0}
+        # unknown files count for the average, 2.25 secs
+        run_param.shard_threshold = 100
+        res = run_param.schedule_testdirs(['a/test', 'b/test', 'c/test'])
+        assert res == ['c/test', 'b/test', 'a/test']
+
+    def test_shards(self):
+        run_param = self.make_run_param()
+        run_param.filetimes = {'a/test/test_1.py': 1.0,
+                               'a/test/test_2.py': 2.0,
+                               'b/test/test_1.py': 5.0,
+                               'c/test/test_1.py': 1.0,
+                               'c/test/test_2.py': 20.0,
+                               'c/test/test_3.py': 4.0}
+        run_param.shard_threshold = 4.0
+        res = run_param.schedule_testdirs(['a/test', 'b/test', 'c/test'])
+        assert res == ['c/test/test_2.py', 'b/test', 'c/test/test_3.py',
+                       'a/test', 'c/test/test_1.py']
+        # by default, the threshold is a quarter of the time per worker
+        run_param.shard_threshold = None
+        res = run_param.schedule_testdirs(['a/test', 'b/test', 'c/test'])
+        assert res == ['c/test/test_2.py', 'b/test', 'c/test/test_3.py',
+                       'a/test/test_2.py', 'a/test/test_1.py',
+                       'c/test/test_1.py']
+        # no shards when there is only one worker
+        run_param.parallel_runs = 1
+        res = run_param.schedule_testdirs(['a/test', 'b/test', 'c/test'])
+        assert res == ['c/test', 'b/test', 'a/test']
+